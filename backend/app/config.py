@@ -126,6 +126,11 @@ def _parse_csv_tokens(raw_value: str | None, fallback: tuple[str, ...] = ()) ->
     return tuple(normalized) if normalized else fallback
 
 
+def _parse_separated(raw_value: str | None, separator: str) -> tuple[str, ...]:
+    # For values such as cookies that legitimately contain commas and semicolons.
+    return tuple(part.strip() for part in (raw_value or "").split(separator) if part.strip())
+
+
 def _parse_int_tokens(raw_value: str | None, fallback: tuple[int, ...] = ()) -> tuple[int, ...]:
     values: list[int] = []
     seen: set[int] = set()
@@ -289,8 +294,12 @@ class Settings:
     app_name: str = os.getenv("APP_NAME", "Card Flip Assistant API")
     api_host: str = os.getenv("API_HOST", "0.0.0.0")
     api_port: int = _get_int("API_PORT", 8000)
+    lazy_routers: bool = _get_bool("LAZY_ROUTERS", True)
+    eager_routers: str = os.getenv("EAGER_ROUTERS", "")
+    lazy_router_warmup_sec: float = _get_float("LAZY_ROUTER_WARMUP_SEC", 2.0)
     uptime_kuma_enabled: bool = _get_bool("UPTIME_KUMA_ENABLED", False)
     uptime_kuma_url: str = os.getenv("UPTIME_KUMA_URL", "http://127.0.0.1:3001")
+    metrics_enabled: bool = _get_bool("METRICS_ENABLED", False)
     supabase_enabled: bool = _get_bool("SUPABASE_ENABLED", False)
     supabase_url: str = os.getenv("SUPABASE_URL", "")
     supabase_service_role_key: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
@@ -300,6 +309,11 @@ class Settings:
     supabase_sync_interval_sec: int = _get_int("SUPABASE_SYNC_INTERVAL_SEC", 30)
     supabase_sync_batch_size: int = _get_int("SUPABASE_SYNC_BATCH_SIZE", 200)
     auto_start_supabase_sync: bool = _get_bool("AUTO_START_SUPABASE_SYNC", False)
+    analytics_export_enabled: bool = _get_bool("ANALYTICS_EXPORT_ENABLED", False)
+    analytics_export_dir: str = os.getenv("ANALYTICS_EXPORT_DIR", "").strip()
+    analytics_export_interval_sec: int = _get_int("ANALYTICS_EXPORT_INTERVAL_SEC", 900)
+    auto_start_analytics_export: bool = _get_bool("AUTO_START_ANALYTICS_EXPORT", False)
+    analytics_duckdb_enabled: bool = _get_bool("ANALYTICS_DUCKDB_ENABLED", True)
     ui_auth_username: str = os.getenv("UI_AUTH_USERNAME", "operator")
     ui_auth_password: str = os.getenv("UI_AUTH_PASSWORD", "admin123456")
     ui_auth_nickname: str = os.getenv("UI_AUTH_NICKNAME", "本地操作员")
@@ -328,9 +342,17 @@ class Settings:
         fallback=DEFAULT_UI_ROLE_PERMISSIONS_VIEWER,
     )
     sqlite_path: str = os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH)
+    ingest_stream_chunk_size: int = _get_int("INGEST_STREAM_CHUNK_SIZE", 1000)
+    ingest_stream_max_line_bytes: int = _get_int("INGEST_STREAM_MAX_LINE_BYTES", 1_048_576)
 
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    gemini_quota_enabled: bool = _get_bool("GEMINI_QUOTA_ENABLED", True)
+    gemini_quota_path: str = os.getenv("GEMINI_QUOTA_PATH", "")
+    gemini_rpm: int = _get_int("GEMINI_RPM", 15)
+    gemini_tpm: int = _get_int("GEMINI_TPM", 1_000_000)
+    gemini_rpd: int = _get_int("GEMINI_RPD", 1500)
+    gemini_quota_max_wait_sec: float = _get_float("GEMINI_QUOTA_MAX_WAIT_SEC", 20.0)
 
     ragflow_enabled: bool = _get_bool("RAGFLOW_ENABLED", False)
     ragflow_base_url: str = os.getenv("RAGFLOW_BASE_URL", "http://127.0.0.1:9380")
@@ -339,6 +361,12 @@ class Settings:
     ragflow_market_dataset_id: str = os.getenv("RAGFLOW_MARKET_DATASET_ID", "")
     ragflow_market_dataset_name: str = os.getenv("RAGFLOW_MARKET_DATASET_NAME", "cardflip_market_knowledge")
     ragflow_timeout_sec: float = _get_float("RAGFLOW_TIMEOUT_SEC", 45.0)
+    ragflow_pool_size: int = _get_int("RAGFLOW_POOL_SIZE", 10)
+    ragflow_upload_concurrency: int = _get_int("RAGFLOW_UPLOAD_CONCURRENCY", 3)
+    ragflow_upload_batch_files: int = _get_int("RAGFLOW_UPLOAD_BATCH_FILES", 8)
+    ragflow_upload_batch_mb: float = _get_float("RAGFLOW_UPLOAD_BATCH_MB", 32.0)
+    ragflow_parse_batch_size: int = _get_int("RAGFLOW_PARSE_BATCH_SIZE", 50)
+    ragflow_chat_stream: bool = _get_bool("RAGFLOW_CHAT_STREAM", True)
 
     platform_fee_rate: float = _get_float("PLATFORM_FEE_RATE", 0.06)
     default_shipping_cost: float = _get_float("DEFAULT_SHIPPING_COST", 8.0)
@@ -357,6 +385,20 @@ class Settings:
         "RISK_SUSPICIOUS_KEYWORDS",
         "urgent sale,quick sale,private chat,vx,wechat,prepay,outside platform,offline deal",
     )
+    near_duplicate_enabled: bool = _get_bool("NEAR_DUPLICATE_ENABLED", True)
+    near_duplicate_threshold: float = _get_float("NEAR_DUPLICATE_THRESHOLD", 0.8)
+    near_duplicate_ingest_dedupe: bool = _get_bool("NEAR_DUPLICATE_INGEST_DEDUPE", False)
+    card_name_dictionary_path: str = os.getenv("CARD_NAME_DICTIONARY_PATH", "").strip()
+    # "dirty": scan the re-valuation queue; "full": re-walk the newest open listings.
+    opportunity_scan_mode: str = os.getenv("OPPORTUNITY_SCAN_MODE", "dirty").strip().lower() or "dirty"
+    # Failed valuations stay queued and are parked after this many attempts (0 = retry forever).
+    valuation_dirty_max_attempts: int = _get_int("VALUATION_DIRTY_MAX_ATTEMPTS", 5)
+    # Dirty-mode scans take the queue by a cheap expected-edge pre-score instead of marking order.
+    scan_priority_enabled: bool = _get_bool("SCAN_PRIORITY_ENABLED", True)
+    scan_priority_median_days: int = _get_int("SCAN_PRIORITY_MEDIAN_DAYS", 30)
+    scan_priority_age_half_life_hours: float = _get_float("SCAN_PRIORITY_AGE_HALF_LIFE_HOURS", 48.0)
+    scan_priority_aging_per_hour: float = _get_float("SCAN_PRIORITY_AGING_PER_HOUR", 0.01)
+    scan_priority_starvation_hours: float = _get_float("SCAN_PRIORITY_STARVATION_HOURS", 12.0)
 
     strategy_profile: str = _normalize_strategy_profile(os.getenv("STRATEGY_PROFILE", "balanced"))
     strategy_thresholds: StrategyThresholds = get_strategy_thresholds(strategy_profile)
@@ -386,6 +428,8 @@ class Settings:
     pricing_rag_sentiment_enabled: bool = _get_bool("PRICING_RAG_SENTIMENT_ENABLED", False)
     pricing_rag_min_confidence: float = _get_float("PRICING_RAG_MIN_CONFIDENCE", 0.45)
     pricing_rag_max_adjustment: float = _get_float("PRICING_RAG_MAX_ADJUSTMENT", 0.08)
+    pricing_rag_timeout_sec: float = _get_float("PRICING_RAG_TIMEOUT_SEC", 12.0)
+    price_rollups_enabled: bool = _get_bool("PRICE_ROLLUPS_ENABLED", True)
 
     monitor_target_url: str = os.getenv(
         "MONITOR_TARGET_URL",
@@ -485,7 +529,44 @@ class Settings:
         "XIAN_YU_COOKIE_REFRESH_MIN_TTL_SEC",
         1800,
     )
+    xianyu_cookie_pool_enabled: bool = _get_bool("XIAN_YU_COOKIE_POOL_ENABLED", False)
+    # "||"-separated accounts, each "name::cookie"; "name::" is fetched from the provider.
+    xianyu_cookie_pool: tuple[str, ...] = _parse_separated(os.getenv("XIAN_YU_COOKIE_POOL", ""), "||")
+    xianyu_cookie_pool_strategy: str = os.getenv("XIAN_YU_COOKIE_POOL_STRATEGY", "least_loaded")
+    xianyu_cookie_pool_budget_per_min: int = _get_int("XIAN_YU_COOKIE_POOL_BUDGET_PER_MIN", 20)
+    xianyu_cookie_pool_refresh_ahead_sec: int = _get_int("XIAN_YU_COOKIE_POOL_REFRESH_AHEAD_SEC", 300)
+    xianyu_cookie_pool_cooldown_sec: float = _get_float("XIAN_YU_COOKIE_POOL_COOLDOWN_SEC", 120.0)
+    xianyu_cookie_pool_min_health: float = _get_float("XIAN_YU_COOKIE_POOL_MIN_HEALTH", 0.3)
+    xianyu_cookie_pool_check_sec: float = _get_float("XIAN_YU_COOKIE_POOL_CHECK_SEC", 15.0)
     monitor_pages: int = _get_int("MONITOR_PAGES", 1)
+    monitor_adaptive_enabled: bool = _get_bool("MONITOR_ADAPTIVE_ENABLED", False)
+    monitor_request_budget: int = _get_int("MONITOR_REQUEST_BUDGET", 0)
+    monitor_max_requests_per_min: int = _get_int("MONITOR_MAX_REQUESTS_PER_MIN", 12)
+    monitor_adaptive_max_pages: int = _get_int("MONITOR_ADAPTIVE_MAX_PAGES", 3)
+    monitor_adaptive_min_interval_sec: float = _get_float(
+        "MONITOR_ADAPTIVE_MIN_INTERVAL_SEC", 20.0
+    )
+    monitor_adaptive_max_interval_sec: float = _get_float(
+        "MONITOR_ADAPTIVE_MAX_INTERVAL_SEC", 1800.0
+    )
+    monitor_adaptive_exploration: float = _get_float("MONITOR_ADAPTIVE_EXPLORATION", 0.5)
+    monitor_adaptive_ewma_alpha: float = _get_float("MONITOR_ADAPTIVE_EWMA_ALPHA", 0.3)
+    monitor_adaptive_fresh_yield: float = _get_float("MONITOR_ADAPTIVE_FRESH_YIELD", 1.0)
+    monitor_incremental_enabled: bool = _get_bool("MONITOR_INCREMENTAL_ENABLED", True)
+    monitor_incremental_stop_seen_ratio: float = _get_float(
+        "MONITOR_INCREMENTAL_STOP_SEEN_RATIO", 0.8
+    )
+    monitor_incremental_seen_ttl_hours: float = _get_float(
+        "MONITOR_INCREMENTAL_SEEN_TTL_HOURS", 72.0
+    )
+    monitor_shard_count: int = _get_int("MONITOR_SHARD_COUNT", 0)
+    monitor_shard_cookies: tuple[str, ...] = _parse_separated(
+        os.getenv("MONITOR_SHARD_COOKIES", ""), "||"
+    )
+    monitor_shard_proxies: tuple[str, ...] = _parse_csv_tokens(os.getenv("MONITOR_SHARD_PROXIES", ""))
+    monitor_shard_start_method: str = os.getenv("MONITOR_SHARD_START_METHOD", "spawn")
+    monitor_shard_drain_batch_size: int = _get_int("MONITOR_SHARD_DRAIN_BATCH_SIZE", 500)
+    monitor_shard_drain_max_attempts: int = _get_int("MONITOR_SHARD_DRAIN_MAX_ATTEMPTS", 3)
     monitor_use_proxy_pool: bool = _get_bool("MONITOR_USE_PROXY_POOL", False)
     proxy_pool_api: str = os.getenv("PROXY_POOL_API", "http://127.0.0.1:8899/")
     proxy_pool_params: str = os.getenv("PROXY_POOL_PARAMS", "types=0&count=3")
@@ -623,6 +704,16 @@ class Settings:
     smtp_user: str = os.getenv("SMTP_USER", "")
     smtp_password: str = os.getenv("SMTP_PASSWORD", "")
     smtp_use_tls: bool = _get_bool("SMTP_USE_TLS", True)
+    alert_webhook_url: str = os.getenv("ALERT_WEBHOOK_URL", "")
+    alert_file_path: str = os.getenv("ALERT_FILE_PATH", "")
+    alert_dedupe_window_sec: float = _get_float("ALERT_DEDUPE_WINDOW_SEC", 300.0)
+    alert_rate_limit_per_min: int = _get_int("ALERT_RATE_LIMIT_PER_MIN", 6)
+    alert_queue_max: int = _get_int("ALERT_QUEUE_MAX", 100)
+    alert_smtp_idle_sec: float = _get_float("ALERT_SMTP_IDLE_SEC", 60.0)
+    audit_write_behind_enabled: bool = _get_bool("AUDIT_WRITE_BEHIND_ENABLED", True)
+    audit_flush_batch_size: int = _get_int("AUDIT_FLUSH_BATCH_SIZE", 200)
+    audit_flush_interval_ms: int = _get_int("AUDIT_FLUSH_INTERVAL_MS", 250)
+    audit_buffer_max: int = _get_int("AUDIT_BUFFER_MAX", 5000)
 
     def ensure_paths(self) -> None:
         db_file = Path(self.sqlite_path).expanduser()
@@ -110,6 +110,204 @@ def _ensure_trade_uniqueness(conn: sqlite3.Connection) -> dict[str, object]:
     return snapshot
 
 
+DASHBOARD_COUNTER_FIELDS: tuple[str, ...] = (
+    "pending_review_count",
+    "active_trades_count",
+    "sold_count",
+    "gross_profit",
+    "open_listing_count",
+    "open_listing_price_sum",
+)
+
+
+def compute_dashboard_counters(conn: sqlite3.Connection) -> dict[str, float]:
+    """Full-scan aggregates the trigger-maintained ``dashboard_counters`` row must equal."""
+    row = conn.execute(
+        """
+        SELECT
+            (SELECT COUNT(*) FROM opportunities WHERE status = 'pending_review')
+                AS pending_review_count,
+            (SELECT COUNT(*) FROM trades WHERE status IN ('approved_for_buy', 'listed_for_sale'))
+                AS active_trades_count,
+            (SELECT COUNT(*) FROM trades WHERE status = 'sold') AS sold_count,
+            (SELECT COALESCE(SUM(sold_price - approved_buy_price), 0) FROM trades WHERE status = 'sold')
+                AS gross_profit,
+            (SELECT COUNT(*) FROM listings_raw WHERE status = 'open') AS open_listing_count,
+            (SELECT COALESCE(SUM(list_price), 0) FROM listings_raw WHERE status = 'open')
+                AS open_listing_price_sum
+        """
+    ).fetchone()
+    return {name: row[name] for name in DASHBOARD_COUNTER_FIELDS}
+
+
+def rebuild_dashboard_counters(conn: sqlite3.Connection) -> dict[str, float]:
+    actual = compute_dashboard_counters(conn)
+    conn.execute(
+        f"""
+        INSERT INTO dashboard_counters(id, {", ".join(DASHBOARD_COUNTER_FIELDS)})
+        VALUES (1, {", ".join("?" for _ in DASHBOARD_COUNTER_FIELDS)})
+        ON CONFLICT(id) DO UPDATE SET
+            {", ".join(f"{name} = excluded.{name}" for name in DASHBOARD_COUNTER_FIELDS)}
+        """,
+        tuple(actual[name] for name in DASHBOARD_COUNTER_FIELDS),
+    )
+    return actual
+
+
+STATUS_COUNTED_TABLES = ("opportunities", "trades")
+
+
+def compute_status_counters(conn: sqlite3.Connection) -> dict[tuple[str, str], int]:
+    """Full-scan per-status row counts the trigger-maintained ``status_counters`` must equal."""
+    counts: dict[tuple[str, str], int] = {}
+    for table in STATUS_COUNTED_TABLES:
+        for row in conn.execute(f"SELECT status, COUNT(*) AS c FROM {table} GROUP BY status"):
+            counts[(table, str(row["status"]))] = int(row["c"])
+    return counts
+
+
+def rebuild_status_counters(conn: sqlite3.Connection) -> dict[tuple[str, str], int]:
+    actual = compute_status_counters(conn)
+    conn.execute("DELETE FROM status_counters")
+    conn.executemany(
+        "INSERT INTO status_counters(table_name, status, row_count) VALUES (?, ?, ?)",
+        [(table, status, count) for (table, status), count in actual.items()],
+    )
+    return actual
+
+
+def _status_counter_triggers(table: str) -> str:
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS trg_status_count_{table}_insert AFTER INSERT ON {table}
+    BEGIN
+        INSERT INTO status_counters(table_name, status, row_count) VALUES ('{table}', NEW.status, 1)
+        ON CONFLICT(table_name, status) DO UPDATE SET row_count = row_count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_status_count_{table}_update AFTER UPDATE OF status ON {table}
+    WHEN OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE status_counters SET row_count = row_count - 1
+        WHERE table_name = '{table}' AND status = OLD.status;
+        INSERT INTO status_counters(table_name, status, row_count) VALUES ('{table}', NEW.status, 1)
+        ON CONFLICT(table_name, status) DO UPDATE SET row_count = row_count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_status_count_{table}_delete AFTER DELETE ON {table}
+    BEGIN
+        UPDATE status_counters SET row_count = row_count - 1
+        WHERE table_name = '{table}' AND status = OLD.status;
+    END;
+    """
+
+
+def compute_support_ticket_counters(conn: sqlite3.Connection) -> dict[tuple[int, str], int]:
+    """Full-scan per-owner, per-status ticket counts ``support_ticket_counters`` must equal."""
+    return {
+        (int(row["user_id"]), str(row["status"])): int(row["c"])
+        for row in conn.execute("SELECT user_id, status, COUNT(*) AS c FROM support_tickets GROUP BY user_id, status")
+    }
+
+
+def rebuild_support_ticket_counters(conn: sqlite3.Connection) -> dict[tuple[int, str], int]:
+    actual = compute_support_ticket_counters(conn)
+    conn.execute("DELETE FROM support_ticket_counters")
+    conn.executemany(
+        "INSERT INTO support_ticket_counters(user_id, status, row_count) VALUES (?, ?, ?)",
+        [(user_id, status, count) for (user_id, status), count in actual.items()],
+    )
+    return actual
+
+
+def _ensure_status_counters(conn: sqlite3.Connection) -> None:
+    # Same as the dashboard row: triggers only apply deltas, so seed once from a full count.
+    if conn.execute("SELECT 1 FROM status_counters LIMIT 1").fetchone() is None:
+        rebuild_status_counters(conn)
+    if conn.execute("SELECT 1 FROM support_ticket_counters LIMIT 1").fetchone() is None:
+        rebuild_support_ticket_counters(conn)
+
+
+def _ensure_dashboard_counters(conn: sqlite3.Connection) -> None:
+    # The triggers only apply deltas, so a database that predates them needs one full rebuild.
+    if conn.execute("SELECT 1 FROM dashboard_counters WHERE id = 1").fetchone() is None:
+        rebuild_dashboard_counters(conn)
+
+
+def _ensure_execution_log_business_ban(conn: sqlite3.Connection) -> None:
+    columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info('execution_logs')")}
+    if "business_ban" in columns:
+        return
+    conn.execute(
+        "ALTER TABLE execution_logs ADD COLUMN business_ban INTEGER NOT NULL DEFAULT 0"
+    )
+    # One-off backfill with the same rule create_execution_log applies at write time.
+    conn.execute(
+        """
+        UPDATE execution_logs
+        SET business_ban = 1
+        WHERE LOWER(error) LIKE '%business ban%'
+           OR (
+               json_valid(response_json)
+               AND (
+                   TRIM(COALESCE(json_extract(response_json, '$.business_ban_code'), '')) != ''
+                   OR LOWER(COALESCE(json_extract(response_json, '$.error'), '')) LIKE '%business ban%'
+               )
+           )
+        """
+    )
+
+
+def _ensure_monitor_staging_attempts(conn: sqlite3.Connection) -> None:
+    columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info('monitor_staging_items')")}
+    if "attempts" not in columns:
+        conn.execute("ALTER TABLE monitor_staging_items ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    if "last_error" not in columns:
+        conn.execute("ALTER TABLE monitor_staging_items ADD COLUMN last_error TEXT NOT NULL DEFAULT ''")
+
+
+def _ensure_price_rollups(conn: sqlite3.Connection) -> None:
+    if not settings.price_rollups_enabled:
+        return
+    if conn.execute("SELECT 1 FROM price_rollups LIMIT 1").fetchone() is not None:
+        return
+    has_rows = conn.execute(
+        "SELECT EXISTS(SELECT 1 FROM sales_raw) OR EXISTS(SELECT 1 FROM listings_raw)"
+    ).fetchone()[0]
+    if has_rows:
+        # Backfill once for databases created before rollups existed.
+        from .services.price_rollups import rebuild_price_rollups
+
+        rebuild_price_rollups(conn)
+
+
+def _ensure_valuation_dirty_queue(conn: sqlite3.Connection) -> None:
+    if conn.execute(
+        "SELECT EXISTS(SELECT 1 FROM valuation_dependencies) OR EXISTS(SELECT 1 FROM valuation_dirty_queue)"
+    ).fetchone()[0]:
+        return
+    # Seed once for databases created before dirty tracking existed.
+    from .services.valuation_dirty import enqueue_untracked_open_listings
+
+    enqueue_untracked_open_listings(conn)
+
+
+def _ensure_valuation_dirty_priority(conn: sqlite3.Connection) -> None:
+    columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info('valuation_dirty_queue')")}
+    if "priority" not in columns:
+        # NULL means "not scored yet"; the scan scorer fills it in before ranking.
+        conn.execute("ALTER TABLE valuation_dirty_queue ADD COLUMN priority REAL")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_valuation_dirty_queue_unscored "
+        "ON valuation_dirty_queue(listing_row_id) WHERE priority IS NULL"
+    )
+
+
+def _ensure_valuation_dirty_attempts(conn: sqlite3.Connection) -> None:
+    columns = {str(row["name"]) for row in conn.execute("PRAGMA table_info('valuation_dirty_queue')")}
+    if "attempts" not in columns:
+        conn.execute("ALTER TABLE valuation_dirty_queue ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    if "last_error" not in columns:
+        conn.execute("ALTER TABLE valuation_dirty_queue ADD COLUMN last_error TEXT NOT NULL DEFAULT ''")
+
+
 def _ensure_seed_admin(conn: sqlite3.Connection) -> None:
     username = settings.ui_auth_username.strip() or "operator"
     nickname = settings.ui_auth_nickname.strip() or username
@@ -259,6 +457,7 @@ def init_db() -> None:
         response_json TEXT NOT NULL DEFAULT '{}',
         success INTEGER NOT NULL DEFAULT 0,
         error TEXT NOT NULL DEFAULT '',
+        business_ban INTEGER NOT NULL DEFAULT 0,
         created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY(trade_id) REFERENCES trades(id)
     );
@@ -327,9 +526,32 @@ def init_db() -> None:
         FOREIGN KEY(author_user_id) REFERENCES users(id) ON DELETE CASCADE
     );
 
+    CREATE TABLE IF NOT EXISTS crawl_seen_items (
+        keyword TEXT NOT NULL,
+        item_key TEXT NOT NULL,
+        first_seen_at TEXT NOT NULL,
+        last_seen_at TEXT NOT NULL,
+        PRIMARY KEY(keyword, item_key)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS monitor_staging_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        shard_id INTEGER NOT NULL,
+        keyword TEXT NOT NULL DEFAULT '',
+        item_json TEXT NOT NULL,
+        staged_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT NOT NULL DEFAULT ''
+    );
+
     CREATE INDEX IF NOT EXISTS idx_sales_title ON sales_raw(title);
+    CREATE INDEX IF NOT EXISTS idx_sales_sold_at ON sales_raw(sold_at DESC);
     CREATE INDEX IF NOT EXISTS idx_listings_status ON listings_raw(status);
     CREATE INDEX IF NOT EXISTS idx_opp_status ON opportunities(status);
+    CREATE INDEX IF NOT EXISTS idx_opp_score_id ON opportunities(score DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_opp_status_score_id ON opportunities(status, score DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_trades_updated_id ON trades(updated_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_trades_status_updated_id ON trades(status, updated_at DESC, id DESC);
     CREATE INDEX IF NOT EXISTS idx_execution_logs_trade_id ON execution_logs(trade_id);
     CREATE INDEX IF NOT EXISTS idx_execution_logs_action_created ON execution_logs(action, created_at DESC);
     CREATE INDEX IF NOT EXISTS idx_opp_reject_logs_opp_id ON opportunity_reject_logs(opportunity_id);
@@ -338,9 +560,209 @@ def init_db() -> None:
     CREATE INDEX IF NOT EXISTS idx_auth_sessions_expires ON auth_sessions(expires_at);
     CREATE INDEX IF NOT EXISTS idx_support_tickets_user_id ON support_tickets(user_id);
     CREATE INDEX IF NOT EXISTS idx_support_tickets_status_updated ON support_tickets(status, updated_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_support_tickets_updated_id ON support_tickets(updated_at DESC, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_support_tickets_user_updated_id ON support_tickets(user_id, updated_at DESC, id DESC);
     CREATE INDEX IF NOT EXISTS idx_support_ticket_messages_ticket_id ON support_ticket_messages(ticket_id, created_at ASC);
-    """
+    CREATE INDEX IF NOT EXISTS idx_crawl_seen_items_last_seen ON crawl_seen_items(last_seen_at);
+
+    CREATE TABLE IF NOT EXISTS listing_minhash (
+        listing_row_id INTEGER PRIMARY KEY,
+        signature BLOB NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS listing_lsh_bands (
+        band INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,
+        listing_row_id INTEGER NOT NULL,
+        PRIMARY KEY (band, bucket, listing_row_id)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS valuation_dependencies (
+        listing_row_id INTEGER PRIMARY KEY,
+        card_name TEXT NOT NULL,
+        rarity TEXT NOT NULL,
+        edition TEXT NOT NULL,
+        valuation_id INTEGER,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_valuation_dependencies_card ON valuation_dependencies(card_name);
+    CREATE TABLE IF NOT EXISTS valuation_dirty_queue (
+        listing_row_id INTEGER PRIMARY KEY,
+        reason TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1,
+        marked_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        priority REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT NOT NULL DEFAULT ''
+    );
+    CREATE INDEX IF NOT EXISTS idx_valuation_dirty_queue_marked ON valuation_dirty_queue(marked_at, listing_row_id);
+
+    CREATE TABLE IF NOT EXISTS price_rollups (
+        granularity TEXT NOT NULL CHECK (granularity IN ('hour', 'day')),
+        card_key TEXT NOT NULL,
+        bucket_start TEXT NOT NULL,
+        open_price REAL,
+        high_price REAL,
+        low_price REAL,
+        close_price REAL,
+        open_ts REAL,
+        close_ts REAL,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        price_sum REAL NOT NULL DEFAULT 0,
+        price_sq_sum REAL NOT NULL DEFAULT 0,
+        median_price REAL,
+        median_sample TEXT NOT NULL DEFAULT '[]',
+        listing_count INTEGER NOT NULL DEFAULT 0,
+        updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (granularity, card_key, bucket_start)
+    );
+    CREATE INDEX IF NOT EXISTS idx_price_rollups_day ON price_rollups(granularity, bucket_start);
+
+    CREATE TABLE IF NOT EXISTS backtest_sweep_results (
+        param_hash TEXT PRIMARY KEY,
+        dataset_hash TEXT NOT NULL,
+        params_json TEXT NOT NULL,
+        result_json TEXT NOT NULL,
+        created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_backtest_sweep_dataset ON backtest_sweep_results(dataset_hash);
+
+    CREATE TABLE IF NOT EXISTS dashboard_counters (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        pending_review_count INTEGER NOT NULL DEFAULT 0,
+        active_trades_count INTEGER NOT NULL DEFAULT 0,
+        sold_count INTEGER NOT NULL DEFAULT 0,
+        gross_profit REAL NOT NULL DEFAULT 0,
+        open_listing_count INTEGER NOT NULL DEFAULT 0,
+        open_listing_price_sum REAL NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS trg_dash_opp_insert AFTER INSERT ON opportunities
+    BEGIN
+        UPDATE dashboard_counters
+        SET pending_review_count = pending_review_count + (NEW.status = 'pending_review')
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_opp_update AFTER UPDATE OF status ON opportunities
+    BEGIN
+        UPDATE dashboard_counters
+        SET pending_review_count = pending_review_count
+            + (NEW.status = 'pending_review') - (OLD.status = 'pending_review')
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_opp_delete AFTER DELETE ON opportunities
+    BEGIN
+        UPDATE dashboard_counters
+        SET pending_review_count = pending_review_count - (OLD.status = 'pending_review')
+        WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_dash_trade_insert AFTER INSERT ON trades
+    BEGIN
+        UPDATE dashboard_counters
+        SET active_trades_count = active_trades_count
+                + (NEW.status IN ('approved_for_buy', 'listed_for_sale')),
+            sold_count = sold_count + (NEW.status = 'sold'),
+            gross_profit = gross_profit + CASE WHEN NEW.status = 'sold'
+                THEN COALESCE(NEW.sold_price - NEW.approved_buy_price, 0) ELSE 0 END
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_trade_update
+    AFTER UPDATE OF status, sold_price, approved_buy_price ON trades
+    BEGIN
+        UPDATE dashboard_counters
+        SET active_trades_count = active_trades_count
+                + (NEW.status IN ('approved_for_buy', 'listed_for_sale'))
+                - (OLD.status IN ('approved_for_buy', 'listed_for_sale')),
+            sold_count = sold_count + (NEW.status = 'sold') - (OLD.status = 'sold'),
+            gross_profit = gross_profit
+                + CASE WHEN NEW.status = 'sold'
+                    THEN COALESCE(NEW.sold_price - NEW.approved_buy_price, 0) ELSE 0 END
+                - CASE WHEN OLD.status = 'sold'
+                    THEN COALESCE(OLD.sold_price - OLD.approved_buy_price, 0) ELSE 0 END
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_trade_delete AFTER DELETE ON trades
+    BEGIN
+        UPDATE dashboard_counters
+        SET active_trades_count = active_trades_count
+                - (OLD.status IN ('approved_for_buy', 'listed_for_sale')),
+            sold_count = sold_count - (OLD.status = 'sold'),
+            gross_profit = gross_profit - CASE WHEN OLD.status = 'sold'
+                THEN COALESCE(OLD.sold_price - OLD.approved_buy_price, 0) ELSE 0 END
+        WHERE id = 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_dash_listing_insert AFTER INSERT ON listings_raw
+    WHEN NEW.status = 'open'
+    BEGIN
+        UPDATE dashboard_counters
+        SET open_listing_count = open_listing_count + 1,
+            open_listing_price_sum = open_listing_price_sum + NEW.list_price
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_listing_update AFTER UPDATE OF status, list_price ON listings_raw
+    WHEN OLD.status = 'open' OR NEW.status = 'open'
+    BEGIN
+        UPDATE dashboard_counters
+        SET open_listing_count = open_listing_count
+                + (NEW.status = 'open') - (OLD.status = 'open'),
+            open_listing_price_sum = open_listing_price_sum
+                + CASE WHEN NEW.status = 'open' THEN NEW.list_price ELSE 0 END
+                - CASE WHEN OLD.status = 'open' THEN OLD.list_price ELSE 0 END
+        WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_dash_listing_delete AFTER DELETE ON listings_raw
+    WHEN OLD.status = 'open'
+    BEGIN
+        UPDATE dashboard_counters
+        SET open_listing_count = open_listing_count - 1,
+            open_listing_price_sum = open_listing_price_sum - OLD.list_price
+        WHERE id = 1;
+    END;
+
+    CREATE TABLE IF NOT EXISTS status_counters (
+        table_name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (table_name, status)
+    );
+
+    -- Ticket list stats: per owner so a user's own totals need no scan either.
+    CREATE TABLE IF NOT EXISTS support_ticket_counters (
+        user_id INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        row_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, status)
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_support_ticket_count_insert AFTER INSERT ON support_tickets
+    BEGIN
+        INSERT INTO support_ticket_counters(user_id, status, row_count) VALUES (NEW.user_id, NEW.status, 1)
+        ON CONFLICT(user_id, status) DO UPDATE SET row_count = row_count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_support_ticket_count_update AFTER UPDATE OF status, user_id ON support_tickets
+    WHEN OLD.status IS NOT NEW.status OR OLD.user_id IS NOT NEW.user_id
+    BEGIN
+        UPDATE support_ticket_counters SET row_count = row_count - 1
+        WHERE user_id = OLD.user_id AND status = OLD.status;
+        INSERT INTO support_ticket_counters(user_id, status, row_count) VALUES (NEW.user_id, NEW.status, 1)
+        ON CONFLICT(user_id, status) DO UPDATE SET row_count = row_count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_support_ticket_count_delete AFTER DELETE ON support_tickets
+    BEGIN
+        UPDATE support_ticket_counters SET row_count = row_count - 1
+        WHERE user_id = OLD.user_id AND status = OLD.status;
+    END;
+    """ + "".join(_status_counter_triggers(table) for table in STATUS_COUNTED_TABLES)
     with get_conn() as conn:
         conn.executescript(ddl)
         _ensure_seed_admin(conn)
         _ensure_trade_uniqueness(conn)
+        _ensure_dashboard_counters(conn)
+        _ensure_status_counters(conn)
+        _ensure_execution_log_business_ban(conn)
+        _ensure_monitor_staging_attempts(conn)
+        _ensure_price_rollups(conn)
+        _ensure_valuation_dirty_queue(conn)
+        _ensure_valuation_dirty_priority(conn)
+        _ensure_valuation_dirty_attempts(conn)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import multiprocessing
 import os
 import runpy
 import sys
@@ -10,20 +11,20 @@ from pathlib import Path
 
 import uvicorn
 
-# Keep dynamic helper-script dependencies visible to PyInstaller analysis.
-try:  # pragma: no cover
-    import browser_cookie3  # type: ignore  # noqa: F401
-except Exception:  # pragma: no cover
-    browser_cookie3 = None  # type: ignore[assignment]
-try:  # pragma: no cover
-    import websocket  # type: ignore  # noqa: F401
-except Exception:  # pragma: no cover
-    websocket = None  # type: ignore[assignment]
-
 from app.config import settings
 from app.main import app
 
 
+def _pyinstaller_hints() -> None:  # pragma: no cover
+    """Never called; keeps helper-script dependencies visible to PyInstaller.
+
+    Importing them at module level put them on the startup path before
+    uvicorn binds; the scripts that need them import them themselves.
+    """
+    import browser_cookie3  # type: ignore  # noqa: F401
+    import websocket  # type: ignore  # noqa: F401
+
+
 def _open_browser_later(port: int) -> None:
     if os.getenv("NO_AUTO_OPEN_BROWSER", "").strip().lower() in {"1", "true", "yes"}:
         return
@@ -74,4 +75,6 @@ def run() -> None:
 
 
 if __name__ == "__main__":
+    # Required for sharded monitor worker processes in the frozen build.
+    multiprocessing.freeze_support()
     run()
@@ -20,3 +20,12 @@ class BusyStateError(RuntimeError):
             "reason": self.reason,
             "message": self.message or f"{self.service} is busy",
         }
+
+
+class BusinessBanError(RuntimeError):
+    """Raised when upstream service returns business-level ban/limit response."""
+
+    def __init__(self, *, code: str, message: str, context: str = "") -> None:
+        super().__init__(message)
+        self.code = code
+        self.context = context
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import importlib
+import threading
+from typing import Any
+
+from fastapi import APIRouter, FastAPI
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Router module (under app.routers) -> top-level path segments it serves.
+# The segments are declared here rather than read from the router so that
+# matching a request never has to import every router first.
+ROUTER_MODULES: dict[str, tuple[str, ...]] = {
+    "auth": ("/auth", "/user"),
+    "health": ("/health",),
+    "ingest": ("/ingest",),
+    "valuation": ("/valuation",),
+    "listings": ("/listings",),
+    "opportunities": ("/opportunities",),
+    "trades": ("/trades",),
+    "execution": ("/execution",),
+    "execution_retry": ("/execution-retry",),
+    "autotrade": ("/autotrade",),
+    "automation": ("/automation",),
+    "monitor": ("/monitor",),
+    "supabase": ("/supabase",),
+    "vnpy": ("/vnpy",),
+    "ragflow": ("/ragflow",),
+    "support": ("/support",),
+    "analysis": ("/analysis",),
+    "metrics": ("/metrics",),
+}
+
+
+class LazyRouterLoader:
+    """Mount API routers into ``app`` on the first request that needs them.
+
+    Each router is included under every mount prefix at once. Routes are
+    swapped in as a new list (never mutated in place) with the SPA fallback
+    routes kept last, so a request being matched concurrently sees either
+    the old or the new table.
+    """
+
+    def __init__(self, app: FastAPI, *, prefixes: tuple[str, ...] = ("",)) -> None:
+        self._app = app
+        self._prefixes = prefixes
+        self._lock = threading.Lock()
+        self._loaded: set[str] = set()
+        self._tail: list[Any] = []
+        self._segments: dict[str, str] = {
+            segment: name for name, segments in ROUTER_MODULES.items() for segment in segments
+        }
+        self._mount_all_paths = {path for path in (app.openapi_url, app.docs_url, app.redoc_url) if path}
+
+    @property
+    def loaded(self) -> list[str]:
+        with self._lock:
+            return sorted(self._loaded)
+
+    def set_tail(self, routes: list[Any]) -> None:
+        """Routes (e.g. the SPA catch-all) that must stay after every API route."""
+        with self._lock:
+            self._tail = list(routes)
+
+    def router_for_path(self, path: str) -> str | None:
+        for prefix in self._prefixes:
+            if not prefix:
+                continue
+            if path == prefix or path.startswith(prefix + "/"):
+                path = path[len(prefix) :] or "/"
+                break
+        segment = "/" + path.lstrip("/").split("/", 1)[0]
+        return self._segments.get(segment)
+
+    def mount(self, *names: str) -> list[str]:
+        """Import and include the named routers; returns the ones newly mounted."""
+        pending = [name for name in names if name not in self._loaded]
+        if not pending:
+            return []
+        with self._lock:
+            pending = [name for name in pending if name not in self._loaded]
+            if not pending:
+                return []
+            staged = APIRouter()
+            for name in pending:
+                if name not in ROUTER_MODULES:
+                    raise KeyError(f"unknown router: {name}")
+                router = importlib.import_module(f"{__package__}.routers.{name}").router
+                for prefix in self._prefixes:
+                    staged.include_router(router, prefix=prefix)
+            tail_ids = {id(route) for route in self._tail}
+            current = [route for route in self._app.router.routes if id(route) not in tail_ids]
+            self._app.router.routes = [*current, *staged.routes, *self._tail]
+            self._app.openapi_schema = None
+            self._loaded.update(pending)
+        return pending
+
+    def mount_all(self) -> list[str]:
+        return self.mount(*ROUTER_MODULES)
+
+    def mount_for_path(self, path: str) -> None:
+        if path in self._mount_all_paths:
+            self.mount_all()
+            return
+        name = self.router_for_path(path)
+        if name is not None and name not in self._loaded:
+            self.mount(name)
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware that mounts the router owning a path before routing it."""
+
+    def __init__(self, app: ASGIApp, loader: LazyRouterLoader) -> None:
+        self.app = app
+        self.loader = loader
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            self.loader.mount_for_path(scope["path"])
+        await self.app(scope, receive, send)
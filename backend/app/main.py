@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import importlib
 import os
 import sys
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -13,30 +15,33 @@ from fastapi.staticfiles import StaticFiles
 
 from .config import settings
 from .database import init_db
+from .errors import BusinessBanError
 from .errors import BusyStateError
-from .services.autotrade import auto_trade_service
-from .services.execution_retry import execution_retry_service
-from .services.market_monitor import monitor_service
-from .services.proxy_resolver import BusinessBanError
-from .services.proxy_resolver import rotate_proxy
-from .services.supabase_sync import supabase_sync_service
-from .routers.auth import router as auth_router
-from .routers.health import router as health_router
-from .routers.ingest import router as ingest_router
-from .routers.monitor import router as monitor_router
-from .routers.opportunities import router as opportunities_router
-from .routers.listings import router as listings_router
-from .routers.execution import router as execution_router
-from .routers.execution_retry import router as execution_retry_router
-from .routers.trades import router as trades_router
-from .routers.autotrade import router as autotrade_router
-from .routers.automation import router as automation_router
-from .routers.valuation import router as valuation_router
-from .routers.vnpy import router as vnpy_router
-from .routers.ragflow import router as ragflow_router
-from .routers.supabase import router as supabase_router
-from .routers.support import router as support_router
-from .routers.analysis import router as analysis_router
+from .lazy_routers import LazyRouterLoader
+from .lazy_routers import LazyRouterMiddleware
+from .lazy_routers import ROUTER_MODULES
+
+# (name, auto-start flag, module, singleton) in start order; shutdown runs in
+# reverse. Services are imported only when auto-started or already loaded by a
+# router, so a cold desktop start does not pay for the whole service graph.
+_MANAGED_SERVICES: tuple[tuple[str, str, str, str], ...] = (
+    ("cookie_pool", "xianyu_cookie_pool_enabled", "cookie_pool", "cookie_pool"),
+    ("monitor", "auto_start_monitor", "market_monitor", "monitor_service"),
+    ("autotrade", "auto_start_autotrade", "autotrade", "auto_trade_service"),
+    ("execution_retry", "auto_start_execution_retry", "execution_retry", "execution_retry_service"),
+    ("supabase_sync", "auto_start_supabase_sync", "supabase_sync", "supabase_sync_service"),
+    ("analytics_export", "auto_start_analytics_export", "analytics_export", "analytics_export_service"),
+)
+
+
+def _service(module: str, attr: str, *, load: bool):
+    qualified = f"{__package__}.services.{module}"
+    loaded = sys.modules.get(qualified)
+    if loaded is None:
+        if not load:
+            return None
+        loaded = importlib.import_module(qualified)
+    return getattr(loaded, attr)
 
 
 @asynccontextmanager
@@ -50,46 +55,49 @@ async def lifespan(app: FastAPI):
 
     init_db()
     startup_services: dict[str, dict] = {}
-    if settings.auto_start_monitor:
-        startup_services["monitor"] = _safe_call(monitor_service.start)
-    if settings.auto_start_autotrade:
-        startup_services["autotrade"] = _safe_call(auto_trade_service.start)
-    if settings.auto_start_execution_retry:
-        startup_services["execution_retry"] = _safe_call(execution_retry_service.start)
-    if settings.auto_start_supabase_sync:
-        startup_services["supabase_sync"] = _safe_call(supabase_sync_service.start)
+    for name, flag, module, attr in _MANAGED_SERVICES:
+        if getattr(settings, flag):
+            startup_services[name] = _safe_call(_service(module, attr, load=True).start)
     app.state.startup_services = startup_services
 
+    warmup: threading.Timer | None = None
+    loader: LazyRouterLoader | None = getattr(app.state, "router_loader", None)
+    if loader is not None and settings.lazy_router_warmup_sec > 0:
+        # Mount the remaining routers once the SPA shell has had time to load.
+        warmup = threading.Timer(settings.lazy_router_warmup_sec, loader.mount_all)
+        warmup.daemon = True
+        warmup.start()
+
     try:
         yield
     finally:
-        shutdown_services = {
-            "supabase_sync": _safe_call(supabase_sync_service.stop),
-            "execution_retry": _safe_call(execution_retry_service.stop),
-            "autotrade": _safe_call(auto_trade_service.stop),
-            "monitor": _safe_call(monitor_service.stop),
-        }
+        if warmup is not None:
+            warmup.cancel()
+        shutdown_services: dict[str, dict] = {}
+        for name, _, module, attr in reversed(_MANAGED_SERVICES):
+            service = _service(module, attr, load=False)
+            shutdown_services[name] = (
+                _safe_call(service.stop) if service is not None else {"stopped": False, "reason": "not loaded"}
+            )
+        audit = _service("audit_writer", "audit_writer", load=False)
+        if audit is not None:
+            # Write buffered execution/reject logs before exit.
+            shutdown_services["audit"] = _safe_call(audit.stop)
+        dispatcher = _service("notifier", "alert_dispatcher", load=False)
+        if dispatcher is not None:
+            # Give queued alerts (e.g. a circuit-open notice) a chance to go out.
+            shutdown_services["alerts"] = _safe_call(dispatcher.stop)
+        ragflow = _service("ragflow_client", "async_ragflow_client", load=False)
+        if ragflow is not None:
+            # Release pooled keep-alive connections while the loop is still running.
+            await ragflow.aclose()
         app.state.shutdown_services = shutdown_services
 
 
 def _include_core_routers(app: FastAPI, prefix: str = "") -> None:
-    app.include_router(auth_router, prefix=prefix)
-    app.include_router(health_router, prefix=prefix)
-    app.include_router(ingest_router, prefix=prefix)
-    app.include_router(valuation_router, prefix=prefix)
-    app.include_router(listings_router, prefix=prefix)
-    app.include_router(opportunities_router, prefix=prefix)
-    app.include_router(trades_router, prefix=prefix)
-    app.include_router(execution_router, prefix=prefix)
-    app.include_router(execution_retry_router, prefix=prefix)
-    app.include_router(autotrade_router, prefix=prefix)
-    app.include_router(automation_router, prefix=prefix)
-    app.include_router(monitor_router, prefix=prefix)
-    app.include_router(supabase_router, prefix=prefix)
-    app.include_router(vnpy_router, prefix=prefix)
-    app.include_router(ragflow_router, prefix=prefix)
-    app.include_router(support_router, prefix=prefix)
-    app.include_router(analysis_router, prefix=prefix)
+    for name in ROUTER_MODULES:
+        router = importlib.import_module(f"{__package__}.routers.{name}").router
+        app.include_router(router, prefix=prefix)
 
 
 def _find_frontend_dist() -> Path | None:
@@ -140,6 +148,8 @@ def create_app() -> FastAPI:
     @app.exception_handler(BusinessBanError)
     async def business_ban_exception_handler(_: Request, exc: BusinessBanError) -> JSONResponse:
         if settings.execution_auto_rotate_proxy_on_ban:
+            from .services.proxy_resolver import rotate_proxy
+
             rotate_proxy(reason=f"global_business_ban:{exc.code}", required=False)
         return JSONResponse(
             status_code=503,
@@ -154,9 +164,18 @@ def create_app() -> FastAPI:
     async def busy_state_exception_handler(_: Request, exc: BusyStateError) -> JSONResponse:
         return JSONResponse(status_code=409, content=exc.to_payload())
 
-    _include_core_routers(app, prefix="")
-    _include_core_routers(app, prefix="/card-api")
-
+    loader: LazyRouterLoader | None = None
+    if settings.lazy_routers:
+        loader = LazyRouterLoader(app, prefixes=("", "/card-api"))
+        eager = [name.strip() for name in settings.eager_routers.split(",") if name.strip() in ROUTER_MODULES]
+        loader.mount(*eager)
+        app.add_middleware(LazyRouterMiddleware, loader=loader)
+    else:
+        _include_core_routers(app, prefix="")
+        _include_core_routers(app, prefix="/card-api")
+    app.state.router_loader = loader
+
+    api_route_count = len(app.router.routes)
     frontend_dist = _find_frontend_dist()
     if frontend_dist:
         assets_dir = frontend_dist / "assets"
@@ -178,6 +197,8 @@ def create_app() -> FastAPI:
                 return FileResponse(requested)
             return _frontend_index_response(frontend_dist / "index.html")
 
+    if loader is not None:
+        loader.set_tail(app.router.routes[api_route_count:])
     return app
 
 
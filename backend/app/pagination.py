@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import base64
+import json
+import math
+from typing import Any, Callable, Sequence
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Pack a keyset position (sort key values + id) into an opaque token."""
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _coerce_key(value: Any, kind: type) -> Any:
+    if kind is float:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise InvalidCursorError("invalid cursor")
+        return float(value)
+    if not isinstance(value, kind):
+        raise InvalidCursorError("invalid cursor")
+    return value
+
+
+def decode_cursor(
+    cursor: str | None,
+    size: int,
+    key_types: Sequence[type] = (),
+) -> tuple[Any, ...] | None:
+    """Unpack a token produced by :func:`encode_cursor`; None/empty means first page.
+
+    ``key_types`` gives the expected type of each leading sort key (``float``
+    accepts any finite number); the trailing id must always be an int.
+    """
+    text = (cursor or "").strip()
+    if not text:
+        return None
+    try:
+        padded = text + "=" * (-len(text) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursorError("invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("invalid cursor")
+    if not isinstance(values[-1], int) or isinstance(values[-1], bool):
+        raise InvalidCursorError("invalid cursor")
+    if key_types:
+        if len(key_types) != size - 1:
+            raise ValueError("key_types must describe every sort key before the id")
+        values[:-1] = [_coerce_key(value, kind) for value, kind in zip(values, key_types)]
+    return tuple(values)
+
+
+def keyset_page(
+    rows: Sequence[Any],
+    limit: int,
+    key: Callable[[Any], Sequence[Any]],
+) -> tuple[list[Any], str | None]:
+    """Trim a ``limit + 1`` fetch to one page and build the cursor for the next."""
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    return page, encode_cursor(key(page[-1]))
@@ -1,12 +1,34 @@
 from __future__ import annotations
 
+import inspect
 import json
 import sqlite3
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+from .config import settings
+from .database import DASHBOARD_COUNTER_FIELDS
+from .database import compute_dashboard_counters
+from .database import compute_status_counters
+from .database import compute_support_ticket_counters
 from .database import get_conn
+from .database import rebuild_dashboard_counters
+from .database import rebuild_status_counters
+from .database import rebuild_support_ticket_counters
 from .schemas import FeatureData, ListingIn, SaleIn, ValuationOut
+from .services import scan_priority
+from .services import valuation_dirty
+from .services.audit_writer import audit_writer
+from .services.execution_health import execution_health
+from .services.metrics import instrument_repository
+from .services.near_duplicate import ensure_indexed as ensure_near_duplicate_indexed
+from .services.near_duplicate import index_listings as index_near_duplicate_listings
+from .services.near_duplicate import listing_text
+from .services.near_duplicate import minhash_signature
+from .services.near_duplicate import query_similar
+from .services.near_duplicate import similar_to_listing
+from .services.price_rollups import record_listings as record_listing_rollups
+from .services.price_rollups import record_sales as record_sale_rollups
 
 
 def _normalize_optional_id(raw: str | None) -> str | None:
@@ -99,6 +121,74 @@ def _load_existing_listing_fingerprints(
     return existing
 
 
+def _near_duplicate_ids(
+    conn: sqlite3.Connection,
+    *,
+    title: str | None,
+    description: str | None,
+    threshold: float,
+    exclude_listing_row_id: int | None = None,
+) -> list[int]:
+    signature = minhash_signature(listing_text(title, description))
+    if signature is None:
+        return []
+    matches = query_similar(
+        conn,
+        signature,
+        threshold=threshold,
+        exclude_listing_row_id=exclude_listing_row_id,
+    )
+    return [row_id for row_id, _ in matches]
+
+
+def _find_open_near_duplicate(
+    conn: sqlite3.Connection,
+    *,
+    source: str,
+    seller_id: str | None,
+    title: str | None,
+    description: str | None,
+    list_price: float | int | str | None,
+) -> int | None:
+    candidates = _near_duplicate_ids(
+        conn,
+        title=title,
+        description=description,
+        threshold=float(settings.near_duplicate_threshold),
+    )
+    if not candidates:
+        return None
+    # Same scope as the exact fingerprint dedupe: same seller and price, recent open rows.
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
+    placeholders = ",".join("?" for _ in candidates)
+    row = conn.execute(
+        f"""
+        SELECT id
+        FROM listings_raw
+        WHERE id IN ({placeholders})
+          AND source = ? AND COALESCE(seller_id, '') = ? AND ROUND(list_price, 2) = ?
+          AND status = 'open' AND listed_at >= ?
+        ORDER BY id DESC
+        LIMIT 1
+        """,
+        (
+            *candidates,
+            str(source or "").strip(),
+            _normalize_optional_id(seller_id) or "",
+            _normalize_price_key(list_price),
+            cutoff,
+        ),
+    ).fetchone()
+    return int(row["id"]) if row else None
+
+
+def _inserted_listing_ids(conn: sqlite3.Connection, count: int) -> list[int]:
+    # One executemany inside this transaction holds the write lock, so its rows
+    # received consecutive ids ending at last_insert_rowid().
+    last_id = int(conn.execute("SELECT last_insert_rowid()").fetchone()[0])
+    return list(range(last_id - count + 1, last_id + 1))
+
+
 def insert_sales(rows: list[SaleIn]) -> int:
     sql = """
     INSERT INTO sales_raw(source, item_id, title, description, sold_price, sold_at, raw_json)
@@ -138,6 +228,8 @@ def insert_sales(rows: list[SaleIn]) -> int:
         if not values:
             return 0
         conn.executemany(sql, values)
+        valuation_dirty.mark_for_sale_titles(conn, [value[2] for value in values])
+        record_sale_rollups(conn, [(value[2], value[5], value[4]) for value in values])
     return len(values)
 
 
@@ -166,6 +258,7 @@ def insert_listings(rows: list[ListingIn]) -> int:
     values: list[tuple[Any, ...]] = []
     seen_in_batch: set[tuple[str, str]] = set()
     seen_fingerprints_in_batch: set[tuple[str, str, str, float]] = set()
+    near_dedupe = settings.near_duplicate_enabled and settings.near_duplicate_ingest_dedupe
     with get_conn() as conn:
         existing_pairs = _load_existing_pairs(
             conn,
@@ -191,6 +284,15 @@ def insert_listings(rows: list[ListingIn]) -> int:
                 )
                 if fp in existing_fingerprints or fp in seen_fingerprints_in_batch:
                     continue
+                if near_dedupe and _find_open_near_duplicate(
+                    conn,
+                    source=row.source,
+                    seller_id=seller_id,
+                    title=row.title,
+                    description=row.description,
+                    list_price=row.list_price,
+                ):
+                    continue
                 seen_fingerprints_in_batch.add(fp)
 
             values.append(
@@ -210,6 +312,14 @@ def insert_listings(rows: list[ListingIn]) -> int:
         if not values:
             return 0
         conn.executemany(sql, values)
+        inserted_ids = _inserted_listing_ids(conn, len(values))
+        if settings.near_duplicate_enabled:
+            index_near_duplicate_listings(
+                conn,
+                [(row_id, value[3], value[4]) for row_id, value in zip(inserted_ids, values)],
+            )
+        valuation_dirty.mark_listings(conn, inserted_ids, "new_listing")
+        record_listing_rollups(conn, [(value[3], value[6]) for value in values])
     return len(values)
 
 
@@ -262,6 +372,17 @@ def upsert_listing(row: ListingIn) -> tuple[int | None, bool]:
                 for item in candidates:
                     if _normalize_text_key(item["title"]) == fp[2]:
                         return int(item["id"]), False
+            if settings.near_duplicate_enabled and settings.near_duplicate_ingest_dedupe:
+                near_id = _find_open_near_duplicate(
+                    conn,
+                    source=row.source,
+                    seller_id=seller_id,
+                    title=row.title,
+                    description=row.description,
+                    list_price=row.list_price,
+                )
+                if near_id is not None:
+                    return near_id, False
 
     sql = """
     INSERT INTO listings_raw(source, listing_id, seller_id, title, description, list_price, listed_at, status, raw_json)
@@ -282,7 +403,12 @@ def upsert_listing(row: ListingIn) -> tuple[int | None, bool]:
                 json.dumps(row.raw, ensure_ascii=True),
             ),
         )
-        return int(cur.lastrowid), True
+        row_id = int(cur.lastrowid)
+        if settings.near_duplicate_enabled:
+            index_near_duplicate_listings(conn, [(row_id, row.title, row.description)])
+        valuation_dirty.mark_listings(conn, [row_id], "new_listing")
+        record_listing_rollups(conn, [(row.title, row.listed_at.isoformat())])
+        return row_id, True
 
 
 def get_listing(row_id: int) -> sqlite3.Row | None:
@@ -329,7 +455,10 @@ def has_frozen_opportunity_for_listing_fingerprint(
     title: str,
     list_price: float,
     exclude_listing_row_id: int | None = None,
+    description: str | None = None,
+    near_duplicate_threshold: float = 0.0,
 ) -> bool:
+    """Exact normalized-title match, or a near-duplicate when ``near_duplicate_threshold`` > 0."""
     normalized_title = _normalize_text_key(title)
     normalized_seller = _normalize_optional_id(seller_id) or ""
     normalized_price = _normalize_price_key(list_price)
@@ -347,13 +476,28 @@ def has_frozen_opportunity_for_listing_fingerprint(
     if exclude_listing_row_id is not None:
         sql += " AND l.id != ?"
         params.append(int(exclude_listing_row_id))
-    sql += " ORDER BY l.id DESC LIMIT 200"
     with get_conn() as conn:
-        rows = conn.execute(sql, tuple(params)).fetchall()
-    for row in rows:
-        if _normalize_text_key(row["title"]) == normalized_title:
-            return True
-    return False
+        rows = conn.execute(sql + " ORDER BY l.id DESC LIMIT 200", tuple(params)).fetchall()
+        for row in rows:
+            if _normalize_text_key(row["title"]) == normalized_title:
+                return True
+        if near_duplicate_threshold <= 0:
+            return False
+        near_ids = _near_duplicate_ids(
+            conn,
+            title=title,
+            description=description,
+            threshold=near_duplicate_threshold,
+            exclude_listing_row_id=exclude_listing_row_id,
+        )
+        if not near_ids:
+            return False
+        placeholders = ",".join("?" for _ in near_ids)
+        row = conn.execute(
+            sql + f" AND l.id IN ({placeholders}) LIMIT 1",
+            (*params, *near_ids),
+        ).fetchone()
+    return row is not None
 
 
 def has_reject_history_for_listing_signature(
@@ -362,7 +506,10 @@ def has_reject_history_for_listing_signature(
     seller_id: str | None,
     title: str,
     exclude_listing_row_id: int | None = None,
+    description: str | None = None,
+    near_duplicate_threshold: float = 0.0,
 ) -> bool:
+    """Exact normalized-title match, or a near-duplicate when ``near_duplicate_threshold`` > 0."""
     normalized_title = _normalize_text_key(title)
     normalized_seller = _normalize_optional_id(seller_id) or ""
 
@@ -381,6 +528,7 @@ def has_reject_history_for_listing_signature(
         params.append(int(exclude_listing_row_id))
     sql += " ORDER BY l.id DESC LIMIT 200"
 
+    audit_writer.sync()
     with get_conn() as conn:
         rows = conn.execute(sql, tuple(params)).fetchall()
         for row in rows:
@@ -406,7 +554,37 @@ def has_reject_history_for_listing_signature(
             if _normalize_text_key(row["title"]) == normalized_title:
                 return True
 
-    return False
+        if near_duplicate_threshold <= 0:
+            return False
+        near_ids = _near_duplicate_ids(
+            conn,
+            title=title,
+            description=description,
+            threshold=near_duplicate_threshold,
+            exclude_listing_row_id=exclude_listing_row_id,
+        )
+        if not near_ids:
+            return False
+        placeholders = ",".join("?" for _ in near_ids)
+        matched = conn.execute(
+            f"""
+            SELECT 1
+            FROM listings_raw l
+            WHERE l.id IN ({placeholders})
+              AND l.source = ?
+              AND COALESCE(l.seller_id, '') = ?
+              AND (
+                EXISTS (
+                    SELECT 1 FROM opportunities o
+                    WHERE o.listing_row_id = l.id AND o.status = 'rejected' AND l.status = 'open'
+                )
+                OR EXISTS (SELECT 1 FROM opportunity_reject_logs r WHERE r.listing_row_id = l.id)
+              )
+            LIMIT 1
+            """,
+            (*near_ids, str(source or "").strip(), normalized_seller),
+        ).fetchone()
+    return matched is not None
 
 
 def get_seller_open_listing_count(source: str, seller_id: str | None, exclude_row_id: int | None = None) -> int:
@@ -468,6 +646,10 @@ def save_features(ref_type: str, ref_id: int, feature: FeatureData, extracted_by
             "SELECT id FROM item_features WHERE ref_type = ? AND ref_id = ?",
             (ref_type, ref_id),
         ).fetchone()
+        if ref_type == "sale":
+            valuation_dirty.mark_for_sale_features(conn, ref_id, feature)
+        elif ref_type == "listing":
+            valuation_dirty.mark_if_key_changed(conn, ref_id, feature)
     return int(row["id"])
 
 
@@ -508,7 +690,8 @@ def get_recent_sales(features: FeatureData, limit: int = 80) -> list[sqlite3.Row
         return cur.fetchall()
 
 
-def save_valuation(result: ValuationOut) -> int:
+def save_valuation(result: ValuationOut, *, features: FeatureData | None = None) -> int:
+    """Insert a valuation; with ``features``, also record the comparable key it was based on."""
     sql = """
     INSERT INTO valuation_records(
         listing_row_id, expected_sale_price, buy_limit, suggested_list_price,
@@ -530,7 +713,10 @@ def save_valuation(result: ValuationOut) -> int:
                 result.reasoning,
             ),
         )
-        return int(cur.lastrowid)
+        valuation_id = int(cur.lastrowid)
+        if features is not None:
+            valuation_dirty.record_dependency(conn, result.listing_row_id, valuation_id, features)
+        return valuation_id
 
 
 def get_latest_valuation_for_listing(listing_row_id: int) -> sqlite3.Row | None:
@@ -583,25 +769,56 @@ def upsert_opportunity(
     return int(row["id"])
 
 
-def list_opportunities(status: str | None = None, limit: int = 100) -> list[sqlite3.Row]:
-    base_sql = """
+def list_opportunities(
+    status: str | None = None,
+    limit: int = 100,
+    *,
+    after: tuple[float, int] | None = None,
+) -> list[sqlite3.Row]:
+    """Opportunities by score; ``after`` is the ``(score, id)`` keyset of the previous page."""
+    sql = """
     SELECT o.*, l.title, l.list_price, v.expected_sale_price, v.suggested_list_price
     FROM opportunities o
     JOIN listings_raw l ON l.id = o.listing_row_id
     JOIN valuation_records v ON v.id = o.valuation_id
     """
-    params: tuple[Any, ...]
+    params: list[Any] = []
+    where: list[str] = []
     if status:
-        sql = f"{base_sql} WHERE o.status = ? ORDER BY o.score DESC LIMIT ?"
-        params = (status, limit)
-    else:
-        sql = f"{base_sql} ORDER BY o.score DESC LIMIT ?"
-        params = (limit,)
+        where.append("o.status = ?")
+        params.append(status)
+    if after is not None:
+        where.append("(o.score, o.id) < (?, ?)")
+        params.extend([float(after[0]), int(after[1])])
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY o.score DESC, o.id DESC LIMIT ?"
+    params.append(limit)
     with get_conn() as conn:
-        cur = conn.execute(sql, params)
+        cur = conn.execute(sql, tuple(params))
         return cur.fetchall()
 
 
+def _status_count(table: str, status: str | None) -> int:
+    """Row count from the trigger-maintained ``status_counters`` (no table scan)."""
+    with get_conn() as conn:
+        if status:
+            row = conn.execute(
+                "SELECT row_count AS c FROM status_counters WHERE table_name = ? AND status = ?",
+                (table, status),
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT SUM(row_count) AS c FROM status_counters WHERE table_name = ?",
+                (table,),
+            ).fetchone()
+    return int(row["c"] or 0) if row is not None else 0
+
+
+def count_opportunities(status: str | None = None) -> int:
+    return _status_count("opportunities", status)
+
+
 def update_opportunity_status(opportunity_id: int, status: str, note: str = "") -> None:
     with get_conn() as conn:
         conn.execute(
@@ -697,27 +914,24 @@ def create_opportunity_reject_log(
             },
         }
 
-        cur = conn.execute(
-            """
-            INSERT INTO opportunity_reject_logs(
-                opportunity_id, listing_row_id, reject_mode, note, snapshot_json
-            ) VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                int(context_row["opportunity_id"]),
-                int(context_row["listing_row_id"]),
-                str(reject_mode or "manual"),
-                str(note or ""),
-                json.dumps(snapshot, ensure_ascii=True),
-            ),
-        )
-        return int(cur.lastrowid)
+    return audit_writer.insert(
+        "opportunity_reject_logs",
+        ("opportunity_id", "listing_row_id", "reject_mode", "note", "snapshot_json"),
+        (
+            int(context_row["opportunity_id"]),
+            int(context_row["listing_row_id"]),
+            str(reject_mode or "manual"),
+            str(note or ""),
+            json.dumps(snapshot, ensure_ascii=True),
+        ),
+    )
 
 
 def list_opportunity_reject_logs(
     *,
     opportunity_id: int | None = None,
     limit: int = 200,
+    after_id: int | None = None,
 ) -> list[sqlite3.Row]:
     sql = """
     SELECT
@@ -730,11 +944,18 @@ def list_opportunity_reject_logs(
     LEFT JOIN opportunities o ON o.id = r.opportunity_id
     """
     params: list[Any] = []
+    where: list[str] = []
     if opportunity_id is not None:
-        sql += " WHERE r.opportunity_id = ?"
+        where.append("r.opportunity_id = ?")
         params.append(opportunity_id)
+    if after_id is not None:
+        where.append("r.id < ?")
+        params.append(int(after_id))
+    if where:
+        sql += " WHERE " + " AND ".join(where)
     sql += " ORDER BY r.id DESC LIMIT ?"
     params.append(limit)
+    audit_writer.sync()
     with get_conn() as conn:
         cur = conn.execute(sql, tuple(params))
         return cur.fetchall()
@@ -1014,25 +1235,40 @@ def list_open_trade_ids(limit: int = 100) -> list[int]:
     return [int(r["id"]) for r in rows]
 
 
-def list_trades(status: str | None = None, limit: int = 100) -> list[sqlite3.Row]:
-    base_sql = """
+def list_trades(
+    status: str | None = None,
+    limit: int = 100,
+    *,
+    after: tuple[str, int] | None = None,
+) -> list[sqlite3.Row]:
+    """Trades by last update; ``after`` is the ``(updated_at, id)`` keyset of the previous page."""
+    sql = """
     SELECT t.*, o.listing_row_id, l.title, l.list_price
     FROM trades t
     JOIN opportunities o ON o.id = t.opportunity_id
     JOIN listings_raw l ON l.id = o.listing_row_id
     """
-    params: tuple[Any, ...]
+    params: list[Any] = []
+    where: list[str] = []
     if status:
-        sql = f"{base_sql} WHERE t.status = ? ORDER BY t.updated_at DESC LIMIT ?"
-        params = (status, limit)
-    else:
-        sql = f"{base_sql} ORDER BY t.updated_at DESC LIMIT ?"
-        params = (limit,)
+        where.append("t.status = ?")
+        params.append(status)
+    if after is not None:
+        where.append("(t.updated_at, t.id) < (?, ?)")
+        params.extend([str(after[0]), int(after[1])])
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY t.updated_at DESC, t.id DESC LIMIT ?"
+    params.append(limit)
     with get_conn() as conn:
-        cur = conn.execute(sql, params)
+        cur = conn.execute(sql, tuple(params))
         return cur.fetchall()
 
 
+def count_trades(status: str | None = None) -> int:
+    return _status_count("trades", status)
+
+
 def update_trade_target_price(trade_id: int, target_sell_price: float, note: str = "") -> None:
     with get_conn() as conn:
         conn.execute(
@@ -1081,28 +1317,86 @@ def update_trade_sold(trade_id: int, sold_price: float, note: str) -> None:
         )
 
 
-def get_dashboard_metrics() -> dict[str, Any]:
+def get_dashboard_counters() -> dict[str, Any]:
+    """Single-row read of the trigger-maintained dashboard counters."""
     with get_conn() as conn:
-        pending = conn.execute(
-            "SELECT COUNT(*) AS c FROM opportunities WHERE status = 'pending_review'"
-        ).fetchone()["c"]
-        approved = conn.execute(
-            "SELECT COUNT(*) AS c FROM trades WHERE status IN ('approved_for_buy', 'listed_for_sale')"
-        ).fetchone()["c"]
-        sold_row = conn.execute(
-            """
-            SELECT COUNT(*) AS c,
-                   COALESCE(SUM(sold_price - approved_buy_price), 0) AS gross_profit
-            FROM trades
-            WHERE status = 'sold'
-            """
-        ).fetchone()
-        return {
-            "pending_review_count": pending,
-            "active_trades_count": approved,
-            "sold_count": sold_row["c"],
-            "gross_profit": round(float(sold_row["gross_profit"]), 2),
+        row = conn.execute("SELECT * FROM dashboard_counters WHERE id = 1").fetchone()
+        if row is None:
+            values = rebuild_dashboard_counters(conn)
+        else:
+            values = {name: row[name] for name in DASHBOARD_COUNTER_FIELDS}
+    return {
+        "pending_review_count": int(values["pending_review_count"]),
+        "active_trades_count": int(values["active_trades_count"]),
+        "sold_count": int(values["sold_count"]),
+        "gross_profit": round(float(values["gross_profit"]), 2),
+        "open_listing_count": int(values["open_listing_count"]),
+        "open_listing_price_sum": round(float(values["open_listing_price_sum"]), 2),
+    }
+
+
+def check_dashboard_counters(*, repair: bool = False) -> dict[str, Any]:
+    """Compare stored counters with full aggregates; optionally rewrite them."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT * FROM dashboard_counters WHERE id = 1").fetchone()
+        actual = compute_dashboard_counters(conn)
+        drift: dict[str, dict[str, float]] = {}
+        for name in DASHBOARD_COUNTER_FIELDS:
+            stored = float(row[name]) if row is not None else 0.0
+            expected = float(actual[name] or 0)
+            # Money sums accumulate float deltas; sub-cent differences are not drift.
+            if row is None or abs(stored - expected) > 0.005:
+                drift[name] = {"stored": stored, "actual": expected}
+        stored_status = {
+            (str(item["table_name"]), str(item["status"])): int(item["row_count"])
+            for item in conn.execute("SELECT * FROM status_counters")
+        }
+        actual_status = compute_status_counters(conn)
+        for key in sorted(set(stored_status) | set(actual_status)):
+            stored_count, expected_count = stored_status.get(key, 0), actual_status.get(key, 0)
+            if stored_count != expected_count:
+                drift[f"{key[0]}.status:{key[1]}"] = {"stored": stored_count, "actual": expected_count}
+        stored_tickets = {
+            (int(item["user_id"]), str(item["status"])): int(item["row_count"])
+            for item in conn.execute("SELECT * FROM support_ticket_counters")
         }
+        actual_tickets = compute_support_ticket_counters(conn)
+        for key in sorted(set(stored_tickets) | set(actual_tickets)):
+            stored_count, expected_count = stored_tickets.get(key, 0), actual_tickets.get(key, 0)
+            if stored_count != expected_count:
+                drift[f"support_tickets.user:{key[0]}.status:{key[1]}"] = {
+                    "stored": stored_count,
+                    "actual": expected_count,
+                }
+        repaired = False
+        if drift and repair:
+            rebuild_dashboard_counters(conn)
+            rebuild_status_counters(conn)
+            rebuild_support_ticket_counters(conn)
+            repaired = True
+    return {"ok": not drift, "drift": drift, "repaired": repaired}
+
+
+def get_dashboard_metrics() -> dict[str, Any]:
+    counters = get_dashboard_counters()
+    return {
+        "pending_review_count": counters["pending_review_count"],
+        "active_trades_count": counters["active_trades_count"],
+        "sold_count": counters["sold_count"],
+        "gross_profit": counters["gross_profit"],
+    }
+
+
+def is_business_ban_log(error: str, response_payload: dict[str, Any] | None) -> bool:
+    payload = response_payload or {}
+    if str(payload.get("business_ban_code") or "").strip():
+        return True
+    error_text = " ".join(
+        part
+        for part in (str(error or "").strip(), str(payload.get("error") or "").strip())
+        if part
+    ).lower()
+    return "business ban" in error_text
 
 
 def create_execution_log(
@@ -1116,25 +1410,34 @@ def create_execution_log(
     success: bool,
     error: str = "",
 ) -> int:
-    with get_conn() as conn:
-        cur = conn.execute(
-            """
-            INSERT INTO execution_logs(
-                trade_id, action, provider, dry_run, request_json, response_json, success, error
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                trade_id,
-                action,
-                provider,
-                1 if dry_run else 0,
-                json.dumps(request_payload or {}, ensure_ascii=True),
-                json.dumps(response_payload or {}, ensure_ascii=True),
-                1 if success else 0,
-                error,
-            ),
-        )
-    return int(cur.lastrowid)
+    business_ban = is_business_ban_log(error, response_payload)
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    log_id = audit_writer.insert(
+        "execution_logs",
+        (
+            "trade_id", "action", "provider", "dry_run", "request_json", "response_json",
+            "success", "error", "business_ban", "created_at",
+        ),
+        (
+            trade_id,
+            action,
+            provider,
+            1 if dry_run else 0,
+            json.dumps(request_payload or {}, ensure_ascii=True),
+            json.dumps(response_payload or {}, ensure_ascii=True),
+            1 if success else 0,
+            error,
+            1 if business_ban else 0,
+            created_at,
+        ),
+    )
+    execution_health.record_execution(
+        log_id,
+        success=success,
+        business_ban=business_ban,
+        created_at=created_at,
+    )
+    return log_id
 
 
 def list_execution_logs(
@@ -1145,6 +1448,7 @@ def list_execution_logs(
     dry_run: bool | None = None,
     success: bool | None = None,
     limit: int = 100,
+    after_id: int | None = None,
 ) -> list[sqlite3.Row]:
     base_sql = """
     SELECT e.*, t.status AS trade_status, t.approved_buy_price, t.target_sell_price
@@ -1168,34 +1472,33 @@ def list_execution_logs(
     if success is not None:
         where.append("e.success = ?")
         params.append(1 if success else 0)
+    if after_id is not None:
+        where.append("e.id < ?")
+        params.append(int(after_id))
     sql = base_sql
     if where:
         sql += " WHERE " + " AND ".join(where)
     sql += " ORDER BY e.id DESC LIMIT ?"
     params.append(limit)
+    audit_writer.sync()
     with get_conn() as conn:
         cur = conn.execute(sql, tuple(params))
         return cur.fetchall()
 
 
-def _parse_json_object(raw: Any) -> dict[str, Any]:
-    if isinstance(raw, dict):
-        return raw
-    if isinstance(raw, str):
-        text = raw.strip()
-        if not text:
-            return {}
-        try:
-            parsed = json.loads(text)
-        except Exception:
-            return {}
-        return parsed if isinstance(parsed, dict) else {}
-    return {}
-
-
 def get_execution_log_summary(limit: int = 24) -> dict[str, Any]:
     try:
-        rows = list_execution_logs(limit=max(1, min(500, int(limit))))
+        audit_writer.sync()
+        with get_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT success, business_ban, created_at
+                FROM execution_logs
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (max(1, min(500, int(limit))),),
+            ).fetchall()
     except sqlite3.OperationalError:
         return {
             "sample_size": 0,
@@ -1212,23 +1515,11 @@ def get_execution_log_summary(limit: int = 24) -> dict[str, Any]:
     last_failure_at = ""
 
     for row in rows:
-        success = bool(row["success"])
-        if not success:
+        if not bool(row["success"]):
             failure_count += 1
             if not last_failure_at:
                 last_failure_at = str(row["created_at"] or "")
-
-        response_payload = _parse_json_object(row["response_json"])
-        business_ban_code = str(response_payload.get("business_ban_code") or "").strip()
-        error_text = " ".join(
-            part
-            for part in (
-                str(row["error"] or "").strip(),
-                str(response_payload.get("error") or "").strip(),
-            )
-            if part
-        ).lower()
-        if business_ban_code or "business ban" in error_text:
+        if bool(row["business_ban"]):
             business_ban_count += 1
 
     success_count = sample_size - failure_count
@@ -1250,7 +1541,7 @@ def get_latest_execution_log(
     trade_id: int,
     action: str,
     success_only: bool = False,
-) -> sqlite3.Row | None:
+) -> sqlite3.Row | dict[str, Any] | None:
     sql = """
     SELECT *
     FROM execution_logs
@@ -1260,9 +1551,16 @@ def get_latest_execution_log(
     if success_only:
         sql += " AND success = 1"
     sql += " ORDER BY id DESC LIMIT 1"
+    # Overlay logs still queued in the audit writer instead of forcing a flush.
+    pending = audit_writer.pending_rows(
+        "execution_logs",
+        lambda row: row["trade_id"] == trade_id and row["action"] == action and (row["success"] or not success_only),
+    )
     with get_conn() as conn:
-        cur = conn.execute(sql, tuple(params))
-        return cur.fetchone()
+        latest = conn.execute(sql, tuple(params)).fetchone()
+    if pending and (latest is None or int(pending[-1]["id"]) > int(latest["id"])):
+        return pending[-1]
+    return latest
 
 
 def list_latest_failed_execution_candidates(
@@ -1288,6 +1586,229 @@ def list_latest_failed_execution_candidates(
         params.append(action)
     sql += " ORDER BY e.id DESC LIMIT ?"
     params.append(limit)
+    audit_writer.sync()
+    with get_conn() as conn:
+        cur = conn.execute(sql, tuple(params))
+        return cur.fetchall()
+
+
+def get_seen_item_keys(keyword: str, item_keys: list[str]) -> set[str]:
+    keys = sorted({key for key in item_keys if key})
+    if not keys:
+        return set()
+    seen: set[str] = set()
+    with get_conn() as conn:
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"""
+                SELECT item_key
+                FROM crawl_seen_items
+                WHERE keyword = ? AND item_key IN ({placeholders})
+                """,
+                (keyword, *chunk),
+            ).fetchall()
+            seen.update(str(row["item_key"]) for row in rows)
+    return seen
+
+
+def mark_items_seen(keyword: str, item_keys: list[str]) -> int:
+    keys = sorted({key for key in item_keys if key})
+    if not keys:
+        return 0
+    now = datetime.now(timezone.utc).isoformat()
+    with get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT INTO crawl_seen_items(keyword, item_key, first_seen_at, last_seen_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(keyword, item_key) DO UPDATE SET last_seen_at = excluded.last_seen_at
+            """,
+            [(keyword, key, now, now) for key in keys],
+        )
+    return len(keys)
+
+
+def prune_seen_items(*, older_than_hours: float) -> int:
+    cutoff = (datetime.now(timezone.utc) - timedelta(hours=max(0.0, older_than_hours))).isoformat()
+    with get_conn() as conn:
+        cur = conn.execute("DELETE FROM crawl_seen_items WHERE last_seen_at < ?", (cutoff,))
+        return int(cur.rowcount or 0)
+
+
+def stage_monitor_items(shard_id: int, items: list[dict[str, Any]]) -> int:
+    values = [
+        (
+            int(shard_id),
+            str(item.get("keyword") or ""),
+            json.dumps(item, ensure_ascii=True),
+        )
+        for item in items
+        if isinstance(item, dict)
+    ]
+    if not values:
+        return 0
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO monitor_staging_items(shard_id, keyword, item_json) VALUES (?, ?, ?)",
+            values,
+        )
+    return len(values)
+
+
+def list_staged_monitor_items(limit: int = 500, *, max_attempts: int = 0) -> list[sqlite3.Row]:
+    """Oldest staged items; with ``max_attempts`` > 0, parked items are skipped."""
+    sql = """
+    SELECT id, shard_id, keyword, item_json, staged_at, attempts, last_error
+    FROM monitor_staging_items
+    """
+    params: list[Any] = []
+    if max_attempts > 0:
+        sql += " WHERE attempts < ?"
+        params.append(int(max_attempts))
+    sql += " ORDER BY id ASC LIMIT ?"
+    params.append(limit)
     with get_conn() as conn:
         cur = conn.execute(sql, tuple(params))
         return cur.fetchall()
+
+
+def mark_staged_monitor_items_failed(ids: list[int], error: str) -> int:
+    if not ids:
+        return 0
+    placeholders = ",".join("?" for _ in ids)
+    with get_conn() as conn:
+        cur = conn.execute(
+            f"""
+            UPDATE monitor_staging_items
+            SET attempts = attempts + 1, last_error = ?
+            WHERE id IN ({placeholders})
+            """,
+            (str(error)[:500], *ids),
+        )
+        return int(cur.rowcount or 0)
+
+
+def count_parked_monitor_items(max_attempts: int) -> int:
+    if max_attempts <= 0:
+        return 0
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS c FROM monitor_staging_items WHERE attempts >= ?",
+            (int(max_attempts),),
+        ).fetchone()
+    return int(row["c"] or 0)
+
+
+def delete_staged_monitor_items(ids: list[int]) -> int:
+    if not ids:
+        return 0
+    placeholders = ",".join("?" for _ in ids)
+    with get_conn() as conn:
+        cur = conn.execute(
+            f"DELETE FROM monitor_staging_items WHERE id IN ({placeholders})",
+            tuple(ids),
+        )
+        return int(cur.rowcount or 0)
+
+
+def get_dirty_listings(limit: int = 50) -> list[sqlite3.Row]:
+    max_attempts = max(0, int(settings.valuation_dirty_max_attempts))
+    with get_conn() as conn:
+        if settings.scan_priority_enabled:
+            return scan_priority.next_prioritized_listings(conn, limit, max_attempts=max_attempts)
+        return valuation_dirty.next_dirty_listings(conn, limit, max_attempts=max_attempts)
+
+
+def get_valuation_dirty_versions(listing_row_ids: list[int]) -> dict[int, int]:
+    if not listing_row_ids:
+        return {}
+    with get_conn() as conn:
+        return valuation_dirty.dirty_versions(conn, listing_row_ids)
+
+
+def clear_valuation_dirty(entries: list[tuple[int, int]]) -> None:
+    if not entries:
+        return
+    with get_conn() as conn:
+        valuation_dirty.clear_dirty(conn, entries)
+
+
+def fail_valuation_dirty(entries: list[tuple[int, int, str]]) -> None:
+    if not entries:
+        return
+    with get_conn() as conn:
+        valuation_dirty.fail_dirty(conn, entries)
+
+
+def count_parked_valuation_dirty() -> int:
+    with get_conn() as conn:
+        return valuation_dirty.parked_count(conn, max(0, int(settings.valuation_dirty_max_attempts)))
+
+
+def count_valuation_dirty() -> int:
+    with get_conn() as conn:
+        return valuation_dirty.pending_count(conn)
+
+
+def ensure_near_duplicate_index(listing_row_ids: list[int]) -> int:
+    if not settings.near_duplicate_enabled or not listing_row_ids:
+        return 0
+    with get_conn() as conn:
+        return ensure_near_duplicate_indexed(conn, [int(row_id) for row_id in listing_row_ids])
+
+
+def find_near_duplicate_listings(
+    listing_row_id: int,
+    *,
+    threshold: float | None = None,
+    limit: int = 20,
+) -> list[dict[str, Any]]:
+    cutoff = float(settings.near_duplicate_threshold if threshold is None else threshold)
+    with get_conn() as conn:
+        matches = similar_to_listing(conn, int(listing_row_id), threshold=cutoff)[: max(1, int(limit))]
+        if not matches:
+            return []
+        similarity = dict(matches)
+        placeholders = ",".join("?" for _ in matches)
+        rows = conn.execute(
+            f"""
+            SELECT id, source, listing_id, seller_id, title, list_price, status, listed_at
+            FROM listings_raw
+            WHERE id IN ({placeholders})
+            """,
+            tuple(similarity),
+        ).fetchall()
+    items = [
+        {
+            "listing_row_id": int(row["id"]),
+            "source": str(row["source"]),
+            "listing_id": row["listing_id"],
+            "seller_id": row["seller_id"],
+            "title": str(row["title"]),
+            "list_price": float(row["list_price"]),
+            "status": str(row["status"]),
+            "listed_at": str(row["listed_at"]),
+            "similarity": similarity[int(row["id"])],
+        }
+        for row in rows
+    ]
+    items.sort(key=lambda item: (-item["similarity"], -item["listing_row_id"]))
+    return items
+
+
+def _instrument_public_functions() -> None:
+    # Wrap every public repository function so /metrics can report per-function
+    # query counts and latency. The wrapper is a single flag check when disabled.
+    namespace = globals()
+    for name, value in list(namespace.items()):
+        if name.startswith("_") or not inspect.isfunction(value):
+            continue
+        if value.__module__ != __name__:
+            continue
+        namespace[name] = instrument_repository(value)
+
+
+_instrument_public_functions()
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 import asyncio
 import json
+from datetime import date, datetime, timedelta, timezone
 from statistics import mean, stdev
 from typing import Any
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 
 from .. import repositories as repo
 from ..database import get_conn
+from ..services import analytics_export, price_rollups
 from ..services.automation import automation_service
 from ..services.autotrade import auto_trade_service
 
@@ -22,6 +24,11 @@ HIGH_RISK_AVG_THRESHOLD = 50.0
 HIGH_RISK_SUGGESTED_MIN_SCORE = 70.0
 NEGATIVE_MOMENTUM_THRESHOLD = -3.0
 NEGATIVE_MOMENTUM_SUGGESTED_MIN_SCORE = 75.0
+MAX_ROLLUP_BUCKETS = 720
+# History endpoints may ask for more rows when the Parquet snapshot can serve
+# them; SQLite reads stay capped at MAX_ANALYSIS_LIMIT.
+MAX_HISTORY_LIMIT = 20000
+DAY_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
 
 
 def _parse_risk_score(note: str) -> float | None:
@@ -40,18 +47,63 @@ def _parse_risk_score(note: str) -> float | None:
     return None
 
 
-def _price_history(limit: int) -> list[dict[str, Any]]:
-    with get_conn() as conn:
-        rows = conn.execute(
-            """
-            SELECT source, title, sold_price, sold_at
-            FROM sales_raw
-            ORDER BY sold_at DESC
-            LIMIT ?
-            """,
-            (limit,),
-        ).fetchall()
-    return [
+def _day_range(
+    start: str | None = Query(default=None, pattern=DAY_PATTERN),
+    end: str | None = Query(default=None, pattern=DAY_PATTERN),
+) -> tuple[str | None, str | None]:
+    """Validate ``start``/``end`` as real calendar days (the pattern only checks the shape)."""
+    days: dict[str, date] = {}
+    for name, value in (("start", start), ("end", end)):
+        if not value:
+            continue
+        try:
+            days[name] = date.fromisoformat(value)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"{name} is not a valid date: {value}") from exc
+    if "start" in days and "end" in days and days["start"] > days["end"]:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    return start, end
+
+
+def _date_range(column: str, start: str | None, end: str | None) -> tuple[str, list[Any]]:
+    """WHERE fragment for an inclusive ``start``..``end`` day range on ``column``."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    if start:
+        clauses.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        clauses.append(f"{column} < ?")
+        params.append((date.fromisoformat(end) + timedelta(days=1)).isoformat())
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _history_limit(limit: int, tables: tuple[str, ...]) -> int:
+    if limit <= MAX_ANALYSIS_LIMIT or analytics_export.columnar_ready(tables):
+        return limit
+    return MAX_ANALYSIS_LIMIT
+
+
+def _query_price_history(
+    limit: int,
+    *,
+    start: str | None = None,
+    end: str | None = None,
+    prefer_columnar: bool = False,
+) -> tuple[list[dict[str, Any]], str]:
+    where, params = _date_range("sold_at", start, end)
+    rows, engine = analytics_export.run_analytics_query(
+        f"""
+        SELECT source, title, sold_price, sold_at
+        FROM sales_raw{where}
+        ORDER BY sold_at DESC
+        LIMIT ?
+        """,
+        [*params, limit],
+        tables=("sales_raw",),
+        prefer_columnar=prefer_columnar,
+    )
+    items = [
         {
             "source": str(row["source"] or ""),
             "title": str(row["title"] or ""),
@@ -60,6 +112,11 @@ def _price_history(limit: int) -> list[dict[str, Any]]:
         }
         for row in rows
     ]
+    return items, engine
+
+
+def _price_history(limit: int) -> list[dict[str, Any]]:
+    return _query_price_history(limit)[0]
 
 
 def _trade_records(limit: int) -> list[dict[str, Any]]:
@@ -80,15 +137,8 @@ def _trade_records(limit: int) -> list[dict[str, Any]]:
 
 
 def _market_snapshot() -> dict[str, Any]:
-    metrics = repo.get_dashboard_metrics()
+    counters = repo.get_dashboard_counters()
     with get_conn() as conn:
-        open_listing_row = conn.execute(
-            """
-            SELECT COUNT(*) AS c, COALESCE(AVG(list_price), 0) AS avg_price
-            FROM listings_raw
-            WHERE status = 'open'
-            """
-        ).fetchone()
         last_sale_row = conn.execute(
             """
             SELECT sold_price, sold_at
@@ -97,13 +147,15 @@ def _market_snapshot() -> dict[str, Any]:
             LIMIT 1
             """
         ).fetchone()
+    open_count = int(counters["open_listing_count"])
+    open_sum = float(counters["open_listing_price_sum"])
     return {
-        "pending_review_count": int(metrics["pending_review_count"]),
-        "active_trades_count": int(metrics["active_trades_count"]),
-        "sold_count": int(metrics["sold_count"]),
-        "gross_profit": float(metrics["gross_profit"]),
-        "open_listing_count": int(open_listing_row["c"]) if open_listing_row else 0,
-        "open_listing_avg_price": round(float(open_listing_row["avg_price"]), 2) if open_listing_row else 0.0,
+        "pending_review_count": int(counters["pending_review_count"]),
+        "active_trades_count": int(counters["active_trades_count"]),
+        "sold_count": int(counters["sold_count"]),
+        "gross_profit": float(counters["gross_profit"]),
+        "open_listing_count": open_count,
+        "open_listing_avg_price": round(open_sum / open_count, 2) if open_count else 0.0,
         "last_sale_price": float(last_sale_row["sold_price"]) if last_sale_row else None,
         "last_sale_at": str(last_sale_row["sold_at"]) if last_sale_row else "",
     }
@@ -283,9 +335,13 @@ def _decision_overview(limit: int) -> dict[str, Any]:
 
 
 @router.get("/data/price-history")
-def get_price_history(limit: int = Query(default=100, ge=1, le=MAX_ANALYSIS_LIMIT)) -> dict[str, Any]:
-    items = _price_history(limit=limit)
-    return {"items": items, "count": len(items)}
+def get_price_history(
+    limit: int = Query(default=100, ge=1, le=MAX_ANALYSIS_LIMIT),
+    days: tuple[str | None, str | None] = Depends(_day_range),
+) -> dict[str, Any]:
+    start, end = days
+    items, engine = _query_price_history(limit, start=start, end=end, prefer_columnar=bool(start or end))
+    return {"items": items, "count": len(items), "engine": engine}
 
 
 @router.get("/data/trade-records")
@@ -299,6 +355,169 @@ def get_market_snapshot() -> dict[str, Any]:
     return _market_snapshot()
 
 
+@router.get("/history/sales")
+def get_sales_history(
+    limit: int = Query(default=1000, ge=1, le=MAX_HISTORY_LIMIT),
+    days: tuple[str | None, str | None] = Depends(_day_range),
+) -> dict[str, Any]:
+    start, end = days
+    effective_limit = _history_limit(limit, ("sales_raw",))
+    items, engine = _query_price_history(effective_limit, start=start, end=end, prefer_columnar=True)
+    return {"items": items, "count": len(items), "engine": engine, "limit": effective_limit}
+
+
+@router.get("/history/daily-sales")
+def get_daily_sales(
+    days: tuple[str | None, str | None] = Depends(_day_range),
+) -> dict[str, Any]:
+    start, end = days
+    where, params = _date_range("sold_at", start, end)
+    rows, engine = analytics_export.run_analytics_query(
+        f"""
+        SELECT substr(sold_at, 1, 10) AS day,
+               COUNT(*) AS sales,
+               ROUND(AVG(sold_price), 2) AS avg_price,
+               MIN(sold_price) AS min_price,
+               MAX(sold_price) AS max_price
+        FROM sales_raw{where}
+        GROUP BY substr(sold_at, 1, 10)
+        ORDER BY day ASC
+        """,
+        params,
+        tables=("sales_raw",),
+        prefer_columnar=True,
+    )
+    items = [
+        {
+            "day": str(row["day"] or ""),
+            "sales": int(row["sales"]),
+            "avg_price": float(row["avg_price"] or 0.0),
+            "min_price": float(row["min_price"] or 0.0),
+            "max_price": float(row["max_price"] or 0.0),
+        }
+        for row in rows
+    ]
+    return {"items": items, "count": len(items), "engine": engine}
+
+
+@router.get("/history/monthly-pnl")
+def get_monthly_pnl(
+    days: tuple[str | None, str | None] = Depends(_day_range),
+) -> dict[str, Any]:
+    start, end = days
+    where, params = _date_range("updated_at", start, end)
+    sold_filter = " AND " if where else " WHERE "
+    rows, engine = analytics_export.run_analytics_query(
+        f"""
+        SELECT substr(updated_at, 1, 7) AS month,
+               COUNT(*) AS sold_count,
+               ROUND(SUM(sold_price), 2) AS revenue,
+               ROUND(SUM(sold_price - approved_buy_price), 2) AS gross_profit
+        FROM trades{where}{sold_filter}status = 'sold' AND sold_price IS NOT NULL
+        GROUP BY substr(updated_at, 1, 7)
+        ORDER BY month ASC
+        """,
+        params,
+        tables=("trades",),
+        prefer_columnar=True,
+    )
+    items = [
+        {
+            "month": str(row["month"] or ""),
+            "sold_count": int(row["sold_count"]),
+            "revenue": float(row["revenue"] or 0.0),
+            "gross_profit": float(row["gross_profit"] or 0.0),
+        }
+        for row in rows
+    ]
+    return {"items": items, "count": len(items), "engine": engine}
+
+
+@router.get("/export/status")
+def get_analytics_export_status() -> dict[str, Any]:
+    return analytics_export.analytics_export_service.status()
+
+
+@router.post("/export/run-once")
+def run_analytics_export_once(force: bool = False) -> dict[str, Any]:
+    return analytics_export.analytics_export_service.run_once(force=force)
+
+
+def _rollup_key(card: str) -> str:
+    text = (card or "").strip()
+    if not text or text == price_rollups.GLOBAL_CARD_KEY:
+        return price_rollups.GLOBAL_CARD_KEY
+    return price_rollups.normalize_card_key(text)
+
+
+@router.get("/rollups/cards")
+def get_rollup_cards(
+    days: int = Query(default=30, ge=1, le=3650),
+    limit: int = Query(default=50, ge=1, le=MAX_ANALYSIS_LIMIT),
+) -> dict[str, Any]:
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
+    items = price_rollups.list_rollup_cards(since=since, limit=limit)
+    return {"items": items, "count": len(items)}
+
+
+@router.get("/rollups/series")
+def get_rollup_series(
+    card: str = Query(default="", max_length=200),
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    buckets: int = Query(default=30, ge=1, le=MAX_ROLLUP_BUCKETS),
+) -> dict[str, Any]:
+    card_key = _rollup_key(card)
+    items = price_rollups.get_rollup_series(card_key, granularity=granularity, buckets=buckets)
+    return {"card_key": card_key, "granularity": granularity, "items": items, "count": len(items)}
+
+
+@router.get("/rollups/trend")
+def get_rollup_trend(
+    card: str = Query(default="", max_length=200),
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    buckets: int = Query(default=30, ge=1, le=MAX_ROLLUP_BUCKETS),
+) -> dict[str, Any]:
+    card_key = _rollup_key(card)
+    series = price_rollups.get_rollup_series(card_key, granularity=granularity, buckets=buckets)
+    return {
+        "card_key": card_key,
+        "granularity": granularity,
+        "buckets": len(series),
+        "trend": price_rollups.trend_from_series(series),
+        "last": series[-1] if series else None,
+    }
+
+
+@router.get("/rollups/volatility")
+def get_rollup_volatility(
+    card: str = Query(default="", max_length=200),
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    buckets: int = Query(default=30, ge=1, le=MAX_ROLLUP_BUCKETS),
+) -> dict[str, Any]:
+    card_key = _rollup_key(card)
+    return {
+        "card_key": card_key,
+        "granularity": granularity,
+        "volatility": price_rollups.card_volatility(card_key, granularity=granularity, buckets=buckets),
+    }
+
+
+@router.get("/rollups/momentum")
+def get_rollup_momentum(
+    card: str = Query(default="", max_length=200),
+    granularity: str = Query(default="day", pattern="^(hour|day)$"),
+    buckets: int = Query(default=30, ge=1, le=MAX_ROLLUP_BUCKETS),
+) -> dict[str, Any]:
+    card_key = _rollup_key(card)
+    series = price_rollups.get_rollup_series(card_key, granularity=granularity, buckets=buckets)
+    return {
+        "card_key": card_key,
+        "granularity": granularity,
+        "buckets": len(series),
+        "momentum": price_rollups.momentum_from_series(series),
+    }
+
+
 @router.get("/calculation/overview")
 def get_calculation_overview(limit: int = Query(default=100, ge=1, le=MAX_ANALYSIS_LIMIT)) -> dict[str, Any]:
     return _calculation_overview(limit=limit)
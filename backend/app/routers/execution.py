@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from .. import repositories as repo
+from ..pagination import InvalidCursorError, decode_cursor, keyset_page
 from ..services.execution import execution_service
 
 router = APIRouter(prefix="/execution", tags=["execution"])
@@ -132,14 +133,24 @@ def list_logs(
     dry_run: bool | None = None,
     success: bool | None = None,
     limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = None,
 ) -> dict:
-    rows = repo.list_execution_logs(
-        trade_id=trade_id,
-        action=action,
-        provider=provider,
-        dry_run=dry_run,
-        success=success,
-        limit=limit,
+    try:
+        after = decode_cursor(cursor, 1)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows, next_cursor = keyset_page(
+        repo.list_execution_logs(
+            trade_id=trade_id,
+            action=action,
+            provider=provider,
+            dry_run=dry_run,
+            success=success,
+            limit=limit + 1,
+            after_id=after[0] if after else None,
+        ),
+        limit,
+        lambda row: (row["id"],),
     )
     items = [
         {
@@ -159,4 +170,4 @@ def list_logs(
         }
         for row in rows
     ]
-    return {"items": items, "count": len(items)}
+    return {"items": items, "count": len(items), "next_cursor": next_cursor}
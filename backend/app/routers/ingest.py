@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+import zlib
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query, Request
 
 from .. import repositories as repo
 from ..schemas import ListingIn, SaleIn
+from ..services.bulk_ingest import INGEST_KINDS
+from ..services.bulk_ingest import NdjsonIngestJob
+from ..services.bulk_ingest import NdjsonLineTooLongError
+from ..services.bulk_ingest import ingest_jobs
+from ..services.bulk_ingest import iter_ndjson_lines
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
@@ -19,3 +27,39 @@ def ingest_listings(rows: list[ListingIn]) -> dict[str, int]:
     count = repo.insert_listings(rows)
     return {"inserted": count}
 
+
+@router.get("/stream/jobs")
+def list_stream_jobs() -> dict[str, Any]:
+    items = ingest_jobs.recent()
+    return {"items": items, "count": len(items)}
+
+
+@router.get("/stream/jobs/{job_id}")
+def get_stream_job(job_id: str) -> dict[str, Any]:
+    job = ingest_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+
+@router.post("/stream/{kind}")
+async def ingest_stream(
+    kind: str,
+    request: Request,
+    chunk_size: int | None = Query(default=None, ge=1, le=50_000),
+    job_id: str | None = Query(default=None, max_length=64),
+) -> dict[str, Any]:
+    """NDJSON (optionally gzip) bulk ingest; poll /ingest/stream/jobs/{job_id} for progress."""
+    if kind not in INGEST_KINDS:
+        raise HTTPException(status_code=404, detail=f"unsupported ingest kind: {kind}")
+
+    encoding = request.headers.get("content-encoding", "").strip().lower()
+    gzip_encoded = True if encoding in {"gzip", "x-gzip"} else None
+    job = NdjsonIngestJob(kind, chunk_size=chunk_size, job_id=job_id)
+    lines = iter_ndjson_lines(request.stream(), gzip_encoded=gzip_encoded)
+    try:
+        return await job.run(lines)
+    except NdjsonLineTooLongError as exc:
+        raise HTTPException(status_code=413, detail={**job.summary(), "error": str(exc)})
+    except zlib.error as exc:
+        raise HTTPException(status_code=400, detail={**job.summary(), "error": f"gzip: {exc}"})
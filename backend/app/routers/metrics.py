@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..services.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    if not metrics.enabled:
+        body = "# metrics disabled (set METRICS_ENABLED=true)\n"
+    else:
+        body = metrics.render_prometheus()
+    return PlainTextResponse(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/metrics/summary")
+def metrics_summary() -> dict[str, Any]:
+    return metrics.snapshot()
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Query
 
+from ..services.cookie_pool import cookie_pool
 from ..services.market_monitor import monitor_service
+from ..services.notifier import alert_dispatcher
 
 router = APIRouter(prefix="/monitor", tags=["monitor"])
 
@@ -24,6 +26,11 @@ def health() -> dict:
     }
 
 
+@router.get("/alerts")
+def alerts() -> dict:
+    return alert_dispatcher.status()
+
+
 @router.post("/start")
 def start() -> dict:
     return monitor_service.start()
@@ -47,3 +54,18 @@ def reset_circuit(reason: str = Query(default="manual reset")) -> dict:
 @router.post("/refresh-cookie")
 def refresh_cookie(kill_browsers: bool = Query(True)) -> dict:
     return monitor_service.refresh_cookie_local(kill_browsers=kill_browsers)
+
+
+@router.get("/cookie-pool")
+def cookie_pool_status() -> dict:
+    return cookie_pool.status()
+
+
+@router.post("/cookie-pool/reload")
+def cookie_pool_reload() -> dict:
+    return cookie_pool.reload()
+
+
+@router.post("/cookie-pool/refresh")
+def cookie_pool_refresh(identity: str = Query(default="primary")) -> dict:
+    return cookie_pool.refresh_now(identity)
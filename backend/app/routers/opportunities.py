@@ -5,6 +5,7 @@ import json
 from fastapi import APIRouter, HTTPException, Query
 
 from .. import repositories as repo
+from ..pagination import InvalidCursorError, decode_cursor, keyset_page
 from ..services.opportunity_scan import scan_open_listings
 
 router = APIRouter(prefix="/opportunities", tags=["opportunities"])
@@ -27,13 +28,29 @@ def _parse_risk_score(note: str) -> float | None:
 
 
 @router.post("/scan")
-async def scan_opportunities(limit: int = Query(default=50, ge=1, le=500)) -> dict[str, int]:
-    return await scan_open_listings(limit=limit)
+async def scan_opportunities(
+    limit: int = Query(default=50, ge=1, le=500),
+    mode: str | None = Query(default=None, pattern="^(dirty|full)$"),
+) -> dict[str, int]:
+    return await scan_open_listings(limit=limit, mode=mode)
 
 
 @router.get("")
-def list_opportunities(status: str | None = None, limit: int = Query(default=100, ge=1, le=500)) -> dict:
-    rows = repo.list_opportunities(status=status, limit=limit)
+def list_opportunities(
+    status: str | None = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = None,
+    include_total: bool = False,
+) -> dict:
+    try:
+        after = decode_cursor(cursor, 2, (float,))
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows, next_cursor = keyset_page(
+        repo.list_opportunities(status=status, limit=limit + 1, after=after),
+        limit,
+        lambda row: (row["score"], row["id"]),
+    )
     items = [
         {
             "opportunity_id": row["id"],
@@ -50,7 +67,10 @@ def list_opportunities(status: str | None = None, limit: int = Query(default=100
         }
         for row in rows
     ]
-    return {"items": items, "count": len(items)}
+    payload: dict = {"items": items, "count": len(items), "next_cursor": next_cursor}
+    if include_total:
+        payload["total"] = repo.count_opportunities(status=status)
+    return payload
 
 
 @router.post("/{opportunity_id}/reject")
@@ -148,8 +168,21 @@ def reject_blocked_batch(
 def list_reject_logs(
     limit: int = Query(default=200, ge=1, le=1000),
     opportunity_id: int | None = None,
+    cursor: str | None = None,
 ) -> dict:
-    rows = repo.list_opportunity_reject_logs(limit=limit, opportunity_id=opportunity_id)
+    try:
+        after = decode_cursor(cursor, 1)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows, next_cursor = keyset_page(
+        repo.list_opportunity_reject_logs(
+            limit=limit + 1,
+            opportunity_id=opportunity_id,
+            after_id=after[0] if after else None,
+        ),
+        limit,
+        lambda row: (row["id"],),
+    )
     items = []
     for row in rows:
         try:
@@ -173,4 +206,5 @@ def list_reject_logs(
     return {
         "items": items,
         "count": len(items),
+        "next_cursor": next_cursor,
     }
@@ -3,9 +3,11 @@ from __future__ import annotations
 from typing import Any
 
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 from ..services.market_sentiment import market_sentiment_service
+from ..services.ragflow_client import async_ragflow_client
 from ..services.ragflow_client import ragflow_client
 
 router = APIRouter(prefix="/ragflow", tags=["ragflow"])
@@ -16,6 +18,8 @@ class RagflowChatIn(BaseModel):
     chat_id: str | None = None
     model: str = "ragflow"
     include_reference: bool = True
+    stream: bool = False
+    deadline_sec: float | None = Field(default=None, gt=0, le=600)
 
 
 class RagflowMarketDatasetIn(BaseModel):
@@ -89,11 +93,12 @@ def ragflow_ensure_market_dataset(payload: RagflowMarketDatasetIn) -> dict[str,
 
 
 @router.post("/datasets/upload-docs")
-def ragflow_upload_documents(payload: RagflowUploadDocumentsIn) -> dict[str, Any]:
+async def ragflow_upload_documents(payload: RagflowUploadDocumentsIn) -> dict[str, Any]:
     try:
         dataset_id = (payload.dataset_id or "").strip()
         if not dataset_id:
-            ensured = ragflow_client.ensure_market_dataset(
+            ensured = await run_in_threadpool(
+                ragflow_client.ensure_market_dataset,
                 dataset_name=payload.dataset_name,
                 chunk_method=payload.chunk_method,
             )
@@ -101,41 +106,12 @@ def ragflow_upload_documents(payload: RagflowUploadDocumentsIn) -> dict[str, Any
             if not dataset_id:
                 raise RuntimeError("failed to resolve dataset_id")
 
-        docs = ragflow_client.upload_documents(
+        return await async_ragflow_client.ingest_documents(
             dataset_id=dataset_id,
             file_paths=payload.file_paths,
+            auto_parse=payload.auto_parse,
+            picture_chunk_for_images=payload.picture_chunk_for_images,
         )
-        image_ext = {".png", ".jpg", ".jpeg", ".bmp", ".webp", ".gif", ".tiff"}
-        image_doc_ids: list[str] = []
-        doc_ids: list[str] = []
-        for row in docs:
-            doc_id = str(row.get("id") or row.get("document_id") or "").strip()
-            if not doc_id:
-                continue
-            doc_ids.append(doc_id)
-            suffix = str(row.get("type") or "").strip().lower()
-            name = str(row.get("name") or "").strip().lower()
-            if suffix == "picture" or any(name.endswith(ext) for ext in image_ext):
-                image_doc_ids.append(doc_id)
-
-        if payload.picture_chunk_for_images:
-            for doc_id in image_doc_ids:
-                ragflow_client.update_document(
-                    dataset_id=dataset_id,
-                    document_id=doc_id,
-                    chunk_method="picture",
-                )
-
-        if payload.auto_parse and doc_ids:
-            ragflow_client.parse_documents(dataset_id=dataset_id, document_ids=doc_ids)
-
-        return {
-            "dataset_id": dataset_id,
-            "uploaded": len(docs),
-            "parsed": len(doc_ids) if payload.auto_parse else 0,
-            "image_docs_reconfigured": len(image_doc_ids) if payload.picture_chunk_for_images else 0,
-            "items": docs,
-        }
     except RuntimeError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
@@ -150,6 +126,8 @@ def ragflow_chat(payload: RagflowChatIn) -> dict[str, Any]:
             chat_id=payload.chat_id,
             model=payload.model,
             include_reference=payload.include_reference,
+            stream=payload.stream,
+            deadline_sec=payload.deadline_sec,
         )
     except RuntimeError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
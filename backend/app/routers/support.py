@@ -15,6 +15,9 @@ from ..auth_utils import require_current_user
 from ..auth_utils import success_response
 from ..auth_utils import utcnow_iso
 from ..database import get_conn
+from ..pagination import InvalidCursorError
+from ..pagination import decode_cursor
+from ..pagination import keyset_page
 
 router = APIRouter(tags=["support"])
 
@@ -118,6 +121,35 @@ def _ticket_messages(conn, ticket_id: int, *, include_internal: bool) -> list[di
     return [_message_payload(row) for row in rows]
 
 
+def _ticket_stats_from_counters(conn, owner_id: int | None, status: str) -> dict[str, int]:
+    """Ticket stats from the trigger-maintained ``support_ticket_counters``, no table scan."""
+    clauses = ["row_count > 0"]
+    params: list[Any] = []
+    if owner_id is not None:
+        clauses.append("user_id = ?")
+        params.append(owner_id)
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    counts: dict[str, int] = {}
+    for row in conn.execute(
+        f"""
+        SELECT status, SUM(row_count) AS c
+        FROM support_ticket_counters
+        WHERE {' AND '.join(clauses)}
+        GROUP BY status
+        """,
+        tuple(params),
+    ):
+        counts[str(row["status"])] = int(row["c"] or 0)
+    return {
+        "total": sum(counts.values()),
+        "active": sum(counts.get(name, 0) for name in ("open", "in_progress", "waiting_user")),
+        "resolved": counts.get("resolved", 0),
+        "closed": counts.get("closed", 0),
+    }
+
+
 @router.get("/support/tickets")
 def list_tickets(
     request: Request,
@@ -125,7 +157,14 @@ def list_tickets(
     category: str = "",
     keyword: str = "",
     limit: int = Query(default=50, ge=1, le=100),
+    cursor: str = "",
+    include_stats: bool = False,
 ) -> dict[str, Any]:
+    try:
+        after = decode_cursor(cursor, 2, (str,))
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail="分页游标无效") from exc
+
     with get_conn() as conn:
         user_row = require_current_user(conn, request)
         where_parts = ["1 = 1"]
@@ -145,17 +184,43 @@ def list_tickets(
             where_parts.append("(t.ticket_no LIKE ? OR t.title LIKE ? OR t.description LIKE ?)")
             params.extend([like, like, like])
 
-        rows = conn.execute(
-            f"""
-            SELECT t.*, u.username, u.nickname, u.email
-            FROM support_tickets AS t
-            JOIN users AS u ON u.id = t.user_id
-            WHERE {' AND '.join(where_parts)}
-            ORDER BY t.updated_at DESC, t.id DESC
-            LIMIT ?
-            """,
-            (*params, limit),
-        ).fetchall()
+        page_parts = list(where_parts)
+        page_params = list(params)
+        if after is not None:
+            page_parts.append("(t.updated_at, t.id) < (?, ?)")
+            page_params.extend([str(after[0]), int(after[1])])
+
+        rows, next_cursor = keyset_page(
+            conn.execute(
+                f"""
+                SELECT t.*, u.username, u.nickname, u.email
+                FROM support_tickets AS t
+                JOIN users AS u ON u.id = t.user_id
+                WHERE {' AND '.join(page_parts)}
+                ORDER BY t.updated_at DESC, t.id DESC
+                LIMIT ?
+                """,
+                (*page_params, limit + 1),
+            ).fetchall(),
+            limit,
+            lambda row: (row["updated_at"], int(row["id"])),
+        )
+
+        data: dict[str, Any] = {
+            "items": [_ticket_summary(row) for row in rows],
+            "nextCursor": next_cursor,
+            "viewer": build_user_profile(user_row),
+            "canManage": _is_admin(user_row),
+        }
+        if after is not None or not include_stats:
+            # Stats are opt-in and describe the whole filtered set, so only the first page carries them.
+            return success_response(data)
+
+        # Owner and status map onto the maintained counters; text and category filters need the aggregate.
+        if not keyword.strip() and not category:
+            owner_id = None if _is_admin(user_row) else int(user_row["id"])
+            data["stats"] = _ticket_stats_from_counters(conn, owner_id, status)
+            return success_response(data)
 
         stats_row = conn.execute(
             f"""
@@ -170,16 +235,11 @@ def list_tickets(
             tuple(params),
         ).fetchone()
 
-        data = {
-            "items": [_ticket_summary(row) for row in rows],
-            "stats": {
-                "total": int(stats_row["total_count"] or 0),
-                "active": int(stats_row["active_count"] or 0),
-                "resolved": int(stats_row["resolved_count"] or 0),
-                "closed": int(stats_row["closed_count"] or 0),
-            },
-            "viewer": build_user_profile(user_row),
-            "canManage": _is_admin(user_row),
+        data["stats"] = {
+            "total": int(stats_row["total_count"] or 0),
+            "active": int(stats_row["active_count"] or 0),
+            "resolved": int(stats_row["resolved_count"] or 0),
+            "closed": int(stats_row["closed_count"] or 0),
         }
     return success_response(data)
 
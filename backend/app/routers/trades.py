@@ -8,6 +8,7 @@ from fastapi.params import Query
 
 from .. import repositories as repo
 from ..config import settings
+from ..pagination import InvalidCursorError, decode_cursor, keyset_page
 from ..schemas import ApproveTradeIn, MarkListedIn, MarkSoldIn
 from ..services.market_sentiment import market_sentiment_service
 from ..services.pricing_strategy import build_pricing_plan
@@ -33,8 +34,21 @@ def approve_trade(payload: ApproveTradeIn) -> dict:
 
 
 @router.get("")
-def list_trades(status: str | None = None, limit: int = Query(default=100, ge=1, le=500)) -> dict:
-    rows = repo.list_trades(status=status, limit=limit)
+def list_trades(
+    status: str | None = None,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = None,
+    include_total: bool = False,
+) -> dict:
+    try:
+        after = decode_cursor(cursor, 2, (str,))
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    rows, next_cursor = keyset_page(
+        repo.list_trades(status=status, limit=limit + 1, after=after),
+        limit,
+        lambda row: (row["updated_at"], row["id"]),
+    )
     items = [
         {
             "trade_id": row["id"],
@@ -54,7 +68,10 @@ def list_trades(status: str | None = None, limit: int = Query(default=100, ge=1,
         }
         for row in rows
     ]
-    return {"items": items, "count": len(items)}
+    payload: dict = {"items": items, "count": len(items), "next_cursor": next_cursor}
+    if include_total:
+        payload["total"] = repo.count_trades(status=status)
+    return payload
 
 
 def _extract_title_keywords(title: str) -> list[str]:
@@ -1,8 +1,20 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Query
-from pydantic import BaseModel
-
+from dataclasses import replace
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from ..config import get_strategy_thresholds
+from ..vnpy_system.backtest import BacktestConfig, load_replay_dataset, run_backtest
+from ..vnpy_system.sweep import (
+    MAX_SWEEP_CONFIGURATIONS,
+    SweepParameterError,
+    grid_configurations,
+    random_configurations,
+    run_sweep,
+)
 from ..vnpy_system.system import system
 
 router = APIRouter(prefix="/vnpy", tags=["vnpy"])
@@ -12,6 +24,36 @@ class KeywordsIn(BaseModel):
     keywords: list[str]
 
 
+class BacktestIn(BaseModel):
+    profile: str | None = Field(default=None, pattern="^(aggressive|balanced|conservative|agg|cons|fast|safe)$")
+    min_score: float | None = None
+    min_roi: float | None = None
+    max_risk_score: float | None = None
+    allow_blocked_review: bool | None = None
+    start: str = ""
+    end: str = ""
+    hold_days: float = Field(default=30.0, gt=0, le=365)
+    seller_window_days: float = Field(default=14.0, ge=0, le=365)
+    capital_limit: float = Field(default=0.0, ge=0)
+    include_trades: bool = False
+
+
+class SweepIn(BaseModel):
+    profile: str | None = Field(default=None, pattern="^(aggressive|balanced|conservative|agg|cons|fast|safe)$")
+    grid: dict[str, Annotated[list[Any], Field(max_length=MAX_SWEEP_CONFIGURATIONS)]] = Field(default_factory=dict)
+    space: dict[str, Any] = Field(default_factory=dict)
+    samples: int = Field(default=0, ge=0, le=MAX_SWEEP_CONFIGURATIONS)
+    seed: int = 0
+    start: str = ""
+    end: str = ""
+    hold_days: float = Field(default=30.0, gt=0, le=365)
+    seller_window_days: float = Field(default=14.0, ge=0, le=365)
+    capital_limit: float = Field(default=0.0, ge=0)
+    max_workers: int = Field(default=0, ge=0, le=64)
+    use_cache: bool = True
+    top: int = Field(default=20, ge=0, le=5000)
+
+
 @router.get("/status")
 def status() -> dict:
     return system.status()
@@ -54,3 +96,65 @@ def get_strategy_profile() -> dict:
 @router.post("/strategy-profile")
 def set_strategy_profile(profile: str = Query(..., pattern="^(aggressive|balanced|conservative|agg|cons|fast|safe)$")) -> dict:
     return system.set_strategy_profile(profile)
+
+
+@router.post("/backtest")
+def backtest(payload: BacktestIn) -> dict:
+    thresholds = get_strategy_thresholds(payload.profile) if payload.profile else system.strategy_thresholds
+    overrides = {
+        name: value
+        for name, value in (
+            ("min_score", payload.min_score),
+            ("min_roi", payload.min_roi),
+            ("max_risk_score", payload.max_risk_score),
+            ("allow_blocked_review", payload.allow_blocked_review),
+        )
+        if value is not None
+    }
+    if overrides:
+        thresholds = replace(thresholds, **overrides)
+    dataset = load_replay_dataset(start=payload.start, end=payload.end)
+    report = run_backtest(
+        dataset,
+        BacktestConfig(
+            thresholds=thresholds,
+            hold_days=payload.hold_days,
+            seller_window_days=payload.seller_window_days,
+            capital_limit=payload.capital_limit,
+        ),
+    ).as_dict()
+    if not payload.include_trades:
+        report.pop("trade_samples", None)
+    report["thresholds"] = {
+        "min_score": thresholds.min_score,
+        "min_roi": thresholds.min_roi,
+        "max_risk_score": thresholds.max_risk_score,
+        "allow_blocked_review": thresholds.allow_blocked_review,
+    }
+    return report
+
+
+@router.post("/sweep")
+def sweep(payload: SweepIn) -> dict:
+    try:
+        configurations = grid_configurations(payload.grid) if payload.grid else []
+        if payload.space and payload.samples:
+            configurations.extend(
+                random_configurations(payload.space, samples=payload.samples, seed=payload.seed)
+            )
+        if not configurations:
+            raise HTTPException(status_code=400, detail="grid or space+samples is required")
+        thresholds = get_strategy_thresholds(payload.profile) if payload.profile else system.strategy_thresholds
+        report = run_sweep(
+            load_replay_dataset(start=payload.start, end=payload.end),
+            configurations,
+            base_thresholds=thresholds,
+            hold_days=payload.hold_days,
+            seller_window_days=payload.seller_window_days,
+            capital_limit=payload.capital_limit,
+            max_workers=payload.max_workers,
+            use_cache=payload.use_cache,
+        )
+    except SweepParameterError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return report.as_dict(top=payload.top)
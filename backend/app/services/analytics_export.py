@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+from ..config import settings
+from ..database import get_conn
+
+logger = logging.getLogger(__name__)
+
+# pyarrow (writing) and duckdb (querying) are optional: see requirements-analytics.txt.
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    name: str
+    day_column: str
+    # Aggregates folded into a per-day fingerprint for tables whose rows are
+    # updated in place. Append-only tables leave this empty and are tracked by
+    # an id watermark instead.
+    change_aggregates: tuple[str, ...] = ()
+
+
+_STATUS_CHECKSUM = "TOTAL(id * (unicode(status) * 31 + length(status)))"
+
+EXPORT_TABLES: dict[str, ExportTable] = {
+    table.name: table
+    for table in (
+        ExportTable("sales_raw", "sold_at"),
+        ExportTable("listings_raw", "listed_at", (_STATUS_CHECKSUM,)),
+        ExportTable("valuation_records", "created_at"),
+        ExportTable(
+            "opportunities",
+            "created_at",
+            (
+                _STATUS_CHECKSUM,
+                "TOTAL(valuation_id)",
+                "TOTAL(score)",
+                "TOTAL(expected_profit)",
+                "MAX(COALESCE(reviewed_at, ''))",
+            ),
+        ),
+        ExportTable(
+            "trades",
+            "created_at",
+            (_STATUS_CHECKSUM, "MAX(COALESCE(updated_at, ''))", "TOTAL(COALESCE(sold_price, 0))"),
+        ),
+    )
+}
+# Raw payloads stay in SQLite; they would dominate the Parquet files.
+EXCLUDED_COLUMNS = frozenset({"raw_json"})
+UNKNOWN_DAY = "unknown"
+PART_FILE = "part-0.parquet"
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def duckdb_available() -> bool:
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_dir() -> Path:
+    configured = settings.analytics_export_dir.strip()
+    if configured:
+        return Path(configured).expanduser()
+    return Path(settings.sqlite_path).expanduser().parent / "analytics"
+
+
+def _day_expr(column: str) -> str:
+    prefix = f"substr({column}, 1, 10)"
+    return (
+        f"CASE WHEN {prefix} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' "
+        f"THEN {prefix} ELSE '{UNKNOWN_DAY}' END"
+    )
+
+
+def _day_bounds(day: str) -> tuple[str, str] | None:
+    try:
+        start = date.fromisoformat(day)
+    except ValueError:
+        return None
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> list[tuple[str, str]]:
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [(str(row["name"]), str(row["type"] or "").upper()) for row in rows if row["name"] not in EXCLUDED_COLUMNS]
+
+
+def _arrow_schema(columns: list[tuple[str, str]]):
+    import pyarrow as pa
+
+    fields = []
+    for name, declared in columns:
+        if "INT" in declared:
+            arrow_type = pa.int64()
+        elif any(token in declared for token in ("REAL", "FLOA", "DOUB")):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _day_rows(conn: sqlite3.Connection, table: ExportTable, columns: list[tuple[str, str]], day: str) -> list[tuple]:
+    select = ", ".join(name for name, _ in columns)
+    bounds = _day_bounds(day)
+    if bounds is None:
+        # "unknown" or a malformed timestamp prefix.
+        where = f"{_day_expr(table.day_column)} = ?"
+        params: tuple[Any, ...] = (day,)
+    else:
+        # A plain range keeps the day column's index usable.
+        where = f"{table.day_column} >= ? AND {table.day_column} < ?"
+        params = bounds
+    return conn.execute(f"SELECT {select} FROM {table.name} WHERE {where} ORDER BY id", params).fetchall()
+
+
+def _write_partition(root: Path, table: str, day: str, schema, rows: list[tuple]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    partition = root / table / f"day={day}"
+    partition.mkdir(parents=True, exist_ok=True)
+    names = schema.names
+    arrays = [pa.array([row[index] for row in rows], type=schema.field(name).type) for index, name in enumerate(names)]
+    tmp_path = partition / f"{PART_FILE}.tmp"
+    pq.write_table(pa.Table.from_arrays(arrays, schema=schema), tmp_path, compression="zstd")
+    os.replace(tmp_path, partition / PART_FILE)
+
+
+def _changed_days(conn: sqlite3.Connection, table: ExportTable, state: dict[str, Any]) -> tuple[set[str], set[str], dict[str, Any]]:
+    """(days to rewrite, days to delete, new state) for one table."""
+    day_expr = _day_expr(table.day_column)
+    previous_days: dict[str, Any] = dict(state.get("days") or {})
+    if not table.change_aggregates:
+        watermark = int(state.get("watermark_id") or 0)
+        rows = conn.execute(
+            f"SELECT {day_expr} AS day, COUNT(*) AS n, MAX(id) AS max_id FROM {table.name} WHERE id > ? GROUP BY day",
+            (watermark,),
+        ).fetchall()
+        changed = {str(row["day"]) for row in rows}
+        days = dict(previous_days)
+        for row in rows:
+            days[str(row["day"])] = {"rows": int((days.get(str(row["day"])) or {}).get("rows", 0)) + int(row["n"])}
+        max_id = max([watermark, *(int(row["max_id"]) for row in rows)])
+        return changed, set(), {"watermark_id": max_id, "days": days}
+
+    aggregates = ", ".join(table.change_aggregates)
+    rows = conn.execute(
+        f"SELECT {day_expr} AS day, COUNT(*) AS n, MAX(id), {aggregates} FROM {table.name} GROUP BY day"
+    ).fetchall()
+    days = {}
+    for row in rows:
+        values = tuple(row)
+        days[str(values[0])] = {"rows": int(values[1]), "fingerprint": json.dumps(values[1:], default=str)}
+    changed = {
+        day
+        for day, info in days.items()
+        if (previous_days.get(day) or {}).get("fingerprint") != info["fingerprint"]
+    }
+    removed = set(previous_days) - set(days)
+    return changed, removed, {"days": days}
+
+
+class AnalyticsExportService:
+    """Snapshots OLTP tables into day-partitioned Parquet files for offline analytics.
+
+    Layout: ``<export_dir>/<table>/day=YYYY-MM-DD/part-0.parquet``. Each run
+    rewrites only the day partitions that changed since the previous run.
+    """
+
+    TABLES: tuple[str, ...] = tuple(EXPORT_TABLES)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._last_error = ""
+        self._last_run_at = 0.0
+        self._last_result: dict[str, Any] = {}
+
+    def _manifest_path(self) -> Path:
+        return export_dir() / "_manifest.json"
+
+    def load_manifest(self) -> dict[str, Any]:
+        path = self._manifest_path()
+        if not path.exists():
+            return {}
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return payload if isinstance(payload, dict) else {}
+
+    def _save_manifest(self, manifest: dict[str, Any]) -> None:
+        path = self._manifest_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def status(self) -> dict[str, Any]:
+        manifest = self.load_manifest()
+        with self._lock:
+            return {
+                "enabled": settings.analytics_export_enabled,
+                "pyarrow_available": pyarrow_available(),
+                "duckdb_available": duckdb_available(),
+                "duckdb_query_enabled": settings.analytics_duckdb_enabled,
+                "export_dir": str(export_dir()),
+                "is_running": self._thread is not None and self._thread.is_alive(),
+                "interval_sec": settings.analytics_export_interval_sec,
+                "exported_at": str(manifest.get("exported_at") or ""),
+                "tables": {
+                    name: len((manifest.get("tables") or {}).get(name, {}).get("days") or {})
+                    for name in self.TABLES
+                },
+                "last_run_at_unix": self._last_run_at,
+                "last_result": dict(self._last_result),
+                "last_error": self._last_error,
+            }
+
+    def start(self) -> dict[str, Any]:
+        reason = ""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                reason = "already_running"
+            elif not settings.analytics_export_enabled:
+                reason = "disabled"
+            elif not pyarrow_available():
+                reason = "pyarrow_not_installed"
+            else:
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run_loop, name="analytics-export-service", daemon=True)
+                self._thread.start()
+        if reason:
+            return {"started": False, "reason": reason}
+        return {"started": True}
+
+    def stop(self) -> dict[str, Any]:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+        if thread is not None:
+            thread.join(timeout=5.0)
+        return {"stopped": True}
+
+    def run_once(self, force: bool = False) -> dict[str, Any]:
+        if not force and not settings.analytics_export_enabled:
+            return {"ok": True, "skipped": True, "reason": "disabled"}
+        if not pyarrow_available():
+            return {"ok": False, "skipped": True, "reason": "pyarrow_not_installed"}
+        if not self._run_lock.acquire(blocking=False):
+            return {"ok": False, "skipped": True, "reason": "already_running"}
+        started = time.time()
+        try:
+            result = self._export()
+            payload = {"ok": True, "skipped": False, "duration_ms": int((time.time() - started) * 1000), **result}
+            with self._lock:
+                self._last_error = ""
+                self._last_result = payload
+                self._last_run_at = time.time()
+            return payload
+        except Exception as exc:
+            message = str(exc)
+            with self._lock:
+                self._last_error = message
+                self._last_run_at = time.time()
+            logger.exception("analytics export failed: %s", message)
+            return {"ok": False, "skipped": False, "error": message}
+        finally:
+            self._run_lock.release()
+
+    def _export(self) -> dict[str, Any]:
+        root = export_dir()
+        manifest = self.load_manifest()
+        table_states: dict[str, Any] = dict(manifest.get("tables") or {})
+        results: dict[str, Any] = {}
+        for name in self.TABLES:
+            table = EXPORT_TABLES[name]
+            written_rows = 0
+            with get_conn() as conn:
+                changed, removed, new_state = _changed_days(conn, table, table_states.get(name) or {})
+                columns = _columns(conn, name)
+                schema = _arrow_schema(columns)
+                for day in sorted(changed):
+                    rows = _day_rows(conn, table, columns, day)
+                    _write_partition(root, name, day, schema, rows)
+                    written_rows += len(rows)
+                    new_state["days"][day]["rows"] = len(rows)
+            for day in removed:
+                shutil.rmtree(root / name / f"day={day}", ignore_errors=True)
+            # The manifest is saved per table, so an interrupted run resumes
+            # from the last fully written table.
+            table_states[name] = new_state
+            manifest = {
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "tables": table_states,
+            }
+            self._save_manifest(manifest)
+            results[name] = {"days_written": len(changed), "days_removed": len(removed), "rows_written": written_rows}
+        return {"tables": results}
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self.run_once(force=True)
+            if self._stop_event.wait(timeout=max(30, int(settings.analytics_export_interval_sec))):
+                break
+
+
+analytics_export_service = AnalyticsExportService()
+
+
+def columnar_ready(tables: Sequence[str]) -> bool:
+    """True when DuckDB queries are enabled and every table has exported partitions."""
+    if not settings.analytics_duckdb_enabled or not duckdb_available():
+        return False
+    root = export_dir()
+    return all(any((root / table).glob(f"day=*/{PART_FILE}")) for table in tables)
+
+
+def _query_duckdb(sql: str, params: Sequence[Any], tables: Sequence[str]) -> list[dict[str, Any]]:
+    import duckdb
+
+    root = export_dir()
+    conn = duckdb.connect(database=":memory:")
+    try:
+        for table in tables:
+            pattern = str(root / table / "day=*" / PART_FILE).replace("'", "''")
+            conn.execute(
+                # The day lives in the rows themselves, so the directory
+                # key is not read back as a column.
+                f"CREATE VIEW {table} AS SELECT * "
+                f"FROM read_parquet('{pattern}', hive_partitioning = false, union_by_name = true)"
+            )
+        cursor = conn.execute(sql, list(params))
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def run_analytics_query(
+    sql: str,
+    params: Sequence[Any],
+    *,
+    tables: Sequence[str],
+    prefer_columnar: bool,
+) -> tuple[list[dict[str, Any]], str]:
+    """Run ``sql`` on the Parquet snapshot when preferred and ready, else on SQLite.
+
+    ``sql`` must stay within the dialect both engines share. Returns the rows
+    and the engine name (``duckdb`` or ``sqlite``).
+    """
+    if prefer_columnar and columnar_ready(tables):
+        try:
+            return _query_duckdb(sql, params, tables), "duckdb"
+        except Exception as exc:
+            logger.warning("duckdb analytics query failed, falling back to sqlite: %s", exc)
+    with get_conn() as conn:
+        rows = conn.execute(sql, tuple(params)).fetchall()
+    return [dict(row) for row in rows], "sqlite"
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Callable, Sequence
+
+from ..config import settings
+from ..database import get_conn
+
+logger = logging.getLogger(__name__)
+
+# Ids reserved per BEGIN IMMEDIATE round trip; unused ones are skipped on exit.
+_ID_BLOCK = 64
+_BUSY_TIMEOUT_SEC = 30.0
+
+
+@dataclass(frozen=True)
+class PendingWrite:
+    table: str
+    sql: str
+    params: tuple[Any, ...]
+    row: dict[str, Any] = field(default_factory=dict)
+
+
+class AuditWriter:
+    """Write-behind buffer for append-only audit rows (execution and reject logs).
+
+    Inserts are queued per database path and written in ``executemany``
+    batches by a background thread once ``audit_flush_batch_size`` rows are
+    pending or ``audit_flush_interval_ms`` has passed. Row ids come from blocks
+    reserved in ``sqlite_sequence`` under ``BEGIN IMMEDIATE``, so an id handed
+    back to the caller is never used by another process or by a plain
+    AUTOINCREMENT insert.
+
+    Nothing is flushed implicitly on read: hot readers overlay the queue
+    (:meth:`pending_rows`), and the remaining audit readers call :meth:`sync`
+    first. A full buffer or a disabled writer falls back to direct writes;
+    :meth:`stop` (lifespan shutdown) and ``atexit`` flush whatever is left.
+
+    Rows are only dropped when SQLite rejects them outright
+    (``IntegrityError``). Any other failure (``database is locked``, an
+    unreachable file) puts them back at the head of the queue for the next
+    flush, since their ids were already handed out.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # Serialises drains so batches for one database commit in queue order.
+        self._flush_lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._pending: dict[str, deque[PendingWrite]] = {}
+        # Popped but not yet committed, so overlays never miss a row mid-flush.
+        self._inflight: dict[str, list[PendingWrite]] = {}
+        self._id_blocks: dict[tuple[str, str], tuple[int, int]] = {}
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self._queued = 0
+        self._written = 0
+        self._batches = 0
+        self._fallback_rows = 0
+        self._failed_rows = 0
+        self._requeued_rows = 0
+        self._last_flush_at: str | None = None
+        self._last_error: str | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.audit_write_behind_enabled)
+
+    def insert(self, table: str, columns: Sequence[str], values: Sequence[Any]) -> int:
+        """Queue an INSERT and return the row id it will be written with."""
+        if not self.enabled:
+            column_sql = ", ".join(columns)
+            placeholders = ", ".join("?" for _ in columns)
+            with get_conn() as conn:
+                cur = conn.execute(f"INSERT INTO {table}({column_sql}) VALUES ({placeholders})", tuple(values))
+                return int(cur.lastrowid)
+
+        path = settings.sqlite_path
+        row_id = self._next_id(path, table)
+        row = {"id": row_id, **dict(zip(columns, values))}
+        column_sql = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        write = PendingWrite(table, f"INSERT INTO {table}({column_sql}) VALUES ({placeholders})", tuple(row.values()), row)
+        with self._lock:
+            self._append(path, write)
+            size = len(self._pending[path])
+        if size >= max(1, settings.audit_buffer_max):
+            # Back-pressure: the caller pays for the write instead of losing rows.
+            self.sync()
+        elif size >= max(1, settings.audit_flush_batch_size):
+            self._wakeup.set()
+        return row_id
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._pending.values())
+
+    def pending_rows(self, table: str, where: Callable[[dict[str, Any]], bool] | None = None) -> list[dict[str, Any]]:
+        """Queued rows for ``table`` in the current database, oldest first."""
+        if not self._pending and not self._inflight:
+            return []
+        path = settings.sqlite_path
+        with self._lock:
+            queue = [*self._inflight.get(path, ()), *(self._pending.get(path) or ())]
+        return [dict(write.row) for write in queue if write.table == table and (where is None or where(write.row))]
+
+    def _append(self, path: str, write: PendingWrite) -> None:
+        self._pending.setdefault(path, deque()).append(write)
+        self._queued += 1
+        if not self._running:
+            self._stop_event.clear()
+            self._wakeup.clear()
+            self._thread = threading.Thread(target=self._run_loop, daemon=True, name="audit-writer")
+            self._running = True
+            self._thread.start()
+
+    # -- ids ------------------------------------------------------------------
+
+    def _next_id(self, path: str, table: str) -> int:
+        with self._id_lock:
+            start, end = self._id_blocks.get((path, table), (0, 0))
+            if start >= end:
+                start, end = self._reserve_ids(path, table, _ID_BLOCK)
+            self._id_blocks[(path, table)] = (start + 1, end)
+            return start
+
+    @staticmethod
+    def _reserve_ids(path: str, table: str, count: int) -> tuple[int, int]:
+        """Claim ``[start, end)`` for ``table`` by advancing its AUTOINCREMENT sequence."""
+        settings.ensure_paths()
+        conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SEC, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+            start = max(int(max_id or 0), int(seq[0] or 0) if seq else 0) + 1
+            end = start + count
+            if seq:
+                conn.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (end - 1, table))
+            else:
+                conn.execute("INSERT INTO sqlite_sequence(name, seq) VALUES (?, ?)", (table, end - 1))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return start, end
+
+    # -- flushing -------------------------------------------------------------
+
+    def _drain_path(self, conn: sqlite3.Connection, path: str) -> int:
+        with self._flush_lock:
+            with self._lock:
+                queue = self._pending.pop(path, None)
+                if not queue:
+                    return 0
+                writes = self._inflight[path] = list(queue)
+            retry: list[PendingWrite] = []
+            failed = 0
+            try:
+                for sql, group in groupby(writes, key=lambda write: write.sql):
+                    conn.executemany(sql, [write.params for write in group])
+                conn.commit()
+                written = len(writes)
+                with self._lock:
+                    self._batches += 1
+            except sqlite3.IntegrityError as exc:
+                conn.rollback()
+                logger.warning("audit batch of %s rows failed (%s); writing rows one by one", len(writes), exc)
+                written, failed, retry = self._write_each(conn, writes)
+            except sqlite3.Error as exc:
+                conn.rollback()
+                written, retry = 0, writes
+                with self._lock:
+                    self._last_error = str(exc)
+            with self._lock:
+                self._inflight.pop(path, None)
+                if retry:
+                    self._requeue(path, retry)
+                self._written += written
+                self._failed_rows += failed
+                self._last_flush_at = datetime.now(timezone.utc).isoformat()
+            if retry:
+                logger.warning("requeued %s audit rows after a failed write: %s", len(retry), self._last_error)
+            return written
+
+    def _write_each(
+        self, conn: sqlite3.Connection, writes: list[PendingWrite]
+    ) -> tuple[int, int, list[PendingWrite]]:
+        """Write rows one at a time; returns (written, dropped, rows left to retry)."""
+        written = failed = 0
+        for index, write in enumerate(writes):
+            try:
+                conn.execute(write.sql, write.params)
+                conn.commit()
+                written += 1
+            except sqlite3.IntegrityError as exc:
+                conn.rollback()
+                failed += 1
+                logger.error("dropping audit row SQLite rejected: %s (%s id=%s)", exc, write.table, write.row.get("id"))
+                with self._lock:
+                    self._last_error = str(exc)
+            except sqlite3.Error as exc:
+                conn.rollback()
+                with self._lock:
+                    self._last_error = str(exc)
+                    self._fallback_rows += written
+                return written, failed, writes[index:]
+        with self._lock:
+            self._fallback_rows += written
+        return written, failed, []
+
+    def _requeue(self, path: str, writes: list[PendingWrite]) -> None:
+        """Put unwritten rows back ahead of anything queued since (caller holds ``_lock``)."""
+        queue = self._pending.setdefault(path, deque())
+        queue.extendleft(reversed(writes))
+        self._requeued_rows += len(writes)
+
+    def _flush_path(self, path: str) -> int:
+        try:
+            conn = sqlite3.connect(path, timeout=_BUSY_TIMEOUT_SEC, check_same_thread=False)
+        except sqlite3.Error as exc:
+            # The rows stay queued and the next flush tries again.
+            with self._lock:
+                self._last_error = str(exc)
+            logger.warning("audit database %s unreachable, keeping rows queued: %s", path, exc)
+            return 0
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            return self._drain_path(conn, path)
+        finally:
+            conn.close()
+
+    def sync(self) -> int:
+        """Write the current database's pending rows before a reader that cannot overlay them."""
+        if not self._pending:
+            return 0
+        path = settings.sqlite_path
+        with self._lock:
+            if not self._pending.get(path):
+                return 0
+        return self._flush_path(path)
+
+    def flush(self) -> int:
+        """Synchronously write everything pending, for every database path."""
+        with self._lock:
+            paths = [path for path, queue in self._pending.items() if queue]
+        return sum(self._flush_path(path) for path in paths)
+
+    def _run_loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._wakeup.wait(max(0.01, settings.audit_flush_interval_ms / 1000.0))
+            self._wakeup.clear()
+            if self._stop_event.is_set():
+                # stop() does the final flush on the caller's thread.
+                return
+            try:
+                self.flush()
+            except Exception as exc:
+                with self._lock:
+                    self._last_error = str(exc)
+                logger.exception("audit flush failed")
+
+    def stop(self, timeout: float = 5.0) -> dict[str, Any]:
+        """Stop the background flusher and write everything still pending."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._running = False
+        self._stop_event.set()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout=timeout)
+        started = time.monotonic()
+        written = self.flush()
+        return {
+            "stopped": thread is not None,
+            "flushed": written,
+            "pending": self.pending(),
+            "flush_ms": round((time.monotonic() - started) * 1000, 2),
+        }
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "running": self._running,
+                "pending": sum(len(queue) for queue in self._pending.values()),
+                "queued": self._queued,
+                "written": self._written,
+                "batches": self._batches,
+                "fallback_rows": self._fallback_rows,
+                "failed_rows": self._failed_rows,
+                "requeued_rows": self._requeued_rows,
+                "last_flush_at": self._last_flush_at,
+                "last_error": self._last_error,
+                "flush_batch_size": settings.audit_flush_batch_size,
+                "flush_interval_ms": settings.audit_flush_interval_ms,
+            }
+
+
+audit_writer = AuditWriter()
+atexit.register(audit_writer.flush)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import threading
+import time
 from datetime import datetime, timezone
 from typing import Any
 
@@ -12,10 +13,39 @@ from ..schemas import ListingIn, ValuationOut
 from .autotrade import auto_trade_service
 from .execution_retry import execution_retry_service
 from .market_monitor import monitor_service
+from .metrics import metrics
 from .operating_state import operating_state_service
 from .opportunity_scan import scan_open_listings
 from .supabase_sync import supabase_sync_service
 
+# Result key that carries the number of rows each stage worked through.
+_STAGE_ROW_KEYS: dict[str, str] = {
+    "monitor": "fetched",
+    "scan": "processed",
+    "autotrade": "considered",
+    "execution_retry": "retried",
+    "supabase_sync": "uploaded",
+}
+
+
+def _record_stage_metrics(name: str, started: float, result: dict[str, Any]) -> None:
+    if not metrics.enabled:
+        return
+    labels = {"stage": name}
+    metrics.observe(
+        "cardflip_automation_stage_duration_seconds",
+        time.perf_counter() - started,
+        labels,
+    )
+    outcome = "success" if result.get("success") else ("busy" if result.get("busy") else "error")
+    metrics.inc("cardflip_automation_stage_runs_total", 1, {**labels, "outcome": outcome})
+    try:
+        rows = int(result.get(_STAGE_ROW_KEYS.get(name, ""), 0) or 0)
+    except (TypeError, ValueError):
+        rows = 0
+    if rows > 0:
+        metrics.inc("cardflip_automation_stage_rows_total", rows, labels)
+
 
 class AutomationService:
     """Orchestrates monitor + scan + autotrade + execution retry + supabase sync."""
@@ -179,6 +209,12 @@ class AutomationService:
         confirm_token: str | None = None,
     ) -> dict[str, Any]:
         def _run_stage(name: str, func: Any) -> dict[str, Any]:
+            started = time.perf_counter()
+            result = _call_stage(name, func)
+            _record_stage_metrics(name, started, result)
+            return result
+
+        def _call_stage(name: str, func: Any) -> dict[str, Any]:
             try:
                 payload = func()
                 if isinstance(payload, dict):
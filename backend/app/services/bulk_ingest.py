@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import threading
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable
+
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .. import repositories as repo
+from ..config import settings
+from ..schemas import ListingIn, SaleIn
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_MAX_ERROR_SAMPLES = 20
+_MAX_TRACKED_JOBS = 50
+
+INGEST_KINDS: dict[str, tuple[type[BaseModel], Callable[[list[Any]], int]]] = {
+    "sales": (SaleIn, lambda rows: repo.insert_sales(rows)),
+    "listings": (ListingIn, lambda rows: repo.insert_listings(rows)),
+}
+
+
+class NdjsonLineTooLongError(ValueError):
+    """Raised when a single NDJSON record exceeds the configured byte limit."""
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes],
+    *,
+    gzip_encoded: bool | None = None,
+    max_line_bytes: int | None = None,
+) -> AsyncIterator[bytes]:
+    """Yield raw NDJSON lines from a byte stream, inflating gzip on the fly.
+
+    When ``gzip_encoded`` is None the gzip magic bytes on the first chunk decide.
+    """
+    limit = max(1024, int(max_line_bytes or settings.ingest_stream_max_line_bytes))
+    decompressor: Any = None
+    decided = gzip_encoded is not None
+    if gzip_encoded:
+        # wbits=47 accepts both gzip and zlib headers.
+        decompressor = zlib.decompressobj(wbits=47)
+    pending = b""
+
+    def _split(data: bytes) -> list[bytes]:
+        nonlocal pending
+        pending += data
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > limit or any(len(line) > limit for line in lines):
+            raise NdjsonLineTooLongError(f"ndjson line exceeds {limit} bytes")
+        return lines
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if not decided:
+            decided = True
+            if chunk[:2] == _GZIP_MAGIC:
+                decompressor = zlib.decompressobj(wbits=47)
+        if decompressor is None:
+            for line in _split(chunk):
+                yield line
+            continue
+        # Inflate at most ``limit`` bytes at a time so a small gzip bomb cannot
+        # expand into one huge buffer before the line limit is checked.
+        while chunk:
+            data = decompressor.decompress(chunk, limit)
+            chunk = decompressor.unconsumed_tail
+            for line in _split(data):
+                yield line
+
+    if decompressor is not None:
+        for line in _split(decompressor.flush()):
+            yield line
+    if pending:
+        yield pending
+
+class NdjsonIngestJob:
+    """Validates NDJSON records one at a time and commits them in fixed-size chunks."""
+
+    def __init__(
+        self,
+        kind: str,
+        *,
+        chunk_size: int | None = None,
+        job_id: str | None = None,
+    ) -> None:
+        if kind not in INGEST_KINDS:
+            raise ValueError(f"unsupported ingest kind: {kind}")
+        self.job_id = (job_id or "").strip()[:64] or uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at = ""
+        self.error = ""
+        self.model, self._insert = INGEST_KINDS[kind]
+        self.chunk_size = max(1, min(50_000, int(chunk_size or settings.ingest_stream_chunk_size)))
+        self.lines = 0
+        self.valid = 0
+        self.invalid = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.chunks_committed = 0
+        self.errors: list[dict[str, Any]] = []
+        self._buffer: list[BaseModel] = []
+
+    def progress(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "lines": self.lines,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "chunks_committed": self.chunks_committed,
+            "chunk_size": self.chunk_size,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "done": bool(self.finished_at),
+            "error": self.error,
+        }
+
+    def summary(self) -> dict[str, Any]:
+        return {**self.progress(), "errors": list(self.errors)}
+
+    def _record_error(self, line_no: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < _MAX_ERROR_SAMPLES:
+            self.errors.append({"line": line_no, "error": message[:300]})
+
+    def feed(self, line: bytes) -> bool:
+        """Validate one line; return True when the buffer is ready to flush."""
+        self.lines += 1
+        text = line.strip()
+        if not text:
+            return False
+        try:
+            row = self.model.model_validate_json(text)
+        except ValidationError as exc:
+            self._record_error(self.lines, str(exc.errors(include_url=False)[:3]))
+            return False
+        self.valid += 1
+        self._buffer.append(row)
+        return len(self._buffer) >= self.chunk_size
+
+    def flush(self) -> int:
+        if not self._buffer:
+            return 0
+        rows, self._buffer = self._buffer, []
+        inserted = int(self._insert(rows))
+        self.inserted += inserted
+        self.duplicates += len(rows) - inserted
+        self.chunks_committed += 1
+        return inserted
+
+    async def run(self, lines: AsyncIterator[bytes]) -> dict[str, Any]:
+        """Consume ``lines``, committing every ``chunk_size`` valid rows."""
+        ingest_jobs.register(self)
+        try:
+            async for line in lines:
+                if self.feed(line):
+                    await run_in_threadpool(self.flush)
+            await run_in_threadpool(self.flush)
+        except Exception as exc:
+            self.error = str(exc)
+            raise
+        finally:
+            self.finished_at = datetime.now(timezone.utc).isoformat()
+        return self.summary()
+
+
+class IngestJobRegistry:
+    """Keeps the most recent stream jobs so uploads can be polled while in flight."""
+
+    def __init__(self, max_jobs: int = _MAX_TRACKED_JOBS) -> None:
+        self._lock = threading.Lock()
+        self._max_jobs = max_jobs
+        self._jobs: OrderedDict[str, NdjsonIngestJob] = OrderedDict()
+
+    def register(self, job: NdjsonIngestJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._jobs.move_to_end(job.job_id)
+            while len(self._jobs) > self._max_jobs:
+                self._jobs.popitem(last=False)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.summary() if job else None
+
+    def recent(self) -> list[dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.progress() for job in reversed(jobs)]
+
+
+ingest_jobs = IngestJobRegistry()
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import settings
+from .cookie_provider import CookieProvider
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_IDENTITY = "primary"
+_HEALTH_ALPHA = 0.2
+_MAX_COOLDOWN_FACTOR = 8
+
+
+@dataclass
+class CookieIdentity:
+    """One Xianyu account in the pool and its runtime bookkeeping."""
+
+    name: str
+    cookie: str = ""
+    expire_ms: int | None = None
+    health: float = 1.0
+    in_flight: int = 0
+    requests_total: int = 0
+    failures_total: int = 0
+    strikes: int = 0
+    cooldown_until: float = 0.0
+    refreshing: bool = False
+    refreshes: int = 0
+    refresh_retry_at: float = 0.0
+    last_refresh_at: float = 0.0
+    last_error: str = ""
+    recent: deque[float] = field(default_factory=deque)
+
+    def ttl_sec(self, now: float) -> float | None:
+        if self.expire_ms is None:
+            return None
+        return self.expire_ms / 1000.0 - now
+
+    def used_last_minute(self, now: float) -> int:
+        while self.recent and now - self.recent[0] >= 60.0:
+            self.recent.popleft()
+        return len(self.recent)
+
+
+@dataclass
+class CookieLease:
+    """A cookie handed to one crawler; report each request on it, then release."""
+
+    identity: str
+    cookie: str
+    degraded: bool = False
+    released: bool = False
+    _pool: CookiePool | None = field(default=None, repr=False, compare=False)
+
+    def record(self, ok: bool, status: int | None = None, *, token_expired: bool = False) -> None:
+        if self._pool is not None:
+            self._pool.record(self, ok, status=status, token_expired=token_expired)
+
+    def allow(self) -> bool:
+        """Whether the leased identity still has budget, health and no cooldown for another request."""
+        return self._pool is None or self._pool.allows(self)
+
+    def release(self) -> None:
+        if self._pool is not None:
+            self._pool.release(self)
+
+    def __enter__(self) -> CookieLease:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def parse_pool_entries(entries: tuple[str, ...]) -> list[tuple[str, str]]:
+    """``name::cookie`` entries as (name, cookie); unnamed cookies become ``account<n>``."""
+    parsed: list[tuple[str, str]] = []
+    seen: set[str] = set()
+    for index, entry in enumerate(entries, start=1):
+        name, sep, cookie = entry.partition("::")
+        if not sep:
+            name, cookie = f"account{index}", entry
+        name = name.strip() or f"account{index}"
+        if name in seen or name == PRIMARY_IDENTITY:
+            continue
+        seen.add(name)
+        parsed.append((name, cookie.strip()))
+    return parsed
+
+
+class CookiePool:
+    """Multi-account cookie pool that leases cookies without waiting on refreshes.
+
+    Every identity carries a per-minute request budget, an EWMA health score
+    and a cooldown after 403/429 responses. Tokens are refreshed in background
+    threads ahead of their ``_m_h5_tk`` expiry (and right after a token error),
+    so ``lease`` always answers immediately: with the best usable identity, or,
+    when none qualifies, with the healthiest cookie marked ``degraded``.
+
+    The ``primary`` identity is the single cookie ``CookieProvider`` manages
+    (env, ``.env``, cookie service, local browser refresh); named accounts
+    from ``XIAN_YU_COOKIE_POOL`` refresh through the cookie service with an
+    ``account`` parameter.
+    """
+
+    def __init__(self, provider: CookieProvider | None = None) -> None:
+        self._provider = provider or CookieProvider()
+        self._lock = threading.Lock()
+        self._identities: dict[str, CookieIdentity] = {}
+        self._loaded = False
+        self._cursor = 0
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+    # -- configuration -----------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        # Only what is already at hand; fetching is left to the background refresh.
+        primary = self._provider.peek_cookie()
+        with self._lock:
+            if self._loaded:
+                return
+            self._identities = {}
+            self._add_identity(PRIMARY_IDENTITY, primary)
+            for name, cookie in parse_pool_entries(settings.xianyu_cookie_pool):
+                self._add_identity(name, cookie)
+            self._loaded = True
+
+    def _add_identity(self, name: str, cookie: str) -> None:
+        identity = CookieIdentity(name=name)
+        self._set_cookie(identity, cookie)
+        self._identities[name] = identity
+
+    def _set_cookie(self, identity: CookieIdentity, cookie: str) -> None:
+        identity.cookie = cookie.strip()
+        identity.expire_ms = self._provider._extract_m_h5_expire_ms(identity.cookie)
+
+    def reload(self) -> dict[str, Any]:
+        with self._lock:
+            self._loaded = False
+        self._ensure_loaded()
+        return self.status()
+
+    def _refresh_cookie(self, name: str) -> str:
+        if name == PRIMARY_IDENTITY:
+            return self._provider.get_cookie(force_refresh=True) or ""
+        return self._provider.fetch_provider_cookie(account=name)
+
+    # -- leasing -----------------------------------------------------------
+
+    def lease(self, *, exclude: set[str] | frozenset[str] = frozenset()) -> CookieLease | None:
+        """Lease a cookie now; None only when no identity holds any cookie."""
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            candidates = [identity for identity in self._identities.values() if identity.cookie]
+            preferred = [identity for identity in candidates if identity.name not in exclude] or candidates
+            usable = [identity for identity in preferred if self._usable(identity, now)]
+            degraded = not usable
+            if usable:
+                chosen = self._pick(usable, now)
+            elif preferred:
+                chosen = max(preferred, key=lambda identity: (identity.cooldown_until <= now, identity.health))
+            else:
+                chosen = None
+            if chosen is not None:
+                chosen.in_flight += 1
+                lease = CookieLease(identity=chosen.name, cookie=chosen.cookie, degraded=degraded, _pool=self)
+            else:
+                lease = None
+        self.refresh_due()
+        return lease
+
+    def rotate(self, lease: CookieLease) -> CookieLease | None:
+        """Release ``lease`` and lease another identity (the same one only if nothing else has a cookie)."""
+        lease.release()
+        return self.lease(exclude={lease.identity})
+
+    def record(
+        self,
+        lease: CookieLease,
+        ok: bool,
+        *,
+        status: int | None = None,
+        token_expired: bool = False,
+    ) -> None:
+        now = time.time()
+        schedule = False
+        with self._lock:
+            identity = self._identities.get(lease.identity)
+            if identity is None:
+                return
+            identity.recent.append(now)
+            identity.requests_total += 1
+            identity.health = (1 - _HEALTH_ALPHA) * identity.health + _HEALTH_ALPHA * (1.0 if ok else 0.0)
+            if ok:
+                identity.strikes = 0
+                return
+            identity.failures_total += 1
+            if status in {403, 429}:
+                identity.strikes += 1
+                factor = min(_MAX_COOLDOWN_FACTOR, 2 ** (identity.strikes - 1))
+                identity.cooldown_until = now + max(0.0, float(settings.xianyu_cookie_pool_cooldown_sec)) * factor
+            if token_expired or status == 401:
+                # The token is dead even if its timestamp says otherwise.
+                if identity.cookie == lease.cookie:
+                    identity.expire_ms = 0
+                identity.refresh_retry_at = 0.0
+                schedule = True
+        if schedule:
+            self.refresh_due()
+
+    def release(self, lease: CookieLease) -> None:
+        with self._lock:
+            if lease.released:
+                return
+            lease.released = True
+            identity = self._identities.get(lease.identity)
+            if identity is not None:
+                identity.in_flight = max(0, identity.in_flight - 1)
+
+    def allows(self, lease: CookieLease) -> bool:
+        with self._lock:
+            identity = self._identities.get(lease.identity)
+            return identity is not None and self._usable(identity, time.time())
+
+    def _usable(self, identity: CookieIdentity, now: float) -> bool:
+        if identity.cooldown_until > now:
+            return False
+        ttl = identity.ttl_sec(now)
+        if ttl is not None and ttl <= 0:
+            return False
+        if identity.health < float(settings.xianyu_cookie_pool_min_health):
+            return False
+        budget = int(settings.xianyu_cookie_pool_budget_per_min)
+        return budget <= 0 or identity.used_last_minute(now) < budget
+
+    def _pick(self, usable: list[CookieIdentity], now: float) -> CookieIdentity:
+        if str(settings.xianyu_cookie_pool_strategy).strip().lower() == "round_robin":
+            ordered = sorted(usable, key=lambda identity: identity.name)
+            chosen = ordered[self._cursor % len(ordered)]
+            self._cursor += 1
+            return chosen
+        return min(
+            usable,
+            key=lambda identity: (identity.in_flight, identity.used_last_minute(now), -identity.health, identity.name),
+        )
+
+    # -- refreshing --------------------------------------------------------
+
+    def _needs_refresh(self, identity: CookieIdentity, now: float) -> bool:
+        if identity.refreshing or identity.refresh_retry_at > now:
+            return False
+        if not identity.cookie:
+            return True
+        ttl = identity.ttl_sec(now)
+        if ttl is not None and ttl <= max(0, int(settings.xianyu_cookie_pool_refresh_ahead_sec)):
+            return True
+        return identity.health < float(settings.xianyu_cookie_pool_min_health) and identity.cooldown_until <= now
+
+    def refresh_due(self) -> list[str]:
+        """Start background refreshes for identities nearing expiry; never blocks."""
+        now = time.time()
+        with self._lock:
+            due = [identity for identity in self._identities.values() if self._needs_refresh(identity, now)]
+            for identity in due:
+                identity.refreshing = True
+        for identity in due:
+            threading.Thread(
+                target=self._refresh_identity,
+                args=(identity.name,),
+                name=f"cookie-refresh-{identity.name}",
+                daemon=True,
+            ).start()
+        return [identity.name for identity in due]
+
+    def refresh_now(self, name: str) -> dict[str, Any]:
+        """Refresh one identity synchronously (manual trigger)."""
+        self._ensure_loaded()
+        with self._lock:
+            identity = self._identities.get(name)
+            if identity is None:
+                return {"refreshed": False, "reason": f"unknown identity {name}"}
+            if identity.refreshing:
+                return {"refreshed": False, "reason": "refresh already running"}
+            identity.refreshing = True
+        return self._refresh_identity(name)
+
+    def _refresh_identity(self, name: str) -> dict[str, Any]:
+        cookie = ""
+        error = ""
+        try:
+            cookie = self._refresh_cookie(name)
+            if not cookie:
+                error = self._provider.last_error or "refresh returned no cookie"
+        except Exception as exc:
+            error = str(exc)
+        now = time.time()
+        with self._lock:
+            identity = self._identities.get(name)
+            if identity is None:
+                return {"refreshed": False, "reason": "identity removed"}
+            identity.refreshing = False
+            if cookie and cookie != identity.cookie:
+                self._set_cookie(identity, cookie)
+                # A new token clears token trouble, not a ban: keep the cooldown.
+                identity.health = max(identity.health, 0.6)
+                identity.refreshes += 1
+                identity.last_refresh_at = now
+                identity.last_error = ""
+                identity.refresh_retry_at = 0.0
+                return {"refreshed": True, "identity": name}
+            identity.last_error = error or "refresh returned the same cookie"
+            identity.refresh_retry_at = now + max(5.0, float(settings.xianyu_cookie_pool_cooldown_sec))
+        logger.warning("cookie pool refresh for %s failed: %s", name, error or "unchanged cookie")
+        return {"refreshed": False, "identity": name, "reason": error or "unchanged cookie"}
+
+    # -- service -----------------------------------------------------------
+
+    def shard_cookies(self) -> tuple[str, ...]:
+        """Current cookies, one per identity, for pinning to monitor shards."""
+        self._ensure_loaded()
+        with self._lock:
+            return tuple(identity.cookie for identity in self._identities.values() if identity.cookie)
+
+    def status(self) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            identities = []
+            for identity in self._identities.values():
+                ttl = identity.ttl_sec(now)
+                identities.append(
+                    {
+                        "name": identity.name,
+                        "has_cookie": bool(identity.cookie),
+                        "usable": bool(identity.cookie) and self._usable(identity, now),
+                        "ttl_sec": None if ttl is None else int(ttl),
+                        "health": round(identity.health, 4),
+                        "in_flight": identity.in_flight,
+                        "requests_last_minute": identity.used_last_minute(now),
+                        "requests_total": identity.requests_total,
+                        "failures_total": identity.failures_total,
+                        "cooldown_sec": round(max(0.0, identity.cooldown_until - now), 1),
+                        "refreshing": identity.refreshing,
+                        "refreshes": identity.refreshes,
+                        "last_error": identity.last_error,
+                    }
+                )
+            return {
+                "enabled": settings.xianyu_cookie_pool_enabled,
+                "is_running": self._thread is not None and self._thread.is_alive(),
+                "strategy": settings.xianyu_cookie_pool_strategy,
+                "budget_per_min": settings.xianyu_cookie_pool_budget_per_min,
+                "refresh_ahead_sec": settings.xianyu_cookie_pool_refresh_ahead_sec,
+                "identities": identities,
+            }
+
+    def start(self) -> dict[str, Any]:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return {"started": False, "reason": "already_running"}
+            if not settings.xianyu_cookie_pool_enabled:
+                return {"started": False, "reason": "disabled"}
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run_loop, name="cookie-pool", daemon=True)
+            self._thread.start()
+        return {"started": True}
+
+    def stop(self) -> dict[str, Any]:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+            self._stop_event.set()
+        if thread is not None:
+            thread.join(timeout=3.0)
+        return {"stopped": True}
+
+    def _run_loop(self) -> None:
+        logger.info("cookie pool refresher started")
+        self._ensure_loaded()
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_due()
+            except Exception as exc:  # pragma: no cover
+                logger.exception("cookie pool refresh loop error: %s", exc)
+            if self._stop_event.wait(timeout=max(1.0, float(settings.xianyu_cookie_pool_check_sec))):
+                break
+        logger.info("cookie pool refresher stopped")
+
+
+cookie_pool = CookiePool()
@@ -104,6 +104,10 @@ class CookieProvider:
             meta["m_h5_tk_expire_at"] = ""
         return meta
 
+    def peek_cookie(self) -> str:
+        """Cookie from ``.env`` or memory, without contacting the provider or refreshing."""
+        return self._read_cookie_from_env() or (self._cached_cookie or "")
+
     @property
     def last_error(self) -> str:
         return self._last_error
@@ -237,29 +241,39 @@ class CookieProvider:
                 # ignore refresh failure, fallback to latest endpoint
                 pass
 
+        cookie_str = self.fetch_provider_cookie()
+        if cookie_str:
+            self._cached_cookie = cookie_str
+            self._last_fetched = time.time()
+        return self._cached_cookie
+
+    def fetch_provider_cookie(self, account: str = "") -> str:
+        """Latest cookie from the cookie service, optionally for one ``account``.
+
+        Returns an empty string (with ``last_error`` set) when none is available.
+        """
         if not settings.xianyu_cookie_provider_url:
             self._last_error = "cookie provider url not set"
-            return self._cached_cookie
+            return ""
 
         try:
             provider_proxies = resolve_proxy_for_url(settings.xianyu_cookie_provider_url)
             resp = request_get(
                 settings.xianyu_cookie_provider_url,
+                params={"account": account} if account else None,
                 timeout=8,
                 proxies=provider_proxies,
             )
             if resp.status_code != 200:
                 self._last_error = f"cookie provider status {resp.status_code}"
-                return self._cached_cookie
+                return ""
             data = resp.json()
             cookie_str = str(data.get("cookie_string") or "").strip()
             if cookie_str:
-                self._cached_cookie = cookie_str
-                self._last_fetched = time.time()
                 self._last_error = ""
-                return self._cached_cookie
+                return cookie_str
             self._last_error = "cookie_string missing in provider response"
-            return self._cached_cookie
+            return ""
         except Exception as exc:
             self._last_error = str(exc)
-            return self._cached_cookie
+            return ""
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from ..config import settings
+
+
+@dataclass
+class KeywordYield:
+    keyword: str
+    requests: int = 0
+    fetched: int = 0
+    inserted: int = 0
+    errors: int = 0
+    yield_ewma: float = 0.0
+    duplicate_ratio_ewma: float = 0.0
+    error_rate_ewma: float = 0.0
+    stale_streak: int = 0
+    last_polled_at: float = 0.0
+    next_due_at: float = 0.0
+
+
+class _TokenBucket:
+    def __init__(self) -> None:
+        self._tokens = -1.0
+        self._updated_at = 0.0
+
+    @staticmethod
+    def _capacity() -> float:
+        return max(1.0, float(settings.monitor_max_requests_per_min))
+
+    def _refill(self, now: float) -> None:
+        capacity = self._capacity()
+        if self._tokens < 0:
+            self._tokens = capacity
+        else:
+            elapsed = max(0.0, now - self._updated_at)
+            self._tokens = min(capacity, self._tokens + elapsed * capacity / 60.0)
+        self._updated_at = now
+
+    def available(self, now: float) -> int:
+        self._refill(now)
+        return int(self._tokens)
+
+    def take(self, count: int, now: float) -> None:
+        self._refill(now)
+        self._tokens = max(0.0, self._tokens - max(0, count))
+
+    def seconds_until(self, count: int, now: float) -> float:
+        self._refill(now)
+        missing = max(0.0, count - self._tokens)
+        return missing * 60.0 / self._capacity()
+
+
+class KeywordCrawlScheduler:
+    """UCB-style request budget allocation across monitor keywords.
+
+    Each keyword's reward is new listings inserted per request, discounted by
+    its recent error rate. Keywords that keep yielding nothing are backed off
+    exponentially; a global token bucket enforces MONITOR_MAX_REQUESTS_PER_MIN.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: dict[str, KeywordYield] = {}
+        self._bucket = _TokenBucket()
+        self._total_requests = 0
+
+    def _sync(self, keywords: list[str]) -> None:
+        for keyword in keywords:
+            if keyword not in self._stats:
+                self._stats[keyword] = KeywordYield(keyword=keyword)
+
+    def _priority(self, stats: KeywordYield) -> float:
+        if stats.requests <= 0:
+            return float("inf")
+        exploration = max(0.0, float(settings.monitor_adaptive_exploration))
+        bonus = exploration * math.sqrt(
+            math.log(self._total_requests + 1.0) / float(stats.requests)
+        )
+        return stats.yield_ewma * (1.0 - stats.error_rate_ewma) + bonus
+
+    def plan(self, keywords: list[str], now: float | None = None) -> list[tuple[str, int]]:
+        """Return ``(keyword, pages)`` pairs for this cycle, highest priority first."""
+        current = time.monotonic() if now is None else now
+        max_pages = max(1, min(10, int(settings.monitor_adaptive_max_pages)))
+        with self._lock:
+            self._sync(keywords)
+            due = [
+                self._stats[keyword]
+                for keyword in keywords
+                if self._stats[keyword].next_due_at <= current
+            ]
+            if not due:
+                return []
+            configured_budget = int(settings.monitor_request_budget)
+            if configured_budget <= 0:
+                configured_budget = len(keywords) * max(1, min(10, settings.monitor_pages))
+            budget = min(configured_budget, self._bucket.available(current))
+            if budget <= 0:
+                return []
+
+            ranked = sorted(due, key=self._priority, reverse=True)
+            pages = {stats.keyword: 0 for stats in ranked}
+            remaining = budget
+            for stats in ranked:
+                if remaining <= 0:
+                    break
+                pages[stats.keyword] = 1
+                remaining -= 1
+
+            # Spare budget deepens only keywords that still surface fresh inventory.
+            productive = [
+                stats
+                for stats in ranked
+                if pages[stats.keyword] > 0
+                and stats.yield_ewma >= float(settings.monitor_adaptive_fresh_yield)
+            ]
+            while remaining > 0 and productive:
+                progressed = False
+                for stats in productive:
+                    if remaining <= 0:
+                        break
+                    if pages[stats.keyword] >= max_pages:
+                        continue
+                    pages[stats.keyword] += 1
+                    remaining -= 1
+                    progressed = True
+                if not progressed:
+                    break
+
+            plan = [(stats.keyword, pages[stats.keyword]) for stats in ranked if pages[stats.keyword] > 0]
+            self._bucket.take(sum(count for _, count in plan), current)
+            return plan
+
+    def record(
+        self,
+        keyword: str,
+        *,
+        requests: int,
+        fetched: int,
+        inserted: int,
+        errors: int = 0,
+        now: float | None = None,
+    ) -> None:
+        current = time.monotonic() if now is None else now
+        alpha = max(0.01, min(1.0, float(settings.monitor_adaptive_ewma_alpha)))
+        requests = max(0, int(requests))
+        with self._lock:
+            self._sync([keyword])
+            stats = self._stats[keyword]
+            stats.requests += requests
+            stats.fetched += max(0, int(fetched))
+            stats.inserted += max(0, int(inserted))
+            stats.errors += max(0, int(errors))
+            self._total_requests += requests
+            if requests > 0:
+                per_request = inserted / float(requests)
+                error_rate = min(1.0, errors / float(requests))
+                stats.yield_ewma = (1 - alpha) * stats.yield_ewma + alpha * per_request
+                stats.error_rate_ewma = (1 - alpha) * stats.error_rate_ewma + alpha * error_rate
+            if fetched > 0:
+                duplicate_ratio = max(0.0, 1.0 - inserted / float(fetched))
+                stats.duplicate_ratio_ewma = (
+                    (1 - alpha) * stats.duplicate_ratio_ewma + alpha * duplicate_ratio
+                )
+            if inserted > 0 and errors == 0:
+                stats.stale_streak = 0
+            else:
+                stats.stale_streak += 1
+            min_interval = max(1.0, float(settings.monitor_adaptive_min_interval_sec))
+            max_interval = max(min_interval, float(settings.monitor_adaptive_max_interval_sec))
+            interval = min(max_interval, min_interval * (2 ** min(stats.stale_streak, 16)))
+            stats.last_polled_at = current
+            stats.next_due_at = current + interval
+
+    def next_delay_sec(self, keywords: list[str], now: float | None = None) -> float:
+        """Seconds until the next keyword is due and the rate ceiling allows a request."""
+        current = time.monotonic() if now is None else now
+        min_interval = max(1.0, float(settings.monitor_adaptive_min_interval_sec))
+        with self._lock:
+            self._sync(keywords)
+            if keywords:
+                due_in = min(self._stats[keyword].next_due_at for keyword in keywords) - current
+            else:
+                due_in = min_interval
+            wait = max(due_in, self._bucket.seconds_until(1, current), 1.0)
+        # Jitter keeps the cadence from looking machine-regular.
+        return wait * random.uniform(1.0, 1.15)
+
+    def status(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            keywords = []
+            for stats in sorted(self._stats.values(), key=self._priority, reverse=True):
+                item = asdict(stats)
+                item["yield_ewma"] = round(stats.yield_ewma, 4)
+                item["duplicate_ratio_ewma"] = round(stats.duplicate_ratio_ewma, 4)
+                item["error_rate_ewma"] = round(stats.error_rate_ewma, 4)
+                item["due_in_sec"] = round(max(0.0, stats.next_due_at - now), 1)
+                item.pop("last_polled_at", None)
+                item.pop("next_due_at", None)
+                keywords.append(item)
+            return {
+                "enabled": settings.monitor_adaptive_enabled,
+                "total_requests": self._total_requests,
+                "tokens_available": self._bucket.available(now),
+                "max_requests_per_min": settings.monitor_max_requests_per_min,
+                "keywords": keywords,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._bucket = _TokenBucket()
+            self._total_requests = 0
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from collections import deque
+from typing import Any
+
+from ..config import settings
+from ..database import get_conn
+from .audit_writer import audit_writer
+
+_MAX_WINDOW = 500
+
+
+class ExecutionHealthAggregator:
+    """Rolling health counters for the operating-state evaluator.
+
+    ``create_execution_log`` pushes every new log (with its business-ban flag
+    already classified), and the market monitor pushes its health snapshot
+    whenever it changes, so :meth:`execution_snapshot` and
+    :meth:`monitor_snapshot` never touch the database or parse JSON. The
+    execution window is loaded once from ``execution_logs`` on first read, and
+    again if the window size or database path changes. The window is kept in
+    id order, so logs whose ids reach it out of order (concurrent writers)
+    still land where the table summary would put them.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._window: deque[tuple[int, bool, bool, str]] = deque()
+        self._window_size = 0
+        self._failures = 0
+        self._business_bans = 0
+        self._ids: set[int] = set()
+        self._last_failure: tuple[int, str] = (0, "")
+        self._loaded_path = ""
+        self._monitor: dict[str, Any] = {
+            "circuit_open": False,
+            "samples": 0,
+            "success_rate": 1.0,
+            "guard_triggered": False,
+        }
+
+    @staticmethod
+    def _configured_window() -> int:
+        return max(1, min(_MAX_WINDOW, int(settings.operating_state_execution_window)))
+
+    def _push(self, entry: tuple[int, bool, bool, str]) -> None:
+        if entry[0] in self._ids:
+            return
+        self._ids.add(entry[0])
+        if self._window and entry[0] < self._window[-1][0]:
+            bisect.insort(self._window, entry)
+        else:
+            self._window.append(entry)
+        if not entry[1]:
+            self._failures += 1
+            if entry[0] > self._last_failure[0]:
+                self._last_failure = (entry[0], entry[3])
+        if entry[2]:
+            self._business_bans += 1
+        while len(self._window) > self._window_size:
+            log_id, success, business_ban, _ = self._window.popleft()
+            self._ids.discard(log_id)
+            if not success:
+                self._failures -= 1
+            if business_ban:
+                self._business_bans -= 1
+
+    def _reload(self) -> None:
+        self._window.clear()
+        self._failures = 0
+        self._business_bans = 0
+        self._ids.clear()
+        self._last_failure = (0, "")
+        self._window_size = self._configured_window()
+        self._loaded_path = settings.sqlite_path
+        audit_writer.sync()
+        with get_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, success, business_ban, created_at
+                FROM execution_logs
+                ORDER BY id DESC
+                LIMIT ?
+                """,
+                (self._window_size,),
+            ).fetchall()
+        for row in reversed(rows):
+            self._push(
+                (int(row["id"]), bool(row["success"]), bool(row["business_ban"]), str(row["created_at"] or ""))
+            )
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_path != settings.sqlite_path
+            or self._window_size != self._configured_window()
+        )
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_path = ""
+
+    def record_execution(
+        self,
+        log_id: int,
+        *,
+        success: bool,
+        business_ban: bool,
+        created_at: str,
+    ) -> None:
+        with self._lock:
+            if self._is_stale():
+                # Not loaded yet; the first read picks this row up from the table.
+                return
+            self._push((int(log_id), bool(success), bool(business_ban), created_at))
+
+    def execution_snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            if self._is_stale():
+                self._reload()
+            sample_size = len(self._window)
+            failure_count = self._failures
+            # Any failure left in the window means the latest one is still in it.
+            last_failure_at = self._last_failure[1] if failure_count else ""
+            business_ban_count = self._business_bans
+        success_count = sample_size - failure_count
+        return {
+            "sample_size": sample_size,
+            "success_count": success_count,
+            "failure_count": failure_count,
+            "success_rate": round(success_count / sample_size, 4) if sample_size else 0.0,
+            "failure_rate": round(failure_count / sample_size, 4) if sample_size else 0.0,
+            "business_ban_count": business_ban_count,
+            "last_failure_at": last_failure_at,
+        }
+
+    def record_monitor_health(
+        self,
+        *,
+        circuit_open: bool,
+        samples: int,
+        success_rate: float,
+        guard_triggered: bool,
+    ) -> None:
+        with self._lock:
+            self._monitor = {
+                "circuit_open": bool(circuit_open),
+                "samples": int(samples),
+                "success_rate": float(success_rate),
+                "guard_triggered": bool(guard_triggered),
+            }
+
+    def monitor_snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return dict(self._monitor)
+
+
+execution_health = ExecutionHealthAggregator()
@@ -1,26 +1,12 @@
 from __future__ import annotations
 
-import re
 from typing import Any
 
 from ..schemas import FeatureData
 from .gemini_client import GeminiClient
+from .text_matcher import CONDITION_TOKENS, NOISE_WORDS, RARITY_TOKENS, guess_card_name, rule_based_features
 
-RARITY_TOKENS = ("UR", "SSR", "SR", "R", "N")
-CONDITION_TOKENS = ("mint", "near mint", "nm", "lp", "played", "damaged")
-NOISE_WORDS = {
-    "mint",
-    "near",
-    "nm",
-    "lp",
-    "played",
-    "damaged",
-    "first",
-    "owner",
-    "clean",
-    "scratch",
-    "scratches",
-}
+__all__ = ["CONDITION_TOKENS", "NOISE_WORDS", "RARITY_TOKENS", "FeatureExtractor"]
 
 
 class FeatureExtractor:
@@ -48,37 +34,7 @@ class FeatureExtractor:
         )
 
     def _fallback(self, title: str, description: str) -> FeatureData:
-        text = f"{title} {description}".strip()
-        rarity = "unknown"
-        for token in RARITY_TOKENS:
-            if re.search(rf"(?<![A-Za-z]){re.escape(token)}(?![A-Za-z])", text, re.IGNORECASE):
-                rarity = token.upper()
-                break
-
-        condition = "unknown"
-        for token in CONDITION_TOKENS:
-            if token in text.lower():
-                condition = token
-                break
-
-        card_name = self._guess_name(title)
-        return FeatureData(
-            card_name=card_name,
-            rarity=rarity,
-            edition="unknown",
-            card_condition=condition,
-            extras={},
-            confidence=0.35,
-        )
+        return rule_based_features(title, description)
 
     def _guess_name(self, title: str) -> str:
-        cleaned = re.sub(r"\[[^\]]+\]|\([^)]*\)", " ", title)
-        for token in RARITY_TOKENS:
-            cleaned = re.sub(rf"(?<![A-Za-z]){re.escape(token)}(?![A-Za-z])", " ", cleaned, flags=re.IGNORECASE)
-        for token in CONDITION_TOKENS:
-            cleaned = re.sub(re.escape(token), " ", cleaned, flags=re.IGNORECASE)
-        words = [w for w in re.split(r"\s+", cleaned) if w and w.lower() not in NOISE_WORDS]
-        cleaned = " ".join(words).strip()
-        if not cleaned:
-            return "unknown"
-        return cleaned[:64]
+        return guess_card_name(title)
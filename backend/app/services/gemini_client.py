@@ -8,6 +8,10 @@ from typing import Any, Iterable
 import httpx
 
 from ..config import settings
+from .gemini_quota import GeminiQuotaScheduler
+from .gemini_quota import gemini_quota
+from .metrics import mask_key
+from .metrics import metrics
 from .proxy_resolver import proxy_url_from_mapping
 from .proxy_resolver import ProxyRequiredError
 from .proxy_resolver import resolve_proxy_for_url
@@ -16,9 +20,14 @@ from .proxy_resolver import resolve_proxy_for_url
 # before being retried.  A value of 0 disables quarantine.
 _RATE_LIMIT_BACKOFF_BASE: float = 4.0
 _RATE_LIMIT_BACKOFF_MAX: float = 60.0
+# Output budget added to the prompt estimate when reserving TPM quota.
+_RESPONSE_TOKEN_ESTIMATE = 256
 
 
 class GeminiClient:
+    # Shared cross-process quota; None keeps the per-instance rotation below.
+    _quota: GeminiQuotaScheduler | None = None
+
     def __init__(self) -> None:
         self.api_keys = self._parse_keys(settings.gemini_api_key)
         self.model = settings.gemini_model
@@ -27,6 +36,8 @@ class GeminiClient:
         self._rate_limited_until: dict[str, float] = {}
         # Maps key → consecutive 429 count (for exponential backoff).
         self._rate_limit_strikes: dict[str, int] = {}
+        if settings.gemini_quota_enabled:
+            self._quota = gemini_quota
 
     @property
     def enabled(self) -> bool:
@@ -74,6 +85,11 @@ class GeminiClient:
         strikes = self._rate_limit_strikes.get(key, 0) + 1
         self._rate_limit_strikes[key] = strikes
         backoff = min(_RATE_LIMIT_BACKOFF_MAX, _RATE_LIMIT_BACKOFF_BASE * (2 ** (strikes - 1)))
+        if self._quota is not None:
+            # Strikes are counted across every client and process sharing the key.
+            backoff = self._quota.mark_rate_limited(
+                key, base=_RATE_LIMIT_BACKOFF_BASE, cap=_RATE_LIMIT_BACKOFF_MAX
+            )
         self._rate_limited_until[key] = time.monotonic() + backoff
         return backoff
 
@@ -81,6 +97,37 @@ class GeminiClient:
         """Reset quarantine state for a key after a successful call."""
         self._rate_limited_until.pop(key, None)
         self._rate_limit_strikes.pop(key, None)
+        if self._quota is not None:
+            self._quota.clear(key)
+
+    def _record_success(self, key: str, *, reserved_tokens: int, used_tokens: Any) -> None:
+        """Clear the key's quarantine and settle its token charge after a successful call."""
+        self._clear_rate_limit(key)
+        if self._quota is not None and isinstance(used_tokens, int):
+            self._quota.settle(key, reserved_tokens=reserved_tokens, used_tokens=used_tokens)
+
+    async def _reserve_key(self, attempt: int, tokens: int) -> str:
+        """Pick the key for this attempt and wait until it may be called."""
+        if self._quota is not None:
+            # Queue behind other callers for the earliest admissible slot on any key.
+            slot = await self._quota.acquire(
+                self.api_keys, tokens=tokens, max_wait_sec=settings.gemini_quota_max_wait_sec
+            )
+            return slot.key if slot is not None else ""
+
+        key = self._next_key()
+        if not key:
+            return ""
+        # Honour any active rate-limit cooldown before sending the request.
+        wait_sec = self._rate_limited_until.get(key, 0.0) - time.monotonic()
+        if wait_sec > 0:
+            # Only wait if this is not the first attempt with a fresh key.
+            if attempt > 0:
+                await asyncio.sleep(min(wait_sec, _RATE_LIMIT_BACKOFF_MAX))
+            else:
+                # All keys may be rate-limited; at least yield the event loop.
+                await asyncio.sleep(0)
+        return key
 
     async def extract_card_features(self, title: str, description: str) -> dict[str, Any] | None:
         if not self.enabled:
@@ -124,26 +171,23 @@ class GeminiClient:
         ) as client:
             last_error: Exception | None = None
             attempts = len(self.api_keys)
+            # Rough prompt size (~4 chars per token) plus the expected answer.
+            tokens = (len(prompt) + len(content)) // 4 + _RESPONSE_TOKEN_ESTIMATE
             for attempt in range(attempts):
-                key = self._next_key()
+                key = await self._reserve_key(attempt, tokens)
                 if not key:
                     break
 
-                # Honour any active rate-limit cooldown before sending the request.
-                wait_sec = self._rate_limited_until.get(key, 0.0) - time.monotonic()
-                if wait_sec > 0:
-                    # Only wait if this is not the first attempt with a fresh key.
-                    if attempt > 0:
-                        await asyncio.sleep(min(wait_sec, _RATE_LIMIT_BACKOFF_MAX))
-                    else:
-                        # All keys may be rate-limited; at least yield the event loop.
-                        await asyncio.sleep(0)
-
                 url = f"{base_url}?key={key}"
+                key_label = mask_key(key)
+                outcome = "error"
+                started = time.perf_counter()
                 try:
                     response = await client.post(url, json=payload)
+                    outcome = str(response.status_code)
                     if response.status_code == 429:
-                        backoff = self._mark_rate_limited(key)
+                        # Quota writes take a SQLite lock shared with other processes; keep them off the loop.
+                        backoff = await asyncio.to_thread(self._mark_rate_limited, key)
                         last_error = httpx.HTTPStatusError(
                             f"429 rate limited (backoff {backoff:.1f}s)",
                             request=response.request,
@@ -154,7 +198,11 @@ class GeminiClient:
                     data = response.json()
                     text = data["candidates"][0]["content"]["parts"][0]["text"]
                     parsed = json.loads(text)
-                    self._clear_rate_limit(key)
+                    used = (data.get("usageMetadata") or {}).get("totalTokenCount")
+                    if self._quota is not None:
+                        await asyncio.to_thread(self._record_success, key, reserved_tokens=tokens, used_tokens=used)
+                    else:
+                        self._clear_rate_limit(key)
                     return parsed if isinstance(parsed, dict) else None
                 except (
                     httpx.HTTPStatusError,
@@ -166,6 +214,18 @@ class GeminiClient:
                 ) as exc:
                     last_error = exc
                     continue
+                finally:
+                    if metrics.enabled:
+                        metrics.observe(
+                            "cardflip_llm_request_duration_seconds",
+                            time.perf_counter() - started,
+                            {"provider": "gemini", "key": key_label},
+                        )
+                        metrics.inc(
+                            "cardflip_llm_requests_total",
+                            1,
+                            {"provider": "gemini", "key": key_label, "outcome": outcome},
+                        )
             _ = last_error
             return None
 
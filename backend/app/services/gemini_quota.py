@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Sequence
+
+from ..config import settings
+from .metrics import mask_key
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gemini_key_quota (
+    key_id TEXT PRIMARY KEY,
+    key_label TEXT NOT NULL DEFAULT '',
+    rpm_tokens REAL NOT NULL,
+    tpm_tokens REAL NOT NULL,
+    refilled_at REAL NOT NULL,
+    day TEXT NOT NULL DEFAULT '',
+    day_count INTEGER NOT NULL DEFAULT 0,
+    quarantined_until REAL NOT NULL DEFAULT 0,
+    strikes INTEGER NOT NULL DEFAULT 0,
+    last_used_at REAL NOT NULL DEFAULT 0
+)
+"""
+
+
+@dataclass(frozen=True)
+class QuotaSlot:
+    key: str
+    admit_at: float
+    wait_sec: float
+    tokens: int
+
+
+def _key_id(key: str) -> str:
+    # Raw keys never touch disk; the hash is stable across processes.
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+def _utc_day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+def _next_utc_day(ts: float) -> float:
+    day = datetime.fromtimestamp(ts, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (day + timedelta(days=1)).timestamp()
+
+
+class GeminiQuotaScheduler:
+    """Per-key RPM/TPM/RPD budgets shared by every process through one SQLite file.
+
+    Each key has two token buckets (requests and tokens per minute) plus a UTC
+    daily request count and a 429 quarantine. :meth:`reserve` picks the key
+    with the earliest admissible time inside a ``BEGIN IMMEDIATE`` transaction
+    and charges it straight away, letting buckets go negative: later callers
+    are therefore queued behind earlier reservations instead of all waking up
+    and retrying together. State uses wall-clock time so separate processes
+    agree on it. Budgets <= 0 are unlimited.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self._path = path
+        self._ready_path = ""
+
+    @property
+    def path(self) -> str:
+        if self._path:
+            return self._path
+        if settings.gemini_quota_path.strip():
+            return settings.gemini_quota_path.strip()
+        return str(Path(settings.sqlite_path).expanduser().with_name("gemini_quota.db"))
+
+    @staticmethod
+    def _limits() -> tuple[float, float, int]:
+        return float(settings.gemini_rpm), float(settings.gemini_tpm), int(settings.gemini_rpd)
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.path
+        if self._ready_path != path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10.0, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if self._ready_path != path:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(_SCHEMA)
+            self._ready_path = path
+        return conn
+
+    def _load(self, conn: sqlite3.Connection, keys: Sequence[str], now: float) -> dict[str, dict[str, Any]]:
+        """Read (or create) each key's row and refill its buckets up to ``now``."""
+        rpm, tpm, _ = self._limits()
+        ids = {_key_id(key): key for key in keys}
+        placeholders = ",".join("?" for _ in ids)
+        rows = {
+            str(row["key_id"]): dict(row)
+            for row in conn.execute(f"SELECT * FROM gemini_key_quota WHERE key_id IN ({placeholders})", tuple(ids))
+        }
+        states: dict[str, dict[str, Any]] = {}
+        for key_id, key in ids.items():
+            state = rows.get(key_id) or {
+                "key_id": key_id,
+                "rpm_tokens": max(rpm, 0.0),
+                "tpm_tokens": max(tpm, 0.0),
+                "refilled_at": now,
+                "day": "",
+                "day_count": 0,
+                "quarantined_until": 0.0,
+                "strikes": 0,
+                "last_used_at": 0.0,
+            }
+            state["key_label"] = mask_key(key)
+            states[key] = self._refill(state, now)
+        return states
+
+    def _refill(self, state: dict[str, Any], now: float) -> dict[str, Any]:
+        rpm, tpm, _ = self._limits()
+        elapsed = max(0.0, now - float(state["refilled_at"]))
+        if rpm > 0:
+            state["rpm_tokens"] = min(rpm, float(state["rpm_tokens"]) + elapsed * rpm / 60.0)
+        if tpm > 0:
+            state["tpm_tokens"] = min(tpm, float(state["tpm_tokens"]) + elapsed * tpm / 60.0)
+        state["refilled_at"] = now
+        if state["day"] != _utc_day(now):
+            state["day"], state["day_count"] = _utc_day(now), 0
+        return state
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, state: dict[str, Any]) -> None:
+        conn.execute(
+            """
+            INSERT INTO gemini_key_quota(
+                key_id, key_label, rpm_tokens, tpm_tokens, refilled_at, day, day_count,
+                quarantined_until, strikes, last_used_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key_id) DO UPDATE SET
+                key_label = excluded.key_label,
+                rpm_tokens = excluded.rpm_tokens,
+                tpm_tokens = excluded.tpm_tokens,
+                refilled_at = excluded.refilled_at,
+                day = excluded.day,
+                day_count = excluded.day_count,
+                quarantined_until = excluded.quarantined_until,
+                strikes = excluded.strikes,
+                last_used_at = excluded.last_used_at
+            """,
+            (
+                state["key_id"],
+                state["key_label"],
+                state["rpm_tokens"],
+                state["tpm_tokens"],
+                state["refilled_at"],
+                state["day"],
+                state["day_count"],
+                state["quarantined_until"],
+                state["strikes"],
+                state["last_used_at"],
+            ),
+        )
+
+    def _admit_at(self, state: dict[str, Any], tokens: int, now: float) -> float:
+        rpm, tpm, rpd = self._limits()
+        admit_at = max(now, float(state["quarantined_until"]))
+        if rpm > 0 and state["rpm_tokens"] < 1.0:
+            admit_at = max(admit_at, now + (1.0 - state["rpm_tokens"]) * 60.0 / rpm)
+        if tpm > 0:
+            needed = min(float(tokens), tpm)
+            if state["tpm_tokens"] < needed:
+                admit_at = max(admit_at, now + (needed - state["tpm_tokens"]) * 60.0 / tpm)
+        if rpd > 0 and int(state["day_count"]) >= rpd:
+            admit_at = max(admit_at, _next_utc_day(now))
+        return admit_at
+
+    def reserve(
+        self,
+        keys: Sequence[str],
+        *,
+        tokens: int = 1,
+        max_wait_sec: float | None = None,
+        now: float | None = None,
+    ) -> QuotaSlot | None:
+        """Charge the key with the earliest admissible time and return when to call.
+
+        Returns None, without charging anything, when no key is admissible
+        within ``max_wait_sec``.
+        """
+        keys = list(dict.fromkeys(key for key in keys if key))
+        if not keys:
+            return None
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            states = self._load(conn, keys, now)
+            # Earliest admissible first; among keys free now, prefer the least recently used.
+            key = min(keys, key=lambda k: (self._admit_at(states[k], tokens, now), states[k]["last_used_at"]))
+            admit_at = self._admit_at(states[key], tokens, now)
+            if max_wait_sec is not None and admit_at - now > max_wait_sec:
+                conn.execute("ROLLBACK")
+                return None
+            state = states[key]
+            state["rpm_tokens"] -= 1.0
+            state["tpm_tokens"] -= float(tokens)
+            state["day_count"] = int(state["day_count"]) + 1
+            state["last_used_at"] = admit_at
+            self._save(conn, state)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return QuotaSlot(key=key, admit_at=admit_at, wait_sec=max(0.0, admit_at - now), tokens=int(tokens))
+
+    async def acquire(
+        self,
+        keys: Sequence[str],
+        *,
+        tokens: int = 1,
+        max_wait_sec: float | None = None,
+    ) -> QuotaSlot | None:
+        """Reserve a slot and sleep until it is admissible."""
+        slot = await asyncio.to_thread(self.reserve, keys, tokens=tokens, max_wait_sec=max_wait_sec)
+        if slot is not None and slot.wait_sec > 0:
+            await asyncio.sleep(slot.wait_sec)
+        return slot
+
+    def _update(self, key: str, change: Any, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            state = self._load(conn, [key], now)[key]
+            change(state, now)
+            self._save(conn, state)
+            conn.execute("COMMIT")
+            return state
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def settle(self, key: str, *, reserved_tokens: int, used_tokens: int, now: float | None = None) -> None:
+        """Correct a reservation's TPM charge once the real token count is known."""
+        if not key or used_tokens == reserved_tokens:
+            return
+
+        def _apply(state: dict[str, Any], _: float) -> None:
+            state["tpm_tokens"] -= float(used_tokens - reserved_tokens)
+
+        self._update(key, _apply, now)
+
+    def mark_rate_limited(self, key: str, *, base: float, cap: float, now: float | None = None) -> float:
+        """Quarantine ``key`` for every process with exponential backoff; return the backoff."""
+        backoff = 0.0
+
+        def _apply(state: dict[str, Any], at: float) -> None:
+            nonlocal backoff
+            state["strikes"] = int(state["strikes"]) + 1
+            backoff = min(cap, base * (2 ** (state["strikes"] - 1)))
+            state["quarantined_until"] = max(float(state["quarantined_until"]), at + backoff)
+
+        self._update(key, _apply, now)
+        return backoff
+
+    def clear(self, key: str, *, now: float | None = None) -> None:
+        """Lift ``key``'s quarantine and strikes; a plain read when it has neither."""
+        if not key:
+            return
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT strikes, quarantined_until FROM gemini_key_quota WHERE key_id = ?",
+                (_key_id(key),),
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None or (int(row["strikes"]) == 0 and float(row["quarantined_until"]) <= 0):
+            return
+
+        def _apply(state: dict[str, Any], _: float) -> None:
+            state["strikes"] = 0
+            state["quarantined_until"] = 0.0
+
+        self._update(key, _apply, now)
+
+    def status(self, keys: Sequence[str] = (), *, now: float | None = None) -> dict[str, Any]:
+        now = time.time() if now is None else now
+        rpm, tpm, rpd = self._limits()
+        conn = self._connect()
+        try:
+            if keys:
+                states = list(self._load(conn, list(dict.fromkeys(keys)), now).values())
+            else:
+                rows = conn.execute("SELECT * FROM gemini_key_quota ORDER BY key_label").fetchall()
+                states = [self._refill(dict(row), now) for row in rows]
+        finally:
+            conn.close()
+        return {
+            "path": self.path,
+            "rpm": rpm,
+            "tpm": tpm,
+            "rpd": rpd,
+            "keys": [
+                {
+                    "key": state["key_label"],
+                    "rpm_available": round(float(state["rpm_tokens"]), 3),
+                    "tpm_available": round(float(state["tpm_tokens"]), 1),
+                    "day": state["day"],
+                    "day_count": int(state["day_count"]),
+                    "strikes": int(state["strikes"]),
+                    "quarantined_sec": round(max(0.0, float(state["quarantined_until"]) - now), 3),
+                }
+                for state in states
+            ],
+        }
+
+
+gemini_quota = GeminiQuotaScheduler()
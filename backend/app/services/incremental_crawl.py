@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from .. import repositories as repo
+from ..config import settings
+
+_PRUNE_INTERVAL_SEC = 3600.0
+
+
+def crawl_item_key(item: dict[str, Any]) -> str:
+    item_id = str(item.get("id") or item.get("listing_id") or "").strip()
+    if item_id:
+        return item_id
+    title = " ".join(str(item.get("title") or item.get("name") or "").lower().split())
+    if not title:
+        return ""
+    try:
+        price = round(float(item.get("price") or 0), 2)
+    except (TypeError, ValueError):
+        price = 0.0
+    return f"{title}|{price:.2f}"
+
+
+class IncrementalCrawlGuard:
+    """Stops paginating a keyword once a page is mostly made of already-seen items.
+
+    Search results are ordered by publish time, so a page dominated by known
+    items means every later page is older still. Seen keys live in
+    ``crawl_seen_items`` and expire after MONITOR_INCREMENTAL_SEEN_TTL_HOURS.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._saved_requests = 0
+        self._early_stops = 0
+        self._pages_checked = 0
+        self._last_pruned_at = 0.0
+        self._last_pruned = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.monitor_incremental_enabled)
+
+    def page_is_stale(self, keyword: str, batch: list[dict[str, Any]]) -> tuple[bool, float]:
+        """Return ``(stop, seen_ratio)`` for one fetched page."""
+        if not self.enabled:
+            return False, 0.0
+        keys = [crawl_item_key(item) for item in batch if isinstance(item, dict)]
+        keys = [key for key in keys if key]
+        with self._lock:
+            self._pages_checked += 1
+        if not keys:
+            # An empty page means the result list is exhausted.
+            return True, 1.0
+        seen = repo.get_seen_item_keys(keyword, keys)
+        ratio = len(seen) / float(len(keys))
+        threshold = max(0.0, min(1.0, float(settings.monitor_incremental_stop_seen_ratio)))
+        return ratio >= threshold, ratio
+
+    def record_early_stop(self, planned_pages: int, fetched_pages: int) -> int:
+        saved = max(0, int(planned_pages) - int(fetched_pages))
+        with self._lock:
+            self._early_stops += 1
+            self._saved_requests += saved
+        return saved
+
+    def remember(self, keyword: str, batch: list[dict[str, Any]]) -> int:
+        if not self.enabled:
+            return 0
+        keys = [crawl_item_key(item) for item in batch if isinstance(item, dict)]
+        marked = repo.mark_items_seen(keyword, keys)
+        self._maybe_prune()
+        return marked
+
+    def _maybe_prune(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._last_pruned_at and now - self._last_pruned_at < _PRUNE_INTERVAL_SEC:
+                return
+            self._last_pruned_at = now
+        pruned = repo.prune_seen_items(
+            older_than_hours=float(settings.monitor_incremental_seen_ttl_hours)
+        )
+        with self._lock:
+            self._last_pruned = pruned
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "stop_seen_ratio": settings.monitor_incremental_stop_seen_ratio,
+                "seen_ttl_hours": settings.monitor_incremental_seen_ttl_hours,
+                "pages_checked": self._pages_checked,
+                "early_stops": self._early_stops,
+                "saved_requests": self._saved_requests,
+                "last_pruned": self._last_pruned,
+            }
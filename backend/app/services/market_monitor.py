@@ -11,7 +11,14 @@ import requests
 from ..config import settings
 from ..repositories import insert_listings
 from ..schemas import ListingIn
+from .cookie_pool import CookieLease
+from .cookie_pool import cookie_pool
 from .cookie_provider import CookieProvider
+from .crawl_scheduler import KeywordCrawlScheduler
+from .execution_health import execution_health
+from .incremental_crawl import IncrementalCrawlGuard
+from .monitor_shards import MonitorShardSupervisor
+from .monitor_shards import build_shard_specs
 from .notifier import format_circuit_email, send_alert_email
 from .opportunity_scan import scan_open_listings
 from .proxy_resolver import mark_proxy_bad
@@ -56,11 +63,19 @@ class MarketMonitorService:
         self._last_proxy = ""
         self._xianyu = XianyuClient()
         self._cookie_provider = CookieProvider()
+        self._scheduler = KeywordCrawlScheduler()
+        self._incremental = IncrementalCrawlGuard()
+        self._shards = MonitorShardSupervisor(
+            saver=self._save_items,
+            on_status=self._publish_shard_health,
+            on_inserted=self._scan_after_shard_drain,
+        )
+        self._sharded = False
 
     def status(self) -> dict[str, Any]:
         monitor_keywords = self._resolved_monitor_keywords()
         with self._lock:
-            return {
+            payload = {
                 "is_running": self._is_running,
                 "runs": self._runs,
                 "last_run_at": self._last_run_at,
@@ -91,21 +106,59 @@ class MarketMonitorService:
                 "last_scan": self._last_scan,
                 "cookie_error": self._cookie_provider.last_error if hasattr(self, "_cookie_provider") else "",
                 "cookie_meta": self._cookie_provider.cookie_meta() if hasattr(self, "_cookie_provider") else {},
+                "cookie_pool": cookie_pool.status() if settings.xianyu_cookie_pool_enabled else {"enabled": False},
+                "crawl_scheduler": self._scheduler.status(),
+                "incremental_crawl": self._incremental.status(),
+                "sharded": self._sharded,
+            }
+            sharded = self._sharded
+        if sharded:
+            self._merge_shard_status(payload, self._shards.status())
+        return payload
+
+    @staticmethod
+    def _merge_shard_status(payload: dict[str, Any], shards: dict[str, Any]) -> None:
+        payload["shards"] = shards
+        shard_rows = shards.get("shards") or []
+        circuit_open = shards.get("circuit_open_shards") or []
+        # One banned identity should not halt the others: the monitor only
+        # reports an open circuit once every shard has tripped.
+        if shard_rows and len(circuit_open) >= len(shard_rows):
+            payload["circuit_open"] = True
+            payload["circuit_reason"] = f"all shards circuit open: {circuit_open}"
+        samples = sum(int((row.get("last_status") or {}).get("health_samples") or 0) for row in shard_rows)
+        min_rate = shards.get("min_health_success_rate")
+        if min_rate is not None:
+            payload["health"] = {
+                **payload["health"],
+                "samples": samples,
+                "success_rate": round(float(min_rate), 4),
             }
+        payload["last_inserted"] = int(shards.get("inserted") or 0)
+
+    def _circuit_cooldown_remaining(self) -> float:
+        """Seconds left before an open circuit may be restarted; 0 when it may."""
+        if not (self._circuit_open and self._circuit_open_at):
+            return 0.0
+        try:
+            opened_at = datetime.fromisoformat(self._circuit_open_at)
+            elapsed = (datetime.now(timezone.utc) - opened_at).total_seconds()
+        except Exception:
+            elapsed = settings.monitor_circuit_cooldown_sec
+        return max(0.0, round(settings.monitor_circuit_cooldown_sec - elapsed, 1))
 
     def start(self) -> dict[str, Any]:
         with self._lock:
             if self._is_running:
                 return {"started": False, "reason": "already running"}
-            if self._circuit_open and self._circuit_open_at:
-                try:
-                    opened_at = datetime.fromisoformat(self._circuit_open_at)
-                    elapsed = (datetime.now(timezone.utc) - opened_at).total_seconds()
-                except Exception:
-                    elapsed = settings.monitor_circuit_cooldown_sec
-                if elapsed < settings.monitor_circuit_cooldown_sec:
-                    remaining = round(settings.monitor_circuit_cooldown_sec - elapsed, 1)
-                    return {"started": False, "reason": f"circuit cooldown {remaining}s"}
+            remaining = self._circuit_cooldown_remaining()
+            if remaining > 0:
+                return {"started": False, "reason": f"circuit cooldown {remaining}s"}
+        if int(settings.monitor_shard_count) > 0 and settings.monitor_provider.lower() == "xianyu":
+            return self._start_sharded()
+        with self._lock:
+            if self._is_running:
+                return {"started": False, "reason": "already running"}
             self._reset_circuit()
             self._stop_event.clear()
             self._thread = threading.Thread(target=self._loop, daemon=True, name="market-monitor")
@@ -113,7 +166,34 @@ class MarketMonitorService:
             self._thread.start()
             return {"started": True}
 
+    def _start_sharded(self) -> dict[str, Any]:
+        with self._lock:
+            if self._is_running:
+                return {"started": False, "reason": "already running"}
+        specs = build_shard_specs(
+            self._resolved_monitor_keywords(),
+            int(settings.monitor_shard_count),
+            cookies=settings.monitor_shard_cookies
+            or (cookie_pool.shard_cookies() if settings.xianyu_cookie_pool_enabled else ()),
+            proxies=settings.monitor_shard_proxies,
+        )
+        result = self._shards.start(specs)
+        if result.get("started"):
+            with self._lock:
+                self._reset_circuit()
+                self._is_running = True
+                self._sharded = True
+        return result
+
     def stop(self) -> dict[str, Any]:
+        with self._lock:
+            sharded = self._sharded
+        if sharded:
+            result = self._shards.stop()
+            with self._lock:
+                self._is_running = False
+                self._sharded = False
+            return result
         with self._lock:
             if not self._is_running:
                 return {"stopped": False, "reason": "not running"}
@@ -133,16 +213,26 @@ class MarketMonitorService:
                 "circuit_open": True,
                 "reason": self._circuit_reason,
             }
-        items = self._fetch_market_data()
-        inserted = self._save_items(items)
-        scan_result: dict[str, Any] | None = None
-        scan_error = ""
-        if settings.monitor_auto_scan_after_ingest:
-            try:
-                scan_limit = max(1, min(500, int(settings.monitor_auto_scan_limit)))
-                scan_result = asyncio.run(scan_open_listings(limit=scan_limit))
-            except Exception as exc:
-                scan_error = str(exc)
+        crawl: dict[str, dict[str, int]] = {}
+        items = self._fetch_market_data(crawl)
+        if settings.monitor_adaptive_enabled and settings.monitor_provider.lower() == "xianyu" and not crawl:
+            return {
+                "fetched": 0,
+                "inserted": 0,
+                "skipped": True,
+                "reason": "no keyword due under adaptive schedule",
+            }
+        inserted_by_keyword: dict[str, int] = {}
+        inserted = self._save_items(items, inserted_by_keyword)
+        self._remember_seen(items)
+        for keyword, counters in crawl.items():
+            self._scheduler.record(
+                keyword,
+                requests=counters["requests"],
+                fetched=counters["fetched"],
+                inserted=inserted_by_keyword.get(keyword, 0),
+            )
+        scan_result, scan_error = self._auto_scan() if settings.monitor_auto_scan_after_ingest else (None, "")
 
         with self._lock:
             self._runs += 1
@@ -156,10 +246,29 @@ class MarketMonitorService:
         return {
             "fetched": len(items),
             "inserted": inserted,
+            "requests": sum(counters["requests"] for counters in crawl.values()),
+            "saved_requests": sum(counters["saved_requests"] for counters in crawl.values()),
             "scan": scan_result or {},
             "scan_error": scan_error,
         }
 
+    @staticmethod
+    def _auto_scan() -> tuple[dict[str, Any] | None, str]:
+        try:
+            scan_limit = max(1, min(500, int(settings.monitor_auto_scan_limit)))
+            return asyncio.run(scan_open_listings(limit=scan_limit)), ""
+        except Exception as exc:
+            return None, str(exc)
+
+    def _scan_after_shard_drain(self, inserted: int) -> None:
+        """Supervisor callback: value listings the shards just added, as ``run_once`` does."""
+        if not settings.monitor_auto_scan_after_ingest:
+            return
+        scan_result, scan_error = self._auto_scan()
+        with self._lock:
+            self._last_scan = scan_result or {}
+            self._last_error = scan_error
+
     def refresh_cookie_local(self, kill_browsers: bool = True) -> dict[str, Any]:
         result = self._cookie_provider.refresh_cookie_local(kill_browsers=kill_browsers)
         if result.get("success"):
@@ -201,41 +310,65 @@ class MarketMonitorService:
         with self._lock:
             self._is_running = False
 
-    def _fetch_market_data(self) -> list[dict[str, Any]]:
+    def _crawl_plan(self, keywords: list[str]) -> list[tuple[str, int]]:
+        if settings.monitor_adaptive_enabled:
+            return self._scheduler.plan(keywords)
+        pages = max(1, min(10, settings.monitor_pages))
+        return [(keyword, pages) for keyword in keywords]
+
+    def _fetch_market_data(
+        self,
+        crawl: dict[str, dict[str, int]] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Fetch listings; ``crawl`` collects per-keyword request/fetch counters."""
         active_proxy = ""
+        crawl = {} if crawl is None else crawl
+        current_keyword = ""
+        lease: CookieLease | None = None
         try:
             if settings.monitor_provider.lower() == "xianyu":
                 items: list[dict[str, Any]] = []
-                pages = max(1, min(10, settings.monitor_pages))
-                keywords = self._resolved_monitor_keywords()
+                plan = self._crawl_plan(self._resolved_monitor_keywords())
+                if not plan:
+                    return items
                 proxies = self._get_proxies(self._xianyu.search_url)
                 active_proxy = proxy_url_from_mapping(proxies) or ""
                 with self._lock:
                     self._last_proxy = active_proxy
-                cookie = self._cookie_provider.get_cookie()
+                if settings.xianyu_cookie_pool_enabled:
+                    lease = cookie_pool.lease()
+                cookie = lease.cookie if lease is not None else self._cookie_provider.get_cookie()
                 refreshed = False
                 seen_keys: set[tuple[str, str, float]] = set()
-                for keyword in keywords:
+                for keyword, pages in plan:
+                    current_keyword = keyword
+                    counters = crawl.setdefault(
+                        keyword,
+                        {"requests": 0, "fetched": 0, "saved_requests": 0},
+                    )
                     for p in range(1, pages + 1):
+                        if lease is not None and not lease.allow():
+                            # The per-minute budget applies per request, not per lease:
+                            # move to a fresher account once this one runs dry mid-crawl.
+                            lease = cookie_pool.rotate(lease)
+                            cookie = lease.cookie if lease is not None else cookie
+                        counters["requests"] += 1
                         try:
-                            batch = self._xianyu.fetch(
-                                page=p,
-                                proxies=proxies,
-                                cookie_override=cookie,
-                                keyword=keyword,
-                            )
+                            batch = self._fetch_page(lease, p, proxies, cookie, keyword)
                         except XianyuHttpError as exc:
                             if not refreshed and _should_refresh_cookie(exc):
                                 refreshed = True
-                                cookie = self._cookie_provider.get_cookie(force_refresh=True) or cookie
-                                batch = self._xianyu.fetch(
-                                    page=p,
-                                    proxies=proxies,
-                                    cookie_override=cookie,
-                                    keyword=keyword,
-                                )
+                                counters["requests"] += 1
+                                if lease is not None:
+                                    # Switch accounts; the pool refreshes the bad token in the background.
+                                    lease = cookie_pool.rotate(lease)
+                                    cookie = lease.cookie if lease is not None else cookie
+                                else:
+                                    cookie = self._cookie_provider.get_cookie(force_refresh=True) or cookie
+                                batch = self._fetch_page(lease, p, proxies, cookie, keyword)
                             else:
                                 raise
+                        counters["fetched"] += len(batch)
                         for item in batch:
                             if not isinstance(item, dict):
                                 continue
@@ -254,21 +387,74 @@ class MarketMonitorService:
                             normalized = dict(item)
                             normalized.setdefault("keyword", keyword)
                             items.append(normalized)
+                        if p < pages:
+                            stop, _ = self._incremental.page_is_stale(keyword, batch)
+                            if stop:
+                                counters["saved_requests"] += self._incremental.record_early_stop(
+                                    pages, p
+                                )
+                                break
                 return items
             return self._fetch_generic()
         except XianyuHttpError as exc:
+            self._record_crawl_error(current_keyword, crawl)
             self._register_error(exc, is_403=exc.status == 403, active_proxy=active_proxy)
             self._record_health(success=False, reason=f"xianyu_http_{exc.status}")
             raise
         except requests.HTTPError as exc:
+            self._record_crawl_error(current_keyword, crawl)
             status = getattr(exc.response, "status_code", None)
             self._register_error(exc, is_403=status == 403, active_proxy=active_proxy)
             self._record_health(success=False, reason=f"http_error_{status}")
             raise
         except Exception as exc:
+            self._record_crawl_error(current_keyword, crawl)
             self._register_error(exc, is_403=False, active_proxy=active_proxy)
             self._record_health(success=False, reason=str(exc))
             raise
+        finally:
+            if lease is not None:
+                lease.release()
+
+    def _fetch_page(
+        self,
+        lease: CookieLease | None,
+        page: int,
+        proxies: dict[str, str] | None,
+        cookie: str | None,
+        keyword: str,
+    ) -> list[dict[str, Any]]:
+        try:
+            batch = self._xianyu.fetch(page=page, proxies=proxies, cookie_override=cookie, keyword=keyword)
+        except XianyuHttpError as exc:
+            if lease is not None:
+                lease.record(False, exc.status, token_expired=_should_refresh_cookie(exc))
+            raise
+        if lease is not None:
+            lease.record(True)
+        return batch
+
+    def _remember_seen(self, items: list[dict[str, Any]]) -> None:
+        by_keyword: dict[str, list[dict[str, Any]]] = {}
+        for item in items:
+            if isinstance(item, dict):
+                by_keyword.setdefault(str(item.get("keyword") or ""), []).append(item)
+        for keyword, batch in by_keyword.items():
+            self._incremental.remember(keyword, batch)
+
+    def _record_crawl_error(self, keyword: str, crawl: dict[str, dict[str, int]]) -> None:
+        # Keywords completed before the failure were never saved; only the failing
+        # keyword is charged, so the scheduler backs it off rather than the rest.
+        if not keyword:
+            return
+        counters = crawl.get(keyword, {"requests": 1, "fetched": 0})
+        self._scheduler.record(
+            keyword,
+            requests=max(1, counters["requests"]),
+            fetched=counters["fetched"],
+            inserted=0,
+            errors=1,
+        )
 
     def _fetch_generic(self) -> list[dict[str, Any]]:
         headers = {
@@ -302,8 +488,12 @@ class MarketMonitorService:
             return resolve_proxy_for_url(target_url)
         return resolve_proxy()
 
-    def _save_items(self, items: list[dict[str, Any]]) -> int:
-        rows: list[ListingIn] = []
+    def _save_items(
+        self,
+        items: list[dict[str, Any]],
+        inserted_by_keyword: dict[str, int] | None = None,
+    ) -> int:
+        rows_by_keyword: dict[str, list[ListingIn]] = {}
         for item in items:
             if not isinstance(item, dict):
                 continue
@@ -322,7 +512,7 @@ class MarketMonitorService:
                 continue
             listing_id = str(item.get("id") or item.get("listing_id") or "").strip() or None
             seller_id = str(item.get("seller_id") or "").strip() or None
-            rows.append(
+            rows_by_keyword.setdefault(str(item.get("keyword") or ""), []).append(
                 ListingIn(
                     source="xianyu_monitor" if settings.monitor_provider.lower() == "xianyu" else "market_monitor",
                     listing_id=listing_id,
@@ -336,9 +526,13 @@ class MarketMonitorService:
                 )
             )
 
-        if not rows:
-            return 0
-        return insert_listings(rows)
+        total = 0
+        for keyword, rows in rows_by_keyword.items():
+            inserted = insert_listings(rows)
+            total += inserted
+            if inserted_by_keyword is not None:
+                inserted_by_keyword[keyword] = inserted_by_keyword.get(keyword, 0) + inserted
+        return total
 
     def _register_error(self, exc: Exception, is_403: bool = False, active_proxy: str = "") -> None:
         with self._lock:
@@ -364,6 +558,7 @@ class MarketMonitorService:
         self._circuit_reason = reason
         self._circuit_open_at = datetime.now(timezone.utc).isoformat()
         self._stop_event.set()
+        self._publish_health()
         print(f"[market_monitor] CIRCUIT OPEN: {reason}")
         subject, body = format_circuit_email(
             reason=reason,
@@ -372,7 +567,8 @@ class MarketMonitorService:
             consecutive_errors=self._consecutive_errors,
             consecutive_403=self._consecutive_403,
         )
-        send_alert_email(subject, body)
+        # Queued for the alert dispatcher; never blocks while the monitor lock is held.
+        send_alert_email(subject, body, key="monitor_circuit_open")
 
     def _resolved_monitor_keywords(self) -> list[str]:
         keywords = [kw.strip() for kw in settings.monitor_keywords if kw and kw.strip()]
@@ -392,8 +588,34 @@ class MarketMonitorService:
         self._health_guard_reason = ""
         self._health_last_rate = 1.0
         self._health_window.clear()
+        self._publish_health()
+
+    def _publish_health(self) -> None:
+        # Callers may already hold self._lock, so read the fields without it.
+        execution_health.record_monitor_health(
+            circuit_open=self._circuit_open,
+            samples=len(self._health_window),
+            success_rate=self._health_last_rate,
+            guard_triggered=self._health_guard_triggered,
+        )
+
+    def _publish_shard_health(self) -> None:
+        payload: dict[str, Any] = {
+            "circuit_open": False,
+            "health": {"samples": 0, "success_rate": 1.0, "guard_triggered": False},
+        }
+        self._merge_shard_status(payload, self._shards.status())
+        health = payload["health"]
+        execution_health.record_monitor_health(
+            circuit_open=bool(payload["circuit_open"]),
+            samples=int(health["samples"]),
+            success_rate=float(health["success_rate"]),
+            guard_triggered=bool(health["guard_triggered"]),
+        )
 
     def _compute_delay_sec(self) -> float:
+        if settings.monitor_adaptive_enabled and settings.monitor_provider.lower() == "xianyu":
+            return self._scheduler.next_delay_sec(self._resolved_monitor_keywords())
         now_local = datetime.now()
         hour = now_local.hour
         if 8 <= hour < 17:
@@ -448,6 +670,8 @@ class MarketMonitorService:
                 should_trip = True
         if should_trip:
             self._open_circuit(trip_reason)
+        else:
+            self._publish_health()
 
     def _maybe_rotate_proxy(self, *, exc: Exception, is_403: bool, active_proxy: str) -> None:
         message = str(exc).lower()
@@ -8,6 +8,11 @@ from ..config import settings
 from .ragflow_client import ragflow_client
 
 
+_PARTIAL_LABEL_RE = re.compile(r'"(?:label|sentiment)"\s*:\s*"(bullish|neutral|bearish)"', re.IGNORECASE)
+# A number only counts once a delimiter follows it; "0.0" may be the head of "0.05".
+_PARTIAL_NUMBER_RE = re.compile(r'"(confidence|adjustment_ratio)"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}\n]')
+
+
 def _clamp(value: float, min_value: float, max_value: float) -> float:
     return max(min_value, min(max_value, value))
 
@@ -56,6 +61,11 @@ class MarketSentimentService:
                     similar_sold_prices=similar_sold_prices,
                 ),
                 include_reference=True,
+                # Streamed answers stop as soon as the JSON verdict is closed;
+                # at the deadline whatever arrived is parsed leniently.
+                stream=bool(settings.ragflow_chat_stream),
+                deadline_sec=float(settings.pricing_rag_timeout_sec),
+                stop_on_json=True,
             )
         except Exception as exc:
             return {
@@ -88,6 +98,7 @@ class MarketSentimentService:
             "reason": str(parsed.get("reason") or "")[:240],
             "raw_answer": answer[:1000],
             "reference": response.get("reference"),
+            "partial": not response.get("complete", True),
         }
 
     def _build_prompt(
@@ -115,6 +126,9 @@ class MarketSentimentService:
 
     def _parse_answer(self, answer: str) -> dict[str, Any]:
         parsed = self._extract_json(answer)
+        if parsed is not None:
+            return self._normalize_payload(parsed)
+        parsed = self._partial_json_fields(answer)
         if parsed is not None:
             return self._normalize_payload(parsed)
 
@@ -160,6 +174,22 @@ class MarketSentimentService:
                 return payload
         return None
 
+    def _partial_json_fields(self, text: str) -> dict[str, Any] | None:
+        """Fields of a JSON answer cut off mid-object (a streamed answer hit its deadline)."""
+        start = text.find("{")
+        if start < 0:
+            return None
+        body = text[start:]
+        fields: dict[str, Any] = {}
+        label = _PARTIAL_LABEL_RE.search(body)
+        if label:
+            fields["label"] = label.group(1)
+        for match in _PARTIAL_NUMBER_RE.finditer(body):
+            fields[match.group(1)] = match.group(2)
+        if "label" not in fields and "adjustment_ratio" not in fields:
+            return None
+        return fields
+
     def _normalize_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
         label = str(payload.get("label") or payload.get("sentiment") or "neutral").strip().lower()
         if label not in {"bullish", "neutral", "bearish"}:
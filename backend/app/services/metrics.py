@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from ..config import settings
+
+# Upper bounds in seconds; covers sub-ms SQLite lookups up to slow crawl stages.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any] | None) -> _LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: _LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    inner = ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-process counters/histograms rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._help: dict[str, tuple[str, str]] = {}
+        self._counters: dict[str, dict[_LabelKey, float]] = {}
+        self._histograms: dict[str, dict[_LabelKey, _Histogram]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.metrics_enabled)
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        with self._lock:
+            self._help[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1.0, labels: dict[str, Any] | None = None) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + float(value)
+
+    def observe(self, name: str, value: float, labels: dict[str, Any] | None = None) -> None:
+        if not settings.metrics_enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = _Histogram(DEFAULT_BUCKETS)
+                series[key] = hist
+            hist.observe(max(0.0, float(value)))
+
+    @contextmanager
+    def timer(self, name: str, labels: dict[str, Any] | None = None) -> Iterator[None]:
+        if not settings.metrics_enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, labels)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counters = {
+                name: {_format_labels(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: {
+                    _format_labels(key): {"count": hist.count, "sum": round(hist.total, 6)}
+                    for key, hist in series.items()
+                }
+                for name, series in self._histograms.items()
+            }
+        return {"enabled": self.enabled, "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted(self._counters):
+                kind, help_text = self._help.get(name, ("counter", ""))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                _, help_text = self._help.get(name, ("histogram", ""))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        le = (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                    inf = (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(key, inf)} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(hist.total)}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+metrics = MetricsRegistry()
+
+metrics.describe(
+    "cardflip_automation_stage_duration_seconds",
+    "histogram",
+    "Wall time of each AutomationService.run_once stage.",
+)
+metrics.describe(
+    "cardflip_automation_stage_rows_total",
+    "counter",
+    "Rows processed by each automation stage.",
+)
+metrics.describe(
+    "cardflip_automation_stage_runs_total",
+    "counter",
+    "Automation stage executions by outcome.",
+)
+metrics.describe(
+    "cardflip_db_query_duration_seconds",
+    "histogram",
+    "Time spent inside each repository function.",
+)
+metrics.describe(
+    "cardflip_db_queries_total",
+    "counter",
+    "Repository function calls.",
+)
+metrics.describe(
+    "cardflip_http_request_duration_seconds",
+    "histogram",
+    "Outbound HTTP latency per host.",
+)
+metrics.describe(
+    "cardflip_http_requests_total",
+    "counter",
+    "Outbound HTTP requests per host and status.",
+)
+metrics.describe(
+    "cardflip_llm_request_duration_seconds",
+    "histogram",
+    "LLM call latency per API key.",
+)
+metrics.describe(
+    "cardflip_llm_requests_total",
+    "counter",
+    "LLM calls per API key and outcome.",
+)
+
+
+def mask_key(key: str) -> str:
+    text = (key or "").strip()
+    if len(text) <= 8:
+        return "***"
+    return f"{text[:4]}...{text[-4:]}"
+
+
+def instrument_repository(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a repository function with call-count and duration metrics."""
+
+    labels = {"function": func.__name__}
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not settings.metrics_enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe(
+                "cardflip_db_query_duration_seconds",
+                time.perf_counter() - started,
+                labels,
+            )
+            metrics.inc("cardflip_db_queries_total", 1, labels)
+
+    wrapper.__wrapped_repository__ = True  # type: ignore[attr-defined]
+    return wrapper
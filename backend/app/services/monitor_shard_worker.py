@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+from .. import repositories as repo
+from ..config import settings
+from .incremental_crawl import crawl_item_key
+from .market_monitor import MarketMonitorService
+from .monitor_shards import SHARD_EXIT_CIRCUIT
+from .monitor_shards import ShardSpec
+
+
+class _StaticCookieProvider:
+    """Pins a shard to the cookie identity it was assigned."""
+
+    def __init__(self, cookie: str) -> None:
+        self._cookie = cookie
+
+    @property
+    def last_error(self) -> str:
+        return ""
+
+    def get_cookie(self, force_refresh: bool = False) -> str | None:
+        return self._cookie
+
+    def cookie_meta(self, cookie_text: str | None = None) -> dict[str, Any]:
+        return {"static": True, "length": len(self._cookie)}
+
+    def refresh_cookie_local(self, kill_browsers: bool = True) -> dict[str, Any]:
+        return {"success": False, "error": "shard cookie is pinned"}
+
+
+class ShardMonitor(MarketMonitorService):
+    """Monitor restricted to one shard's keywords that stages results instead of inserting."""
+
+    def __init__(self, spec: ShardSpec, status_queue: Any = None) -> None:
+        super().__init__()
+        self._spec = spec
+        self._status_queue = status_queue
+        if spec.cookie:
+            self._cookie_provider = _StaticCookieProvider(spec.cookie)  # type: ignore[assignment]
+
+    def _resolved_monitor_keywords(self) -> list[str]:
+        return list(self._spec.keywords)
+
+    def _get_proxies(self, target_url: str | None = None) -> dict[str, str] | None:
+        if self._spec.proxy_url:
+            return {"http": self._spec.proxy_url, "https": self._spec.proxy_url}
+        return super()._get_proxies(target_url)
+
+    def _save_items(
+        self,
+        items: list[dict[str, Any]],
+        inserted_by_keyword: dict[str, int] | None = None,
+    ) -> int:
+        # The API process does the real insert; "new" here means not yet in the
+        # seen set, which is what the crawl scheduler needs for its yield signal.
+        by_keyword: dict[str, list[dict[str, Any]]] = {}
+        for item in items:
+            if isinstance(item, dict):
+                by_keyword.setdefault(str(item.get("keyword") or ""), []).append(item)
+        total_new = 0
+        for keyword, batch in by_keyword.items():
+            keys = [crawl_item_key(item) for item in batch]
+            seen = repo.get_seen_item_keys(keyword, keys)
+            new_count = sum(1 for key in keys if not key or key not in seen)
+            total_new += new_count
+            if inserted_by_keyword is not None:
+                inserted_by_keyword[keyword] = inserted_by_keyword.get(keyword, 0) + new_count
+        repo.stage_monitor_items(self._spec.shard_id, items)
+        return total_new
+
+    def run_once(self) -> dict[str, Any]:
+        try:
+            result = super().run_once()
+        except Exception as exc:
+            self.publish_status(error=str(exc))
+            raise
+        self.publish_status()
+        return result
+
+    def publish_status(self, error: str = "") -> None:
+        if self._status_queue is None:
+            return
+        status = self.status()
+        health = status.get("health") or {}
+        message = {
+            "shard_id": self._spec.shard_id,
+            "runs": status.get("runs", 0),
+            "last_inserted": status.get("last_inserted", 0),
+            "last_error": error or status.get("last_error", ""),
+            "circuit_open": bool(status.get("circuit_open")),
+            "circuit_reason": status.get("circuit_reason", ""),
+            "health_success_rate": health.get("success_rate", 1.0),
+            "health_samples": health.get("samples", 0),
+            "saved_requests": (status.get("incremental_crawl") or {}).get("saved_requests", 0),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            self._status_queue.put_nowait(message)
+        except Exception:
+            pass
+
+
+def run_shard(spec_data: dict[str, Any], status_queue: Any, stop_event: Any) -> None:
+    """Process entry point for one monitor shard."""
+    spec = ShardSpec(**{**spec_data, "keywords": tuple(spec_data.get("keywords") or ())})
+    if spec.sqlite_path:
+        object.__setattr__(settings, "sqlite_path", spec.sqlite_path)
+    # The API process runs the post-ingest scan once a drain inserts the staged rows.
+    object.__setattr__(settings, "monitor_auto_scan_after_ingest", False)
+    if spec.cookie:
+        # The shard is pinned to one pool identity; leasing stays with the API process.
+        object.__setattr__(settings, "xianyu_cookie_pool_enabled", False)
+    monitor = ShardMonitor(spec, status_queue)
+    monitor._stop_event = stop_event
+    monitor._is_running = True
+    monitor._loop()
+    monitor.publish_status()
+    if monitor._circuit_open:
+        sys.exit(SHARD_EXIT_CIRCUIT)
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import importlib
+import json
+import multiprocessing
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from .. import repositories as repo
+from ..config import settings
+
+SHARD_EXIT_CIRCUIT = 3
+DEFAULT_SHARD_TARGET = f"{__package__}.monitor_shard_worker:run_shard"
+
+
+@dataclass(frozen=True)
+class ShardSpec:
+    shard_id: int
+    keywords: tuple[str, ...]
+    cookie: str = ""
+    proxy_url: str = ""
+    sqlite_path: str = ""
+
+
+def build_shard_specs(
+    keywords: list[str],
+    shard_count: int,
+    *,
+    cookies: tuple[str, ...] = (),
+    proxies: tuple[str, ...] = (),
+    sqlite_path: str = "",
+) -> list[ShardSpec]:
+    """Round-robin keywords over shards; each shard gets its own cookie/proxy slot."""
+    count = max(1, min(int(shard_count), len(keywords) or 1))
+    buckets: list[list[str]] = [[] for _ in range(count)]
+    for index, keyword in enumerate(keywords):
+        buckets[index % count].append(keyword)
+    specs: list[ShardSpec] = []
+    for shard_id, bucket in enumerate(buckets):
+        if not bucket:
+            continue
+        specs.append(
+            ShardSpec(
+                shard_id=shard_id,
+                keywords=tuple(bucket),
+                cookie=cookies[shard_id % len(cookies)] if cookies else "",
+                proxy_url=proxies[shard_id % len(proxies)] if proxies else "",
+                sqlite_path=sqlite_path or settings.sqlite_path,
+            )
+        )
+    return specs
+
+
+def _resolve_target(target: str | Callable[..., Any]) -> Callable[..., Any]:
+    if callable(target):
+        return target
+    module_name, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class _ShardHandle:
+    def __init__(self, spec: ShardSpec) -> None:
+        self.spec = spec
+        self.process: Any = None
+        self.stop_event: Any = None
+        self.restarts = 0
+        self.last_exitcode: int | None = None
+        self.next_start_at = 0.0
+        self.started_at = ""
+        self.last_status: dict[str, Any] = {}
+
+
+class MonitorShardSupervisor:
+    """Runs monitor shards as worker processes and drains their staged results.
+
+    Shards write fetched items into ``monitor_staging_items``; the supervisor
+    thread in the API process feeds them through ``saver`` (the monitor's
+    normal listing filter + insert path), calls ``on_inserted`` with the
+    number of new listings after a drain that inserted any, restarts dead
+    shards with backoff, and folds heartbeat messages into :meth:`status`.
+    """
+
+    def __init__(
+        self,
+        saver: Callable[[list[dict[str, Any]]], int],
+        *,
+        target: str | Callable[..., Any] = DEFAULT_SHARD_TARGET,
+        poll_interval_sec: float = 1.0,
+        on_status: Callable[[], None] | None = None,
+        on_inserted: Callable[[int], None] | None = None,
+    ) -> None:
+        self._saver = saver
+        self._on_status = on_status
+        self._on_inserted = on_inserted
+        self._target = target
+        self._poll_interval_sec = poll_interval_sec
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._handles: list[_ShardHandle] = []
+        self._ctx: Any = None
+        self._status_queue: Any = None
+        self._running = False
+        self._drained = 0
+        self._inserted = 0
+        self._last_drain_error = ""
+
+    @property
+    def running(self) -> bool:
+        with self._lock:
+            return self._running
+
+    def start(self, specs: list[ShardSpec]) -> dict[str, Any]:
+        with self._lock:
+            if self._running:
+                return {"started": False, "reason": "already running"}
+            if not specs:
+                return {"started": False, "reason": "no keywords to shard"}
+            method = (settings.monitor_shard_start_method or "spawn").strip().lower()
+            self._ctx = multiprocessing.get_context(method)
+            self._status_queue = self._ctx.Queue()
+            self._handles = [_ShardHandle(spec) for spec in specs]
+            for handle in self._handles:
+                self._spawn(handle)
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._loop,
+                daemon=True,
+                name="monitor-shard-supervisor",
+            )
+            self._running = True
+            self._thread.start()
+            return {"started": True, "shards": len(self._handles)}
+
+    def stop(self, timeout_sec: float = 10.0) -> dict[str, Any]:
+        with self._lock:
+            if not self._running:
+                return {"stopped": False, "reason": "not running"}
+            self._stop_event.set()
+            thread = self._thread
+            handles = list(self._handles)
+        if thread:
+            thread.join(timeout=timeout_sec)
+        deadline = time.monotonic() + timeout_sec
+        for handle in handles:
+            if handle.stop_event is not None:
+                handle.stop_event.set()
+        for handle in handles:
+            process = handle.process
+            if process is None:
+                continue
+            process.join(timeout=max(0.1, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join(timeout=2)
+        # Pick up anything the shards staged before exiting.
+        self._drain_staging()
+        with self._lock:
+            self._running = False
+        return {"stopped": True}
+
+    def _spawn(self, handle: _ShardHandle) -> None:
+        handle.stop_event = self._ctx.Event()
+        handle.process = self._ctx.Process(
+            target=_resolve_target(self._target),
+            args=(asdict(handle.spec), self._status_queue, handle.stop_event),
+            daemon=True,
+            name=f"monitor-shard-{handle.spec.shard_id}",
+        )
+        handle.process.start()
+        handle.started_at = datetime.now(timezone.utc).isoformat()
+
+    def _restart_delay(self, exitcode: int | None, restarts: int) -> float:
+        if exitcode == SHARD_EXIT_CIRCUIT:
+            return max(1.0, float(settings.monitor_circuit_cooldown_sec))
+        return min(60.0, 2.0 ** min(restarts, 6))
+
+    def _supervise(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            handles = list(self._handles)
+        for handle in handles:
+            process = handle.process
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                # Record the exit once, then schedule the restart.
+                handle.last_exitcode = process.exitcode
+                handle.process = None
+                handle.next_start_at = now + self._restart_delay(
+                    handle.last_exitcode, handle.restarts
+                )
+                continue
+            if now >= handle.next_start_at and not self._stop_event.is_set():
+                handle.restarts += 1
+                self._spawn(handle)
+
+    def _collect_status(self) -> None:
+        if self._status_queue is None:
+            return
+        while True:
+            try:
+                message = self._status_queue.get_nowait()
+            except queue.Empty:
+                break
+            except (EOFError, OSError):
+                break
+            if not isinstance(message, dict):
+                continue
+            shard_id = message.get("shard_id")
+            with self._lock:
+                for handle in self._handles:
+                    if handle.spec.shard_id == shard_id:
+                        handle.last_status = message
+                        break
+
+    def _save_one_by_one(self, entries: list[tuple[int, dict[str, Any]]]) -> tuple[list[int], int, str]:
+        """Save each item alone after a batch failure; mark the ones that still fail."""
+        done: list[int] = []
+        inserted = 0
+        error = ""
+        for row_id, item in entries:
+            try:
+                inserted += int(self._saver([item]) or 0)
+            except Exception as exc:
+                error = str(exc)
+                repo.mark_staged_monitor_items_failed([row_id], error)
+                continue
+            done.append(row_id)
+        return done, inserted, error
+
+    def _drain_staging(self) -> int:
+        batch_size = max(1, int(settings.monitor_shard_drain_batch_size))
+        max_attempts = max(0, int(settings.monitor_shard_drain_max_attempts))
+        drained = 0
+        try:
+            while True:
+                rows = repo.list_staged_monitor_items(limit=batch_size, max_attempts=max_attempts)
+                if not rows:
+                    break
+                # Unparseable rows can never be saved, so they are dropped with the batch.
+                done: list[int] = []
+                entries: list[tuple[int, dict[str, Any]]] = []
+                for row in rows:
+                    try:
+                        item = json.loads(row["item_json"])
+                    except (TypeError, ValueError):
+                        item = None
+                    if isinstance(item, dict):
+                        item.setdefault("keyword", str(row["keyword"] or ""))
+                        entries.append((int(row["id"]), item))
+                    else:
+                        done.append(int(row["id"]))
+                error = ""
+                try:
+                    inserted = int(self._saver([item for _, item in entries]) or 0) if entries else 0
+                    done.extend(row_id for row_id, _ in entries)
+                except Exception:
+                    saved, inserted, error = self._save_one_by_one(entries)
+                    done.extend(saved)
+                repo.delete_staged_monitor_items(done)
+                drained += len(done)
+                with self._lock:
+                    self._drained += len(done)
+                    self._inserted += inserted
+                    self._last_drain_error = error
+                if len(rows) < batch_size or not done:
+                    break
+        except Exception as exc:
+            with self._lock:
+                self._last_drain_error = str(exc)
+        return drained
+
+    def _drain_and_notify(self) -> int:
+        with self._lock:
+            before = self._inserted
+        drained = self._drain_staging()
+        with self._lock:
+            inserted = self._inserted - before
+        if inserted > 0 and self._on_inserted is not None:
+            try:
+                self._on_inserted(inserted)
+            except Exception as exc:
+                with self._lock:
+                    self._last_drain_error = str(exc)
+        return drained
+
+    def _notify_status(self) -> None:
+        if self._on_status is None:
+            return
+        try:
+            self._on_status()
+        except Exception:
+            pass
+
+    def _loop(self) -> None:
+        while not self._stop_event.is_set():
+            self._collect_status()
+            self._notify_status()
+            self._supervise()
+            self._drain_and_notify()
+            if self._stop_event.wait(timeout=self._poll_interval_sec):
+                break
+        self._collect_status()
+
+    def status(self) -> dict[str, Any]:
+        self._collect_status()
+        parked = repo.count_parked_monitor_items(int(settings.monitor_shard_drain_max_attempts))
+        with self._lock:
+            shards = []
+            for handle in self._handles:
+                process = handle.process
+                last = dict(handle.last_status)
+                shards.append(
+                    {
+                        "shard_id": handle.spec.shard_id,
+                        "keywords": list(handle.spec.keywords),
+                        "proxy": handle.spec.proxy_url,
+                        "has_cookie": bool(handle.spec.cookie),
+                        "pid": process.pid if process is not None else None,
+                        "alive": bool(process is not None and process.is_alive()),
+                        "restarts": handle.restarts,
+                        "last_exitcode": handle.last_exitcode,
+                        "started_at": handle.started_at,
+                        "last_status": last,
+                    }
+                )
+            circuit_open = [s["shard_id"] for s in shards if s["last_status"].get("circuit_open")]
+            success_rates = [
+                float(s["last_status"]["health_success_rate"])
+                for s in shards
+                if "health_success_rate" in s["last_status"]
+            ]
+            return {
+                "enabled": int(settings.monitor_shard_count) > 0,
+                "running": self._running,
+                "shard_count": len(shards),
+                "alive": sum(1 for s in shards if s["alive"]),
+                "circuit_open_shards": circuit_open,
+                "min_health_success_rate": min(success_rates) if success_rates else None,
+                "drained": self._drained,
+                "inserted": self._inserted,
+                "last_drain_error": self._last_drain_error,
+                "parked": parked,
+                "shards": shards,
+            }
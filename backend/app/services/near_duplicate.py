@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import sqlite3
+import struct
+import zlib
+from typing import Iterable
+
+# 16 bands x 4 rows: listings with Jaccard 0.8 collide in at least one band
+# with probability ~0.9998, while pairs at 0.3 only do ~12% of the time.
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_PERM = NUM_BANDS * ROWS_PER_BAND
+SHINGLE_SIZE = 3
+MAX_TEXT_CHARS = 512
+# Guards against template listings that put thousands of rows in one bucket.
+MAX_CANDIDATES = 500
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM))
+_SIGNATURE_FORMAT = f"<{NUM_PERM}Q"
+
+
+def listing_text(title: str | None, description: str | None) -> str:
+    text = " ".join(f"{title or ''} {description or ''}".lower().split())
+    return text[:MAX_TEXT_CHARS]
+
+
+def shingles(text: str) -> set[int]:
+    """CRC32 hashes of the character n-grams of ``text``.
+
+    Character shingles survive a single edited character (only the n-grams
+    covering it change) and word reordering (only the n-grams spanning word
+    boundaries change), which is what near-duplicate relists look like.
+    """
+    if not text:
+        return set()
+    if len(text) <= SHINGLE_SIZE:
+        return {zlib.crc32(text.encode("utf-8"))}
+    return {
+        zlib.crc32(text[index : index + SHINGLE_SIZE].encode("utf-8"))
+        for index in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signature(text: str) -> tuple[int, ...] | None:
+    values = shingles(text)
+    if not values:
+        return None
+    return tuple(min((a * value + b) % _PRIME for value in values) for a, b in _PERMUTATIONS)
+
+
+def band_keys(signature: tuple[int, ...]) -> list[tuple[int, int]]:
+    keys: list[tuple[int, int]] = []
+    for band in range(NUM_BANDS):
+        chunk = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}Q", *chunk), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "little", signed=True)))
+    return keys
+
+
+def estimated_similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """MinHash estimate of the Jaccard similarity of the two shingle sets."""
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+def _pack(signature: tuple[int, ...]) -> bytes:
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def _unpack(blob: bytes) -> tuple[int, ...]:
+    return struct.unpack(_SIGNATURE_FORMAT, blob)
+
+
+def index_listings(
+    conn: sqlite3.Connection,
+    rows: Iterable[tuple[int, str | None, str | None]],
+) -> int:
+    """Store signatures and band buckets for ``(listing_row_id, title, description)`` rows."""
+    signatures: list[tuple[int, bytes]] = []
+    bands: list[tuple[int, int, int]] = []
+    for row_id, title, description in rows:
+        signature = minhash_signature(listing_text(title, description))
+        if signature is None:
+            continue
+        signatures.append((int(row_id), _pack(signature)))
+        bands.extend((band, bucket, int(row_id)) for band, bucket in band_keys(signature))
+    if not signatures:
+        return 0
+    conn.executemany(
+        "INSERT OR REPLACE INTO listing_minhash(listing_row_id, signature) VALUES (?, ?)",
+        signatures,
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO listing_lsh_bands(band, bucket, listing_row_id) VALUES (?, ?, ?)",
+        bands,
+    )
+    return len(signatures)
+
+
+def ensure_indexed(conn: sqlite3.Connection, listing_row_ids: list[int]) -> int:
+    """Index any of ``listing_row_ids`` that predate the index."""
+    if not listing_row_ids:
+        return 0
+    placeholders = ",".join("?" for _ in listing_row_ids)
+    rows = conn.execute(
+        f"""
+        SELECT l.id, l.title, l.description
+        FROM listings_raw l
+        LEFT JOIN listing_minhash m ON m.listing_row_id = l.id
+        WHERE l.id IN ({placeholders}) AND m.listing_row_id IS NULL
+        """,
+        [int(row_id) for row_id in listing_row_ids],
+    ).fetchall()
+    return index_listings(conn, [(int(row["id"]), row["title"], row["description"]) for row in rows])
+
+
+def query_similar(
+    conn: sqlite3.Connection,
+    signature: tuple[int, ...],
+    *,
+    threshold: float,
+    exclude_listing_row_id: int | None = None,
+) -> list[tuple[int, float]]:
+    """``(listing_row_id, similarity)`` pairs at or above ``threshold``, best first."""
+    keys = band_keys(signature)
+    values_sql = ",".join("(?, ?)" for _ in keys)
+    rows = conn.execute(
+        f"""
+        SELECT m.listing_row_id, m.signature
+        FROM (
+            SELECT DISTINCT b.listing_row_id
+            FROM (VALUES {values_sql}) AS k
+            JOIN listing_lsh_bands b ON b.band = k.column1 AND b.bucket = k.column2
+            LIMIT ?
+        ) AS c
+        JOIN listing_minhash m ON m.listing_row_id = c.listing_row_id
+        """,
+        [part for key in keys for part in key] + [MAX_CANDIDATES],
+    ).fetchall()
+    matches: list[tuple[int, float]] = []
+    for row in rows:
+        row_id = int(row["listing_row_id"])
+        if exclude_listing_row_id is not None and row_id == int(exclude_listing_row_id):
+            continue
+        similarity = estimated_similarity(signature, _unpack(row["signature"]))
+        if similarity >= threshold:
+            matches.append((row_id, round(similarity, 4)))
+    matches.sort(key=lambda item: (-item[1], -item[0]))
+    return matches
+
+
+def similar_to_listing(
+    conn: sqlite3.Connection,
+    listing_row_id: int,
+    *,
+    threshold: float,
+) -> list[tuple[int, float]]:
+    ensure_indexed(conn, [int(listing_row_id)])
+    row = conn.execute(
+        "SELECT signature FROM listing_minhash WHERE listing_row_id = ?",
+        (int(listing_row_id),),
+    ).fetchone()
+    if row is None:
+        return []
+    return query_similar(
+        conn,
+        _unpack(row["signature"]),
+        threshold=threshold,
+        exclude_listing_row_id=int(listing_row_id),
+    )
+
+
+def rebuild_near_duplicate_index(conn: sqlite3.Connection, *, batch_size: int = 1000) -> int:
+    conn.execute("DELETE FROM listing_lsh_bands")
+    conn.execute("DELETE FROM listing_minhash")
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, title, description FROM listings_raw WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = int(rows[-1]["id"])
+        indexed += index_listings(conn, [(int(row["id"]), row["title"], row["description"]) for row in rows])
+    return indexed
@@ -1,42 +1,364 @@
 from __future__ import annotations
 
+import json
 import smtplib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
 from email.message import EmailMessage
-from typing import Optional
+from pathlib import Path
+from typing import Any
 
 from ..config import settings
 
 
-def send_alert_email(subject: str, body: str) -> bool:
-    """
-    Fire-and-forget SMTP email sender.
-    Returns True if sent, False otherwise.
-    """
-    if not settings.alert_email_enabled:
-        return False
-    if not settings.alert_email_to or not settings.smtp_host or not settings.smtp_user:
-        return False
+@dataclass
+class Alert:
+    key: str
+    subject: str
+    body: str
+    first_at: str
+    last_at: str
+    count: int = 1
+
+    def rendered_subject(self) -> str:
+        return self.subject if self.count <= 1 else f"{self.subject} (x{self.count})"
+
+    def rendered_body(self) -> str:
+        if self.count <= 1:
+            return self.body
+        return f"{self.body}\n\nRepeated {self.count} times between {self.first_at} and {self.last_at}."
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class AlertSink:
+    name = "sink"
+
+    def send(self, alert: Alert) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        return None
+
+
+class SmtpSink(AlertSink):
+    """Keeps one logged-in SMTP connection open between alerts and reconnects on demand."""
 
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = settings.smtp_user
-    msg["To"] = settings.alert_email_to
-    msg.set_content(body)
-
-    try:
-        if settings.smtp_use_tls:
-            with smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port, timeout=10) as server:
-                server.login(settings.smtp_user, settings.smtp_password)
-                server.send_message(msg)
+    name = "smtp"
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        to: str,
+        use_tls: bool,
+        timeout: float = 10.0,
+        idle_sec: float = 60.0,
+    ) -> None:
+        self._host = host
+        self._port = int(port)
+        self._user = user
+        self._password = password
+        self._to = to
+        self._use_tls = bool(use_tls)
+        self._timeout = float(timeout)
+        self._idle_sec = float(idle_sec)
+        self._server: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._use_tls:
+            server: smtplib.SMTP = smtplib.SMTP_SSL(self._host, self._port, timeout=self._timeout)
         else:
-            with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=10) as server:
-                server.starttls()
-                server.login(settings.smtp_user, settings.smtp_password)
-                server.send_message(msg)
-        return True
-    except Exception:
+            server = smtplib.SMTP(self._host, self._port, timeout=self._timeout)
+            server.starttls()
+        server.login(self._user, self._password)
+        return server
+
+    def send(self, alert: Alert) -> None:
+        msg = EmailMessage()
+        msg["Subject"] = alert.rendered_subject()
+        msg["From"] = self._user
+        msg["To"] = self._to
+        msg.set_content(alert.rendered_body())
+
+        if self._server is not None and time.monotonic() - self._last_used > self._idle_sec:
+            # Servers drop idle sessions; reconnecting beats a failed send.
+            self.close()
+        for attempt in range(2):
+            if self._server is None:
+                self._server = self._connect()
+            try:
+                self._server.send_message(msg)
+                self._last_used = time.monotonic()
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+
+class WebhookSink(AlertSink):
+    name = "webhook"
+
+    def __init__(self, url: str, *, timeout: float = 10.0) -> None:
+        self._url = url
+        self._timeout = float(timeout)
+
+    def send(self, alert: Alert) -> None:
+        import httpx
+
+        payload = alert.as_dict()
+        payload["text"] = f"{alert.rendered_subject()}\n{alert.rendered_body()}"
+        httpx.post(self._url, json=payload, timeout=self._timeout).raise_for_status()
+
+
+class FileSink(AlertSink):
+    """Appends one JSON line per alert; handy for local runs and tests."""
+
+    name = "file"
+
+    def __init__(self, path: str) -> None:
+        self._path = Path(path).expanduser()
+
+    def send(self, alert: Alert) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(alert.as_dict(), ensure_ascii=False) + "\n")
+
+
+def _sink_config() -> tuple[Any, ...]:
+    return (
+        settings.alert_email_enabled,
+        settings.alert_email_to,
+        settings.smtp_host,
+        settings.smtp_port,
+        settings.smtp_user,
+        settings.smtp_password,
+        settings.smtp_use_tls,
+        settings.alert_smtp_idle_sec,
+        settings.alert_webhook_url,
+        settings.alert_file_path,
+    )
+
+
+def build_configured_sinks() -> list[AlertSink]:
+    sinks: list[AlertSink] = []
+    if settings.alert_email_enabled and settings.alert_email_to and settings.smtp_host and settings.smtp_user:
+        sinks.append(
+            SmtpSink(
+                host=settings.smtp_host,
+                port=settings.smtp_port,
+                user=settings.smtp_user,
+                password=settings.smtp_password,
+                to=settings.alert_email_to,
+                use_tls=settings.smtp_use_tls,
+                idle_sec=settings.alert_smtp_idle_sec,
+            )
+        )
+    if settings.alert_webhook_url.strip():
+        sinks.append(WebhookSink(settings.alert_webhook_url.strip()))
+    if settings.alert_file_path.strip():
+        sinks.append(FileSink(settings.alert_file_path.strip()))
+    return sinks
+
+
+class AlertDispatcher:
+    """Background alert queue: callers enqueue and return immediately.
+
+    Alerts sharing a key are coalesced while queued, and a key is sent at most
+    once per dedupe window; repeats inside the window are held and go out as a
+    single "(xN)" alert when it expires. Sends are also capped per minute.
+    """
+
+    def __init__(self, sinks: list[AlertSink] | None = None) -> None:
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: OrderedDict[str, Alert] = OrderedDict()
+        self._due_at: dict[str, float] = {}
+        self._last_sent: dict[str, float] = {}
+        self._sink_override = sinks
+        self._sinks: list[AlertSink] = []
+        self._sinks_key: tuple[Any, ...] | None = None
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self._stopping = False
+        self._tokens = float(max(1, settings.alert_rate_limit_per_min))
+        self._tokens_at = time.monotonic()
+        self._submitted = 0
+        self._coalesced = 0
+        self._sent = 0
+        self._dropped = 0
+        self._failed = 0
+        self._last_sent_at = ""
+        self._last_error = ""
+
+    def _active_sinks(self) -> list[AlertSink]:
+        if self._sink_override is not None:
+            return self._sink_override
+        key = _sink_config()
+        if key != self._sinks_key:
+            for sink in self._sinks:
+                sink.close()
+            self._sinks = build_configured_sinks()
+            self._sinks_key = key
+        return self._sinks
+
+    def submit(self, subject: str, body: str, *, key: str | None = None) -> bool:
+        """Queue an alert; False when no sink is configured or the dispatcher is stopping."""
+        with self._lock:
+            if self._stopping or not self._active_sinks():
+                return False
+            alert_key = str(key or subject)
+            now_iso = datetime.now(timezone.utc).isoformat()
+            self._submitted += 1
+            pending = self._pending.get(alert_key)
+            if pending is not None:
+                pending.count += 1
+                pending.body = body
+                pending.last_at = now_iso
+                self._coalesced += 1
+                return True
+            if len(self._pending) >= max(1, settings.alert_queue_max):
+                dropped_key, _ = self._pending.popitem(last=False)
+                self._due_at.pop(dropped_key, None)
+                self._dropped += 1
+            now = time.monotonic()
+            last_sent = self._last_sent.get(alert_key)
+            window = max(0.0, settings.alert_dedupe_window_sec)
+            self._due_at[alert_key] = now if last_sent is None else max(now, last_sent + window)
+            self._pending[alert_key] = Alert(alert_key, subject, body, now_iso, now_iso)
+            self._ensure_worker()
+            self._wakeup.notify()
+            return True
+
+    def _ensure_worker(self) -> None:
+        if self._running:
+            return
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="alert-dispatcher")
+        self._running = True
+        self._thread.start()
+
+    def _next_alert(self) -> tuple[Alert, list[AlertSink]] | None:
+        with self._lock:
+            while True:
+                if not self._pending:
+                    if self._stopping:
+                        return None
+                    self._wakeup.wait()
+                    continue
+                key = min(self._pending, key=self._due_at.__getitem__)
+                now = time.monotonic()
+                wait_for = 0.0 if self._stopping else self._due_at[key] - now
+                rate = max(1, settings.alert_rate_limit_per_min) / 60.0
+                self._tokens = min(rate * 60.0, self._tokens + (now - self._tokens_at) * rate)
+                self._tokens_at = now
+                if not self._stopping and self._tokens < 1.0:
+                    wait_for = max(wait_for, (1.0 - self._tokens) / rate)
+                if wait_for > 0:
+                    self._wakeup.wait(timeout=wait_for)
+                    continue
+                alert = self._pending.pop(key)
+                self._due_at.pop(key, None)
+                self._tokens -= 1.0
+                self._last_sent[key] = now
+                if len(self._last_sent) > 1000:
+                    cutoff = now - max(0.0, settings.alert_dedupe_window_sec)
+                    self._last_sent = {k: t for k, t in self._last_sent.items() if t >= cutoff}
+                return alert, list(self._active_sinks())
+
+    def _loop(self) -> None:
+        while True:
+            item = self._next_alert()
+            if item is None:
+                return
+            alert, sinks = item
+            errors: list[str] = []
+            for sink in sinks:
+                try:
+                    sink.send(alert)
+                except Exception as exc:
+                    errors.append(f"{sink.name}: {exc}")
+            with self._lock:
+                if errors:
+                    self._failed += 1
+                    self._last_error = "; ".join(errors)
+                if len(errors) < len(sinks):
+                    self._sent += 1
+                    self._last_sent_at = datetime.now(timezone.utc).isoformat()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until the queue is empty; held (windowed) alerts keep waiting for their window."""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._pending:
+                    return True
+            time.sleep(0.02)
         return False
 
+    def stop(self, timeout: float = 5.0) -> dict[str, Any]:
+        """Send everything still queued (ignoring windows and rate limits), then close the sinks."""
+        with self._lock:
+            if not self._running:
+                return {"stopped": False, "reason": "not running"}
+            self._stopping = True
+            self._wakeup.notify_all()
+            thread = self._thread
+        if thread:
+            thread.join(timeout=timeout)
+        with self._lock:
+            unsent = len(self._pending)
+            self._running = thread is not None and thread.is_alive()
+            self._stopping = False
+            for sink in self._sinks if self._sink_override is None else self._sink_override:
+                sink.close()
+        return {"stopped": True, "unsent": unsent}
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._running,
+                "sinks": [sink.name for sink in self._active_sinks()],
+                "pending": len(self._pending),
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "sent": self._sent,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "last_sent_at": self._last_sent_at,
+                "last_error": self._last_error,
+                "dedupe_window_sec": settings.alert_dedupe_window_sec,
+                "rate_limit_per_min": settings.alert_rate_limit_per_min,
+            }
+
+
+alert_dispatcher = AlertDispatcher()
+
+
+def send_alert_email(subject: str, body: str, *, key: str | None = None) -> bool:
+    """
+    Queue an alert for the configured sinks (SMTP, webhook, file) without blocking.
+    Returns True if it was queued or coalesced into a pending alert.
+    """
+    return alert_dispatcher.submit(subject, body, key=key)
+
 
 def format_circuit_email(
     *,
@@ -5,11 +5,10 @@ from datetime import datetime, timezone
 from math import ceil
 from typing import Any
 
-from .. import repositories as repo
 from ..config import settings
 from .autotrade import auto_trade_service
+from .execution_health import execution_health
 from .execution_retry import execution_retry_service
-from .market_monitor import monitor_service
 
 
 _STATE_PRIORITY = {
@@ -75,25 +74,26 @@ def _policy_for_state(state: str) -> OperatingPolicy:
 
 
 class OperatingStateService:
-    """Aggregates runtime health into one safe automation posture."""
+    """Aggregates runtime health into one safe automation posture.
+
+    Monitor and execution signals come from the rolling ``execution_health``
+    aggregator, so evaluating the posture does not query or parse logs.
+    """
 
     def status(self) -> dict[str, Any]:
-        monitor = monitor_service.status()
+        monitor = execution_health.monitor_snapshot()
         autotrade = auto_trade_service.status()
         execution_retry = execution_retry_service.status()
-        execution_health = repo.get_execution_log_summary(
-            limit=settings.operating_state_execution_window,
-        )
+        execution_summary = execution_health.execution_snapshot()
 
         state = "normal"
         reasons: list[str] = []
-        monitor_health = monitor.get("health", {}) if isinstance(monitor, dict) else {}
-        monitor_success_rate = float(monitor_health.get("success_rate") or 1.0)
-        monitor_samples = int(monitor_health.get("samples") or 0)
-        monitor_guard_triggered = bool(monitor_health.get("guard_triggered"))
-        execution_sample_size = int(execution_health.get("sample_size") or 0)
-        execution_failure_rate = float(execution_health.get("failure_rate") or 0.0)
-        execution_business_ban_count = int(execution_health.get("business_ban_count") or 0)
+        monitor_success_rate = float(monitor.get("success_rate") or 1.0)
+        monitor_samples = int(monitor.get("samples") or 0)
+        monitor_guard_triggered = bool(monitor.get("guard_triggered"))
+        execution_sample_size = int(execution_summary.get("sample_size") or 0)
+        execution_failure_rate = float(execution_summary.get("failure_rate") or 0.0)
+        execution_business_ban_count = int(execution_summary.get("business_ban_count") or 0)
 
         if bool(monitor.get("circuit_open")):
             state = _escalate(state, "recovery")
@@ -156,12 +156,12 @@ class OperatingStateService:
                 "monitor_health_guard_triggered": monitor_guard_triggered,
                 "execution_sample_size": execution_sample_size,
                 "execution_success_rate": round(
-                    float(execution_health.get("success_rate") or 0.0),
+                    float(execution_summary.get("success_rate") or 0.0),
                     4,
                 ),
                 "execution_failure_rate": round(execution_failure_rate, 4),
                 "execution_business_ban_count": execution_business_ban_count,
-                "execution_last_failure_at": execution_health.get("last_failure_at", ""),
+                "execution_last_failure_at": execution_summary.get("last_failure_at", ""),
                 "autotrade_running": bool(autotrade.get("running")),
                 "execution_retry_running": bool(execution_retry.get("running")),
             },
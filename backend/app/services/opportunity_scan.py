@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from .. import repositories as repo
+from ..config import settings
 from ..schemas import FeatureData
 from .feature_extractor import FeatureExtractor
 from .opportunity import score_opportunity
@@ -10,15 +11,42 @@ from .valuation import estimate_valuation
 _extractor = FeatureExtractor()
 
 
-async def scan_open_listings(limit: int = 50) -> dict[str, int]:
-    open_listings = repo.get_open_listings(limit=max(1, min(500, int(limit))))
+SCAN_MODES = ("dirty", "full")
+
+
+def _normalize_scan_mode(value: str | None) -> str:
+    mode = str(value or "").strip().lower()
+    return mode if mode in SCAN_MODES else "dirty"
+
+
+async def scan_open_listings(limit: int = 50, *, mode: str | None = None) -> dict[str, int]:
+    """Value open listings and refresh their opportunities.
+
+    ``dirty`` mode (the default, see OPPORTUNITY_SCAN_MODE) takes entries of
+    the re-valuation queue (new listings and listings whose comparable sales
+    changed), highest expected-edge pre-score first when SCAN_PRIORITY_ENABLED,
+    otherwise oldest first. ``full`` re-walks the newest ``limit`` listings.
+    """
+    batch_limit = max(1, min(500, int(limit)))
+    if _normalize_scan_mode(mode or settings.opportunity_scan_mode) == "dirty":
+        open_listings = repo.get_dirty_listings(limit=batch_limit)
+        listing_ids = [int(row["id"]) for row in open_listings]
+        dirty_versions = {int(row["id"]): int(row["dirty_version"]) for row in open_listings}
+    else:
+        open_listings = repo.get_open_listings(limit=batch_limit)
+        listing_ids = [int(row["id"]) for row in open_listings if row["id"] is not None]
+        dirty_versions = repo.get_valuation_dirty_versions(listing_ids)
     frozen_by_status = {"rejected", "approved_for_buy"}
-    listing_ids = [int(row["id"]) for row in open_listings if row["id"] is not None]
     existing_status_map = repo.get_opportunity_status_map_by_listing_rows(listing_ids)
+    near_duplicate_threshold = 0.0
+    if settings.near_duplicate_enabled:
+        repo.ensure_near_duplicate_index(listing_ids)
+        near_duplicate_threshold = settings.near_duplicate_threshold
     created = 0
     ignored = 0
     blocked = 0
     failed = 0
+    failures: dict[int, str] = {}
     for listing in open_listings:
         try:
             listing_row_id = int(listing["id"])
@@ -31,6 +59,8 @@ async def scan_open_listings(limit: int = 50) -> dict[str, int]:
                 seller_id=listing["seller_id"],
                 title=str(listing["title"]),
                 exclude_listing_row_id=listing_row_id,
+                description=listing["description"],
+                near_duplicate_threshold=near_duplicate_threshold,
             ):
                 existing_opp = repo.get_opportunity_by_listing_row_id(listing_row_id)
                 if existing_opp and str(existing_opp["status"] or "") not in frozen_by_status:
@@ -47,6 +77,8 @@ async def scan_open_listings(limit: int = 50) -> dict[str, int]:
                 title=str(listing["title"]),
                 list_price=float(listing["list_price"]),
                 exclude_listing_row_id=listing_row_id,
+                description=listing["description"],
+                near_duplicate_threshold=near_duplicate_threshold,
             ):
                 existing_opp = repo.get_opportunity_by_listing_row_id(listing_row_id)
                 if existing_opp and str(existing_opp["status"] or "") not in frozen_by_status:
@@ -77,7 +109,7 @@ async def scan_open_listings(limit: int = 50) -> dict[str, int]:
                 features=feature,
                 comparable_prices=[float(row["sold_price"]) for row in sales],
             )
-            valuation_id = repo.save_valuation(valuation)
+            valuation_id = repo.save_valuation(valuation, features=feature)
 
             seller_open_count = repo.get_seller_open_listing_count(
                 source=str(listing["source"]),
@@ -112,14 +144,26 @@ async def scan_open_listings(limit: int = 50) -> dict[str, int]:
                 blocked += 1
             else:
                 ignored += 1
-        except Exception:
+        except Exception as exc:
             failed += 1
             ignored += 1
+            failures[int(listing["id"])] = f"{type(exc).__name__}: {exc}"
 
+    # Only valued listings leave the queue. Failures stay queued behind the
+    # rest with their attempts bumped, and are parked at VALUATION_DIRTY_MAX_ATTEMPTS
+    # so one bad row cannot pin the queue head.
+    repo.clear_valuation_dirty(
+        [(row_id, version) for row_id, version in dirty_versions.items() if row_id not in failures]
+    )
+    repo.fail_valuation_dirty(
+        [(row_id, version, failures[row_id]) for row_id, version in dirty_versions.items() if row_id in failures]
+    )
     return {
         "processed": len(open_listings),
         "pending_review": created,
         "blocked_risk": blocked,
         "ignored": ignored,
         "failed": failed,
+        "dirty_pending": repo.count_valuation_dirty(),
+        "dirty_parked": repo.count_parked_valuation_dirty(),
     }
@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from statistics import mean, median, pstdev
+from typing import Any, Iterable
+
+from ..config import settings
+from ..database import get_conn
+from .text_matcher import card_name_dictionary_version, guess_card_name
+
+GLOBAL_CARD_KEY = "*"
+GRANULARITIES = ("hour", "day")
+_BUCKET_FORMATS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d"}
+# Each bucket keeps a sorted price sample for its median. Past this size the
+# sample is decimated (every other value kept), so medians of very busy
+# buckets become approximate rather than growing without bound.
+_MEDIAN_SAMPLE_CAP = 256
+_MERGE_CHUNK = 300
+
+
+def normalize_card_key(name: str | None) -> str:
+    text = " ".join(str(name or "").lower().split())
+    return text or "unknown"
+
+
+def rollup_card_key(title: str | None) -> str:
+    """Card key for a raw sale/listing title, from the rule-based name guess."""
+    # The version keys the cache so a reloaded card-name dictionary takes effect.
+    return _cached_card_key(str(title or ""), card_name_dictionary_version())
+
+
+@lru_cache(maxsize=8192)
+def _cached_card_key(title: str, dictionary_version: int) -> str:
+    return normalize_card_key(guess_card_name(title))
+
+
+def _to_epoch(value: Any) -> float | None:
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _bucket_starts(ts: float) -> tuple[tuple[str, str], ...]:
+    hour = datetime.fromtimestamp(ts, tz=timezone.utc).strftime(_BUCKET_FORMATS["hour"])
+    return (("hour", hour), ("day", hour[:10]))
+
+
+@dataclass
+class _Bucket:
+    open_ts: float | None = None
+    open_price: float | None = None
+    close_ts: float | None = None
+    close_price: float | None = None
+    high_price: float | None = None
+    low_price: float | None = None
+    sale_count: int = 0
+    price_sum: float = 0.0
+    price_sq_sum: float = 0.0
+    sample: list[float] = field(default_factory=list)
+    listing_count: int = 0
+
+    def add_sale(self, ts: float, price: float) -> None:
+        if self.open_ts is None or ts < self.open_ts:
+            self.open_ts, self.open_price = ts, price
+        if self.close_ts is None or ts >= self.close_ts:
+            self.close_ts, self.close_price = ts, price
+        self.high_price = price if self.high_price is None else max(self.high_price, price)
+        self.low_price = price if self.low_price is None else min(self.low_price, price)
+        self.sale_count += 1
+        self.price_sum += price
+        self.price_sq_sum += price * price
+        self.sample.append(price)
+
+    def merge(self, other: _Bucket) -> None:
+        if other.open_ts is not None and (self.open_ts is None or other.open_ts < self.open_ts):
+            self.open_ts, self.open_price = other.open_ts, other.open_price
+        if other.close_ts is not None and (self.close_ts is None or other.close_ts >= self.close_ts):
+            self.close_ts, self.close_price = other.close_ts, other.close_price
+        for attr, pick in (("high_price", max), ("low_price", min)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                mine = getattr(self, attr)
+                setattr(self, attr, theirs if mine is None else pick(mine, theirs))
+        self.sale_count += other.sale_count
+        self.price_sum += other.price_sum
+        self.price_sq_sum += other.price_sq_sum
+        self.sample.extend(other.sample)
+        self.listing_count += other.listing_count
+
+    def finalized_sample(self) -> list[float]:
+        sample = sorted(self.sample)
+        while len(sample) > _MEDIAN_SAMPLE_CAP:
+            sample = sample[::2]
+        return sample
+
+
+def _bucket_from_row(row: sqlite3.Row) -> _Bucket:
+    return _Bucket(
+        open_ts=row["open_ts"],
+        open_price=row["open_price"],
+        close_ts=row["close_ts"],
+        close_price=row["close_price"],
+        high_price=row["high_price"],
+        low_price=row["low_price"],
+        sale_count=int(row["sale_count"]),
+        price_sum=float(row["price_sum"]),
+        price_sq_sum=float(row["price_sq_sum"]),
+        sample=[float(value) for value in json.loads(row["median_sample"] or "[]")],
+        listing_count=int(row["listing_count"]),
+    )
+
+
+def _merge_into_table(conn: sqlite3.Connection, deltas: dict[tuple[str, str, str], _Bucket]) -> None:
+    keys = list(deltas)
+    for start in range(0, len(keys), _MERGE_CHUNK):
+        chunk = keys[start : start + _MERGE_CHUNK]
+        values_sql = ",".join("(?, ?, ?)" for _ in chunk)
+        params = [part for key in chunk for part in key]
+        # A join against the VALUES list probes the primary key; the row-value
+        # IN form makes SQLite scan the whole table.
+        rows = conn.execute(
+            f"""
+            SELECT r.*
+            FROM (VALUES {values_sql}) AS k
+            JOIN price_rollups r
+              ON r.granularity = k.column1 AND r.card_key = k.column2 AND r.bucket_start = k.column3
+            """,
+            params,
+        ).fetchall()
+        merged: dict[tuple[str, str, str], _Bucket] = {
+            (str(row["granularity"]), str(row["card_key"]), str(row["bucket_start"])): _bucket_from_row(row)
+            for row in rows
+        }
+        for key in chunk:
+            bucket = merged.setdefault(key, _Bucket())
+            bucket.merge(deltas[key])
+        payload = []
+        for key in chunk:
+            bucket = merged[key]
+            sample = bucket.finalized_sample()
+            payload.append(
+                (
+                    *key,
+                    bucket.open_price,
+                    bucket.high_price,
+                    bucket.low_price,
+                    bucket.close_price,
+                    bucket.open_ts,
+                    bucket.close_ts,
+                    bucket.sale_count,
+                    bucket.price_sum,
+                    bucket.price_sq_sum,
+                    median(sample) if sample else None,
+                    json.dumps(sample),
+                    bucket.listing_count,
+                )
+            )
+        conn.executemany(
+            """
+            INSERT INTO price_rollups(
+                granularity, card_key, bucket_start, open_price, high_price, low_price, close_price,
+                open_ts, close_ts, sale_count, price_sum, price_sq_sum, median_price, median_sample,
+                listing_count
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(granularity, card_key, bucket_start) DO UPDATE SET
+                open_price = excluded.open_price,
+                high_price = excluded.high_price,
+                low_price = excluded.low_price,
+                close_price = excluded.close_price,
+                open_ts = excluded.open_ts,
+                close_ts = excluded.close_ts,
+                sale_count = excluded.sale_count,
+                price_sum = excluded.price_sum,
+                price_sq_sum = excluded.price_sq_sum,
+                median_price = excluded.median_price,
+                median_sample = excluded.median_sample,
+                listing_count = excluded.listing_count,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            payload,
+        )
+
+
+def _card_keys(title: str | None) -> tuple[str, ...]:
+    card_key = rollup_card_key(title)
+    return (GLOBAL_CARD_KEY,) if card_key == "unknown" else (GLOBAL_CARD_KEY, card_key)
+
+
+def record_sales(conn: sqlite3.Connection, sales: Iterable[tuple[str | None, Any, float]]) -> int:
+    """Fold ``(title, sold_at, price)`` rows into their hour/day buckets.
+
+    Runs inside the caller's transaction so the rollups commit (or roll back)
+    together with the ``sales_raw`` insert.
+    """
+    if not settings.price_rollups_enabled:
+        return 0
+    deltas: dict[tuple[str, str, str], _Bucket] = {}
+    applied = 0
+    for title, sold_at, price in sales:
+        ts = _to_epoch(sold_at)
+        price = float(price or 0)
+        if ts is None or price <= 0:
+            continue
+        applied += 1
+        buckets = _bucket_starts(ts)
+        for card_key in _card_keys(title):
+            for granularity, bucket_start in buckets:
+                key = (granularity, card_key, bucket_start)
+                deltas.setdefault(key, _Bucket()).add_sale(ts, price)
+    if deltas:
+        _merge_into_table(conn, deltas)
+    return applied
+
+
+def record_listings(conn: sqlite3.Connection, listings: Iterable[tuple[str | None, Any]]) -> int:
+    """Count ``(title, listed_at)`` rows into their hour/day listing buckets."""
+    if not settings.price_rollups_enabled:
+        return 0
+    deltas: dict[tuple[str, str, str], _Bucket] = {}
+    applied = 0
+    for title, listed_at in listings:
+        ts = _to_epoch(listed_at)
+        if ts is None:
+            continue
+        applied += 1
+        buckets = _bucket_starts(ts)
+        for card_key in _card_keys(title):
+            for granularity, bucket_start in buckets:
+                key = (granularity, card_key, bucket_start)
+                deltas.setdefault(key, _Bucket()).listing_count += 1
+    if deltas:
+        _merge_into_table(conn, deltas)
+    return applied
+
+
+def rebuild_price_rollups(conn: sqlite3.Connection, *, batch_size: int = 2000) -> dict[str, int]:
+    """Recompute every bucket from ``sales_raw`` and ``listings_raw``."""
+    conn.execute("DELETE FROM price_rollups")
+    counts = {"sales": 0, "listings": 0}
+    for table, columns, recorder, counter in (
+        ("sales_raw", "title, sold_at, sold_price", record_sales, "sales"),
+        ("listings_raw", "title, listed_at", record_listings, "listings"),
+    ):
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                f"SELECT id, {columns} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            last_id = int(rows[-1]["id"])
+            counts[counter] += recorder(conn, [tuple(row)[1:] for row in rows])
+    return counts
+
+
+def _bucket_out(row: sqlite3.Row) -> dict[str, Any]:
+    count = int(row["sale_count"])
+    return {
+        "bucket": str(row["bucket_start"]),
+        "open": row["open_price"],
+        "high": row["high_price"],
+        "low": row["low_price"],
+        "close": row["close_price"],
+        "median": row["median_price"],
+        "volume": count,
+        "turnover": round(float(row["price_sum"]), 2),
+        "avg": round(float(row["price_sum"]) / count, 2) if count else None,
+        "listing_count": int(row["listing_count"]),
+    }
+
+
+def _series_rows(card_key: str, granularity: str, buckets: int) -> list[sqlite3.Row]:
+    if granularity not in _BUCKET_FORMATS:
+        raise ValueError(f"unknown granularity: {granularity}")
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT *
+            FROM price_rollups
+            WHERE granularity = ? AND card_key = ?
+            ORDER BY bucket_start DESC
+            LIMIT ?
+            """,
+            (granularity, card_key, max(1, int(buckets))),
+        ).fetchall()
+    return list(reversed(rows))
+
+
+def get_rollup_series(card_key: str, *, granularity: str = "day", buckets: int = 30) -> list[dict[str, Any]]:
+    """The latest ``buckets`` non-empty buckets for ``card_key``, oldest first."""
+    return [_bucket_out(row) for row in _series_rows(card_key, granularity, buckets)]
+
+
+def list_rollup_cards(*, since: str = "", limit: int = 50) -> list[dict[str, Any]]:
+    """Cards ranked by sale count over daily buckets on or after ``since`` (YYYY-MM-DD)."""
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT card_key,
+                   SUM(sale_count) AS volume,
+                   SUM(price_sum) AS turnover,
+                   SUM(listing_count) AS listing_count,
+                   MAX(CASE WHEN sale_count > 0 THEN bucket_start END) AS last_sale_day
+            FROM price_rollups
+            WHERE granularity = 'day' AND card_key <> ? AND bucket_start >= ?
+            GROUP BY card_key
+            ORDER BY volume DESC, card_key ASC
+            LIMIT ?
+            """,
+            (GLOBAL_CARD_KEY, since, max(1, int(limit))),
+        ).fetchall()
+    return [
+        {
+            "card_key": str(row["card_key"]),
+            "volume": int(row["volume"] or 0),
+            "turnover": round(float(row["turnover"] or 0), 2),
+            "avg": round(float(row["turnover"]) / int(row["volume"]), 2) if row["volume"] else None,
+            "listing_count": int(row["listing_count"] or 0),
+            "last_sale_day": row["last_sale_day"] or "",
+        }
+        for row in rows
+    ]
+
+
+def _closes(series: list[dict[str, Any]]) -> list[float]:
+    return [float(item["close"]) for item in series if item["close"] is not None and float(item["close"]) > 0]
+
+
+def trend_from_series(series: list[dict[str, Any]]) -> dict[str, Any]:
+    closes = _closes(series)
+    first_open = next((float(item["open"]) for item in series if item["open"]), 0.0)
+    if not closes or first_open <= 0:
+        return {"direction": "flat", "change_pct": 0.0, "slope_pct_per_bucket": 0.0}
+    change_pct = round(((closes[-1] - first_open) / first_open) * 100, 2)
+    slope = 0.0
+    if len(closes) >= 2:
+        # Least-squares slope over bucket index, relative to the mean close.
+        xs = range(len(closes))
+        x_mean = (len(closes) - 1) / 2
+        y_mean = mean(closes)
+        denom = sum((x - x_mean) ** 2 for x in xs)
+        if denom > 0 and y_mean > 0:
+            slope = sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, closes)) / denom / y_mean * 100
+    direction = "up" if change_pct > 1 else "down" if change_pct < -1 else "flat"
+    return {"direction": direction, "change_pct": change_pct, "slope_pct_per_bucket": round(slope, 4)}
+
+
+def volatility_from_series(series: list[dict[str, Any]], rows_stats: list[tuple[int, float, float]]) -> dict[str, Any]:
+    closes = _closes(series)
+    returns = [math.log(b / a) for a, b in zip(closes, closes[1:]) if a > 0 and b > 0]
+    count = sum(item[0] for item in rows_stats)
+    total = sum(item[1] for item in rows_stats)
+    sq_total = sum(item[2] for item in rows_stats)
+    pooled_cv = 0.0
+    if count >= 2 and total > 0:
+        avg = total / count
+        variance = max(0.0, sq_total / count - avg * avg)
+        pooled_cv = math.sqrt(variance) / avg
+    ranges = [
+        (float(item["high"]) - float(item["low"])) / float(item["avg"])
+        for item in series
+        if item["avg"] and item["high"] is not None and item["low"] is not None
+    ]
+    return {
+        "return_stddev": round(pstdev(returns), 4) if len(returns) >= 2 else 0.0,
+        "coefficient_of_variation": round(pooled_cv, 4),
+        "avg_range_ratio": round(mean(ranges), 4) if ranges else 0.0,
+        "buckets": len(series),
+    }
+
+
+def momentum_from_series(series: list[dict[str, Any]]) -> dict[str, Any]:
+    closes = _closes(series)
+    if len(closes) < 2:
+        return {"short_term_pct": 0.0, "long_term_pct": 0.0, "volume_change_pct": 0.0}
+    short_avg = mean(closes[-min(3, len(closes)) :])
+    long_avg = mean(closes[-min(10, len(closes)) :])
+    short_term_pct = round(((short_avg - long_avg) / long_avg) * 100, 2) if long_avg > 0 else 0.0
+    long_term_pct = round(((closes[-1] - closes[0]) / closes[0]) * 100, 2) if closes[0] > 0 else 0.0
+    volumes = [int(item["volume"]) for item in series]
+    recent = mean(volumes[-min(3, len(volumes)) :])
+    baseline = mean(volumes[-min(10, len(volumes)) :])
+    volume_change_pct = round(((recent - baseline) / baseline) * 100, 2) if baseline > 0 else 0.0
+    return {
+        "short_term_pct": short_term_pct,
+        "long_term_pct": long_term_pct,
+        "volume_change_pct": volume_change_pct,
+    }
+
+
+def card_volatility(card_key: str, *, granularity: str = "day", buckets: int = 30) -> dict[str, Any]:
+    rows = _series_rows(card_key, granularity, buckets)
+    stats = [(int(row["sale_count"]), float(row["price_sum"]), float(row["price_sq_sum"])) for row in rows]
+    return volatility_from_series([_bucket_out(row) for row in rows], stats)
@@ -13,21 +13,14 @@ from urllib.parse import urlparse
 import requests
 
 from ..config import settings
+from ..errors import BusinessBanError
+from .metrics import metrics
 
 
 class ProxyRequiredError(RuntimeError):
     """Raised when strict proxy mode is enabled but no proxy is available."""
 
 
-class BusinessBanError(RuntimeError):
-    """Raised when upstream service returns business-level ban/limit response."""
-
-    def __init__(self, *, code: str, message: str, context: str = "") -> None:
-        super().__init__(message)
-        self.code = code
-        self.context = context
-
-
 _PROXY_ENV_KEYS = (
     "HTTP_PROXY",
     "HTTPS_PROXY",
@@ -202,11 +195,32 @@ def network_policy_status() -> dict[str, Any]:
 
 
 def _request(method: str, url: str, **kwargs: Any) -> requests.Response:
-    _clear_proxy_env()
     with requests.Session() as session:
-        session.trust_env = not settings.network_ignore_env_proxy
+        return session_request(session, method, url, **kwargs)
+
+
+def session_request(session: requests.Session, method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Send through a caller-owned (pooled) session with the same env and metrics handling."""
+    _clear_proxy_env()
+    session.trust_env = not settings.network_ignore_env_proxy
+    if not settings.metrics_enabled:
         return session.request(method=method.upper(), url=url, **kwargs)
 
+    host = urlparse(url).hostname or "unknown"
+    status = "error"
+    started = time.perf_counter()
+    try:
+        response = session.request(method=method.upper(), url=url, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        metrics.observe(
+            "cardflip_http_request_duration_seconds",
+            time.perf_counter() - started,
+            {"host": host},
+        )
+        metrics.inc("cardflip_http_requests_total", 1, {"host": host, "status": status})
+
 
 def _from_forced() -> dict[str, str] | None:
     proxy = _normalize_proxy(settings.network_force_proxy_url)
@@ -1,17 +1,288 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
+import time
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Sequence
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 
 from ..config import settings
-from .proxy_resolver import request_get
-from .proxy_resolver import request_post
+from .proxy_resolver import proxy_url_from_mapping
 from .proxy_resolver import resolve_proxy_for_url
+from .proxy_resolver import session_request
+
+_IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".gif", ".tiff")
+
+
+class RagflowUploadError(RuntimeError):
+    """Some upload batches failed; ``documents`` holds the rows RAGFlow did create."""
+
+    def __init__(self, message: str, *, documents: list[dict[str, Any]], errors: list[dict[str, Any]]) -> None:
+        super().__init__(message)
+        self.documents = documents
+        self.errors = errors
+
+
+def _check_code(payload: dict[str, Any], action: str) -> None:
+    if payload.get("code") not in (None, 0):
+        raise RuntimeError(f"RAGFlow {action} failed: {payload.get('message') or 'unknown'}")
+
+
+def _document_rows(data: Any) -> list[dict[str, Any]]:
+    if isinstance(data, list):
+        return [row for row in data if isinstance(row, dict)]
+    if isinstance(data, dict):
+        for key in ("items", "docs", "documents"):
+            node = data.get(key)
+            if isinstance(node, list):
+                return [row for row in node if isinstance(row, dict)]
+    return []
+
+
+def _existing_files(file_paths: Sequence[str]) -> list[Path]:
+    valid_paths: list[Path] = []
+    for raw_path in file_paths:
+        p = Path(str(raw_path or "")).expanduser()
+        if not p.exists() or not p.is_file():
+            raise RuntimeError(f"file not found: {p}")
+        valid_paths.append(p)
+    if not valid_paths:
+        raise RuntimeError("file_paths cannot be empty")
+    return valid_paths
+
+
+def upload_batches(paths: Sequence[Path], *, max_files: int, max_bytes: int) -> list[list[Path]]:
+    """Split files into multipart requests of at most ``max_files`` files and ``max_bytes`` bytes.
+
+    A single file larger than ``max_bytes`` still goes out, alone in its batch.
+    """
+    batches: list[list[Path]] = []
+    current: list[Path] = []
+    current_bytes = 0
+    for path in paths:
+        size = path.stat().st_size
+        if current and (len(current) >= max_files or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(path)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _chunked(values: Sequence[str], size: int) -> Iterator[list[str]]:
+    step = max(1, int(size))
+    for start in range(0, len(values), step):
+        yield list(values[start : start + step])
+
+
+def _upload_limits() -> tuple[int, int]:
+    max_files = max(1, int(settings.ragflow_upload_batch_files))
+    max_bytes = max(1, int(float(settings.ragflow_upload_batch_mb) * 1024 * 1024))
+    return max_files, max_bytes
+
+
+def _image_document_ids(docs: list[dict[str, Any]]) -> tuple[list[str], list[str]]:
+    doc_ids: list[str] = []
+    image_doc_ids: list[str] = []
+    for row in docs:
+        doc_id = str(row.get("id") or row.get("document_id") or "").strip()
+        if not doc_id:
+            continue
+        doc_ids.append(doc_id)
+        doc_type = str(row.get("type") or "").strip().lower()
+        name = str(row.get("name") or "").strip().lower()
+        if doc_type == "picture" or name.endswith(_IMAGE_SUFFIXES):
+            image_doc_ids.append(doc_id)
+    return doc_ids, image_doc_ids
+
+
+def first_json_object(text: str) -> dict[str, Any] | None:
+    """The first complete top-level JSON object in ``text``, or None while it is still open.
+
+    Lets a streamed answer be cut off as soon as the model has closed its JSON.
+    """
+    start = text.find("{")
+    while start >= 0:
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        payload = json.loads(text[start : index + 1])
+                    except ValueError:
+                        break
+                    if isinstance(payload, dict):
+                        return payload
+                    break
+        else:
+            return None
+        start = text.find("{", start + 1)
+    return None
+
+
+class ChatStream:
+    """Accumulates an OpenAI-style ``text/event-stream`` chat completion."""
+
+    def __init__(self, *, stop_on_json: bool = False) -> None:
+        self.stop_on_json = stop_on_json
+        self.parts: list[str] = []
+        self.reference: Any = None
+        self.chunks = 0
+        self.stopped = "eof"
 
+    @property
+    def answer(self) -> str:
+        return "".join(self.parts).strip()
+
+    @property
+    def complete(self) -> bool:
+        return self.stopped in {"done", "json"}
+
+    def feed(self, line: str) -> bool:
+        """Consume one SSE line; True once reading can stop."""
+        line = line.strip()
+        if not line.startswith("data:"):
+            return False
+        data = line[5:].strip()
+        if data == "[DONE]":
+            self.stopped = "done"
+            return True
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return False
+        if not isinstance(event, dict):
+            return False
+        _check_code(event, "chat")
+        choices = event.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return False
+        self.chunks += 1
+        delta = choices[0].get("delta")
+        if not isinstance(delta, dict):
+            delta = choices[0].get("message") if isinstance(choices[0].get("message"), dict) else {}
+        content = delta.get("content")
+        if delta.get("reference"):
+            self.reference = delta["reference"]
+        if not content:
+            return False
+        self.parts.append(str(content))
+        if self.stop_on_json and "}" in content and first_json_object("".join(self.parts)) is not None:
+            self.stopped = "json"
+            return True
+        return False
+
+    def result(self, chat_id: str, *, include_reference: bool) -> dict[str, Any]:
+        answer = self.answer
+        if not answer:
+            suffix = " before deadline" if self.stopped == "deadline" else ""
+            raise RuntimeError(f"RAGFlow returned empty answer{suffix}")
+        return {
+            "chat_id": chat_id,
+            "answer": answer,
+            "reference": self.reference if include_reference else None,
+            "raw": {"chunks": self.chunks},
+            "streamed": True,
+            "complete": self.complete,
+            "stopped": self.stopped,
+        }
+
+
+def _chat_body(question: str, model: str, include_reference: bool, stream: bool) -> dict[str, Any]:
+    return {
+        "model": model or "ragflow",
+        "messages": [{"role": "user", "content": question}],
+        "stream": bool(stream),
+        "extra_body": {"reference": bool(include_reference)},
+    }
+
+
+def _chat_target(chat_id: str | None, question: str) -> str:
+    selected_chat_id = (chat_id or settings.ragflow_chat_id or "").strip()
+    if not selected_chat_id:
+        raise RuntimeError("Missing chat_id. Set RAGFLOW_CHAT_ID or pass chat_id in request.")
+    if not str(question or "").strip():
+        raise RuntimeError("question cannot be empty")
+    return selected_chat_id
+
+
+def _json_result(status_code: int, text: str, content: bytes, *, label: str = "RAGFlow") -> dict[str, Any]:
+    if status_code >= 400:
+        raise RuntimeError(f"{label} HTTP {status_code}: {(text or '')[:240]}")
+    try:
+        payload = json.loads(content)
+    except ValueError as exc:
+        raise RuntimeError(f"{label} returned non-JSON response") from exc
+    if not isinstance(payload, dict):
+        raise RuntimeError(f"{label} returned unsupported JSON payload")
+    return payload
+
+
+def _upload_result(status_code: int, text: str, content: bytes) -> list[dict[str, Any]]:
+    payload = _json_result(status_code, text, content, label="RAGFlow upload")
+    _check_code(payload, "upload")
+    return _document_rows(payload.get("data"))
+
+
+def _batch_error(batch: list[Path], exc: BaseException) -> dict[str, Any]:
+    return {"files": [p.name for p in batch], "error": str(exc)}
+
+
+def _upload_error(documents: list[dict[str, Any]], errors: list[dict[str, Any]], total: int) -> RagflowUploadError:
+    done = total - len(errors)
+    return RagflowUploadError(
+        f"RAGFlow upload: {done}/{total} requests succeeded; first error: {errors[0]['error']}",
+        documents=documents,
+        errors=errors,
+    )
+
+
+def _chat_completion_result(chat_id: str, payload: dict[str, Any], *, include_reference: bool) -> dict[str, Any]:
+    if "code" in payload and payload.get("code") not in (None, 0):
+        raise RuntimeError(f"RAGFlow chat failed: {payload.get('message') or 'unknown'}")
 
-class RagflowClient:
+    choices = payload.get("choices")
+    if not isinstance(choices, list) or not choices:
+        raise RuntimeError("RAGFlow returned no choices")
+
+    first = choices[0] if isinstance(choices[0], dict) else {}
+    message = first.get("message") if isinstance(first.get("message"), dict) else {}
+    answer = str(message.get("content") or "").strip()
+    if not answer:
+        raise RuntimeError("RAGFlow returned empty answer")
+
+    return {
+        "chat_id": chat_id,
+        "answer": answer,
+        "reference": message.get("reference") if include_reference else None,
+        "raw": payload,
+    }
+
+
+class _RagflowEndpoint:
     def __init__(self) -> None:
         self.base_url = str(settings.ragflow_base_url or "").strip().rstrip("/")
         self.api_key = str(settings.ragflow_api_key or "").strip()
@@ -24,6 +295,39 @@ class RagflowClient:
     def configured(self) -> bool:
         return bool(self.base_url and self.api_key)
 
+    def _ensure_ready(self) -> None:
+        if not self.enabled:
+            raise RuntimeError("RAGFlow is disabled. Set RAGFLOW_ENABLED=true.")
+        if not self.base_url:
+            raise RuntimeError("RAGFLOW_BASE_URL is empty.")
+        if not self.api_key:
+            raise RuntimeError("RAGFLOW_API_KEY is empty.")
+
+
+class RagflowClient(_RagflowEndpoint):
+    def __init__(self) -> None:
+        super().__init__()
+        self._session: requests.Session | None = None
+        self._session_lock = threading.Lock()
+
+    def _http(self) -> requests.Session:
+        """Shared keep-alive session; requests to RAGFlow reuse its connection pool."""
+        with self._session_lock:
+            if self._session is None:
+                size = max(1, int(settings.ragflow_pool_size))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        with self._session_lock:
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
     def status(self) -> dict[str, Any]:
         status = {
             "enabled": self.enabled,
@@ -68,44 +372,76 @@ class RagflowClient:
         chat_id: str | None = None,
         model: str = "ragflow",
         include_reference: bool = True,
+        stream: bool = False,
+        deadline_sec: float | None = None,
+        stop_on_json: bool = False,
     ) -> dict[str, Any]:
-        self._ensure_ready()
-        selected_chat_id = (chat_id or settings.ragflow_chat_id or "").strip()
-        if not selected_chat_id:
-            raise RuntimeError("Missing chat_id. Set RAGFLOW_CHAT_ID or pass chat_id in request.")
-        if not str(question or "").strip():
-            raise RuntimeError("question cannot be empty")
+        """Ask a RAGFlow chat assistant.
 
-        payload = self._request_json(
-            "POST",
-            f"/api/v1/chats_openai/{selected_chat_id}/chat/completions",
-            json={
-                "model": model or "ragflow",
-                "messages": [{"role": "user", "content": question}],
-                "stream": False,
-                "extra_body": {"reference": bool(include_reference)},
-            },
-        )
-
-        if "code" in payload and payload.get("code") not in (None, 0):
-            raise RuntimeError(f"RAGFlow chat failed: {payload.get('message') or 'unknown'}")
-
-        choices = payload.get("choices")
-        if not isinstance(choices, list) or not choices:
-            raise RuntimeError("RAGFlow returned no choices")
+        With ``stream`` the answer is read as server-sent events; reading stops
+        at ``[DONE]``, at ``deadline_sec`` (keeping the partial answer), or, with
+        ``stop_on_json``, as soon as the answer holds a complete JSON object.
+        Streamed results carry ``complete`` and ``stopped`` to tell these apart.
+        """
+        self._ensure_ready()
+        selected_chat_id = _chat_target(chat_id, question)
+        path = f"/api/v1/chats_openai/{selected_chat_id}/chat/completions"
+        body = _chat_body(question, model, include_reference, stream)
+        if stream:
+            return self._stream_chat(path, body, deadline_sec=deadline_sec, stop_on_json=stop_on_json).result(
+                selected_chat_id, include_reference=include_reference
+            )
 
-        first = choices[0] if isinstance(choices[0], dict) else {}
-        message = first.get("message") if isinstance(first.get("message"), dict) else {}
-        answer = str(message.get("content") or "").strip()
-        if not answer:
-            raise RuntimeError("RAGFlow returned empty answer")
+        payload = self._request_json("POST", path, json=body)
+        return _chat_completion_result(selected_chat_id, payload, include_reference=include_reference)
 
-        return {
-            "chat_id": selected_chat_id,
-            "answer": answer,
-            "reference": message.get("reference") if include_reference else None,
-            "raw": payload,
-        }
+    def _stream_chat(
+        self,
+        path: str,
+        body: dict[str, Any],
+        *,
+        deadline_sec: float | None,
+        stop_on_json: bool,
+    ) -> ChatStream:
+        url = f"{self.base_url}{path}"
+        timeout = float(settings.ragflow_timeout_sec or 45.0)
+        deadline = time.monotonic() + deadline_sec if deadline_sec and deadline_sec > 0 else None
+        if deadline_sec and deadline_sec > 0:
+            # Bounds each wait for the next chunk; the loop enforces the total.
+            timeout = min(timeout, float(deadline_sec))
+        chat = ChatStream(stop_on_json=stop_on_json)
+        try:
+            resp = session_request(
+                self._http(),
+                "POST",
+                url,
+                headers=self._headers(json_body=True),
+                json=body,
+                timeout=timeout,
+                proxies=resolve_proxy_for_url(url),
+                stream=True,
+            )
+        except requests.RequestException as exc:
+            raise RuntimeError(f"RAGFlow request error: {exc}") from exc
+        try:
+            if resp.status_code >= 400:
+                excerpt = (resp.text or "")[:240]
+                raise RuntimeError(f"RAGFlow HTTP {resp.status_code}: {excerpt}")
+            for raw_line in resp.iter_lines():
+                if raw_line and chat.feed(raw_line.decode("utf-8", errors="replace")):
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    chat.stopped = "deadline"
+                    break
+        except requests.Timeout:
+            chat.stopped = "deadline"
+        except requests.RequestException as exc:
+            if not chat.parts:
+                raise RuntimeError(f"RAGFlow request error: {exc}") from exc
+            chat.stopped = "error"
+        finally:
+            resp.close()
+        return chat
 
     def list_datasets(
         self,
@@ -197,64 +533,48 @@ class RagflowClient:
         dataset_id: str,
         file_paths: list[str],
     ) -> list[dict[str, Any]]:
+        """Upload files in bounded multipart batches (see ``upload_batches``).
+
+        Only one batch is open and encoded at a time; ``AsyncRagflowClient``
+        streams batches from disk concurrently for bulk ingest. A failed batch
+        does not stop the rest; if any failed, ``RagflowUploadError`` carries
+        the documents that did upload.
+        """
         self._ensure_ready()
         normalized_dataset_id = str(dataset_id or "").strip()
         if not normalized_dataset_id:
             raise RuntimeError("dataset_id cannot be empty")
-        valid_paths: list[Path] = []
-        for raw_path in file_paths:
-            p = Path(str(raw_path or "")).expanduser()
-            if not p.exists() or not p.is_file():
-                raise RuntimeError(f"file not found: {p}")
-            valid_paths.append(p)
-        if not valid_paths:
-            raise RuntimeError("file_paths cannot be empty")
+        valid_paths = _existing_files(file_paths)
 
         url = f"{self.base_url}/api/v1/datasets/{normalized_dataset_id}/documents"
         proxies = resolve_proxy_for_url(url)
-        headers = {"Authorization": f"Bearer {self.api_key}"}
         timeout = float(settings.ragflow_timeout_sec or 45.0)
-
-        files = [("file", (p.name, p.open("rb"), "application/octet-stream")) for p in valid_paths]
-        try:
-            resp = requests.post(
-                url,
-                headers=headers,
-                files=files,
-                timeout=timeout,
-                proxies=proxies,
-                trust_env=False,
-            )
-        except requests.RequestException as exc:
-            raise RuntimeError(f"RAGFlow upload documents error: {exc}") from exc
-        finally:
-            for _, payload in files:
+        max_files, max_bytes = _upload_limits()
+
+        docs: list[dict[str, Any]] = []
+        errors: list[dict[str, Any]] = []
+        batches = upload_batches(valid_paths, max_files=max_files, max_bytes=max_bytes)
+        for batch in batches:
+            with ExitStack() as stack:
+                files = [("file", (p.name, stack.enter_context(p.open("rb")), "application/octet-stream")) for p in batch]
                 try:
-                    payload[1].close()
-                except Exception:
-                    pass
-
-        if resp.status_code >= 400:
-            excerpt = (resp.text or "")[:240]
-            raise RuntimeError(f"RAGFlow upload HTTP {resp.status_code}: {excerpt}")
-        try:
-            payload = resp.json()
-        except ValueError as exc:
-            raise RuntimeError("RAGFlow upload returned non-JSON response") from exc
-        if not isinstance(payload, dict):
-            raise RuntimeError("RAGFlow upload returned unsupported payload")
-        if payload.get("code") not in (None, 0):
-            raise RuntimeError(f"RAGFlow upload failed: {payload.get('message') or 'unknown'}")
-
-        data = payload.get("data")
-        if isinstance(data, list):
-            return [row for row in data if isinstance(row, dict)]
-        if isinstance(data, dict):
-            for key in ("items", "docs", "documents"):
-                node = data.get(key)
-                if isinstance(node, list):
-                    return [row for row in node if isinstance(row, dict)]
-        return []
+                    resp = session_request(
+                        self._http(),
+                        "POST",
+                        url,
+                        headers=self._headers(),
+                        files=files,
+                        timeout=timeout,
+                        proxies=proxies,
+                    )
+                    docs.extend(_upload_result(resp.status_code, resp.text, resp.content))
+                except requests.RequestException as exc:
+                    errors.append(_batch_error(batch, RuntimeError(f"RAGFlow upload documents error: {exc}")))
+                except RuntimeError as exc:
+                    errors.append(_batch_error(batch, exc))
+        if errors:
+            raise _upload_error(docs, errors, len(batches))
+        return docs
 
     def update_document(
         self,
@@ -275,15 +595,13 @@ class RagflowClient:
 
     def parse_documents(self, *, dataset_id: str, document_ids: list[str]) -> None:
         cleaned_ids = [str(doc_id).strip() for doc_id in document_ids if str(doc_id).strip()]
-        if not cleaned_ids:
-            return
-        payload = self._request_json(
-            "POST",
-            f"/api/v1/datasets/{dataset_id}/chunks",
-            json={"document_ids": cleaned_ids},
-        )
-        if payload.get("code") not in (None, 0):
-            raise RuntimeError(f"RAGFlow parse documents failed: {payload.get('message') or 'unknown'}")
+        for batch in _chunked(cleaned_ids, settings.ragflow_parse_batch_size):
+            payload = self._request_json(
+                "POST",
+                f"/api/v1/datasets/{dataset_id}/chunks",
+                json={"document_ids": batch},
+            )
+            _check_code(payload, "parse documents")
 
     def _request_json(
         self,
@@ -296,51 +614,271 @@ class RagflowClient:
         self._ensure_ready()
         url = f"{self.base_url}{path}"
         proxies = resolve_proxy_for_url(url)
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         timeout = float(settings.ragflow_timeout_sec or 45.0)
+        kwargs: dict[str, Any] = {"params": params or {}}
+        if method.upper() != "GET":
+            kwargs["json"] = json or {}
         try:
-            if method.upper() == "GET":
-                resp = request_get(
-                    url,
-                    headers=headers,
-                    params=params or {},
-                    timeout=timeout,
-                    proxies=proxies,
-                )
-            else:
-                resp = request_post(
-                    url,
-                    headers=headers,
-                    params=params or {},
-                    json=json or {},
-                    timeout=timeout,
-                    proxies=proxies,
-                )
+            resp = session_request(
+                self._http(),
+                method,
+                url,
+                headers=self._headers(json_body=True),
+                timeout=timeout,
+                proxies=proxies,
+                **kwargs,
+            )
         except requests.RequestException as exc:
             raise RuntimeError(f"RAGFlow request error: {exc}") from exc
+        return _json_result(resp.status_code, resp.text, resp.content)
+
+    def _headers(self, *, json_body: bool = False) -> dict[str, str]:
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        if json_body:
+            headers["Content-Type"] = "application/json"
+        return headers
+
+
+class AsyncRagflowClient(_RagflowEndpoint):
+    """Pooled async RAGFlow client for bulk ingest and streamed chat.
 
-        if resp.status_code >= 400:
-            excerpt = (resp.text or "")[:240]
-            raise RuntimeError(f"RAGFlow HTTP {resp.status_code}: {excerpt}")
+    One keep-alive ``httpx.AsyncClient`` is kept per event loop. Uploads go
+    out as bounded multipart batches streamed from disk, at most
+    ``RAGFLOW_UPLOAD_CONCURRENCY`` requests in flight; parse requests are
+    batched by ``RAGFLOW_PARSE_BATCH_SIZE`` ids.
+    """
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._client: httpx.AsyncClient | None = None
+        self._client_key: tuple[Any, ...] = ()
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        key = (loop, self.base_url, self.api_key)
+        if self._client is None or self._client.is_closed or self._client_key != key:
+            # A client bound to another (finished) loop cannot be closed from
+            # here; its connections go with that loop.
+            size = max(1, int(settings.ragflow_pool_size))
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(float(settings.ragflow_timeout_sec or 45.0)),
+                limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+                trust_env=not settings.network_ignore_env_proxy,
+                proxy=proxy_url_from_mapping(resolve_proxy_for_url(self.base_url)),
+            )
+            self._client_key = key
+        return self._client
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        loop = self._client_key[0] if self._client_key else None
+        self._client_key = ()
+        if client is not None and not client.is_closed and loop is asyncio.get_running_loop():
+            await client.aclose()
+
+    async def request_json(
+        self,
+        method: str,
+        path: str,
+        *,
+        params: dict[str, Any] | None = None,
+        json: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        self._ensure_ready()
         try:
-            payload = resp.json()
-        except ValueError as exc:
-            raise RuntimeError("RAGFlow returned non-JSON response") from exc
-        if not isinstance(payload, dict):
-            raise RuntimeError("RAGFlow returned unsupported JSON payload")
-        return payload
+            resp = await self._http().request(
+                method.upper(),
+                path,
+                params=params or None,
+                json=json if method.upper() != "GET" else None,
+            )
+        except httpx.HTTPError as exc:
+            raise RuntimeError(f"RAGFlow request error: {exc}") from exc
+        return _json_result(resp.status_code, resp.text, resp.content)
 
-    def _ensure_ready(self) -> None:
-        if not self.enabled:
-            raise RuntimeError("RAGFlow is disabled. Set RAGFLOW_ENABLED=true.")
-        if not self.base_url:
-            raise RuntimeError("RAGFLOW_BASE_URL is empty.")
-        if not self.api_key:
-            raise RuntimeError("RAGFLOW_API_KEY is empty.")
+    async def upload_documents(
+        self,
+        *,
+        dataset_id: str,
+        file_paths: list[str],
+        concurrency: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Upload every batch; raises ``RagflowUploadError`` (with the uploaded rows) if any failed."""
+        docs, errors, total = await self._upload_all(dataset_id, file_paths, concurrency)
+        if errors:
+            raise _upload_error(docs, errors, total)
+        return docs
+
+    async def _upload_all(
+        self,
+        dataset_id: str,
+        file_paths: list[str],
+        concurrency: int | None,
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]], int]:
+        """Uploaded rows and per-batch errors, plus the batch count; a failed batch never discards the others."""
+        self._ensure_ready()
+        normalized_dataset_id = str(dataset_id or "").strip()
+        if not normalized_dataset_id:
+            raise RuntimeError("dataset_id cannot be empty")
+        max_files, max_bytes = _upload_limits()
+        batches = upload_batches(_existing_files(file_paths), max_files=max_files, max_bytes=max_bytes)
+        path = f"/api/v1/datasets/{normalized_dataset_id}/documents"
+        results = await self._gather(
+            [lambda batch=batch: self._upload_batch(path, batch) for batch in batches],
+            concurrency,
+        )
+        docs: list[dict[str, Any]] = []
+        errors: list[dict[str, Any]] = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException):
+                errors.append(_batch_error(batch, result))
+            else:
+                docs.extend(result)
+        return docs, errors, len(batches)
+
+    async def _upload_batch(self, path: str, batch: list[Path]) -> list[dict[str, Any]]:
+        with ExitStack() as stack:
+            # httpx reads file objects in chunks while sending; nothing is
+            # buffered beyond the current chunk.
+            files = [("file", (p.name, stack.enter_context(p.open("rb")), "application/octet-stream")) for p in batch]
+            try:
+                resp = await self._http().post(path, files=files)
+            except httpx.HTTPError as exc:
+                raise RuntimeError(f"RAGFlow upload documents error: {exc}") from exc
+        return _upload_result(resp.status_code, resp.text, resp.content)
+
+    async def update_document(self, *, dataset_id: str, document_id: str, chunk_method: str) -> dict[str, Any]:
+        payload = await self.request_json(
+            "PUT",
+            f"/api/v1/datasets/{dataset_id}/documents/{document_id}",
+            json={"chunk_method": chunk_method},
+        )
+        _check_code(payload, "update document")
+        data = payload.get("data")
+        return data if isinstance(data, dict) else {}
+
+    async def parse_documents(
+        self,
+        *,
+        dataset_id: str,
+        document_ids: list[str],
+        concurrency: int | None = None,
+    ) -> int:
+        """Start parsing in batches of ``RAGFLOW_PARSE_BATCH_SIZE``; returns the request count."""
+        cleaned_ids = [str(doc_id).strip() for doc_id in document_ids if str(doc_id).strip()]
+        path = f"/api/v1/datasets/{dataset_id}/chunks"
+
+        async def _parse(batch: list[str]) -> None:
+            _check_code(await self.request_json("POST", path, json={"document_ids": batch}), "parse documents")
+
+        batches = list(_chunked(cleaned_ids, settings.ragflow_parse_batch_size))
+        await self._bounded([lambda batch=batch: _parse(batch) for batch in batches], concurrency, action="parse")
+        return len(batches)
+
+    async def ingest_documents(
+        self,
+        *,
+        dataset_id: str,
+        file_paths: list[str],
+        auto_parse: bool = True,
+        picture_chunk_for_images: bool = True,
+    ) -> dict[str, Any]:
+        """Upload, switch image documents to the ``picture`` chunker, then parse.
+
+        Documents from batches that did upload are still configured and
+        parsed when other batches fail; those failures are returned under
+        ``errors``. Only a run where nothing uploaded raises.
+        """
+        docs, errors, total = await self._upload_all(dataset_id, file_paths, None)
+        if errors and not docs:
+            raise _upload_error(docs, errors, total)
+        doc_ids, image_doc_ids = _image_document_ids(docs)
+        if picture_chunk_for_images and image_doc_ids:
+            await self._bounded(
+                [
+                    lambda doc_id=doc_id: self.update_document(
+                        dataset_id=dataset_id, document_id=doc_id, chunk_method="picture"
+                    )
+                    for doc_id in image_doc_ids
+                ],
+                None,
+                action="update document",
+            )
+        if auto_parse and doc_ids:
+            await self.parse_documents(dataset_id=dataset_id, document_ids=doc_ids)
+        return {
+            "dataset_id": dataset_id,
+            "uploaded": len(docs),
+            "parsed": len(doc_ids) if auto_parse else 0,
+            "image_docs_reconfigured": len(image_doc_ids) if picture_chunk_for_images else 0,
+            "failed": sum(len(error["files"]) for error in errors),
+            "errors": errors,
+            "items": docs,
+        }
+
+    async def create_chat_completion(
+        self,
+        *,
+        question: str,
+        chat_id: str | None = None,
+        model: str = "ragflow",
+        include_reference: bool = True,
+        stream: bool = False,
+        deadline_sec: float | None = None,
+        stop_on_json: bool = False,
+    ) -> dict[str, Any]:
+        """Async ``RagflowClient.create_chat_completion``; same streaming semantics."""
+        self._ensure_ready()
+        selected_chat_id = _chat_target(chat_id, question)
+        path = f"/api/v1/chats_openai/{selected_chat_id}/chat/completions"
+        body = _chat_body(question, model, include_reference, stream)
+        if not stream:
+            payload = await self.request_json("POST", path, json=body)
+            return _chat_completion_result(selected_chat_id, payload, include_reference=include_reference)
+
+        chat = ChatStream(stop_on_json=stop_on_json)
+        try:
+            async with asyncio.timeout(deadline_sec if deadline_sec and deadline_sec > 0 else None):
+                async with self._http().stream("POST", path, json=body) as resp:
+                    if resp.status_code >= 400:
+                        excerpt = (await resp.aread()).decode("utf-8", errors="replace")[:240]
+                        raise RuntimeError(f"RAGFlow HTTP {resp.status_code}: {excerpt}")
+                    async for line in resp.aiter_lines():
+                        if line and chat.feed(line):
+                            break
+        except (TimeoutError, httpx.TimeoutException):
+            chat.stopped = "deadline"
+        except httpx.HTTPError as exc:
+            if not chat.parts:
+                raise RuntimeError(f"RAGFlow request error: {exc}") from exc
+            chat.stopped = "error"
+        return chat.result(selected_chat_id, include_reference=include_reference)
+
+    async def _gather(self, calls: list[Any], concurrency: int | None) -> list[Any]:
+        """Run zero-argument coroutine factories with at most ``concurrency`` in flight.
+
+        Results come back in call order; a failed call yields its exception.
+        """
+        limit = max(1, int(concurrency or settings.ragflow_upload_concurrency))
+        semaphore = asyncio.Semaphore(limit)
+
+        async def _run(call: Any) -> Any:
+            async with semaphore:
+                return await call()
+
+        return list(await asyncio.gather(*(_run(call) for call in calls), return_exceptions=True))
+
+    async def _bounded(self, calls: list[Any], concurrency: int | None, *, action: str) -> list[Any]:
+        """``_gather`` that raises once every call has finished if any of them failed."""
+        results = await self._gather(calls, concurrency)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        if failures:
+            done = len(results) - len(failures)
+            raise RuntimeError(f"RAGFlow {action}: {done}/{len(results)} requests succeeded; first error: {failures[0]}")
+        return list(results)
 
 
 ragflow_client = RagflowClient()
+async_ragflow_client = AsyncRagflowClient()
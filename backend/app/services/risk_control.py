@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 from ..config import settings
 from ..schemas import ValuationOut
+from .text_matcher import risk_keyword_matcher
 
 
 @dataclass(frozen=True)
@@ -68,13 +69,7 @@ def assess_opportunity_risk(
         score += penalty
         reasons.append("seller_listing_concentration")
 
-    lower_text = listing_text.lower()
-    suspicious_keywords = [
-        token.strip().lower()
-        for token in settings.risk_suspicious_keywords.split(",")
-        if token.strip()
-    ]
-    if suspicious_keywords and any(token in lower_text for token in suspicious_keywords):
+    if risk_keyword_matcher().contains_any(listing_text):
         score += settings.risk_keyword_penalty
         reasons.append("suspicious_listing_keywords")
 
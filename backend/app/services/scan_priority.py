@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Iterable
+
+from ..config import settings
+from .price_rollups import rollup_card_key
+from .valuation_dirty import drop_closed
+
+# Queue entries are scored once when (re-)marked: a re-mark resets ``priority``
+# to NULL. Scoring only reads the price rollups and a seller count, so the scan
+# can rank the whole queue without extracting features or valuing anything.
+
+_CHUNK = 300
+_SCORE_BATCH = 2000
+_SELLER_DAMPING = 0.1
+
+
+def prescore(
+    *,
+    list_price: float,
+    card_median: float | None,
+    seller_open_count: int,
+    age_hours: float,
+) -> float:
+    """Expected-edge pre-score: discount to the card median, damped for dealers and stale listings.
+
+    Unknown cards score 0, between underpriced (> 0) and overpriced (< 0) ones.
+    """
+    if not card_median or card_median <= 0 or list_price <= 0:
+        return 0.0
+    edge = max(-1.0, min(1.0, (card_median - list_price) / card_median))
+    if edge <= 0:
+        return round(edge, 6)
+    # Sellers with many open listings tend to be dealers pricing at market.
+    concentration = 1.0 / (1.0 + _SELLER_DAMPING * max(0, seller_open_count - 1))
+    half_life = settings.scan_priority_age_half_life_hours
+    # Old listings are less likely to still be available at that price.
+    freshness = 0.5 ** (max(0.0, age_hours) / half_life) if half_life > 0 else 1.0
+    return round(edge * concentration * freshness, 6)
+
+
+def card_medians(conn: sqlite3.Connection, card_keys: Iterable[str]) -> dict[str, float]:
+    """Median of the daily rollup medians over the last ``scan_priority_median_days``."""
+    keys = sorted({key for key in card_keys if key and key != "unknown"})
+    window = timedelta(days=max(1, settings.scan_priority_median_days))
+    since = (datetime.now(timezone.utc) - window).strftime("%Y-%m-%d")
+    daily: dict[str, list[float]] = {}
+    for start in range(0, len(keys), _CHUNK):
+        chunk = keys[start : start + _CHUNK]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT card_key, median_price
+            FROM price_rollups
+            WHERE granularity = 'day' AND bucket_start >= ? AND median_price IS NOT NULL
+              AND card_key IN ({placeholders})
+            """,
+            (since, *chunk),
+        ).fetchall()
+        for row in rows:
+            daily.setdefault(str(row["card_key"]), []).append(float(row["median_price"]))
+    return {key: median(values) for key, values in daily.items()}
+
+
+def seller_open_counts(conn: sqlite3.Connection, sellers: Iterable[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    pairs = sorted(set(sellers))
+    counts: dict[tuple[str, str], int] = {}
+    for start in range(0, len(pairs), _CHUNK):
+        chunk = pairs[start : start + _CHUNK]
+        values_sql = ",".join("(?, ?)" for _ in chunk)
+        rows = conn.execute(
+            f"""
+            SELECT l.source, l.seller_id, COUNT(*) AS open_count
+            FROM (VALUES {values_sql}) AS s
+            JOIN listings_raw l ON l.source = s.column1 AND l.seller_id = s.column2
+            WHERE l.status = 'open'
+            GROUP BY l.source, l.seller_id
+            """,
+            [part for pair in chunk for part in pair],
+        ).fetchall()
+        counts.update({(str(row["source"]), str(row["seller_id"])): int(row["open_count"]) for row in rows})
+    return counts
+
+
+def score_pending(conn: sqlite3.Connection, *, batch_size: int = _SCORE_BATCH) -> int:
+    """Fill in ``priority`` for unscored queue entries; returns how many were scored."""
+    rows = conn.execute(
+        """
+        SELECT q.listing_row_id, q.version, l.source, l.seller_id, l.title, l.list_price,
+               (julianday('now') - julianday(l.listed_at)) * 24.0 AS age_hours
+        FROM valuation_dirty_queue q
+        JOIN listings_raw l ON l.id = q.listing_row_id
+        WHERE q.priority IS NULL
+        LIMIT ?
+        """,
+        (max(1, int(batch_size)),),
+    ).fetchall()
+    if not rows:
+        return 0
+    card_keys = {int(row["listing_row_id"]): rollup_card_key(row["title"]) for row in rows}
+    medians = card_medians(conn, card_keys.values()) if settings.price_rollups_enabled else {}
+    sellers = seller_open_counts(
+        conn,
+        ((str(row["source"]), str(row["seller_id"])) for row in rows if row["seller_id"]),
+    )
+    updates = []
+    for row in rows:
+        score = prescore(
+            list_price=float(row["list_price"] or 0),
+            card_median=medians.get(card_keys[int(row["listing_row_id"])]),
+            seller_open_count=sellers.get((str(row["source"]), str(row["seller_id"])), 1),
+            age_hours=float(row["age_hours"] or 0.0),
+        )
+        updates.append((score, int(row["listing_row_id"]), int(row["version"])))
+    # The version guard keeps a re-mark that happened meanwhile unscored.
+    conn.executemany(
+        "UPDATE valuation_dirty_queue SET priority = ? WHERE listing_row_id = ? AND version = ?",
+        updates,
+    )
+    return len(updates)
+
+
+def next_prioritized_listings(conn: sqlite3.Connection, limit: int, *, max_attempts: int = 0) -> list[sqlite3.Row]:
+    """Top-``limit`` open queue entries by pre-score plus queue-wait aging.
+
+    Entries queued longer than ``scan_priority_starvation_hours`` come first
+    (oldest first), so unknown or overpriced cards are still valued eventually.
+    Entries parked after ``max_attempts`` failures (when > 0) are skipped.
+    """
+    drop_closed(conn)
+    while score_pending(conn):
+        pass
+    return conn.execute(
+        """
+        SELECT l.*, q.version AS dirty_version, q.reason AS dirty_reason,
+               q.priority AS scan_priority, q.waited_hours AS queue_waited_hours
+        FROM (
+            SELECT listing_row_id, version, reason, priority, marked_at,
+                   (julianday('now') - julianday(marked_at)) * 24.0 AS waited_hours
+            FROM valuation_dirty_queue
+            WHERE :max_attempts <= 0 OR attempts < :max_attempts
+        ) AS q
+        JOIN listings_raw l ON l.id = q.listing_row_id
+        ORDER BY
+            CASE WHEN :starve > 0 AND q.waited_hours >= :starve THEN q.marked_at END IS NULL,
+            CASE WHEN :starve > 0 AND q.waited_hours >= :starve THEN q.marked_at END ASC,
+            COALESCE(q.priority, 0) + :aging * q.waited_hours DESC,
+            q.marked_at ASC,
+            q.listing_row_id ASC
+        LIMIT :limit
+        """,
+        {
+            "starve": settings.scan_priority_starvation_hours,
+            "aging": settings.scan_priority_aging_per_hour,
+            "max_attempts": int(max_attempts),
+            "limit": max(1, int(limit)),
+        },
+    ).fetchall()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Hashable, Iterable
+
+from ..config import settings
+from ..schemas import FeatureData
+
+RARITY_TOKENS = ("UR", "SSR", "SR", "R", "N")
+CONDITION_TOKENS = ("mint", "near mint", "nm", "lp", "played", "damaged")
+NOISE_WORDS = frozenset(
+    {
+        "mint",
+        "near",
+        "nm",
+        "lp",
+        "played",
+        "damaged",
+        "first",
+        "owner",
+        "clean",
+        "scratch",
+        "scratches",
+    }
+)
+
+# How often the card-name dictionary file is stat()ed for changes.
+DICTIONARY_CHECK_INTERVAL_SEC = 2.0
+
+
+class KeywordMatcher:
+    """A token dictionary compiled into one case-insensitive regex.
+
+    ``tokens`` are in priority order. ``boundary`` is a character class body
+    (e.g. ``"A-Za-z"``); when set, a token only matches where it is not
+    directly preceded or followed by one of those characters.
+    """
+
+    def __init__(self, tokens: Iterable[str], *, boundary: str = "") -> None:
+        ordered: list[str] = []
+        seen: set[str] = set()
+        for token in tokens:
+            key = str(token or "").strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                ordered.append(key)
+        self.tokens = tuple(ordered)
+        self._priority = {token: index for index, token in enumerate(self.tokens)}
+        before = f"(?<![{boundary}])" if boundary else ""
+        after = f"(?![{boundary}])" if boundary else ""
+        # Longest first, so a scan/substitution prefers "near mint" over "mint".
+        longest = "|".join(re.escape(token) for token in sorted(self.tokens, key=len, reverse=True))
+        # Priority order inside a lookahead: at each position the best-ranked
+        # token starting there is captured, overlapping matches included.
+        ranked = "|".join(re.escape(token) for token in self.tokens)
+        if self.tokens:
+            self._scan = re.compile(f"{before}(?:{longest}){after}", re.IGNORECASE)
+            self._ranked = re.compile(f"(?=({before}(?:{ranked}){after}))", re.IGNORECASE)
+        else:
+            self._scan = None
+            self._ranked = None
+
+    def __bool__(self) -> bool:
+        return bool(self.tokens)
+
+    @property
+    def pattern(self) -> str:
+        return self._scan.pattern if self._scan is not None else "(?!)"
+
+    def contains_any(self, text: str) -> bool:
+        return self._scan is not None and self._scan.search(text) is not None
+
+    def first(self, text: str) -> str | None:
+        """The highest-priority token present anywhere in ``text``."""
+        if self._ranked is None:
+            return None
+        best: int | None = None
+        for match in self._ranked.finditer(text):
+            rank = self._priority[match.group(1).lower()]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return None if best is None else self.tokens[best]
+
+    def leftmost(self, text: str) -> str | None:
+        """The leftmost (then longest) token in ``text``, lower-cased."""
+        if self._scan is None:
+            return None
+        match = self._scan.search(text)
+        return match.group(0).lower() if match else None
+
+    def sub(self, replacement: str, text: str) -> str:
+        return text if self._scan is None else self._scan.sub(replacement, text)
+
+
+class CardNameDictionary:
+    """Alias -> canonical card name lookup over one compiled matcher."""
+
+    def __init__(self, entries: dict[str, Iterable[str]] | None = None) -> None:
+        canonical_by_alias: dict[str, str] = {}
+        for canonical, aliases in (entries or {}).items():
+            name = " ".join(str(canonical or "").split())
+            if not name:
+                continue
+            for alias in (name, *aliases):
+                key = " ".join(str(alias or "").lower().split())
+                if key:
+                    canonical_by_alias.setdefault(key, name)
+        self._canonical = canonical_by_alias
+        self._matcher = KeywordMatcher(canonical_by_alias, boundary="A-Za-z0-9")
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def canonicalize(self, text: str) -> str | None:
+        alias = self._matcher.leftmost(text)
+        return None if alias is None else self._canonical[alias]
+
+
+def load_card_name_dictionary(path: str) -> CardNameDictionary:
+    """Read ``{"Canonical Name": ["alias", ...]}`` JSON; a bare string alias is allowed."""
+    with open(path, "r", encoding="utf-8-sig") as handle:
+        data = json.load(handle)
+    if not isinstance(data, dict):
+        raise ValueError("card name dictionary must be a JSON object")
+    entries = {
+        str(canonical): [aliases] if isinstance(aliases, str) else [str(alias) for alias in aliases or []]
+        for canonical, aliases in data.items()
+    }
+    return CardNameDictionary(entries)
+
+
+RARITY_MATCHER = KeywordMatcher(RARITY_TOKENS, boundary="A-Za-z")
+CONDITION_MATCHER = KeywordMatcher(CONDITION_TOKENS)
+_NAME_NOISE = re.compile(
+    r"\[[^\]]+\]|\([^)]*\)"
+    rf"|{RARITY_MATCHER.pattern}"
+    rf"|{CONDITION_MATCHER.pattern}",
+    re.IGNORECASE,
+)
+
+_cache_lock = threading.Lock()
+_cache: dict[str, tuple[Hashable, Any]] = {}
+_dictionary_state: dict[str, Any] = {"checked_at": 0.0, "key": None, "version": 0, "error": ""}
+
+
+def _cached(name: str, key: Hashable, build: Callable[[], Any]) -> Any:
+    entry = _cache.get(name)
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    with _cache_lock:
+        entry = _cache.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            _cache[name] = entry
+    return entry[1]
+
+
+def risk_keyword_matcher() -> KeywordMatcher:
+    """Matcher for ``settings.risk_suspicious_keywords``; rebuilt when the setting changes."""
+    raw = settings.risk_suspicious_keywords
+    return _cached("risk_keywords", raw, lambda: KeywordMatcher(raw.split(",")))
+
+
+def _dictionary_key() -> tuple[str, int]:
+    path = settings.card_name_dictionary_path
+    now = time.monotonic()
+    state = _dictionary_state
+    if (
+        state["key"] is not None
+        and state["key"][0] == path
+        and now - state["checked_at"] < DICTIONARY_CHECK_INTERVAL_SEC
+    ):
+        return state["key"]
+    try:
+        mtime = os.stat(path).st_mtime_ns if path else 0
+    except OSError:
+        mtime = -1
+    state["checked_at"] = now
+    state["key"] = (path, mtime)
+    return state["key"]
+
+
+def _build_dictionary(key: tuple[str, int]) -> CardNameDictionary:
+    path, mtime = key
+    _dictionary_state["version"] += 1
+    _dictionary_state["error"] = ""
+    if not path:
+        return CardNameDictionary()
+    if mtime < 0:
+        _dictionary_state["error"] = "file not found"
+        return CardNameDictionary()
+    try:
+        return load_card_name_dictionary(path)
+    except (OSError, ValueError, TypeError) as exc:
+        _dictionary_state["error"] = str(exc)
+        return CardNameDictionary()
+
+
+def card_name_dictionary() -> CardNameDictionary:
+    """Dictionary from ``settings.card_name_dictionary_path``, reloaded when the path or file changes."""
+    key = _dictionary_key()
+    return _cached("card_names", key, lambda: _build_dictionary(key))
+
+
+def card_name_dictionary_version() -> int:
+    """Bumped on every dictionary (re)load; lets callers key their own caches on it."""
+    card_name_dictionary()
+    return int(_dictionary_state["version"])
+
+
+def matcher_status() -> dict[str, Any]:
+    dictionary = card_name_dictionary()
+    return {
+        "rarity_tokens": list(RARITY_MATCHER.tokens),
+        "condition_tokens": list(CONDITION_MATCHER.tokens),
+        "risk_keywords": list(risk_keyword_matcher().tokens),
+        "card_name_dictionary": {
+            "path": settings.card_name_dictionary_path,
+            "aliases": len(dictionary),
+            "version": int(_dictionary_state["version"]),
+            "error": _dictionary_state["error"],
+        },
+    }
+
+
+def guess_card_name(title: str) -> str:
+    canonical = card_name_dictionary().canonicalize(title)
+    if canonical:
+        return canonical
+    cleaned = _NAME_NOISE.sub(" ", title)
+    words = [word for word in cleaned.split() if word.lower() not in NOISE_WORDS]
+    cleaned = " ".join(words).strip()
+    if not cleaned:
+        return "unknown"
+    return cleaned[:64]
+
+
+def rule_based_features(title: str, description: str) -> FeatureData:
+    text = f"{title} {description}".strip()
+    rarity = RARITY_MATCHER.first(text)
+    condition = CONDITION_MATCHER.first(text)
+    return FeatureData(
+        card_name=guess_card_name(title),
+        rarity=rarity.upper() if rarity else "unknown",
+        edition="unknown",
+        card_condition=condition or "unknown",
+        extras={},
+        confidence=0.35,
+    )
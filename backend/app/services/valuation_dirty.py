@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable
+
+from ..schemas import FeatureData
+
+# Each valuation records the (card_name, rarity, edition) key its comparables
+# were looked up under. New sales or re-extracted features for a key re-queue
+# only the open listings valued on it, so the scan can work from this queue
+# instead of re-walking the newest N listings. A listing whose valuation fails
+# stays queued with ``attempts`` bumped and is parked once it reaches
+# ``valuation_dirty_max_attempts``; the next re-mark gives it a fresh start.
+
+_CHUNK = 300
+
+_ENQUEUE_CONFLICT = """
+ON CONFLICT(listing_row_id) DO UPDATE SET
+    version = valuation_dirty_queue.version + 1,
+    reason = excluded.reason,
+    priority = NULL,
+    attempts = 0,
+    last_error = ''
+"""
+
+
+def mark_listings(conn: sqlite3.Connection, listing_row_ids: Iterable[int], reason: str) -> None:
+    rows = [(int(row_id), reason) for row_id in listing_row_ids]
+    if not rows:
+        return
+    conn.executemany(
+        "INSERT INTO valuation_dirty_queue(listing_row_id, reason) VALUES (?, ?)" + _ENQUEUE_CONFLICT,
+        rows,
+    )
+
+
+def mark_for_sale_titles(conn: sqlite3.Connection, titles: list[str]) -> None:
+    """Queue open listings whose card name occurs in a new sale title.
+
+    Mirrors the ``s.title LIKE '%card_name%'`` arm of the comparable lookup,
+    which is what a sale without extracted features is matched on.
+    """
+    for start in range(0, len(titles), _CHUNK):
+        chunk = [str(title or "") for title in titles[start : start + _CHUNK]]
+        values_sql = ",".join("(?)" for _ in chunk)
+        conn.execute(
+            f"""
+            INSERT INTO valuation_dirty_queue(listing_row_id, reason)
+            SELECT d.listing_row_id, 'comparable_sale'
+            FROM valuation_dependencies d
+            JOIN listings_raw l ON l.id = d.listing_row_id
+            WHERE l.status = 'open'
+              AND d.card_name IN (
+                SELECT DISTINCT dc.card_name
+                FROM (SELECT DISTINCT card_name FROM valuation_dependencies) AS dc
+                JOIN (VALUES {values_sql}) AS t ON t.column1 LIKE '%' || dc.card_name || '%'
+              )
+            {_ENQUEUE_CONFLICT}
+            """,
+            chunk,
+        )
+
+
+def mark_for_sale_features(conn: sqlite3.Connection, sale_row_id: int, feature: FeatureData) -> None:
+    """Queue listings whose comparable set may change now that a sale has features.
+
+    Rarity/edition filters can add or drop the sale, so every listing on the
+    card (by name or by title match) is re-queued.
+    """
+    conn.execute(
+        f"""
+        INSERT INTO valuation_dirty_queue(listing_row_id, reason)
+        SELECT d.listing_row_id, 'comparable_features'
+        FROM valuation_dependencies d
+        JOIN listings_raw l ON l.id = d.listing_row_id
+        WHERE l.status = 'open'
+          AND (
+            d.card_name = ?
+            OR (SELECT title FROM sales_raw WHERE id = ?) LIKE '%' || d.card_name || '%'
+          )
+        {_ENQUEUE_CONFLICT}
+        """,
+        (feature.card_name, int(sale_row_id)),
+    )
+
+
+def mark_if_key_changed(conn: sqlite3.Connection, listing_row_id: int, feature: FeatureData) -> None:
+    conn.execute(
+        f"""
+        INSERT INTO valuation_dirty_queue(listing_row_id, reason)
+        SELECT listing_row_id, 'features_changed'
+        FROM valuation_dependencies
+        WHERE listing_row_id = ? AND (card_name, rarity, edition) IS NOT (?, ?, ?)
+        {_ENQUEUE_CONFLICT}
+        """,
+        (int(listing_row_id), feature.card_name, feature.rarity, feature.edition),
+    )
+
+
+def record_dependency(
+    conn: sqlite3.Connection,
+    listing_row_id: int,
+    valuation_id: int,
+    feature: FeatureData,
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO valuation_dependencies(listing_row_id, card_name, rarity, edition, valuation_id)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(listing_row_id) DO UPDATE SET
+            card_name = excluded.card_name,
+            rarity = excluded.rarity,
+            edition = excluded.edition,
+            valuation_id = excluded.valuation_id,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (int(listing_row_id), feature.card_name, feature.rarity, feature.edition, int(valuation_id)),
+    )
+
+
+def dirty_versions(conn: sqlite3.Connection, listing_row_ids: list[int]) -> dict[int, int]:
+    versions: dict[int, int] = {}
+    for start in range(0, len(listing_row_ids), _CHUNK):
+        chunk = [int(row_id) for row_id in listing_row_ids[start : start + _CHUNK]]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(
+            f"SELECT listing_row_id, version FROM valuation_dirty_queue WHERE listing_row_id IN ({placeholders})",
+            chunk,
+        ).fetchall()
+        versions.update({int(row["listing_row_id"]): int(row["version"]) for row in rows})
+    return versions
+
+
+def drop_closed(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        DELETE FROM valuation_dirty_queue
+        WHERE listing_row_id IN (
+            SELECT q.listing_row_id
+            FROM valuation_dirty_queue q
+            LEFT JOIN listings_raw l ON l.id = q.listing_row_id
+            WHERE l.id IS NULL OR l.status != 'open'
+        )
+        """
+    )
+
+
+def next_dirty_listings(conn: sqlite3.Connection, limit: int, *, max_attempts: int = 0) -> list[sqlite3.Row]:
+    """Oldest-marked open listings first; entries for closed listings are dropped.
+
+    With ``max_attempts`` > 0, entries that failed that many times are skipped.
+    """
+    drop_closed(conn)
+    return conn.execute(
+        """
+        SELECT l.*, q.version AS dirty_version, q.reason AS dirty_reason
+        FROM valuation_dirty_queue q
+        JOIN listings_raw l ON l.id = q.listing_row_id
+        WHERE :max_attempts <= 0 OR q.attempts < :max_attempts
+        ORDER BY q.marked_at ASC, q.listing_row_id ASC
+        LIMIT :limit
+        """,
+        {"max_attempts": int(max_attempts), "limit": max(1, int(limit))},
+    ).fetchall()
+
+
+def clear_dirty(conn: sqlite3.Connection, entries: list[tuple[int, int]]) -> None:
+    """Drop ``(listing_row_id, version)`` entries; a re-mark since then bumped the version and survives."""
+    if entries:
+        conn.executemany(
+            "DELETE FROM valuation_dirty_queue WHERE listing_row_id = ? AND version = ?",
+            [(int(row_id), int(version)) for row_id, version in entries],
+        )
+
+
+def fail_dirty(conn: sqlite3.Connection, entries: list[tuple[int, int, str]]) -> None:
+    """Bump ``attempts`` for ``(listing_row_id, version, error)`` entries and move them to the back.
+
+    The version guard leaves entries re-marked meanwhile alone: the re-mark
+    already reset their attempts.
+    """
+    if entries:
+        conn.executemany(
+            """
+            UPDATE valuation_dirty_queue
+            SET attempts = attempts + 1, last_error = ?, marked_at = CURRENT_TIMESTAMP
+            WHERE listing_row_id = ? AND version = ?
+            """,
+            [(str(error)[:500], int(row_id), int(version)) for row_id, version, error in entries],
+        )
+
+
+def parked_count(conn: sqlite3.Connection, max_attempts: int) -> int:
+    if max_attempts <= 0:
+        return 0
+    return int(
+        conn.execute("SELECT COUNT(*) FROM valuation_dirty_queue WHERE attempts >= ?", (int(max_attempts),)).fetchone()[0]
+    )
+
+
+def pending_count(conn: sqlite3.Connection) -> int:
+    return int(conn.execute("SELECT COUNT(*) FROM valuation_dirty_queue").fetchone()[0])
+
+
+def enqueue_untracked_open_listings(conn: sqlite3.Connection) -> int:
+    """Queue open listings that have no recorded dependency (e.g. valued before tracking existed)."""
+    cur = conn.execute(
+        """
+        INSERT OR IGNORE INTO valuation_dirty_queue(listing_row_id, reason)
+        SELECT l.id, 'untracked'
+        FROM listings_raw l
+        WHERE l.status = 'open'
+          AND NOT EXISTS (SELECT 1 FROM valuation_dependencies d WHERE d.listing_row_id = l.id)
+        """
+    )
+    return int(cur.rowcount or 0)
@@ -9,8 +9,11 @@ from typing import Any
 from urllib.parse import urlencode
 
 from ..config import settings
+from . import xianyu_parse
 from .proxy_resolver import request_get
 
+_TAG_RE = re.compile(r"<[^>]+>")
+
 
 class XianyuClient:
     """
@@ -73,9 +76,9 @@ class XianyuClient:
         if resp.status_code != 200:
             raise XianyuHttpError(resp.status_code, resp.text[:200])
 
-        text = resp.text
-        data = self._extract_json(text)
-        items = self._parse_items(data) if data else self._regex_parse_items(text)
+        page = xianyu_parse.response_bytes(resp.content, resp.headers.get("Content-Type", ""))
+        data = self._extract_json(page)
+        items = self._parse_items(data) if data else self._regex_parse_items(page)
         return items
 
     def _fetch_mtop_search(
@@ -146,7 +149,7 @@ class XianyuClient:
         if resp.status_code != 200:
             raise XianyuHttpError(resp.status_code, resp.text[:200])
 
-        payload = resp.json()
+        payload = xianyu_parse.loads(resp.content)
         ret = payload.get("ret") or []
         if ret and not any("SUCCESS" in str(r) for r in ret):
             # Surface mtop auth/limit errors to caller instead of timing out on HTML fallback.
@@ -154,62 +157,12 @@ class XianyuClient:
 
         data = payload.get("data") or {}
         items_raw = self._extract_mtop_items(data)
-        items: list[dict[str, Any]] = []
-        for raw in items_raw:
-            if not isinstance(raw, dict):
-                continue
-            node = raw
-            if isinstance(raw.get("data"), dict):
-                node = raw["data"]
-            candidate = node
-            if isinstance(node.get("item"), dict):
-                item_node = node["item"]
-                if isinstance(item_node.get("main"), dict):
-                    ex_content = item_node.get("main", {}).get("exContent")
-                    if isinstance(ex_content, dict):
-                        candidate = ex_content
-                    else:
-                        candidate = item_node
-                else:
-                    candidate = item_node
-                if isinstance(node.get("seller"), dict) and isinstance(candidate, dict):
-                    candidate = dict(candidate)
-                    candidate.setdefault("seller", node["seller"])
-            items.append(self._normalize_item(candidate))
-        return items
+        return [
+            self._normalize_item(xianyu_parse.mtop_item_node(raw)) for raw in items_raw if isinstance(raw, dict)
+        ]
 
     def _extract_mtop_items(self, data: dict[str, Any]) -> list[dict[str, Any]]:
-        if not isinstance(data, dict):
-            return []
-
-        def _maybe_json(value: Any) -> Any:
-            if isinstance(value, str):
-                try:
-                    return json.loads(value)
-                except Exception:
-                    return value
-            return value
-
-        for key in ("resultList", "items", "itemList", "list", "result"):
-            value = _maybe_json(data.get(key))
-            if isinstance(value, dict):
-                for subkey in ("resultList", "items", "itemList", "list"):
-                    sub = _maybe_json(value.get(subkey))
-                    if isinstance(sub, list):
-                        return sub
-            if isinstance(value, list):
-                return value
-
-        for value in data.values():
-            value = _maybe_json(value)
-            if isinstance(value, list) and value and isinstance(value[0], dict):
-                return value
-            if isinstance(value, dict):
-                for sub in value.values():
-                    sub = _maybe_json(sub)
-                    if isinstance(sub, list) and sub and isinstance(sub[0], dict):
-                        return sub
-        return []
+        return xianyu_parse.mtop_result_list(data)
 
     def _parse_cookie(self, cookie: str) -> dict[str, str]:
         pairs: dict[str, str] = {}
@@ -259,28 +212,11 @@ class XianyuClient:
             return float(raw) * multiplier
         except Exception:
             return 0.0
-    def _extract_json(self, html: str) -> dict[str, Any] | None:
-        # Multiple possible bootstrap variables
-        patterns = [
-            r"__INIT_DATA__\s*=\s*(\{.*?\})\s*;</script>",
-            r"__initialState__\s*=\s*(\{.*?\})\s*;</script>",
-            r"window\.__initData__\s*=\s*(\{.*?\})\s*;</script>",
-        ]
-        for pat in patterns:
-            m = re.search(pat, html, re.S)
-            if not m:
-                continue
-            raw = m.group(1)
-            try:
-                return json.loads(raw)
-            except json.JSONDecodeError:
-                # Some pages have trailing comments; attempt a lenient fix
-                try:
-                    cleaned = raw.split("};", 1)[0] + "}"
-                    return json.loads(cleaned)
-                except Exception:
-                    continue
-        return None
+
+    def _extract_json(self, html: str | bytes) -> dict[str, Any] | None:
+        # __INIT_DATA__, __initialState__ or window.__initData__, located in one pass
+        page = html.encode("utf-8") if isinstance(html, str) else html
+        return xianyu_parse.decode_bootstrap(page)
 
     def _parse_items(self, data: dict[str, Any]) -> list[dict[str, Any]]:
         """
@@ -303,30 +239,12 @@ class XianyuClient:
 
         return []
 
-    def _regex_parse_items(self, html: str) -> list[dict[str, Any]]:
+    def _regex_parse_items(self, html: str | bytes) -> list[dict[str, Any]]:
         """
         Fallback: crude regex extraction when JSON bootstrap is absent.
         """
-        items: list[dict[str, Any]] = []
-        pattern = re.compile(
-            r'"itemId"\s*:\s*"(?P<id>[^"]+)"[^}]*?"price"\s*:\s*"?(?P<price>[0-9.]+)"?[^}]*?'
-            r'"title"\s*:\s*"(?P<title>[^"]+)"',
-            re.S,
-        )
-        for match in pattern.finditer(html):
-            try:
-                items.append(
-                    {
-                        "id": match.group("id"),
-                        "price": float(match.group("price")),
-                        "title": match.group("title"),
-                        "description": "",
-                        "seller_id": None,
-                    }
-                )
-            except Exception:
-                continue
-        return items
+        page = html.encode("utf-8") if isinstance(html, str) else html
+        return xianyu_parse.regex_items(page)
 
     def _normalize_item(self, item: dict[str, Any]) -> dict[str, Any]:
         # Common key variants
@@ -351,7 +269,7 @@ class XianyuClient:
             or ""
         )
         if "<" in str(title):
-            title = re.sub(r"<[^>]+>", "", str(title))
+            title = _TAG_RE.sub("", str(title))
         desc = item.get("description") or item.get("desc") or ""
         seller = (
             item.get("sellerId")
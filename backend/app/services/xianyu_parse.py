@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Iterator
+
+try:
+    import orjson
+except ImportError:  # optional speed-up; the stdlib decoder is used without it
+    orjson = None
+
+# Fast parsing layer for Xianyu search responses. Pages are handled as raw
+# UTF-8 bytes: the bootstrap object is located with substring scans and
+# decoded from its slice, so a full page is never decoded to text or run
+# through backtracking regexes.
+
+_BOOTSTRAP_MARKERS = (b"__INIT_DATA__", b"__initialState__", b"window.__initData__")
+_BOOTSTRAP_END = b";</script>"
+_WHITESPACE = frozenset(b" \t\r\n\x0b\x0c")
+
+_ITEM_START = b'"itemId"'
+_ITEM_RE = re.compile(
+    rb'"itemId"\s*:\s*"(?P<id>[^"]+)"[^}]*?"price"\s*:\s*"?(?P<price>[0-9.]+)"?[^}]*?'
+    rb'"title"\s*:\s*"(?P<title>[^"]+)"',
+    re.S,
+)
+_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.I)
+
+MTOP_LIST_KEYS = ("resultList", "items", "itemList", "list", "result")
+MTOP_SUBLIST_KEYS = ("resultList", "items", "itemList", "list")
+
+
+def decoder_name() -> str:
+    return "orjson" if orjson is not None else "json"
+
+
+def loads(raw: str | bytes | bytearray | memoryview) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson is stricter (NaN, integers beyond 64 bits); let json decide.
+            pass
+    return json.loads(bytes(raw) if isinstance(raw, memoryview) else raw)
+
+
+def response_bytes(content: bytes, content_type: str = "") -> bytes:
+    """Response body as UTF-8 bytes; only a declared non-UTF-8 charset is transcoded."""
+    match = _CHARSET_RE.search(content_type or "")
+    charset = match.group(1).lower() if match else ""
+    if not charset or charset.replace("_", "-") in {"utf-8", "utf8"}:
+        return content
+    try:
+        return content.decode(charset, errors="replace").encode("utf-8")
+    except LookupError:
+        return content
+
+
+def _object_end(page: bytes, start: int) -> int:
+    """End of ``{...}`` at ``start``: the first ``}`` followed by optional space and ``;</script>``."""
+    pos = start
+    while True:
+        end = page.find(_BOOTSTRAP_END, pos)
+        if end < 0:
+            return -1
+        last = end
+        while last > start and page[last - 1] in _WHITESPACE:
+            last -= 1
+        if last > start and page[last - 1] == 0x7D:  # "}"
+            return last
+        pos = end + 1
+
+
+def _object_start(page: bytes, pos: int) -> int:
+    """Index of the ``{`` in ``<marker>\\s*=\\s*{`` when ``pos`` is just past a marker, else -1."""
+    size = len(page)
+    while pos < size and page[pos] in _WHITESPACE:
+        pos += 1
+    if pos >= size or page[pos] != 0x3D:  # "="
+        return -1
+    pos += 1
+    while pos < size and page[pos] in _WHITESPACE:
+        pos += 1
+    return pos if pos < size and page[pos] == 0x7B else -1  # "{"
+
+
+def bootstrap_slices(page: bytes) -> Iterator[memoryview]:
+    """Candidate bootstrap JSON blocks, in marker priority order, located with plain substring scans."""
+    view = memoryview(page)
+    for marker in _BOOTSTRAP_MARKERS:
+        found = page.find(marker)
+        while found >= 0:
+            start = _object_start(page, found + len(marker))
+            end = _object_end(page, start) if start >= 0 else -1
+            if end > start:
+                yield view[start:end]
+                break
+            found = page.find(marker, found + 1)
+
+
+def decode_bootstrap(page: bytes) -> dict[str, Any] | None:
+    for block in bootstrap_slices(page):
+        try:
+            data = loads(block)
+        except ValueError:
+            # Some pages have trailing comments; attempt a lenient fix
+            try:
+                data = loads(bytes(block).split(b"};", 1)[0] + b"}")
+            except ValueError:
+                continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def regex_items(page: bytes) -> list[dict[str, Any]]:
+    """Crude item extraction for pages without a bootstrap block.
+
+    Each ``"itemId"`` occurrence is matched in place; the ``[^}]`` runs keep
+    every attempt within the object it starts in.
+    """
+    items: list[dict[str, Any]] = []
+    pos = page.find(_ITEM_START)
+    while pos >= 0:
+        match = _ITEM_RE.match(page, pos)
+        if match is None:
+            pos = page.find(_ITEM_START, pos + 1)
+            continue
+        try:
+            items.append(
+                {
+                    "id": match.group("id").decode("utf-8", errors="replace"),
+                    "price": float(match.group("price")),
+                    "title": match.group("title").decode("utf-8", errors="replace"),
+                    "description": "",
+                    "seller_id": None,
+                }
+            )
+        except ValueError:
+            pass
+        pos = page.find(_ITEM_START, match.end())
+    return items
+
+
+def mtop_result_list(data: dict[str, Any]) -> list[Any]:
+    """The item list in an mtop ``data`` payload; string-encoded JSON fields are decoded at most once."""
+    if not isinstance(data, dict):
+        return []
+    direct = data.get("resultList")
+    if isinstance(direct, list):
+        return direct
+
+    decoded: dict[int, Any] = {}
+
+    def _maybe_json(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        key = id(value)
+        if key not in decoded:
+            try:
+                decoded[key] = loads(value)
+            except ValueError:
+                decoded[key] = value
+        return decoded[key]
+
+    for key in MTOP_LIST_KEYS:
+        value = _maybe_json(data.get(key))
+        if isinstance(value, dict):
+            for subkey in MTOP_SUBLIST_KEYS:
+                sub = _maybe_json(value.get(subkey))
+                if isinstance(sub, list):
+                    return sub
+        if isinstance(value, list):
+            return value
+
+    for value in data.values():
+        value = _maybe_json(value)
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            return value
+        if isinstance(value, dict):
+            for sub in value.values():
+                sub = _maybe_json(sub)
+                if isinstance(sub, list) and sub and isinstance(sub[0], dict):
+                    return sub
+    return []
+
+
+def mtop_item_node(raw: dict[str, Any]) -> dict[str, Any]:
+    """The dict ``_normalize_item`` reads for one mtop result entry.
+
+    The usual shape is ``data.item.main.exContent`` with the seller beside
+    ``item``; other shapes fall back to the nearest item-like node.
+    """
+    node = raw.get("data")
+    if not isinstance(node, dict):
+        node = raw
+    item_node = node.get("item")
+    if not isinstance(item_node, dict):
+        return node
+    main = item_node.get("main")
+    candidate = item_node
+    if isinstance(main, dict):
+        ex_content = main.get("exContent")
+        if isinstance(ex_content, dict):
+            candidate = ex_content
+    seller = node.get("seller")
+    if isinstance(seller, dict):
+        candidate = dict(candidate)
+        candidate.setdefault("seller", seller)
+    return candidate
@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import asyncio
 import logging
+from dataclasses import dataclass
 from typing import Any
 
 from .. import repositories as repo
-from ..schemas import FeatureData
+from ..schemas import FeatureData, ValuationOut
 from ..services.feature_extractor import FeatureExtractor
 from ..services.opportunity import score_opportunity
-from ..services.risk_control import apply_risk_gate, assess_opportunity_risk, format_risk_note
+from ..services.risk_control import (
+    RiskAssessment,
+    apply_risk_gate,
+    assess_opportunity_risk,
+    format_risk_note,
+)
 from ..services.valuation import estimate_valuation
 from .event_engine import Event, EventType, event_engine
 from .main_engine import MainEngine
@@ -16,6 +22,53 @@ from .main_engine import MainEngine
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class ListingEvaluation:
+    valuation: ValuationOut
+    risk: RiskAssessment
+    expected_profit: float
+    roi: float
+    score: float
+    status: str
+
+
+def evaluate_listing(
+    *,
+    listing_row_id: int,
+    list_price: float,
+    feature: FeatureData,
+    comparable_prices: list[float],
+    seller_open_count: int,
+    listing_text: str,
+) -> ListingEvaluation:
+    """Valuation, risk and scoring for one listing without touching the database."""
+    valuation = estimate_valuation(
+        listing_row_id=listing_row_id,
+        listing_price=list_price,
+        features=feature,
+        comparable_prices=comparable_prices,
+    )
+    risk = assess_opportunity_risk(
+        list_price=list_price,
+        valuation=valuation,
+        seller_open_listing_count=seller_open_count,
+        listing_text=listing_text,
+    )
+    expected_profit, roi, score, status = score_opportunity(
+        list_price=list_price,
+        expected_sale_price=valuation.expected_sale_price,
+        risk_score=risk.score,
+    )
+    return ListingEvaluation(
+        valuation=valuation,
+        risk=risk,
+        expected_profit=expected_profit,
+        roi=roi,
+        score=score,
+        status=apply_risk_gate(status, risk),
+    )
+
+
 class AnalysisEngine:
     """Analyze listings and emit strategy-ready events."""
 
@@ -51,31 +104,26 @@ class AnalysisEngine:
 
         feature = self._ensure_features(listing_row_id, listing)
         sales = repo.get_recent_sales(feature, limit=80)
-        valuation = estimate_valuation(
-            listing_row_id=listing_row_id,
-            listing_price=list_price,
-            features=feature,
-            comparable_prices=[float(row["sold_price"]) for row in sales],
-        )
-        valuation_id = repo.save_valuation(valuation)
-
         seller_open_count = repo.get_seller_open_listing_count(
             source=str(listing["source"]),
             seller_id=listing["seller_id"],
             exclude_row_id=listing_row_id,
         )
-        risk = assess_opportunity_risk(
+        evaluation = evaluate_listing(
+            listing_row_id=listing_row_id,
             list_price=list_price,
-            valuation=valuation,
-            seller_open_listing_count=seller_open_count,
+            feature=feature,
+            comparable_prices=[float(row["sold_price"]) for row in sales],
+            seller_open_count=seller_open_count,
             listing_text=f"{listing['title']} {listing['description']}",
         )
-        expected_profit, roi, score, status = score_opportunity(
-            list_price=list_price,
-            expected_sale_price=valuation.expected_sale_price,
-            risk_score=risk.score,
-        )
-        status = apply_risk_gate(status, risk)
+        valuation = evaluation.valuation
+        risk = evaluation.risk
+        expected_profit = evaluation.expected_profit
+        roi = evaluation.roi
+        score = evaluation.score
+        status = evaluation.status
+        valuation_id = repo.save_valuation(valuation)
         repo.upsert_opportunity(
             listing_row_id=listing_row_id,
             valuation_id=valuation_id,
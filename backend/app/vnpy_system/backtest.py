@@ -0,0 +1,440 @@
+from __future__ import annotations
+
+import heapq
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from statistics import median
+from typing import Any
+
+from ..config import StrategyThresholds, settings
+from ..database import get_conn
+from ..schemas import FeatureData
+from ..services.text_matcher import rule_based_features
+from .analysis_engine import evaluate_listing
+from .strategies.bargain_hunter_strategy import decide_bargain
+
+_DAY_SEC = 86400.0
+_MAX_TRADE_SAMPLES = 200
+
+
+def _to_epoch(value: Any) -> float | None:
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+@dataclass(frozen=True)
+class ReplayListing:
+    row_id: int
+    source: str
+    seller_id: str
+    text: str
+    list_price: float
+    listed_ts: float
+    card_name: str
+    rarity: str
+    edition: str
+    card_condition: str
+    confidence: float
+
+
+@dataclass
+class ReplayDataset:
+    """Time-ordered listings and sales loaded once and replayed in memory.
+
+    Sales are kept as parallel columns sorted by ``sold_at`` so point-in-time
+    comparable lookups are a bisect on the timestamp column.
+    """
+
+    listings: list[ReplayListing]
+    sale_ts: list[float]
+    sale_price: list[float]
+    sale_title: list[str]
+    sale_card_name: list[str | None]
+    sale_rarity: list[str | None]
+    sale_edition: list[str | None]
+    _title_blob: str = field(default="", repr=False)
+    _title_offsets: list[int] = field(default_factory=list, repr=False)
+    _matches: dict[str, tuple[list[int], list[float]]] = field(default_factory=dict, repr=False)
+    _by_card_name: dict[str, list[int]] = field(default_factory=dict, repr=False)
+    _seller_ts: dict[tuple[str, str], list[float]] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        offsets: list[int] = []
+        position = 0
+        parts: list[str] = []
+        for title in self.sale_title:
+            offsets.append(position)
+            lowered = title.lower()
+            parts.append(lowered)
+            position += len(lowered) + 1
+        # One newline-joined blob lets each card name be located with str.find
+        # instead of a Python-level scan over every sale title.
+        self._title_blob = "\n".join(parts)
+        self._title_offsets = offsets
+        by_card_name: dict[str, list[int]] = {}
+        for index, name in enumerate(self.sale_card_name):
+            if name is not None:
+                by_card_name.setdefault(name, []).append(index)
+        self._by_card_name = by_card_name
+        seller_ts: dict[tuple[str, str], list[float]] = {}
+        for listing in self.listings:
+            if listing.seller_id:
+                seller_ts.setdefault((listing.source, listing.seller_id), []).append(listing.listed_ts)
+        self._seller_ts = seller_ts
+
+    @property
+    def span(self) -> tuple[str, str]:
+        if not self.listings:
+            return "", ""
+        first = datetime.fromtimestamp(self.listings[0].listed_ts, tz=timezone.utc)
+        last = datetime.fromtimestamp(self.listings[-1].listed_ts, tz=timezone.utc)
+        return first.isoformat(), last.isoformat()
+
+    def _name_matches(self, card_name: str) -> tuple[list[int], list[float]]:
+        cached = self._matches.get(card_name)
+        if cached is not None:
+            return cached
+        # Mirrors repo.get_recent_sales: exact feature name OR title LIKE %name%.
+        hits = set(self._by_card_name.get(card_name, ()))
+        needle = card_name.lower()
+        if needle:
+            start = self._title_blob.find(needle)
+            while start >= 0:
+                hits.add(bisect_right(self._title_offsets, start) - 1)
+                start = self._title_blob.find(needle, start + 1)
+        ordered = sorted(hits)
+        result = (ordered, [self.sale_ts[index] for index in ordered])
+        self._matches[card_name] = result
+        return result
+
+    def _attribute_ok(self, index: int, rarity: str, edition: str) -> bool:
+        sale_rarity = self.sale_rarity[index]
+        if rarity != "unknown" and sale_rarity is not None and sale_rarity != rarity:
+            return False
+        sale_edition = self.sale_edition[index]
+        if edition != "unknown" and sale_edition is not None and sale_edition != edition:
+            return False
+        return True
+
+    def comparables_before(self, listing: ReplayListing, limit: int) -> list[float]:
+        """Most recent matching sale prices at or before the listing time."""
+        indices, times = self._name_matches(listing.card_name)
+        cursor = bisect_right(times, listing.listed_ts)
+        prices: list[float] = []
+        while cursor > 0 and len(prices) < limit:
+            cursor -= 1
+            index = indices[cursor]
+            if self._attribute_ok(index, listing.rarity, listing.edition):
+                prices.append(self.sale_price[index])
+        return prices
+
+    def sales_between(self, listing: ReplayListing, start_ts: float, end_ts: float) -> list[tuple[float, float]]:
+        """Matching ``(sold_ts, price)`` pairs in ``(start_ts, end_ts]``, oldest first."""
+        indices, times = self._name_matches(listing.card_name)
+        lo = bisect_right(times, start_ts)
+        hi = bisect_right(times, end_ts)
+        return [
+            (times[pos], self.sale_price[indices[pos]])
+            for pos in range(lo, hi)
+            if self._attribute_ok(indices[pos], listing.rarity, listing.edition)
+        ]
+
+    def seller_recent_count(self, listing: ReplayListing, window_sec: float) -> int:
+        if not listing.seller_id:
+            return 0
+        stamps = self._seller_ts.get((listing.source, listing.seller_id)) or []
+        lo = bisect_left(stamps, listing.listed_ts - window_sec)
+        hi = bisect_left(stamps, listing.listed_ts)
+        return max(0, hi - lo)
+
+
+def load_replay_dataset(*, start: str = "", end: str = "") -> ReplayDataset:
+    """Read listings in ``[start, end]`` and every sale (history before start feeds comparables)."""
+    start_ts = _to_epoch(start) if start else None
+    end_ts = _to_epoch(end) if end else None
+    with get_conn() as conn:
+        listing_rows = conn.execute(
+            """
+            SELECT l.id, l.source, l.seller_id, l.title, l.description, l.list_price, l.listed_at,
+                   f.card_name, f.rarity, f.edition, f.card_condition, f.confidence
+            FROM listings_raw l
+            LEFT JOIN item_features f ON f.ref_type = 'listing' AND f.ref_id = l.id
+            """
+        ).fetchall()
+        sale_rows = conn.execute(
+            """
+            SELECT s.title, s.sold_price, s.sold_at, f.card_name, f.rarity, f.edition
+            FROM sales_raw s
+            LEFT JOIN item_features f ON f.ref_type = 'sale' AND f.ref_id = s.id
+            """
+        ).fetchall()
+
+    listings: list[ReplayListing] = []
+    for row in listing_rows:
+        listed_ts = _to_epoch(row["listed_at"])
+        if listed_ts is None or float(row["list_price"] or 0) <= 0:
+            continue
+        if start_ts is not None and listed_ts < start_ts:
+            continue
+        if end_ts is not None and listed_ts > end_ts:
+            continue
+        if row["card_name"] is not None:
+            feature = FeatureData(
+                card_name=row["card_name"],
+                rarity=row["rarity"],
+                edition=row["edition"],
+                card_condition=row["card_condition"],
+                confidence=float(row["confidence"]),
+                extras={},
+            )
+        else:
+            # Replays never call the LLM; unlabelled listings use the rule-based extractor.
+            feature = rule_based_features(str(row["title"]), str(row["description"] or ""))
+        listings.append(
+            ReplayListing(
+                row_id=int(row["id"]),
+                source=str(row["source"]),
+                seller_id=str(row["seller_id"] or ""),
+                text=f"{row['title']} {row['description'] or ''}",
+                list_price=float(row["list_price"]),
+                listed_ts=listed_ts,
+                card_name=feature.card_name,
+                rarity=feature.rarity,
+                edition=feature.edition,
+                card_condition=feature.card_condition,
+                confidence=float(feature.confidence),
+            )
+        )
+    listings.sort(key=lambda item: (item.listed_ts, item.row_id))
+
+    sales: list[tuple[float, float, str, str | None, str | None, str | None]] = []
+    for row in sale_rows:
+        sold_ts = _to_epoch(row["sold_at"])
+        if sold_ts is None:
+            continue
+        sales.append(
+            (
+                sold_ts,
+                float(row["sold_price"]),
+                str(row["title"] or ""),
+                row["card_name"],
+                row["rarity"],
+                row["edition"],
+            )
+        )
+    sales.sort(key=lambda item: item[0])
+    return ReplayDataset(
+        listings=listings,
+        sale_ts=[item[0] for item in sales],
+        sale_price=[item[1] for item in sales],
+        sale_title=[item[2] for item in sales],
+        sale_card_name=[item[3] for item in sales],
+        sale_rarity=[item[4] for item in sales],
+        sale_edition=[item[5] for item in sales],
+    )
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    thresholds: StrategyThresholds
+    hold_days: float = 30.0
+    seller_window_days: float = 14.0
+    capital_limit: float = 0.0
+    comparable_limit: int = 80
+    # Multiplier on the valuation's suggested list price, e.g. a pricing-mode factor.
+    sell_factor: float = 1.0
+
+
+@dataclass
+class BacktestReport:
+    listings_replayed: int = 0
+    signals: int = 0
+    trades: int = 0
+    skipped_capital: int = 0
+    sold_at_target: int = 0
+    forced_exits: int = 0
+    unresolved: int = 0
+    hits: int = 0
+    hit_rate: float = 0.0
+    total_pnl: float = 0.0
+    avg_pnl: float = 0.0
+    max_drawdown: float = 0.0
+    capital_deployed: float = 0.0
+    peak_capital: float = 0.0
+    avg_capital: float = 0.0
+    return_on_peak_capital: float = 0.0
+    span_start: str = ""
+    span_end: str = ""
+    elapsed_sec: float = 0.0
+    trade_samples: list[dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _exit_for(
+    dataset: ReplayDataset,
+    listing: ReplayListing,
+    sell_price: float,
+    hold_sec: float,
+) -> tuple[str, float, float]:
+    """Return ``(outcome, exit_price, exit_ts)`` from the sales after the entry."""
+    horizon = listing.listed_ts + hold_sec
+    later = dataset.sales_between(listing, listing.listed_ts, horizon)
+    for sold_ts, price in later:
+        if price >= sell_price:
+            return "sold_at_target", sell_price, sold_ts
+    if later:
+        return "forced_exit", float(median(price for _, price in later)), horizon
+    return "unresolved", 0.0, horizon
+
+
+def run_backtest(dataset: ReplayDataset, config: BacktestConfig) -> BacktestReport:
+    """Replay ``dataset`` through valuation, risk and the bargain-hunter rule in-process.
+
+    Decisions only see sales at or before each listing's timestamp; sales in
+    the following ``hold_days`` decide whether the position would have sold
+    at the strategy's target price, been dumped at their median, or stayed
+    unresolved (held at cost).
+    """
+    started = time.perf_counter()
+    report = BacktestReport()
+    report.span_start, report.span_end = dataset.span
+    hold_sec = max(1.0, float(config.hold_days)) * _DAY_SEC
+    seller_window_sec = max(0.0, float(config.seller_window_days)) * _DAY_SEC
+    limit = max(1, int(config.comparable_limit))
+    fee_rate = float(settings.platform_fee_rate)
+    shipping = float(settings.default_shipping_cost)
+
+    open_positions: list[tuple[float, float]] = []
+    capital = 0.0
+    capital_area = 0.0
+    last_ts: float | None = None
+    first_ts: float | None = None
+    closed: list[tuple[float, float]] = []
+
+    def advance(until: float) -> None:
+        nonlocal capital, capital_area, last_ts
+        while open_positions and open_positions[0][0] <= until:
+            exit_ts, amount = heapq.heappop(open_positions)
+            if last_ts is not None:
+                capital_area += capital * max(0.0, exit_ts - last_ts)
+            last_ts = exit_ts if last_ts is None else max(last_ts, exit_ts)
+            capital -= amount
+        if last_ts is not None:
+            capital_area += capital * max(0.0, until - last_ts)
+        last_ts = until if last_ts is None else max(last_ts, until)
+
+    for listing in dataset.listings:
+        report.listings_replayed += 1
+        if first_ts is None:
+            first_ts = listing.listed_ts
+        advance(listing.listed_ts)
+
+        feature = FeatureData(
+            card_name=listing.card_name,
+            rarity=listing.rarity,
+            edition=listing.edition,
+            card_condition=listing.card_condition,
+            confidence=listing.confidence,
+            extras={},
+        )
+        evaluation = evaluate_listing(
+            listing_row_id=listing.row_id,
+            list_price=listing.list_price,
+            feature=feature,
+            comparable_prices=dataset.comparables_before(listing, limit),
+            seller_open_count=dataset.seller_recent_count(listing, seller_window_sec),
+            listing_text=listing.text,
+        )
+        valuation = evaluation.valuation
+        if valuation.suggested_list_price <= 0:
+            continue
+        decision = decide_bargain(
+            config.thresholds,
+            status=evaluation.status,
+            score=evaluation.score,
+            roi=evaluation.roi,
+            risk_score=evaluation.risk.score,
+            hard_block=evaluation.risk.hard_block,
+            list_price=listing.list_price,
+            buy_limit=valuation.buy_limit,
+            sell_price=valuation.suggested_list_price * max(0.01, float(config.sell_factor)),
+        )
+        if not decision.place_order:
+            continue
+        report.signals += 1
+        if config.capital_limit > 0 and capital + decision.buy_price > config.capital_limit:
+            report.skipped_capital += 1
+            continue
+
+        outcome, exit_price, exit_ts = _exit_for(dataset, listing, decision.sell_price, hold_sec)
+        if outcome == "unresolved":
+            pnl = 0.0
+            report.unresolved += 1
+        else:
+            pnl = exit_price * (1.0 - fee_rate) - shipping - decision.buy_price
+            if outcome == "sold_at_target":
+                report.sold_at_target += 1
+            else:
+                report.forced_exits += 1
+            if pnl > 0:
+                report.hits += 1
+
+        report.trades += 1
+        report.total_pnl += pnl
+        report.capital_deployed += decision.buy_price
+        capital += decision.buy_price
+        report.peak_capital = max(report.peak_capital, capital)
+        heapq.heappush(open_positions, (exit_ts, decision.buy_price))
+        closed.append((exit_ts, pnl))
+        if len(report.trade_samples) < _MAX_TRADE_SAMPLES:
+            report.trade_samples.append(
+                {
+                    "listing_row_id": listing.row_id,
+                    "entry_at": datetime.fromtimestamp(listing.listed_ts, tz=timezone.utc).isoformat(),
+                    "buy_price": round(decision.buy_price, 2),
+                    "target_price": round(decision.sell_price, 2),
+                    "outcome": outcome,
+                    "exit_price": round(exit_price, 2),
+                    "pnl": round(pnl, 2),
+                    "score": evaluation.score,
+                    "roi": evaluation.roi,
+                    "risk_score": evaluation.risk.score,
+                }
+            )
+
+    if open_positions:
+        advance(max(exit_ts for exit_ts, _ in open_positions))
+
+    resolved = report.trades - report.unresolved
+    report.hit_rate = round(report.hits / resolved, 4) if resolved else 0.0
+    report.avg_pnl = round(report.total_pnl / report.trades, 2) if report.trades else 0.0
+    report.total_pnl = round(report.total_pnl, 2)
+    report.capital_deployed = round(report.capital_deployed, 2)
+    report.peak_capital = round(report.peak_capital, 2)
+    if first_ts is not None and last_ts is not None and last_ts > first_ts:
+        report.avg_capital = round(capital_area / (last_ts - first_ts), 2)
+    if report.peak_capital > 0:
+        report.return_on_peak_capital = round(report.total_pnl / report.peak_capital, 4)
+
+    equity = 0.0
+    peak_equity = 0.0
+    drawdown = 0.0
+    for _, pnl in sorted(closed):
+        equity += pnl
+        peak_equity = max(peak_equity, equity)
+        drawdown = max(drawdown, peak_equity - equity)
+    report.max_drawdown = round(drawdown, 2)
+    report.elapsed_sec = round(time.perf_counter() - started, 3)
+    return report
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 
 from ... import repositories as repo
 from ...config import StrategyThresholds, settings
@@ -10,6 +11,50 @@ from ..strategy_engine import Strategy
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class BargainDecision:
+    should_review: bool
+    place_order: bool
+    buy_price: float
+    sell_price: float
+
+
+def decide_bargain(
+    thresholds: StrategyThresholds,
+    *,
+    status: str,
+    score: float,
+    roi: float,
+    risk_score: float,
+    hard_block: bool,
+    list_price: float,
+    buy_limit: float,
+    sell_price: float,
+) -> BargainDecision:
+    """The strategy's review/order rule, shared by the live engine and the replay backtest."""
+    if hard_block:
+        should_review = False
+    elif status == "blocked_risk":
+        should_review = (
+            bool(thresholds.allow_blocked_review)
+            and score >= thresholds.min_score
+            and roi >= thresholds.min_roi
+        )
+    else:
+        should_review = (
+            score >= thresholds.min_score
+            and risk_score <= thresholds.max_risk_score
+            and roi >= thresholds.min_roi
+        )
+    buy_price = min(list_price, buy_limit) if buy_limit > 0 else list_price
+    return BargainDecision(
+        should_review=should_review,
+        place_order=should_review and status == "pending_review",
+        buy_price=buy_price,
+        sell_price=sell_price,
+    )
+
+
 class BargainHunterStrategy(Strategy):
     """Simple bargain hunter strategy (simulation only)."""
 
@@ -44,16 +89,6 @@ class BargainHunterStrategy(Strategy):
         roi = float(analysis.get("profit", {}).get("roi", 0))
 
         hard_block = bool(analysis.get("risk", {}).get("hard_block"))
-        if hard_block:
-            should_review = False
-        elif status == "blocked_risk":
-            should_review = self.allow_blocked_review and score >= self.min_score and roi >= self.min_roi
-        else:
-            should_review = (
-                score >= self.min_score
-                and risk_score <= self.max_risk_score
-                and roi >= self.min_roi
-            )
 
         listing = analysis.get("listing", {})
         valuation = analysis.get("valuation", {})
@@ -65,19 +100,30 @@ class BargainHunterStrategy(Strategy):
         if listing_row_id <= 0 or list_price <= 0 or sell_price <= 0:
             return
 
+        decision = decide_bargain(
+            self.thresholds,
+            status=str(status or ""),
+            score=score,
+            roi=roi,
+            risk_score=risk_score,
+            hard_block=hard_block,
+            list_price=list_price,
+            buy_limit=buy_limit,
+            sell_price=sell_price,
+        )
         self._sync_opportunity(
             listing_row_id=listing_row_id,
-            should_review=should_review,
+            should_review=decision.should_review,
             score=score,
             roi=roi,
             risk_score=risk_score,
             hard_block=hard_block,
         )
 
-        if not should_review or status != "pending_review":
+        if not decision.place_order:
             return
 
-        buy_price = min(list_price, buy_limit) if buy_limit > 0 else list_price
+        buy_price = decision.buy_price
 
         logger.info(
             "[%s] signal: row_id=%s score=%.1f roi=%.3f risk=%.1f buy=%.2f sell=%.2f",
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from multiprocessing import shared_memory
+from typing import Any
+
+from ..config import StrategyThresholds, settings
+from ..database import get_conn
+from .backtest import BacktestConfig, ReplayDataset, run_backtest
+
+THRESHOLD_PARAMETERS = ("min_score", "min_roi", "max_risk_score", "allow_blocked_review")
+RISK_PARAMETERS = ("risk_block_score", "risk_min_comparables")
+PRICING_PARAMETERS = ("pricing_mode", "pricing_factor", "hold_days")
+SWEEP_PARAMETERS = THRESHOLD_PARAMETERS + RISK_PARAMETERS + PRICING_PARAMETERS
+PRICING_MODES = ("balanced", "fast_exit", "profit_max")
+# Upper bound on configurations a grid may expand to (and on random ``samples``).
+MAX_SWEEP_CONFIGURATIONS = 5000
+
+# Settings that change a replay's outcome without being swept; they are folded
+# into the dataset fingerprint so editing them invalidates cached results.
+_FINGERPRINT_SETTINGS = ("platform_fee_rate", "default_shipping_cost", "min_profit")
+_FINGERPRINT_PREFIXES = ("risk_", "pricing_mode_")
+
+_worker_dataset: ReplayDataset | None = None
+
+
+class SweepParameterError(ValueError):
+    pass
+
+
+def _mode_factor(mode: str) -> float:
+    if mode == "fast_exit":
+        return float(settings.pricing_mode_fast_exit_factor)
+    if mode == "profit_max":
+        return float(settings.pricing_mode_profit_max_factor)
+    return float(settings.pricing_mode_balanced_factor)
+
+
+def _cast(name: str, value: Any, kind: type) -> Any:
+    if kind is bool:
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in ("1", "true", "yes", "on"):
+                return True
+            if lowered in ("0", "false", "no", "off", ""):
+                return False
+            raise SweepParameterError(f"{name}: expected a boolean, got {value!r}")
+        return bool(value)
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise SweepParameterError(f"{name}: expected a number, got {value!r}")
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError, OverflowError) as exc:
+        raise SweepParameterError(f"{name}: expected a number, got {value!r}") from exc
+
+
+def _check_names(names: Any) -> None:
+    unknown = sorted(set(names) - set(SWEEP_PARAMETERS))
+    if unknown:
+        raise SweepParameterError(f"unknown sweep parameters: {', '.join(unknown)}")
+
+
+def grid_configurations(grid: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """Cartesian product of ``grid`` values, in key order.
+
+    The product size is checked against ``MAX_SWEEP_CONFIGURATIONS`` before
+    anything is expanded.
+    """
+    _check_names(grid)
+    names = list(grid)
+    size = math.prod(len(grid[name]) for name in names)
+    if size > MAX_SWEEP_CONFIGURATIONS:
+        raise SweepParameterError(
+            f"grid expands to {size} configurations; at most {MAX_SWEEP_CONFIGURATIONS} are allowed"
+        )
+    return [dict(zip(names, values)) for values in itertools.product(*(list(grid[name]) for name in names))]
+
+
+def random_configurations(
+    space: dict[str, Any],
+    *,
+    samples: int,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Draw ``samples`` configurations from ``space``.
+
+    A list value is sampled uniformly by choice; a ``(low, high)`` tuple or a
+    ``{"low": ..., "high": ...}`` mapping is sampled uniformly in range
+    (integers when both ends are).
+    """
+    _check_names(space)
+    rng = random.Random(seed)
+    configurations: list[dict[str, Any]] = []
+    for _ in range(max(0, int(samples))):
+        params: dict[str, Any] = {}
+        for name, domain in space.items():
+            if isinstance(domain, dict):
+                if "low" not in domain or "high" not in domain:
+                    raise SweepParameterError(f"{name}: range needs low and high")
+                domain = (domain["low"], domain["high"])
+            if isinstance(domain, tuple) and len(domain) == 2:
+                low, high = domain
+                if isinstance(low, int) and isinstance(high, int) and not isinstance(low, bool):
+                    if low > high:
+                        raise SweepParameterError(f"{name}: low must not exceed high")
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = round(
+                        rng.uniform(_cast(name, low, float), _cast(name, high, float)), 4
+                    )
+            else:
+                choices = list(domain)
+                if not choices:
+                    raise SweepParameterError(f"{name}: no values to sample")
+                params[name] = rng.choice(choices)
+        configurations.append(params)
+    return configurations
+
+
+def resolve_parameters(params: dict[str, Any], base: StrategyThresholds, *, hold_days: float = 30.0) -> dict[str, Any]:
+    """Fill every sweep parameter so the hash covers defaults as well as overrides."""
+    _check_names(params)
+    mode = str(params.get("pricing_mode") or "balanced")
+    if mode not in PRICING_MODES:
+        raise SweepParameterError(f"unknown pricing_mode: {mode}")
+    factor = params.get("pricing_factor")
+    return {
+        "min_score": _cast("min_score", params.get("min_score", base.min_score), float),
+        "min_roi": _cast("min_roi", params.get("min_roi", base.min_roi), float),
+        "max_risk_score": _cast("max_risk_score", params.get("max_risk_score", base.max_risk_score), float),
+        "allow_blocked_review": _cast(
+            "allow_blocked_review", params.get("allow_blocked_review", base.allow_blocked_review), bool
+        ),
+        "risk_block_score": _cast("risk_block_score", params.get("risk_block_score", settings.risk_block_score), float),
+        "risk_min_comparables": _cast(
+            "risk_min_comparables", params.get("risk_min_comparables", settings.risk_min_comparables), int
+        ),
+        "pricing_mode": mode,
+        "pricing_factor": round(
+            _cast("pricing_factor", factor if factor is not None else _mode_factor(mode), float), 4
+        ),
+        "hold_days": _cast("hold_days", params.get("hold_days", hold_days), float),
+    }
+
+
+def _pack_dataset(dataset: ReplayDataset) -> bytes:
+    # Only the raw columns travel; every worker rebuilds the lookup indexes.
+    return pickle.dumps(
+        (
+            dataset.listings,
+            dataset.sale_ts,
+            dataset.sale_price,
+            dataset.sale_title,
+            dataset.sale_card_name,
+            dataset.sale_rarity,
+            dataset.sale_edition,
+        ),
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def _unpack_dataset(payload: bytes) -> ReplayDataset:
+    listings, sale_ts, sale_price, sale_title, sale_card_name, sale_rarity, sale_edition = pickle.loads(payload)
+    return ReplayDataset(
+        listings=listings,
+        sale_ts=sale_ts,
+        sale_price=sale_price,
+        sale_title=sale_title,
+        sale_card_name=sale_card_name,
+        sale_rarity=sale_rarity,
+        sale_edition=sale_edition,
+    )
+
+
+def dataset_fingerprint(payload: bytes, *, seller_window_days: float, capital_limit: float) -> str:
+    digest = hashlib.sha256(payload)
+    fixed = {
+        item.name: getattr(settings, item.name)
+        for item in fields(settings)
+        if item.name in _FINGERPRINT_SETTINGS or item.name.startswith(_FINGERPRINT_PREFIXES)
+    }
+    fixed["seller_window_days"] = float(seller_window_days)
+    fixed["capital_limit"] = float(capital_limit)
+    digest.update(json.dumps(fixed, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def parameter_hash(params: dict[str, Any], dataset_hash: str) -> str:
+    body = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{dataset_hash}:{body}".encode("utf-8")).hexdigest()
+
+
+def _settings_snapshot() -> dict[str, Any]:
+    # Spawned workers re-read settings from the environment; carry runtime overrides over.
+    return {item.name: getattr(settings, item.name) for item in fields(settings)}
+
+
+def _attach_dataset(shm_name: str, size: int, settings_values: dict[str, Any]) -> None:
+    global _worker_dataset
+    for name, value in settings_values.items():
+        object.__setattr__(settings, name, value)
+    # One copy per worker: the block is only the transport, so each worker
+    # unpickles the columns once and rebuilds its own lookup indexes.
+    block = shared_memory.SharedMemory(name=shm_name)
+    try:
+        _worker_dataset = _unpack_dataset(bytes(block.buf[:size]))
+    finally:
+        block.close()
+
+
+def _evaluate(task: tuple[dict[str, Any], float, float]) -> dict[str, Any]:
+    params, seller_window_days, capital_limit = task
+    if _worker_dataset is None:
+        raise RuntimeError("sweep worker has no dataset attached")
+    # Workers are single-purpose processes, so swapping the risk settings in
+    # place cannot leak into the API process.
+    object.__setattr__(settings, "risk_block_score", params["risk_block_score"])
+    object.__setattr__(settings, "risk_min_comparables", params["risk_min_comparables"])
+    thresholds = StrategyThresholds(
+        min_score=params["min_score"],
+        min_roi=params["min_roi"],
+        max_risk_score=params["max_risk_score"],
+        allow_blocked_review=params["allow_blocked_review"],
+        auto_reject_unqualified=False,
+    )
+    report = run_backtest(
+        _worker_dataset,
+        BacktestConfig(
+            thresholds=thresholds,
+            hold_days=params["hold_days"],
+            seller_window_days=seller_window_days,
+            capital_limit=capital_limit,
+            sell_factor=params["pricing_factor"],
+        ),
+    ).as_dict()
+    report.pop("trade_samples", None)
+    return report
+
+
+def _load_cached(hashes: list[str]) -> dict[str, dict[str, Any]]:
+    cached: dict[str, dict[str, Any]] = {}
+    if not hashes:
+        return cached
+    with get_conn() as conn:
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start : start + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT param_hash, result_json FROM backtest_sweep_results WHERE param_hash IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                cached[str(row["param_hash"])] = json.loads(row["result_json"])
+    return cached
+
+
+def _store_results(dataset_hash: str, entries: list[tuple[str, dict[str, Any], dict[str, Any]]]) -> None:
+    if not entries:
+        return
+    with get_conn() as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO backtest_sweep_results(param_hash, dataset_hash, params_json, result_json)
+            VALUES (?, ?, ?, ?)
+            """,
+            [
+                (param_hash, dataset_hash, json.dumps(params, sort_keys=True), json.dumps(result))
+                for param_hash, params, result in entries
+            ],
+        )
+
+
+def clear_sweep_cache(*, keep_dataset_hash: str = "") -> int:
+    """Drop cached results, optionally keeping the ones for one dataset."""
+    with get_conn() as conn:
+        if keep_dataset_hash:
+            cur = conn.execute(
+                "DELETE FROM backtest_sweep_results WHERE dataset_hash <> ?",
+                (keep_dataset_hash,),
+            )
+        else:
+            cur = conn.execute("DELETE FROM backtest_sweep_results")
+        return int(cur.rowcount or 0)
+
+
+def _risk_adjusted(result: dict[str, Any]) -> float:
+    return round(float(result.get("total_pnl", 0.0)) - float(result.get("max_drawdown", 0.0)), 2)
+
+
+@dataclass
+class SweepReport:
+    dataset_hash: str = ""
+    configurations: int = 0
+    evaluated: int = 0
+    cached: int = 0
+    workers: int = 0
+    elapsed_sec: float = 0.0
+    results: list[dict[str, Any]] = field(default_factory=list)
+
+    def as_dict(self, *, top: int = 0) -> dict[str, Any]:
+        results = self.results[:top] if top > 0 else self.results
+        return {
+            "dataset_hash": self.dataset_hash,
+            "configurations": self.configurations,
+            "evaluated": self.evaluated,
+            "cached": self.cached,
+            "workers": self.workers,
+            "elapsed_sec": self.elapsed_sec,
+            "results": results,
+        }
+
+
+def run_sweep(
+    dataset: ReplayDataset,
+    configurations: list[dict[str, Any]],
+    *,
+    base_thresholds: StrategyThresholds,
+    hold_days: float = 30.0,
+    seller_window_days: float = 14.0,
+    capital_limit: float = 0.0,
+    max_workers: int = 0,
+    use_cache: bool = True,
+) -> SweepReport:
+    """Replay ``dataset`` once per configuration across a process pool.
+
+    The dataset is pickled once into a shared-memory block; each worker
+    unpickles its own copy from it at start-up, so the payload is not re-sent
+    per task and tasks carry only their parameters. Workers are always
+    spawned, never forked, because the API process is multithreaded. Results
+    are cached by parameter hash (which folds in the dataset fingerprint), so
+    rerunning a widened grid only evaluates the new points. Results are
+    ranked by risk-adjusted PnL (total PnL minus max drawdown), then PnL.
+    """
+    started = time.perf_counter()
+    base = replace(base_thresholds, auto_reject_unqualified=False)
+    payload = _pack_dataset(dataset)
+    report = SweepReport(
+        dataset_hash=dataset_fingerprint(payload, seller_window_days=seller_window_days, capital_limit=capital_limit),
+    )
+
+    resolved: dict[str, dict[str, Any]] = {}
+    for params in configurations:
+        full = resolve_parameters(params, base, hold_days=hold_days)
+        resolved.setdefault(parameter_hash(full, report.dataset_hash), full)
+    report.configurations = len(resolved)
+
+    results = _load_cached(list(resolved)) if use_cache else {}
+    report.cached = len(results)
+    pending = [param_hash for param_hash in resolved if param_hash not in results]
+
+    if pending:
+        workers = max_workers if max_workers > 0 else (os.cpu_count() or 1)
+        workers = max(1, min(workers, len(pending)))
+        report.workers = workers
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(payload)))
+        try:
+            block.buf[: len(payload)] = payload
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_attach_dataset,
+                initargs=(block.name, len(payload), _settings_snapshot()),
+            ) as pool:
+                tasks = [(resolved[param_hash], seller_window_days, capital_limit) for param_hash in pending]
+                fresh = list(pool.map(_evaluate, tasks))
+        finally:
+            block.close()
+            block.unlink()
+        entries = list(zip(pending, (resolved[param_hash] for param_hash in pending), fresh))
+        for param_hash, _, result in entries:
+            results[param_hash] = result
+        if use_cache:
+            _store_results(report.dataset_hash, entries)
+        report.evaluated = len(pending)
+
+    ranked = []
+    for param_hash, params in resolved.items():
+        result = results[param_hash]
+        ranked.append(
+            {
+                "param_hash": param_hash,
+                "params": params,
+                "risk_adjusted_pnl": _risk_adjusted(result),
+                "total_pnl": result.get("total_pnl", 0.0),
+                "max_drawdown": result.get("max_drawdown", 0.0),
+                "trades": result.get("trades", 0),
+                "hit_rate": result.get("hit_rate", 0.0),
+                "return_on_peak_capital": result.get("return_on_peak_capital", 0.0),
+                "peak_capital": result.get("peak_capital", 0.0),
+                "unresolved": result.get("unresolved", 0),
+            }
+        )
+    ranked.sort(key=lambda item: (-item["risk_adjusted_pnl"], -item["total_pnl"], item["param_hash"]))
+    for rank, item in enumerate(ranked, start=1):
+        item["rank"] = rank
+    report.results = ranked
+    report.elapsed_sec = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.services import xianyu_parse
+from app.services.xianyu_client import XianyuClient
+from scripts.xianyu_standin import XianyuStandinServer, StandinConfig
+
+DEFAULT_CAPTURE = ROOT_DIR.parent / "tmp_goofish_search.html"
+
+# Baseline: the text/regex/json path the client used before xianyu_parse.
+_BASELINE_BOOTSTRAP = (
+    r"__INIT_DATA__\s*=\s*(\{.*?\})\s*;</script>",
+    r"__initialState__\s*=\s*(\{.*?\})\s*;</script>",
+    r"window\.__initData__\s*=\s*(\{.*?\})\s*;</script>",
+)
+_BASELINE_ITEM = re.compile(
+    r'"itemId"\s*:\s*"(?P<id>[^"]+)"[^}]*?"price"\s*:\s*"?(?P<price>[0-9.]+)"?[^}]*?'
+    r'"title"\s*:\s*"(?P<title>[^"]+)"',
+    re.S,
+)
+
+
+def _baseline_html(client: XianyuClient, body: bytes) -> list[dict[str, Any]]:
+    text = body.decode("utf-8", errors="replace")
+    data = None
+    for pattern in _BASELINE_BOOTSTRAP:
+        match = re.search(pattern, text, re.S)
+        if match:
+            try:
+                data = json.loads(match.group(1))
+                break
+            except json.JSONDecodeError:
+                continue
+    if data:
+        return client._parse_items(data)
+    return [
+        {"id": m.group("id"), "price": float(m.group("price")), "title": m.group("title"), "description": "", "seller_id": None}
+        for m in _BASELINE_ITEM.finditer(text)
+    ]
+
+
+def _baseline_mtop(client: XianyuClient, body: bytes) -> list[dict[str, Any]]:
+    payload = json.loads(body.decode("utf-8"))
+    items = []
+    for raw in (payload.get("data") or {}).get("resultList") or []:
+        node = raw["data"] if isinstance(raw.get("data"), dict) else raw
+        candidate = node
+        item_node = node.get("item")
+        if isinstance(item_node, dict):
+            main = item_node.get("main")
+            candidate = main.get("exContent") if isinstance(main, dict) and isinstance(main.get("exContent"), dict) else item_node
+            if isinstance(node.get("seller"), dict):
+                candidate = dict(candidate)
+                candidate.setdefault("seller", node["seller"])
+        items.append(client._normalize_item(candidate))
+    return items
+
+
+def _fast_html(client: XianyuClient, body: bytes) -> list[dict[str, Any]]:
+    data = client._extract_json(body)
+    return client._parse_items(data) if data else client._regex_parse_items(body)
+
+
+def _fast_mtop(client: XianyuClient, body: bytes) -> list[dict[str, Any]]:
+    payload = xianyu_parse.loads(body)
+    raw_items = client._extract_mtop_items(payload.get("data") or {})
+    return [client._normalize_item(xianyu_parse.mtop_item_node(raw)) for raw in raw_items if isinstance(raw, dict)]
+
+
+def _synthetic_pages(page_size: int, filler_kb: int) -> dict[str, tuple[str, bytes]]:
+    """mtop and HTML pages in the stand-in's shapes, padded like real responses."""
+    standin = XianyuStandinServer(StandinConfig(page_size=page_size))
+    items = [standin._item("游戏王", seq) for seq in range(page_size)]
+    filler = {
+        "fishTags": {"r1": {"tagList": [{"data": {"content": "包邮", "color": "#FF4400"}}] * 3}},
+        "picUrl": "https://img.alicdn.com/bao/uploaded/i4/O1CN01" + "x" * 48 + ".jpg",
+        "detailParams": {"itemType": "normal", "isVideo": "false", "soldPrice": "0"},
+        "trackParams": {"args": "a" * 200},
+    }
+    mtop_items = []
+    for item in items:
+        entry = standin._mtop_item(item)
+        entry["data"]["item"]["main"]["exContent"].update(filler)
+        mtop_items.append(entry)
+    mtop = {"api": "mtop.taobao.idlemtopsearch.pc.search", "ret": ["SUCCESS::调用成功"], "data": {"resultList": mtop_items}}
+    bootstrap = json.dumps({"result": {"data": {"items": [standin._html_item(item) for item in items]}}}, ensure_ascii=False)
+    shell = "<div class=\"feeds\">" + ("<span>闲鱼</span>" * 40) * max(1, filler_kb) + "</div>"
+    html = (
+        "<!DOCTYPE html><html><head><script>window.g_config = {};</script></head><body>"
+        f"{shell}<script>window.__INIT_DATA__ = {bootstrap};</script></body></html>"
+    )
+    return {
+        "synthetic_mtop.json": ("mtop", json.dumps(mtop, ensure_ascii=False).encode("utf-8")),
+        "synthetic_bootstrap.html": ("html", html.encode("utf-8")),
+    }
+
+
+def _per_page_ms(fn: Callable[[], Any], min_seconds: float) -> float:
+    rounds = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        rounds += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds and rounds >= 5:
+            return elapsed / rounds * 1000
+
+
+def _comparable(items: list[dict[str, Any]]) -> list[tuple[Any, ...]]:
+    return [(item["id"], item["price"], item["title"], item["seller_id"]) for item in items]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark Xianyu search page parsing: baseline vs fast path.")
+    parser.add_argument("pages", nargs="*", help="captured .html/.json search responses")
+    parser.add_argument("--page-size", type=int, default=30)
+    parser.add_argument("--filler-kb", type=int, default=100, help="approximate size of the synthetic HTML shell")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="timing budget per page and path")
+    args = parser.parse_args()
+
+    pages = _synthetic_pages(args.page_size, args.filler_kb)
+    paths = [Path(path) for path in args.pages] or ([DEFAULT_CAPTURE] if DEFAULT_CAPTURE.exists() else [])
+    for path in paths:
+        pages[path.name] = ("mtop" if path.suffix == ".json" else "html", path.read_bytes())
+
+    client = XianyuClient()
+    results = []
+    for name, (kind, body) in pages.items():
+        baseline_fn, fast_fn = (_baseline_mtop, _fast_mtop) if kind == "mtop" else (_baseline_html, _fast_html)
+        baseline_items = baseline_fn(client, body)
+        fast_items = fast_fn(client, body)
+        baseline_ms = _per_page_ms(lambda: baseline_fn(client, body), args.min_seconds)
+        fast_ms = _per_page_ms(lambda: fast_fn(client, body), args.min_seconds)
+        results.append(
+            {
+                "page": name,
+                "kind": kind,
+                "bytes": len(body),
+                "items": len(fast_items),
+                "same_items": _comparable(baseline_items) == _comparable(fast_items),
+                "baseline_ms": round(baseline_ms, 4),
+                "fast_ms": round(fast_ms, 4),
+                "speedup": round(baseline_ms / fast_ms, 2) if fast_ms > 0 else None,
+            }
+        )
+    print(json.dumps({"decoder": xianyu_parse.decoder_name(), "pages": results}, ensure_ascii=False, indent=2))
+    return 0 if all(row["same_items"] for row in results) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app import repositories as repo
+from app.database import init_db
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the trigger-maintained dashboard counters with full-table aggregates."
+    )
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="Rebuild the counters row when drift is found.",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    result = repo.check_dashboard_counters(repair=args.repair)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if result["ok"] or result["repaired"]:
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.database import init_db
+from app.services.analytics_export import analytics_export_service
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Export changed days of the local SQLite tables to partitioned Parquet files."
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run even when ANALYTICS_EXPORT_ENABLED=false",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    run_result = analytics_export_service.run_once(force=args.force)
+    print(json.dumps(run_result, ensure_ascii=False, indent=2))
+    return 0 if bool(run_result.get("ok")) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
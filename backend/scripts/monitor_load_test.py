@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Any, Iterator
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.config import settings
+from app.database import init_db
+from app.services import xianyu_client
+from app.services.market_monitor import MarketMonitorService
+from scripts.xianyu_standin import StandinConfig, XianyuStandinServer
+
+# Proxied runs address the site by a name that only the stand-in's proxy
+# listeners can serve, so a request that skips the proxy fails loudly.
+PROXIED_SITE = "http://xianyu.standin.invalid"
+
+
+@contextmanager
+def _settings_overrides(values: dict[str, Any]) -> Iterator[None]:
+    previous = {name: getattr(settings, name) for name in values}
+    for name, value in values.items():
+        object.__setattr__(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            object.__setattr__(settings, name, value)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": round(statistics.fmean(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def run_load_test(
+    config: StandinConfig,
+    *,
+    runs: int = 20,
+    keywords: tuple[str, ...] = ("游戏王",),
+    pages: int = 3,
+    interval_ms: float = 0.0,
+    incremental: bool = False,
+    auto_scan: bool = False,
+    sqlite_path: str = "",
+) -> dict[str, Any]:
+    """Drive the real ``MarketMonitorService`` against a local stand-in and report throughput.
+
+    The stand-in also serves as cookie provider; proxy listeners, when
+    configured, are handed to the monitor through the proxy-pool endpoint.
+    """
+    with tempfile.TemporaryDirectory(prefix="monitor-load-") as tmp_dir, XianyuStandinServer(config) as standin:
+        site = PROXIED_SITE if config.proxy_ports else standin.base_url
+        overrides: dict[str, Any] = {
+            "sqlite_path": sqlite_path or str(Path(tmp_dir) / "load_test.db"),
+            "monitor_provider": "xianyu",
+            "monitor_keywords": tuple(keywords),
+            "monitor_pages": max(1, int(pages)),
+            "monitor_adaptive_enabled": False,
+            "monitor_shard_count": 0,
+            "monitor_incremental_enabled": bool(incremental),
+            "monitor_auto_scan_after_ingest": bool(auto_scan),
+            "xianyu_mtop_url": standin.mtop_url.replace(standin.base_url, site),
+            "xianyu_search_url": standin.search_url.replace(standin.base_url, site),
+            "xianyu_cookie": "",
+            "xianyu_cookie_provider_url": standin.cookie_url,
+            "xianyu_cookie_refresh_on_start": False,
+            "xianyu_cookie_auto_local_refresh": False,
+            "monitor_use_proxy_pool": bool(config.proxy_ports),
+            "proxy_pool_api": standin.proxy_pool_url,
+            "proxy_pool_params": "",
+            "network_force_proxy_url": "",
+            "network_force_proxy_only": False,
+            "local_proxy_url": "",
+            "metrics_enabled": False,
+            "alert_email_enabled": False,
+            "alert_webhook_url": "",
+            "alert_file_path": "",
+        }
+        # Keep the real backend/.env cookie out of the run.
+        old_dotenv = os.environ.get("DOTENV_PATH")
+        os.environ["DOTENV_PATH"] = str(Path(tmp_dir) / "standin.env")
+        try:
+            with _settings_overrides(overrides):
+                init_db()
+                return _drive(standin, runs=runs, interval_ms=interval_ms)
+        finally:
+            if old_dotenv is None:
+                os.environ.pop("DOTENV_PATH", None)
+            else:
+                os.environ["DOTENV_PATH"] = old_dotenv
+
+
+def _drive(standin: XianyuStandinServer, *, runs: int, interval_ms: float) -> dict[str, Any]:
+    monitor = MarketMonitorService()
+    network_ms: list[float] = []
+    parse_ms: list[float] = []
+    insert_samples: list[tuple[int, float]] = []
+
+    original_get = xianyu_client.request_get
+    original_fetch = monitor._xianyu.fetch
+    original_save = monitor._save_items
+
+    def timed_get(url: str, **kwargs: Any):
+        started = time.perf_counter()
+        try:
+            return original_get(url, **kwargs)
+        finally:
+            network_ms.append((time.perf_counter() - started) * 1000)
+
+    def timed_fetch(*args: Any, **kwargs: Any):
+        calls_before = len(network_ms)
+        started = time.perf_counter()
+        batch = original_fetch(*args, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Whatever the page cost beyond its HTTP round trips is parsing.
+        parse_ms.append(max(0.0, elapsed_ms - sum(network_ms[calls_before:])))
+        return batch
+
+    def timed_save(items, inserted_by_keyword=None):
+        started = time.perf_counter()
+        inserted = original_save(items, inserted_by_keyword)
+        insert_samples.append((inserted, time.perf_counter() - started))
+        return inserted
+
+    monitor._xianyu.fetch = timed_fetch  # type: ignore[method-assign]
+    monitor._save_items = timed_save  # type: ignore[method-assign]
+    xianyu_client.request_get = timed_get
+    timeline: list[dict[str, Any]] = []
+    circuit: dict[str, Any] = {"opened": False}
+    started = time.perf_counter()
+    try:
+        for index in range(max(1, runs)):
+            run_started = time.perf_counter()
+            entry: dict[str, Any] = {"run": index + 1}
+            try:
+                result = monitor.run_once()
+                entry.update(
+                    {
+                        "ok": not result.get("circuit_open"),
+                        "fetched": int(result.get("fetched") or 0),
+                        "inserted": int(result.get("inserted") or 0),
+                    }
+                )
+            except Exception as exc:
+                entry.update({"ok": False, "error": str(exc)[:160]})
+            entry["ms"] = round((time.perf_counter() - run_started) * 1000, 1)
+            status = monitor.status()
+            entry["circuit_open"] = bool(status["circuit_open"])
+            if entry["circuit_open"] and not circuit["opened"]:
+                circuit = {
+                    "opened": True,
+                    "opened_at_run": index + 1,
+                    "reason": status["circuit_reason"],
+                    "consecutive_errors": status["consecutive_errors"],
+                    "consecutive_403": status["consecutive_403"],
+                    "site_requests_at_open": _site_requests(standin),
+                }
+            timeline.append(entry)
+            if interval_ms > 0:
+                time.sleep(interval_ms / 1000.0)
+    finally:
+        xianyu_client.request_get = original_get
+    elapsed = time.perf_counter() - started
+
+    server = standin.stats()
+    site_requests = _site_requests(standin)
+    if circuit["opened"]:
+        # An open breaker must stop all traffic to the site.
+        circuit["site_requests_after_open"] = site_requests - circuit.pop("site_requests_at_open")
+    inserted = sum(count for count, _ in insert_samples)
+    insert_sec = sum(seconds for _, seconds in insert_samples)
+    status = monitor.status()
+    return {
+        "runs": len(timeline),
+        "ok_runs": sum(1 for entry in timeline if entry.get("ok")),
+        "elapsed_sec": round(elapsed, 3),
+        "site_requests": site_requests,
+        "requests_per_sec": round(site_requests / elapsed, 2) if elapsed > 0 else 0.0,
+        "network_ms": _percentiles(network_ms),
+        "parse_ms_per_page": _percentiles(parse_ms),
+        "fetched": sum(int(entry.get("fetched") or 0) for entry in timeline),
+        "inserted": inserted,
+        "insert_rows_per_sec": round(inserted / insert_sec, 1) if insert_sec > 0 else 0.0,
+        "circuit": circuit,
+        "health": status["health"],
+        "cookie_refreshes": max(0, int(server["cookies_issued"]) - 1),
+        "server": server,
+        "timeline": timeline,
+    }
+
+
+def _site_requests(standin: XianyuStandinServer) -> int:
+    routes = standin.stats()["by_route"]
+    return int(routes.get("mtop", 0)) + int(routes.get("html", 0))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Load-test the market monitor against a local Xianyu stand-in server."
+    )
+    parser.add_argument("--runs", type=int, default=20, help="monitor run_once cycles")
+    parser.add_argument("--keywords", default="游戏王", help="comma separated keywords")
+    parser.add_argument("--pages", type=int, default=3, help="pages per keyword per run")
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="pause between runs")
+    parser.add_argument("--mode", choices=("mtop", "html"), default="mtop", help="API or HTML fallback path")
+    parser.add_argument("--page-size", type=int, default=30)
+    parser.add_argument("--total-items", type=int, default=600)
+    parser.add_argument("--new-items", type=int, default=5, help="fresh listings per search request")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--rate-401", type=float, default=0.0)
+    parser.add_argument("--rate-403", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--fail-after", type=int, default=0, help="fail every search from this request on")
+    parser.add_argument("--fail-status", type=int, default=403)
+    parser.add_argument("--token-ttl-sec", type=float, default=3600.0)
+    parser.add_argument("--proxy-ports", type=int, default=0, help="emulated proxies served via the pool API")
+    parser.add_argument("--proxy-ban-after", type=int, default=0)
+    parser.add_argument("--incremental", action="store_true", help="enable early stop on already-seen pages")
+    parser.add_argument("--auto-scan", action="store_true", help="run the opportunity scan after each ingest")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeline", action="store_true", help="include the per-run timeline")
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        page_size=args.page_size,
+        total_items=args.total_items,
+        new_items_per_request=args.new_items,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        status_401_rate=args.rate_401,
+        status_403_rate=args.rate_403,
+        status_429_rate=args.rate_429,
+        fail_after=args.fail_after,
+        fail_status=args.fail_status,
+        token_ttl_sec=args.token_ttl_sec,
+        issue_mtop_token=args.mode == "mtop",
+        proxy_ports=args.proxy_ports,
+        proxy_ban_after=args.proxy_ban_after,
+        seed=args.seed,
+    )
+    # The monitor prints circuit events; keep stdout for the JSON report.
+    with redirect_stdout(sys.stderr):
+        report = run_load_test(
+            config,
+            runs=args.runs,
+            keywords=tuple(token.strip() for token in args.keywords.split(",") if token.strip()),
+            pages=args.pages,
+            interval_ms=args.interval_ms,
+            incremental=args.incremental,
+            auto_scan=args.auto_scan,
+        )
+    if not args.timeline:
+        report.pop("timeline", None)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["ok_runs"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+def importtime_summary(module: str, *, top: int, env: dict[str, str]) -> dict:
+    """Run ``python -X importtime -c "import <module>"`` and rank the slowest imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    rows: list[tuple[str, int, int]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line.split(":", 1)[1].split("|", 2)
+            rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    total_us = next((cumulative for name, _, cumulative in rows if name.strip() == module), 0)
+    by_cumulative = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    by_self = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    app_us = sum(self_us for name, self_us, _ in rows if name.strip().startswith("app."))
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "modules_imported": len(rows),
+        "total_ms": round(total_us / 1000, 1),
+        "app_self_ms": round(app_us / 1000, 1),
+        "top_cumulative": [
+            {"module": name.strip(), "depth": (len(name) - len(name.lstrip())) // 2, "ms": round(cum / 1000, 1)}
+            for name, _, cum in by_cumulative
+        ],
+        "top_self": [{"module": name.strip(), "ms": round(own / 1000, 1)} for name, own, _ in by_self],
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 and proc.stderr.strip() else "",
+    }
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def _get(port: int, path: str, timeout: float) -> tuple[int, float]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        started = time.perf_counter()
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read(1)
+        first_byte = time.perf_counter()
+        response.read()
+        return response.status, (first_byte - started) * 1000
+    finally:
+        conn.close()
+
+
+def measure_ttfb(*, path: str, api_path: str, timeout: float, env: dict[str, str]) -> dict:
+    """Spawn the API server and time process start -> first byte of ``path``."""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(ROOT_DIR),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    result: dict = {"path": path, "port": port}
+    try:
+        deadline = started + timeout
+        while True:
+            if proc.poll() is not None:
+                result["error"] = (proc.stderr.read() if proc.stderr else "").strip()[-500:] or "server exited"
+                return result
+            try:
+                status, _ = _get(port, path, timeout=max(0.5, deadline - time.perf_counter()))
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    result["error"] = "timed out waiting for the server"
+                    return result
+                time.sleep(0.02)
+        result["status"] = status
+        result["spa_served"] = status == 200
+        result["ttfb_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        if api_path:
+            # The first API hit pays for mounting its router when lazy loading is on.
+            api_status, first_ms = _get(port, api_path, timeout=timeout)
+            _, warm_ms = _get(port, api_path, timeout=timeout)
+            result["api"] = {
+                "path": api_path,
+                "status": api_status,
+                "first_ms": round(first_ms, 1),
+                "warm_ms": round(warm_ms, 1),
+            }
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Summarise -X importtime for app.main and measure SPA time-to-first-byte."
+    )
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--path", default="/", help="SPA path whose first byte is timed.")
+    parser.add_argument("--api-path", default="/health", help="API path timed after the SPA (empty to skip).")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--target-ms", type=float, default=0.0, help="Exit 1 when TTFB exceeds this.")
+    parser.add_argument("--eager", action="store_true", help="Profile with LAZY_ROUTERS=false for comparison.")
+    parser.add_argument("--skip-ttfb", action="store_true")
+    parser.add_argument(
+        "--use-configured-db",
+        action="store_true",
+        help="Use SQLITE_PATH from the environment instead of a throwaway database.",
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["NO_AUTO_OPEN_BROWSER"] = "1"
+    if args.eager:
+        env["LAZY_ROUTERS"] = "false"
+    with tempfile.TemporaryDirectory(prefix="startup-profile-") as tmp_dir:
+        if not args.use_configured_db:
+            env["SQLITE_PATH"] = str(Path(tmp_dir) / "trading.db")
+        report: dict = {
+            "lazy_routers": env.get("LAZY_ROUTERS", "true").strip().lower() not in {"0", "false", "no", "off"},
+            "importtime": importtime_summary(args.module, top=args.top, env=env),
+        }
+        if not args.skip_ttfb:
+            report["ttfb"] = measure_ttfb(path=args.path, api_path=args.api_path, timeout=args.timeout, env=env)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not report["importtime"]["ok"]:
+        return 2
+    ttfb = report.get("ttfb")
+    if ttfb is not None:
+        if "ttfb_ms" not in ttfb:
+            return 2
+        if args.target_ms > 0 and ttfb["ttfb_ms"] > args.target_ms:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
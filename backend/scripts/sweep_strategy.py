@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.config import get_strategy_thresholds, settings
+from app.database import init_db
+from app.vnpy_system.backtest import load_replay_dataset
+from app.vnpy_system.sweep import (
+    SweepParameterError,
+    clear_sweep_cache,
+    grid_configurations,
+    random_configurations,
+    run_sweep,
+)
+
+
+def _load_spec(value: str) -> dict:
+    if not value:
+        return {}
+    path = Path(value)
+    text = path.read_text(encoding="utf-8") if path.exists() else value
+    spec = json.loads(text)
+    if not isinstance(spec, dict):
+        raise SweepParameterError("spec must be a JSON object")
+    return spec
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay history across a grid or random sample of strategy/risk/pricing parameters."
+    )
+    parser.add_argument("--grid", default="", help='JSON object or file, e.g. {"min_score": [40, 50]}.')
+    parser.add_argument(
+        "--space",
+        default="",
+        help='JSON object or file for random samples; ranges as {"low": 0.1, "high": 0.3}.',
+    )
+    parser.add_argument("--samples", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default="", help="Base strategy profile (defaults to STRATEGY_PROFILE).")
+    parser.add_argument("--start", default="")
+    parser.add_argument("--end", default="")
+    parser.add_argument("--hold-days", type=float, default=30.0)
+    parser.add_argument("--seller-window-days", type=float, default=14.0)
+    parser.add_argument("--capital-limit", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=0, help="Process count (0 = CPU count).")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write cached results.")
+    parser.add_argument(
+        "--prune-cache",
+        action="store_true",
+        help="Drop cached results that belong to other datasets after the run.",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    try:
+        configurations = grid_configurations(_load_spec(args.grid)) if args.grid else []
+        if args.space and args.samples:
+            configurations.extend(
+                random_configurations(_load_spec(args.space), samples=args.samples, seed=args.seed)
+            )
+        if not configurations:
+            parser.error("--grid or --space with --samples is required")
+        thresholds = get_strategy_thresholds(args.profile) if args.profile else settings.strategy_thresholds
+        report = run_sweep(
+            load_replay_dataset(start=args.start, end=args.end),
+            configurations,
+            base_thresholds=thresholds,
+            hold_days=args.hold_days,
+            seller_window_days=args.seller_window_days,
+            capital_limit=args.capital_limit,
+            max_workers=args.workers,
+            use_cache=not args.no_cache,
+        )
+    except (SweepParameterError, json.JSONDecodeError) as exc:
+        print(json.dumps({"error": str(exc)}, ensure_ascii=False))
+        return 2
+
+    result = report.as_dict(top=args.top)
+    if args.prune_cache:
+        result["pruned"] = clear_sweep_cache(keep_dataset_hash=report.dataset_hash)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
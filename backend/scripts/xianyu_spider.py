@@ -9,6 +9,7 @@ Env vars (reuse monitor defaults):
   XIAN_YU_KEYWORDS, XIAN_YU_KEYWORD, MONITOR_MAX_PRICE, MONITOR_PAGES
   XIAN_YU_COOKIE, XIAN_YU_SEARCH_URL
   MONITOR_USE_PROXY_POOL, PROXY_POOL_API, PROXY_POOL_PARAMS
+  MONITOR_INCREMENTAL_ENABLED, MONITOR_INCREMENTAL_STOP_SEEN_RATIO
 """
 
 from __future__ import annotations
@@ -17,16 +18,29 @@ from typing import Any
 from datetime import datetime, timezone
 
 from app.config import settings
+from app.database import init_db
 from app.repositories import insert_listings
 from app.schemas import ListingIn
 from app.services.xianyu_client import XianyuClient
 from app.services.cookie_provider import CookieProvider
+from app.services.incremental_crawl import IncrementalCrawlGuard
 from app.services.proxy_resolver import resolve_proxy
 
 
+def _remember_seen(
+    guard: IncrementalCrawlGuard,
+    keywords: list[str],
+    items: list[dict[str, Any]],
+) -> None:
+    for keyword in keywords:
+        guard.remember(keyword, [item for item in items if item.get("keyword") == keyword])
+
+
 def main() -> None:
+    init_db()
     client = XianyuClient()
     cookie_provider = CookieProvider()
+    guard = IncrementalCrawlGuard()
     cookie = cookie_provider.get_cookie()
     proxies = resolve_proxy()
     pages = max(1, min(10, settings.monitor_pages))
@@ -37,10 +51,13 @@ def main() -> None:
 
     all_items: list[dict[str, Any]] = []
     seen_keys: set[tuple[str, str, float]] = set()
+    requests_sent = 0
+    saved_requests = 0
     for keyword in keywords:
         for p in range(1, pages + 1):
             print(f"[spider] fetch keyword={keyword} page={p}")
             items = client.fetch(page=p, proxies=proxies, cookie_override=cookie, keyword=keyword)
+            requests_sent += 1
             for item in items:
                 if not isinstance(item, dict):
                     continue
@@ -59,8 +76,20 @@ def main() -> None:
                 normalized = dict(item)
                 normalized.setdefault("keyword", keyword)
                 all_items.append(normalized)
+            if p < pages:
+                stop, seen_ratio = guard.page_is_stale(keyword, items)
+                if stop:
+                    saved_requests += guard.record_early_stop(pages, p)
+                    print(
+                        f"[spider] stop keyword={keyword} after page={p} "
+                        f"(seen_ratio={seen_ratio:.2f})"
+                    )
+                    break
 
-    print(f"[spider] fetched {len(all_items)} raw items")
+    print(
+        f"[spider] fetched {len(all_items)} raw items with {requests_sent} requests "
+        f"(saved {saved_requests})"
+    )
     rows: list[ListingIn] = []
     for item in all_items:
         try:
@@ -88,10 +117,12 @@ def main() -> None:
 
     if not rows:
         print("[spider] nothing to insert")
+        _remember_seen(guard, keywords, all_items)
         return
 
     inserted = insert_listings(rows)
     print(f"[spider] inserted {inserted} listings into DB")
+    _remember_seen(guard, keywords, all_items)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import secrets
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+# Local stand-in for the Xianyu search endpoints, for load-testing the monitor
+# without touching the real site (see monitor_load_test.py alongside). It speaks
+# the mtop search JSON shape, the HTML bootstrap shape and the cookie provider
+# API, and can inject latency, auth/ban/rate-limit statuses and token expiry.
+
+MTOP_PATH_PREFIX = "/h5/"
+SEARCH_PATH = "/search.htm"
+COOKIE_PATH = "/api/cookies/latest"
+PROXY_POOL_PATH = "/proxy-pool"
+STATS_PATH = "/_stats"
+
+_CARD_TITLES = (
+    "青眼白龙",
+    "黑魔导",
+    "栗子球",
+    "真红眼黑龙",
+    "Blue-Eyes White Dragon",
+    "Dark Magician",
+    "Kuriboh",
+    "Red-Eyes Black Dragon",
+)
+_TITLE_SUFFIXES = ("UR", "SER", "PSER", "SR", "N", "九喆新", "简中", "日版")
+
+
+@dataclass
+class StandinConfig:
+    page_size: int = 30
+    # Listings available per keyword; pages past the end come back empty.
+    total_items: int = 600
+    # Fresh listings pushed to the head of each keyword's feed per search call.
+    new_items_per_request: int = 0
+    min_price: float = 1.0
+    max_price: float = 200.0
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    status_401_rate: float = 0.0
+    status_403_rate: float = 0.0
+    status_429_rate: float = 0.0
+    # From the Nth search request on, every search fails with fail_status (0 = never).
+    fail_after: int = 0
+    fail_status: int = 403
+    token_ttl_sec: float = 3600.0
+    # False hands out cookies without _m_h5_tk, which sends the client down the HTML path.
+    issue_mtop_token: bool = True
+    # Extra listeners that act as forward proxies; each one answers 403 once it
+    # has carried proxy_ban_after requests (0 = never banned).
+    proxy_ports: int = 0
+    proxy_ban_after: int = 0
+    seed: int = 7
+
+
+@dataclass
+class _Stats:
+    requests: int = 0
+    search_requests: int = 0
+    by_route: dict[str, int] = field(default_factory=dict)
+    by_status: dict[str, int] = field(default_factory=dict)
+    injected: dict[str, int] = field(default_factory=dict)
+    token_rejections: dict[str, int] = field(default_factory=dict)
+    cookies_issued: int = 0
+    items_served: int = 0
+    bytes_served: int = 0
+    proxied: dict[str, int] = field(default_factory=dict)
+    banned_proxies: list[str] = field(default_factory=list)
+
+
+def _bump(counter: dict[str, int], key: str, amount: int = 1) -> None:
+    counter[key] = counter.get(key, 0) + amount
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "XianyuStandin/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return None
+
+    def do_GET(self) -> None:  # noqa: N802
+        standin: XianyuStandinServer = self.server.standin  # type: ignore[attr-defined]
+        proxy_label: str | None = self.server.proxy_label  # type: ignore[attr-defined]
+        status, content_type, body = standin.handle(self.path, self.headers.get("Cookie", ""), proxy_label)
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_POST = do_GET
+
+
+class XianyuStandinServer:
+    """Threaded HTTP stand-in for the mtop search API, the HTML search page and the cookie provider.
+
+    ``start()`` returns the base URL. With ``proxy_ports`` set, extra
+    listeners accept absolute-form (proxied) requests and are listed by
+    ``/proxy-pool`` in the shape the proxy resolver reads.
+    """
+
+    def __init__(self, config: StandinConfig | None = None, *, host: str = "127.0.0.1") -> None:
+        self.config = config or StandinConfig()
+        self._host = host
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.config.seed)
+        self._stats = _Stats()
+        self._tokens: dict[str, float] = {}
+        self._feed_heads: dict[str, int] = {}
+        self._servers: list[ThreadingHTTPServer] = []
+        self._threads: list[threading.Thread] = []
+        self.base_url = ""
+        self.proxy_urls: list[str] = []
+
+    def __enter__(self) -> XianyuStandinServer:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> str:
+        if self._servers:
+            return self.base_url
+        labels: list[str | None] = [None] + [f"proxy-{index}" for index in range(max(0, self.config.proxy_ports))]
+        for label in labels:
+            server = ThreadingHTTPServer((self._host, 0), _Handler)
+            server.daemon_threads = True
+            server.standin = self  # type: ignore[attr-defined]
+            server.proxy_label = label  # type: ignore[attr-defined]
+            thread = threading.Thread(target=server.serve_forever, name=f"xianyu-standin-{label or 'site'}", daemon=True)
+            thread.start()
+            self._servers.append(server)
+            self._threads.append(thread)
+        ports = [int(server.server_address[1]) for server in self._servers]
+        self.base_url = f"http://{self._host}:{ports[0]}"
+        self.proxy_urls = [f"http://{self._host}:{port}" for port in ports[1:]]
+        return self.base_url
+
+    def stop(self) -> None:
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._servers.clear()
+        self._threads.clear()
+
+    @property
+    def mtop_url(self) -> str:
+        return f"{self.base_url}{MTOP_PATH_PREFIX}mtop.taobao.idlemtopsearch.pc.search/1.0/"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.base_url}{SEARCH_PATH}"
+
+    @property
+    def cookie_url(self) -> str:
+        return f"{self.base_url}{COOKIE_PATH}"
+
+    @property
+    def proxy_pool_url(self) -> str:
+        return f"{self.base_url}{PROXY_POOL_PATH}"
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return json.loads(json.dumps(asdict(self._stats)))
+
+    def issue_cookie(self) -> str:
+        with self._lock:
+            self._stats.cookies_issued += 1
+            if not self.config.issue_mtop_token:
+                return f"cna=standin{self._stats.cookies_issued}"
+            token = secrets.token_hex(16)
+            expire_ms = int((time.time() + self.config.token_ttl_sec) * 1000)
+            self._tokens[token] = expire_ms / 1000.0
+        return f"cna=standin; _m_h5_tk={token}_{expire_ms}; _m_h5_tk_enc={secrets.token_hex(16)}"
+
+    # -- request handling -------------------------------------------------
+
+    def handle(self, raw_path: str, cookie_header: str, proxy_label: str | None) -> tuple[int, str, str]:
+        url = urlsplit(raw_path)
+        path = url.path or "/"
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if path.startswith(MTOP_PATH_PREFIX):
+            route = "mtop"
+        elif path == SEARCH_PATH:
+            route = "html"
+        elif path == COOKIE_PATH:
+            route = "cookie"
+        elif path == PROXY_POOL_PATH:
+            route = "proxy_pool"
+        elif path == STATS_PATH:
+            route = "stats"
+        else:
+            route = "unknown"
+        status, content_type, body = self._dispatch(route, query, cookie_header, proxy_label)
+        with self._lock:
+            self._stats.requests += 1
+            _bump(self._stats.by_route, route)
+            _bump(self._stats.by_status, str(status))
+            self._stats.bytes_served += len(body)
+        return status, content_type, body
+
+    def _dispatch(
+        self,
+        route: str,
+        query: dict[str, str],
+        cookie_header: str,
+        proxy_label: str | None,
+    ) -> tuple[int, str, str]:
+        if route == "cookie":
+            return 200, "application/json", json.dumps({"cookie_string": self.issue_cookie()})
+        if route == "proxy_pool":
+            return 200, "application/json", json.dumps({"data": [url.split("://", 1)[1] for url in self.proxy_urls]})
+        if route == "stats":
+            return 200, "application/json", json.dumps(self.stats())
+        if route == "unknown":
+            return 404, "text/plain", "not found"
+
+        injected = self._inject(proxy_label)
+        self._sleep()
+        if injected:
+            return injected, "text/plain", f"standin injected {injected}"
+        if route == "mtop":
+            return self._mtop(query, cookie_header)
+        keyword = query.get("keywords") or ""
+        page = max(1, int(query.get("page") or 1))
+        items = [self._html_item(item) for item in self._page(keyword, page)]
+        bootstrap = json.dumps({"result": {"data": {"items": items}}}, ensure_ascii=False)
+        html = (
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>standin</title></head><body>"
+            f"<div id=\"root\"></div><script>window.__INIT_DATA__ = {bootstrap};</script></body></html>"
+        )
+        return 200, "text/html; charset=utf-8", html
+
+    def _inject(self, proxy_label: str | None) -> int:
+        config = self.config
+        with self._lock:
+            self._stats.search_requests += 1
+            if proxy_label is not None:
+                _bump(self._stats.proxied, proxy_label)
+                if config.proxy_ban_after and self._stats.proxied[proxy_label] > config.proxy_ban_after:
+                    if proxy_label not in self._stats.banned_proxies:
+                        self._stats.banned_proxies.append(proxy_label)
+                    _bump(self._stats.injected, "proxy_ban")
+                    return 403
+            if config.fail_after and self._stats.search_requests >= config.fail_after:
+                _bump(self._stats.injected, f"fail_after_{config.fail_status}")
+                return int(config.fail_status)
+            roll = self._rng.random()
+            for status, rate in ((429, config.status_429_rate), (403, config.status_403_rate), (401, config.status_401_rate)):
+                if roll < rate:
+                    _bump(self._stats.injected, str(status))
+                    return status
+                roll -= rate
+        return 0
+
+    def _sleep(self) -> None:
+        delay_ms = self.config.latency_ms
+        if self.config.latency_jitter_ms > 0:
+            with self._lock:
+                delay_ms += self._rng.uniform(0.0, self.config.latency_jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000.0)
+
+    def _mtop(self, query: dict[str, str], cookie_header: str) -> tuple[int, str, str]:
+        cookies = dict(
+            chunk.strip().split("=", 1) for chunk in cookie_header.split(";") if "=" in chunk
+        )
+        token = str(cookies.get("_m_h5_tk") or "").split("_", 1)[0]
+        data = query.get("data") or ""
+        failure = ""
+        with self._lock:
+            expires_at = self._tokens.get(token)
+        if not token:
+            failure = "FAIL_SYS_TOKEN_EMPTY::令牌为空"
+        elif expires_at is None or expires_at <= time.time():
+            failure = "FAIL_SYS_TOKEN_EXOIRED::令牌过期"
+        else:
+            expected = hashlib.md5(
+                f"{token}&{query.get('t', '')}&{query.get('appKey', '')}&{data}".encode("utf-8")
+            ).hexdigest()
+            if expected != query.get("sign"):
+                failure = "FAIL_SYS_ILLEGAL_ACCESS::非法请求"
+        if failure:
+            with self._lock:
+                _bump(self._stats.token_rejections, failure.split("::", 1)[0])
+            return 200, "application/json", json.dumps({"api": query.get("api", ""), "ret": [failure], "data": {}})
+
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            payload = {}
+        keyword = str(payload.get("keyword") or "")
+        page = max(1, int(payload.get("pageNumber") or 1))
+        result = [self._mtop_item(item) for item in self._page(keyword, page)]
+        body = {
+            "api": query.get("api", ""),
+            "v": "1.0",
+            "ret": ["SUCCESS::调用成功"],
+            "data": {"resultList": result, "resultInfo": {"hasNextPage": bool(result)}},
+        }
+        return 200, "application/json", json.dumps(body, ensure_ascii=False)
+
+    # -- synthetic feed ---------------------------------------------------
+
+    def _page(self, keyword: str, page: int) -> list[dict[str, Any]]:
+        config = self.config
+        with self._lock:
+            head = self._feed_heads.get(keyword, config.total_items)
+            if page == 1:
+                self._feed_heads[keyword] = head + max(0, config.new_items_per_request)
+        size = max(1, config.page_size)
+        first = head - (page - 1) * size
+        floor = head - config.total_items
+        items = [self._item(keyword, seq) for seq in range(first, max(floor, first - size), -1)]
+        with self._lock:
+            self._stats.items_served += len(items)
+        return items
+
+    def _item(self, keyword: str, seq: int) -> dict[str, Any]:
+        rng = random.Random(f"{self.config.seed}:{keyword}:{seq}")
+        title = f"{rng.choice(_CARD_TITLES)} {rng.choice(_TITLE_SUFFIXES)} {keyword}".strip()
+        return {
+            "id": f"{zlib.crc32(keyword.encode('utf-8'))}{seq:08d}",
+            "title": title,
+            "price": round(rng.uniform(self.config.min_price, self.config.max_price), 1),
+            "seller_id": f"standin-seller-{rng.randrange(200)}",
+        }
+
+    @staticmethod
+    def _mtop_item(item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "data": {
+                "item": {
+                    "main": {
+                        "exContent": {
+                            "itemId": item["id"],
+                            "title": item["title"],
+                            "price": [{"text": "¥"}, {"text": str(item["price"])}],
+                            "area": "上海",
+                        },
+                        "clickParam": {"args": {"item_id": item["id"]}},
+                    }
+                },
+                "seller": {"userId": item["seller_id"]},
+            }
+        }
+
+    @staticmethod
+    def _html_item(item: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "itemId": item["id"],
+            "title": item["title"],
+            "price": str(item["price"]),
+            "sellerId": item["seller_id"],
+        }
@@ -93,9 +93,13 @@ create table if not exists public.cardflip_execution_logs (
   response_json text not null,
   success integer not null,
   error text not null,
+  business_ban integer not null default 0,
   created_at text not null
 );
 
+alter table public.cardflip_execution_logs
+  add column if not exists business_ban integer not null default 0;
+
 create table if not exists public.cardflip_opportunity_reject_logs (
   id bigint primary key,
   opportunity_id bigint not null,
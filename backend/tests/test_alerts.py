@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+import smtplib
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.services import notifier
+from app.services.notifier import Alert, AlertDispatcher, AlertSink, FileSink, SmtpSink
+
+
+class _BlockingSink(AlertSink):
+    name = "blocking"
+
+    def __init__(self) -> None:
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.received: list[Alert] = []
+
+    def send(self, alert: Alert) -> None:
+        self.entered.set()
+        self.release.wait(timeout=5)
+        self.received.append(alert)
+
+
+@pytest.fixture
+def alert_settings():
+    old = (settings.alert_dedupe_window_sec, settings.alert_rate_limit_per_min)
+    object.__setattr__(settings, "alert_dedupe_window_sec", 0.3)
+    object.__setattr__(settings, "alert_rate_limit_per_min", 600)
+    try:
+        yield
+    finally:
+        object.__setattr__(settings, "alert_dedupe_window_sec", old[0])
+        object.__setattr__(settings, "alert_rate_limit_per_min", old[1])
+
+
+def test_dispatcher_never_blocks_and_coalesces_repeats(alert_settings, tmp_path: Path) -> None:
+    blocking = _BlockingSink()
+    dispatcher = AlertDispatcher(sinks=[blocking, FileSink(str(tmp_path / "alerts.jsonl"))])
+
+    assert dispatcher.submit("Circuit open: errors=0", "body 0", key="circuit")
+    assert blocking.entered.wait(timeout=2)
+    started = time.perf_counter()
+    for index in range(1, 5):
+        assert dispatcher.submit(f"Circuit open: errors={index}", f"body {index}", key="circuit")
+    assert dispatcher.submit("Other alert", "other")
+    # The first send is still stuck in the sink; every submit returned at once.
+    assert time.perf_counter() - started < 0.2
+
+    blocking.release.set()
+    deadline = time.monotonic() + 3
+    while len(blocking.received) < 3 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert [(alert.key, alert.count) for alert in blocking.received] == [
+        ("circuit", 1),
+        ("Other alert", 1),
+        ("circuit", 4),
+    ]
+    assert blocking.received[-1].body == "body 4"
+    assert blocking.received[-1].rendered_subject().endswith("(x4)")
+
+    status = dispatcher.status()
+    assert (status["submitted"], status["coalesced"], status["sent"]) == (6, 3, 3)
+    assert dispatcher.stop()["stopped"]
+    lines = (tmp_path / "alerts.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["count"] for line in lines] == [1, 1, 4]
+
+
+def test_dispatcher_without_sinks_is_a_noop() -> None:
+    dispatcher = AlertDispatcher(sinks=[])
+    assert not dispatcher.submit("subject", "body")
+    assert dispatcher.status()["running"] is False
+
+
+def test_smtp_sink_reuses_and_reconnects(monkeypatch: pytest.MonkeyPatch) -> None:
+    connections: list[_FakeSmtp] = []
+
+    class _FakeSmtp:
+        def __init__(self, host: str, port: int, timeout: float) -> None:
+            self.sent: list[str] = []
+            self.fail_next = False
+            connections.append(self)
+
+        def login(self, user: str, password: str) -> None:
+            return None
+
+        def send_message(self, msg) -> None:
+            if self.fail_next:
+                raise smtplib.SMTPServerDisconnected("gone")
+            self.sent.append(msg["Subject"])
+
+        def quit(self) -> None:
+            return None
+
+    monkeypatch.setattr(notifier.smtplib, "SMTP_SSL", _FakeSmtp)
+    sink = SmtpSink(host="smtp.test", port=465, user="u", password="p", to="ops@test", use_tls=True)
+    alert = Alert("k", "subject", "body", "t0", "t0")
+    sink.send(alert)
+    sink.send(alert)
+    assert len(connections) == 1 and connections[0].sent == ["subject", "subject"]
+
+    connections[0].fail_next = True
+    sink.send(alert)
+    assert len(connections) == 2 and connections[1].sent == ["subject"]
+    sink.close()
@@ -136,6 +136,25 @@ def test_analysis_endpoints(tmp_path: Path) -> None:
             history_payload = price_history.json()
             assert history_payload["count"] == 3
 
+            daily = client.get("/analysis/history/daily-sales", params={"start": "2000-01-01"})
+            assert daily.status_code == 200
+            assert daily.json()["engine"] == "sqlite"
+            assert sum(item["sales"] for item in daily.json()["items"]) == 3
+            assert client.get("/analysis/history/monthly-pnl").json()["engine"] == "sqlite"
+            assert client.get("/analysis/history/sales", params={"limit": 5000}).json()["limit"] == 500
+            ranged = client.get(
+                "/analysis/history/daily-sales", params={"start": "2026-03-10", "end": "2026-03-10"}
+            ).json()
+            assert ranged["engine"] == "sqlite" and [item["day"] for item in ranged["items"]] == ["2026-03-10"]
+            for path in ("daily-sales", "sales", "monthly-pnl"):
+                assert client.get(f"/analysis/history/{path}", params={"end": "2024-02-30"}).status_code == 422
+            assert client.get("/analysis/data/price-history", params={"start": "2024-13-01"}).status_code == 422
+            assert (
+                client.get("/analysis/history/daily-sales", params={"start": "2026-03-11", "end": "2026-03-10"})
+                .status_code
+                == 422
+            )
+
             trade_records = client.get("/analysis/data/trade-records")
             assert trade_records.status_code == 200
             assert trade_records.json()["count"] >= 1
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, SaleIn
+from app.services import analytics_export
+from app.services.analytics_export import EXPORT_TABLES, AnalyticsExportService
+
+
+def _at(day: int, hour: int = 12) -> datetime:
+    return datetime(2026, 3, day, hour, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def isolated_export(tmp_path: Path):
+    old = (settings.sqlite_path, settings.analytics_export_dir)
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "analytics.db"))
+    object.__setattr__(settings, "analytics_export_dir", str(tmp_path / "parquet"))
+    init_db()
+    try:
+        yield tmp_path / "parquet"
+    finally:
+        object.__setattr__(settings, "sqlite_path", old[0])
+        object.__setattr__(settings, "analytics_export_dir", old[1])
+
+
+def _sale(item_id: str, price: float, sold_at: datetime) -> SaleIn:
+    return SaleIn(source="pytest", item_id=item_id, title="Dark Magician", sold_price=price, sold_at=sold_at)
+
+
+def _plan(table: str, state: dict) -> tuple[set[str], set[str], dict]:
+    with get_conn() as conn:
+        return analytics_export._changed_days(conn, EXPORT_TABLES[table], state)
+
+
+def test_only_changed_days_are_planned(isolated_export: Path) -> None:
+    repo.insert_sales([_sale("s-1", 10.0, _at(1)), _sale("s-2", 12.0, _at(2)), _sale("s-3", 11.0, _at(2, 18))])
+    changed, removed, sales_state = _plan("sales_raw", {})
+    assert (changed, removed) == ({"2026-03-01", "2026-03-02"}, set())
+    assert sales_state["days"]["2026-03-02"]["rows"] == 2
+
+    repo.insert_sales([_sale("s-4", 13.0, _at(2, 20))])
+    changed, _, sales_state = _plan("sales_raw", sales_state)
+    assert changed == {"2026-03-02"}
+    assert sales_state["days"]["2026-03-02"]["rows"] == 3
+    assert _plan("sales_raw", sales_state)[0] == set()
+
+    first, _ = repo.upsert_listing(
+        ListingIn(source="pytest", listing_id="l-1", title="Kuriboh", list_price=5.0, listed_at=_at(3))
+    )
+    repo.upsert_listing(ListingIn(source="pytest", listing_id="l-2", title="Kuriboh", list_price=6.0, listed_at=_at(4)))
+    with get_conn() as conn:
+        conn.execute("UPDATE listings_raw SET listed_at = '' WHERE listing_id = 'l-2'")
+    changed, _, listing_state = _plan("listings_raw", {})
+    assert changed == {"2026-03-03", analytics_export.UNKNOWN_DAY}
+
+    # In-place status changes re-export the listing's day; deleted days are dropped.
+    with get_conn() as conn:
+        conn.execute("UPDATE listings_raw SET status = 'sold' WHERE id = ?", (first,))
+    changed, removed, listing_state = _plan("listings_raw", listing_state)
+    assert (changed, removed) == ({"2026-03-03"}, set())
+    with get_conn() as conn:
+        conn.execute("DELETE FROM listings_raw WHERE id = ?", (first,))
+    changed, removed, _ = _plan("listings_raw", listing_state)
+    assert (changed, removed) == (set(), {"2026-03-03"})
+
+
+def test_queries_fall_back_to_sqlite_without_a_snapshot(isolated_export: Path) -> None:
+    repo.insert_sales([_sale("s-1", 10.0, _at(1)), _sale("s-2", 12.0, _at(2))])
+    rows, engine = analytics_export.run_analytics_query(
+        "SELECT COUNT(*) AS n FROM sales_raw WHERE sold_at >= ?",
+        ["2026-03-02"],
+        tables=("sales_raw",),
+        prefer_columnar=True,
+    )
+    assert (rows, engine) == ([{"n": 1}], "sqlite")
+    assert not analytics_export.columnar_ready(("sales_raw",))
+
+    status = AnalyticsExportService().status()
+    assert status["export_dir"] == str(isolated_export)
+    assert AnalyticsExportService().run_once()["reason"] == "disabled"
+
+
+def test_export_round_trip_through_duckdb(isolated_export: Path) -> None:
+    pytest.importorskip("pyarrow")
+    pytest.importorskip("duckdb")
+    repo.insert_sales([_sale("s-1", 10.0, _at(1)), _sale("s-2", 12.0, _at(2))])
+    service = AnalyticsExportService()
+
+    first = service.run_once(force=True)
+    assert first["ok"] and first["tables"]["sales_raw"]["days_written"] == 2
+    assert (isolated_export / "sales_raw" / "day=2026-03-02" / "part-0.parquet").exists()
+
+    repo.insert_sales([_sale("s-3", 14.0, _at(2, 18))])
+    second = service.run_once(force=True)
+    assert second["tables"]["sales_raw"] == {"days_written": 1, "days_removed": 0, "rows_written": 2}
+
+    rows, engine = analytics_export.run_analytics_query(
+        "SELECT COUNT(*) AS n, MAX(sold_price) AS top FROM sales_raw WHERE sold_at >= ?",
+        ["2026-03-02"],
+        tables=("sales_raw",),
+        prefer_columnar=True,
+    )
+    assert engine == "duckdb"
+    assert (int(rows[0]["n"]), float(rows[0]["top"])) == (2, 14.0)
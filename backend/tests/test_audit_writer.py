@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, ValuationOut
+from app.services import audit_writer as audit_writer_module
+from app.services.audit_writer import AuditWriter, audit_writer
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    names = ("sqlite_path", "audit_write_behind_enabled", "audit_flush_interval_ms", "audit_flush_batch_size")
+    old = {name: getattr(settings, name) for name in names}
+    audit_writer.stop()
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "audit.db"))
+    object.__setattr__(settings, "audit_write_behind_enabled", True)
+    # Only explicit flushes and syncing readers write during the test.
+    object.__setattr__(settings, "audit_flush_interval_ms", 60_000)
+    object.__setattr__(settings, "audit_flush_batch_size", 10_000)
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        audit_writer.stop()
+        for name, value in old.items():
+            object.__setattr__(settings, name, value)
+
+
+def _seed_trade() -> tuple[int, int]:
+    listing_row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id="audit-1",
+            title="pytest card",
+            list_price=100,
+            listed_at=datetime(2026, 3, 6, tzinfo=timezone.utc),
+            status="open",
+        )
+    )
+    assert listing_row_id is not None
+    valuation_id = repo.save_valuation(
+        ValuationOut(
+            listing_row_id=listing_row_id,
+            expected_sale_price=160,
+            buy_limit=120,
+            suggested_list_price=170,
+            ci_low=140,
+            ci_high=180,
+            model_confidence=0.9,
+            comparables_count=12,
+            reasoning="pytest seed",
+        )
+    )
+    opportunity_id = repo.upsert_opportunity(
+        listing_row_id=listing_row_id,
+        valuation_id=valuation_id,
+        expected_profit=40.0,
+        roi=0.4,
+        score=85.0,
+        status="pending_review",
+        note="pytest_seed",
+    )
+    approved = repo.approve_opportunity_idempotent(
+        opportunity_id=opportunity_id, approved_buy_price=100.0, approved_by="pytest", note=""
+    )
+    return opportunity_id, int(approved["trade_id"])
+
+
+def _log(trade_id: int, *, success: bool) -> int:
+    return repo.create_execution_log(
+        trade_id=trade_id,
+        action="buy",
+        provider="webhook",
+        dry_run=True,
+        success=success,
+        error="" if success else "timeout",
+    )
+
+
+def _raw_count(path: Path, table: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+    finally:
+        conn.close()
+
+
+def test_buffered_writes_are_batched_and_overlaid_for_readers(isolated_sqlite: Path) -> None:
+    opportunity_id, trade_id = _seed_trade()
+    reject_id = repo.create_opportunity_reject_log(opportunity_id, note="too pricey", reject_mode="auto")
+    first = _log(trade_id, success=True)
+    audit_writer.flush()
+    batches = audit_writer.status()["batches"]
+
+    ids = [_log(trade_id, success=index % 2 == 1) for index in range(5)]
+    # Status updates are not buffered: they fail or land immediately.
+    repo.update_trade_listed(trade_id, "https://example.test/item", "listed by pytest")
+    assert str(repo.get_trade(trade_id)["note"]).endswith("listed by pytest")
+
+    assert ids == list(range(first + 1, first + 6))
+    assert audit_writer.pending() == 5
+    assert _raw_count(isolated_sqlite, "execution_logs") == 1
+
+    # The idempotency check sees queued logs without forcing a flush.
+    latest = repo.get_latest_execution_log(trade_id=trade_id, action="buy")
+    assert latest is not None and int(latest["id"]) == ids[-1]
+    latest_success = repo.get_latest_execution_log(trade_id=trade_id, action="buy", success_only=True)
+    assert latest_success is not None and int(latest_success["id"]) == ids[-2]
+    assert repo.get_latest_execution_log(trade_id=trade_id, action="sell") is None
+    assert audit_writer.pending() == 5
+
+    # List readers write the queue first, in one batch.
+    assert [int(row["id"]) for row in repo.list_execution_logs(trade_id=trade_id)] == [*reversed(ids), first]
+    assert audit_writer.pending() == 0
+    assert audit_writer.status()["batches"] == batches + 1
+    logs = repo.list_opportunity_reject_logs(opportunity_id=opportunity_id)
+    assert [int(row["id"]) for row in logs] == [reject_id]
+
+
+def test_reserved_ids_never_collide_across_writers(isolated_sqlite: Path) -> None:
+    _, trade_id = _seed_trade()
+    # A second writer stands in for another process sharing the database.
+    other = AuditWriter()
+    try:
+        mine = _log(trade_id, success=True)
+        theirs = other.insert("execution_logs", ("trade_id", "action", "provider"), (trade_id, "sell", "other"))
+        assert theirs != mine
+        other.flush()
+
+        # A plain AUTOINCREMENT insert skips every reserved id as well.
+        conn = sqlite3.connect(isolated_sqlite)
+        direct = conn.execute(
+            "INSERT INTO execution_logs(trade_id, action, provider) VALUES (?, 'cancel', 'direct')", (trade_id,)
+        ).lastrowid
+        conn.commit()
+        conn.close()
+        assert direct not in (mine, theirs)
+        second = _log(trade_id, success=False)
+
+        result = audit_writer.stop()
+        assert result["pending"] == 0 and result["flushed"] == 2
+        assert audit_writer.status()["failed_rows"] == 0
+    finally:
+        other.stop()
+    with get_conn() as conn:
+        rows = dict(conn.execute("SELECT id, action FROM execution_logs").fetchall())
+    assert rows == {mine: "buy", theirs: "sell", direct: "cancel", second: "buy"}
+
+
+def test_transient_write_failures_keep_rows_queued(isolated_sqlite: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _, trade_id = _seed_trade()
+    monkeypatch.setattr(audit_writer_module, "_BUSY_TIMEOUT_SEC", 0.05)
+    ids = [_log(trade_id, success=True) for _ in range(3)]
+
+    blocker = sqlite3.connect(isolated_sqlite, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        assert audit_writer.flush() == 0
+        # "database is locked" requeues the rows; readers still see them.
+        assert audit_writer.pending() == 3
+        assert int(repo.get_latest_execution_log(trade_id=trade_id, action="buy")["id"]) == ids[-1]
+        later = _log(trade_id, success=False)
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    # A row SQLite rejects outright is the only kind that is dropped.
+    conn = sqlite3.connect(isolated_sqlite)
+    conn.execute(
+        "INSERT INTO execution_logs(id, trade_id, action, provider) VALUES (?, ?, 'sell', 'direct')", (ids[1], trade_id)
+    )
+    conn.commit()
+    conn.close()
+
+    assert audit_writer.flush() == 3
+    status = audit_writer.status()
+    assert status["pending"] == 0 and status["failed_rows"] == 1 and status["requeued_rows"] >= 3
+    with get_conn() as conn:
+        rows = dict(conn.execute("SELECT id, provider FROM execution_logs").fetchall())
+    assert rows == {ids[0]: "webhook", ids[1]: "direct", ids[2]: "webhook", later: "webhook"}
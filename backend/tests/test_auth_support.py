@@ -107,7 +107,11 @@ def test_user_ticket_flow_and_admin_management(isolated_auth_sqlite: Path) -> No
         assert admin_list.status_code == 200
         admin_payload = admin_list.json()["data"]
         assert admin_payload["canManage"] is True
-        assert admin_payload["stats"]["total"] == 1
+        assert "stats" not in admin_payload
+        admin_stats = client.get(
+            "/support/tickets", headers=_bearer(admin_token), params={"include_stats": "true"}
+        ).json()["data"]["stats"]
+        assert admin_stats == {"total": 1, "active": 1, "resolved": 0, "closed": 0}
 
         update = client.patch(
             f"/support/tickets/{ticket_id}",
@@ -116,6 +120,14 @@ def test_user_ticket_flow_and_admin_management(isolated_auth_sqlite: Path) -> No
         )
         assert update.status_code == 200
         assert update.json()["data"]["ticket"]["status"] == "resolved"
+        # Counter-served stats follow status changes; a keyword filter falls back to the aggregate.
+        for params in ({"include_stats": "true"}, {"include_stats": "true", "keyword": "模拟盘"}):
+            stats = client.get("/support/tickets", headers=_bearer(user_token), params=params).json()["data"]["stats"]
+            assert stats == {"total": 1, "active": 0, "resolved": 1, "closed": 0}
+        no_match = client.get(
+            "/support/tickets", headers=_bearer(user_token), params={"include_stats": "true", "keyword": "none"}
+        ).json()["data"]["stats"]
+        assert no_match["total"] == 0
 
         reply = client.post(
             f"/support/tickets/{ticket_id}/reply",
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import repositories as repo
+from app.config import StrategyThresholds, settings
+from app.database import init_db
+from app.main import create_app
+from app.schemas import FeatureData, ListingIn, SaleIn
+from app.vnpy_system.backtest import BacktestConfig, load_replay_dataset, run_backtest
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+THRESHOLDS = StrategyThresholds(
+    min_score=30.0,
+    min_roi=0.1,
+    max_risk_score=60.0,
+    allow_blocked_review=False,
+    auto_reject_unqualified=False,
+)
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "backtest.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _sale(name: str, day: float, price: float, index: int) -> SaleIn:
+    return SaleIn(
+        source="pytest",
+        item_id=f"{name}-{index}",
+        title=f"{name} holo card",
+        sold_price=price,
+        sold_at=T0 + timedelta(days=day),
+    )
+
+
+def _listing(name: str, day: float, price: float) -> None:
+    row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id=f"listing-{name}",
+            seller_id=f"seller-{name}",
+            title=f"{name} holo card",
+            list_price=price,
+            listed_at=T0 + timedelta(days=day),
+            status="open",
+        )
+    )
+    assert row_id is not None
+    repo.save_features(
+        "listing",
+        row_id,
+        FeatureData(card_name=name, rarity="unknown", edition="unknown", card_condition="unknown", confidence=0.95),
+        "pytest",
+    )
+
+
+def _seed() -> None:
+    sales = [_sale("Charizard", day, 200.0 + day, day) for day in range(1, 11)]
+    sales.append(_sale("Charizard", 13, 260.0, 99))
+    # Pikachu only sells richly *after* its listing appears; using those sales
+    # for the entry decision would be lookahead.
+    sales.extend(_sale("Pikachu", 20 + day, 400.0, day) for day in range(10))
+    repo.insert_sales(sales)
+    _listing("Charizard", 11, 100.0)
+    _listing("Pikachu", 12, 100.0)
+
+
+def test_replay_uses_point_in_time_comparables(isolated_sqlite: Path) -> None:
+    _seed()
+    dataset = load_replay_dataset()
+    assert [listing.card_name for listing in dataset.listings] == ["Charizard", "Pikachu"]
+    assert dataset.comparables_before(dataset.listings[1], 80) == []
+
+    report = run_backtest(dataset, BacktestConfig(thresholds=THRESHOLDS, hold_days=30))
+    assert report.listings_replayed == 2
+    assert report.trades == 1
+    trade = report.trade_samples[0]
+    assert trade["outcome"] == "sold_at_target"
+    assert trade["pnl"] > 0
+    assert report.hit_rate == 1.0
+    assert report.peak_capital == pytest.approx(trade["buy_price"])
+
+
+def test_capital_limit_skips_signals(isolated_sqlite: Path) -> None:
+    _seed()
+    report = run_backtest(
+        load_replay_dataset(),
+        BacktestConfig(thresholds=THRESHOLDS, capital_limit=10.0),
+    )
+    assert report.signals == 1
+    assert report.trades == 0
+    assert report.skipped_capital == 1
+
+
+def test_backtest_route_reports_summary(isolated_sqlite: Path) -> None:
+    _seed()
+    client = TestClient(create_app())
+    resp = client.post(
+        "/vnpy/backtest",
+        json={"min_score": 30, "min_roi": 0.1, "max_risk_score": 60, "allow_blocked_review": False},
+    )
+    assert resp.status_code == 200
+    payload = resp.json()
+    assert payload["trades"] == 1
+    assert "trade_samples" not in payload
+    assert payload["thresholds"]["min_score"] == 30
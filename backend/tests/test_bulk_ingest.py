@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.main import create_app
+from app.services.bulk_ingest import NdjsonLineTooLongError
+from app.services.bulk_ingest import iter_ndjson_lines
+
+
+@pytest.fixture
+def client(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "bulk_ingest.db"))
+    init_db()
+    try:
+        yield TestClient(create_app())
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _sale_lines(count: int, *, start: int = 0) -> bytes:
+    rows = [
+        {
+            "source": "backfill",
+            "item_id": f"sale-{index}",
+            "title": f"card #{index}",
+            "sold_price": 10 + index,
+            "sold_at": "2026-01-01T00:00:00+00:00",
+        }
+        for index in range(start, start + count)
+    ]
+    return "\n".join(json.dumps(row) for row in rows).encode("utf-8")
+
+
+def _sales_count() -> int:
+    with get_conn() as conn:
+        return int(conn.execute("SELECT COUNT(*) AS c FROM sales_raw").fetchone()["c"])
+
+
+def test_stream_ingest_commits_in_chunks_and_dedupes(client: TestClient) -> None:
+    body = _sale_lines(5) + b"\nnot-json\n" + _sale_lines(3, start=3) + b"\n"
+    response = client.post("/ingest/stream/sales?chunk_size=2", content=body)
+    assert response.status_code == 200
+    payload = response.json()
+
+    assert payload["lines"] == 9
+    assert payload["valid"] == 8
+    assert payload["invalid"] == 1
+    assert payload["errors"][0]["line"] == 6
+    assert payload["inserted"] == 6
+    assert payload["duplicates"] == 2
+    assert payload["chunks_committed"] == 4
+    assert _sales_count() == 6
+
+
+def test_stream_ingest_accepts_gzip_and_tracks_job(client: TestClient) -> None:
+    body = gzip.compress(_sale_lines(5))
+    response = client.post(
+        "/ingest/stream/sales?chunk_size=2&job_id=backfill-1",
+        content=body,
+        headers={"Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 5
+    assert _sales_count() == 5
+
+    job = client.get("/ingest/stream/jobs/backfill-1").json()
+    assert job["done"] is True
+    assert job["chunks_committed"] == 3
+    assert job["inserted"] == 5
+
+
+def test_stream_ingest_rejects_unknown_kind(client: TestClient) -> None:
+    response = client.post("/ingest/stream/trades", content=b"{}")
+    assert response.status_code == 404
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def test_gzip_lines_are_inflated_in_bounded_steps() -> None:
+    lines = [b"x" * 1500, b"y" * 10, b"z" * 2000]
+    body = gzip.compress(b"\n".join(lines) + b"\n")
+    decoded = [line async for line in iter_ndjson_lines(_chunks(body), max_line_bytes=2048)]
+    assert decoded == lines
+
+    # A tiny body that inflates to one huge line is rejected at the limit.
+    bomb = gzip.compress(b"a" * 5_000_000)
+    with pytest.raises(NdjsonLineTooLongError):
+        async for _ in iter_ndjson_lines(_chunks(bomb), max_line_bytes=4096):
+            pass
+
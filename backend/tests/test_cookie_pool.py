@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Iterator
+
+import pytest
+
+from app.config import settings
+from app.services import market_monitor
+from app.services.cookie_pool import CookiePool, parse_pool_entries
+from app.services.cookie_provider import CookieProvider
+from app.services.market_monitor import MarketMonitorService
+from scripts.xianyu_standin import StandinConfig, XianyuStandinServer
+
+
+def _cookie(label: str, ttl_sec: float) -> str:
+    return f"cna={label}; _m_h5_tk={label}tok_{int((time.time() + ttl_sec) * 1000)}; _m_h5_tk_enc=x"
+
+
+class _FakeProvider(CookieProvider):
+    def __init__(self, primary: str = "") -> None:
+        super().__init__()
+        self.primary = primary
+        self.issued: dict[str, str] = {}
+        self.gate = threading.Event()
+        self.gate.set()
+        self.calls: list[str] = []
+
+    def peek_cookie(self) -> str:
+        return self.primary
+
+    def get_cookie(self, force_refresh: bool = False) -> str | None:
+        return self.fetch_provider_cookie(account="primary")
+
+    def fetch_provider_cookie(self, account: str = "") -> str:
+        self.calls.append(account)
+        self.gate.wait(5)
+        return self.issued.get(account, "")
+
+
+@pytest.fixture()
+def pool_settings() -> Iterator[Any]:
+    names = (
+        "xianyu_cookie_pool",
+        "xianyu_cookie_pool_enabled",
+        "xianyu_cookie_pool_strategy",
+        "xianyu_cookie_pool_budget_per_min",
+        "xianyu_cookie_pool_refresh_ahead_sec",
+        "xianyu_cookie_pool_cooldown_sec",
+    )
+    old = {name: getattr(settings, name) for name in names}
+
+    def _apply(**values: Any) -> None:
+        for name, value in values.items():
+            object.__setattr__(settings, name, value)
+
+    _apply(xianyu_cookie_pool_refresh_ahead_sec=300, xianyu_cookie_pool_cooldown_sec=60.0)
+    try:
+        yield _apply
+    finally:
+        _apply(**old)
+
+
+def test_lease_spreads_load_and_respects_budgets_and_cooldowns(pool_settings: Any) -> None:
+    assert parse_pool_entries(("a::x=1; y=2", "z=3", "a::dup", "primary::p")) == [("a", "x=1; y=2"), ("account2", "z=3")]
+    pool_settings(
+        xianyu_cookie_pool=(f"a::{_cookie('a', 3600)}", f"b::{_cookie('b', 3600)}"),
+        xianyu_cookie_pool_budget_per_min=2,
+        xianyu_cookie_pool_strategy="least_loaded",
+    )
+    pool = CookiePool(_FakeProvider(primary=_cookie("p", 3600)))
+
+    held = [pool.lease() for _ in range(3)]
+    assert sorted(lease.identity for lease in held) == ["a", "b", "primary"]
+    for lease in held:
+        lease.release()
+
+    # Two requests exhaust "a"'s budget; a 429 puts "b" on cooldown.
+    with pool.lease(exclude={"primary", "b"}) as lease_a:
+        lease_a.record(True)
+        lease_a.record(True)
+    with pool.lease(exclude={"primary", "a"}) as lease_b:
+        lease_b.record(False, 429)
+    picks = {pool.lease().identity for _ in range(3)}
+    assert picks == {"primary"}
+    rows = {row["name"]: row for row in pool.status()["identities"]}
+    assert rows["a"]["requests_last_minute"] == 2 and not rows["a"]["usable"]
+    assert rows["b"]["cooldown_sec"] > 50 and rows["b"]["health"] < 1.0
+
+    # With nothing usable the lease is immediate and degraded rather than blocking.
+    pool_settings(xianyu_cookie_pool_budget_per_min=1)
+    pool.lease(exclude={"a", "b"}).record(True)
+    fallback = pool.lease()
+    assert fallback.degraded and fallback.cookie
+
+
+def test_refresh_runs_ahead_of_expiry_without_blocking_leases(pool_settings: Any) -> None:
+    pool_settings(xianyu_cookie_pool=(f"a::{_cookie('a', 60)}", f"b::{_cookie('b', 3600)}"))
+    provider = _FakeProvider()
+    provider.issued = {"a": _cookie("a2", 3600), "primary": _cookie("p2", 3600)}
+    provider.gate.clear()
+    pool = CookiePool(provider)
+
+    started = time.monotonic()
+    lease = pool.lease()
+    assert time.monotonic() - started < 0.5
+    # "a" is inside the refresh window, "primary" has no cookie: both refresh in the background.
+    assert lease.cookie.startswith("cna=") and sorted(provider.calls) == ["a", "primary"]
+    assert {row["name"] for row in pool.status()["identities"] if row["refreshing"]} == {"a", "primary"}
+    lease.release()
+
+    provider.gate.set()
+    deadline = time.monotonic() + 2
+    while any(row["refreshing"] for row in pool.status()["identities"]) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rows = {row["name"]: row for row in pool.status()["identities"]}
+    assert rows["a"]["refreshes"] == 1 and rows["a"]["ttl_sec"] > 3000
+    assert rows["primary"]["has_cookie"] and rows["primary"]["usable"]
+
+    # A token error retires the cookie at once; rotate never hands it out again.
+    with pool.lease(exclude={"primary", "b"}) as bad:
+        bad.record(False, 401, token_expired=True)
+        replacement = pool.rotate(bad)
+    assert replacement.identity != "a" and not replacement.degraded
+
+
+def test_monitor_rotates_accounts_on_token_errors(pool_settings: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    with XianyuStandinServer(StandinConfig(page_size=5, token_ttl_sec=3600)) as standin:
+        expired = "cna=old; _m_h5_tk=deadbeef_9999999999999; _m_h5_tk_enc=x"
+        pool_settings(
+            xianyu_cookie_pool_enabled=True,
+            xianyu_cookie_pool=(f"a::{expired}", f"b::{standin.issue_cookie()}"),
+            xianyu_cookie_pool_strategy="round_robin",
+        )
+        pool = CookiePool(_FakeProvider())
+        monkeypatch.setattr(market_monitor, "cookie_pool", pool)
+        monitor = MarketMonitorService()
+        monitor._xianyu.mtop_url = standin.mtop_url
+        monitor._xianyu.search_url = standin.search_url
+        monkeypatch.setattr(monitor._cookie_provider, "get_cookie", lambda force_refresh=False: pytest.fail("blocking refresh"))
+
+        overrides = {
+            "monitor_provider": "xianyu",
+            "monitor_adaptive_enabled": False,
+            "monitor_incremental_enabled": False,
+            "monitor_pages": 2,
+        }
+        old = {name: getattr(settings, name) for name in overrides}
+        for name, value in overrides.items():
+            object.__setattr__(settings, name, value)
+        monkeypatch.setattr(monitor, "_resolved_monitor_keywords", lambda: ["游戏王"])
+        monkeypatch.setattr(monitor, "_get_proxies", lambda target_url=None: None)
+        try:
+            items = monitor._fetch_market_data()
+        finally:
+            for name, value in old.items():
+                object.__setattr__(settings, name, value)
+
+        assert len(items) == 10
+        rows = {row["name"]: row for row in pool.status()["identities"]}
+        assert rows["a"]["failures_total"] == 1 and not rows["a"]["usable"]
+        assert rows["b"]["requests_total"] == 2 and rows["b"]["in_flight"] == 0
+
+
+def test_monitor_rechecks_the_lease_budget_per_page(pool_settings: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    pool_settings(
+        xianyu_cookie_pool_enabled=True,
+        xianyu_cookie_pool=(f"a::{_cookie('a', 3600)}", f"b::{_cookie('b', 3600)}"),
+        xianyu_cookie_pool_strategy="round_robin",
+        xianyu_cookie_pool_budget_per_min=2,
+    )
+    pool = CookiePool(_FakeProvider())
+    monkeypatch.setattr(market_monitor, "cookie_pool", pool)
+    monitor = MarketMonitorService()
+    used: list[str] = []
+
+    def fake_fetch(page, proxies, cookie_override, keyword):
+        used.append(cookie_override.split(";")[0])
+        return [{"id": f"{keyword}-{page}", "price": 10.0, "title": "card"}]
+
+    monkeypatch.setattr(monitor._xianyu, "fetch", fake_fetch)
+    monkeypatch.setattr(monitor, "_resolved_monitor_keywords", lambda: ["alpha"])
+    monkeypatch.setattr(monitor, "_get_proxies", lambda target_url=None: None)
+    overrides = {
+        "monitor_provider": "xianyu",
+        "monitor_adaptive_enabled": False,
+        "monitor_incremental_enabled": False,
+        "monitor_pages": 4,
+    }
+    old = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        object.__setattr__(settings, name, value)
+    try:
+        assert len(monitor._fetch_market_data()) == 4
+    finally:
+        for name, value in old.items():
+            object.__setattr__(settings, name, value)
+
+    # One lease covered the crawl before; now each account stops at its 2/min budget.
+    assert used == ["cna=a", "cna=a", "cna=b", "cna=b"]
+    rows = {row["name"]: row for row in pool.status()["identities"]}
+    assert rows["a"]["in_flight"] == 0 and rows["b"]["in_flight"] == 0
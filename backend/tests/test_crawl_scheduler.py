@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.database import init_db
+from app.services.crawl_scheduler import KeywordCrawlScheduler
+from app.services.market_monitor import MarketMonitorService
+
+
+@pytest.fixture
+def scheduler_settings(tmp_path: Path):
+    overrides = {
+        "sqlite_path": str(tmp_path / "crawl_scheduler.db"),
+        "monitor_adaptive_enabled": True,
+        "monitor_request_budget": 4,
+        "monitor_max_requests_per_min": 60,
+        "monitor_adaptive_max_pages": 3,
+        "monitor_adaptive_min_interval_sec": 10.0,
+        "monitor_adaptive_max_interval_sec": 600.0,
+        "monitor_adaptive_exploration": 0.0,
+        "monitor_adaptive_ewma_alpha": 1.0,
+        "monitor_adaptive_fresh_yield": 1.0,
+        "monitor_keywords": ("alpha", "beta"),
+        "monitor_provider": "xianyu",
+        "monitor_auto_scan_after_ingest": False,
+        "monitor_pages": 1,
+        "monitor_incremental_enabled": True,
+        "monitor_incremental_stop_seen_ratio": 0.8,
+    }
+    previous = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        object.__setattr__(settings, name, value)
+    init_db()
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            object.__setattr__(settings, name, value)
+
+
+def test_unvisited_keywords_are_explored_first(scheduler_settings) -> None:
+    scheduler = KeywordCrawlScheduler()
+    plan = scheduler.plan(["a", "b", "c"], now=0.0)
+    assert sorted(keyword for keyword, _ in plan) == ["a", "b", "c"]
+    assert all(pages == 1 for _, pages in plan)
+
+
+def test_fresh_keyword_gets_extra_pages_and_stale_one_backs_off(scheduler_settings) -> None:
+    scheduler = KeywordCrawlScheduler()
+    scheduler.plan(["fresh", "stale"], now=0.0)
+    scheduler.record("fresh", requests=1, fetched=20, inserted=12, now=0.0)
+    scheduler.record("stale", requests=1, fetched=20, inserted=0, now=0.0)
+
+    plan = dict(scheduler.plan(["fresh", "stale"], now=15.0))
+    assert plan == {"fresh": 3}
+
+    # stale keyword: streak 1 -> 20s backoff, so it becomes due again at t=20
+    plan = dict(scheduler.plan(["fresh", "stale"], now=21.0))
+    assert "stale" in plan
+
+
+def test_rate_ceiling_caps_requests(scheduler_settings) -> None:
+    object.__setattr__(settings, "monitor_max_requests_per_min", 2)
+    scheduler = KeywordCrawlScheduler()
+    plan = scheduler.plan(["a", "b", "c"], now=0.0)
+    assert sum(pages for _, pages in plan) == 2
+    assert scheduler.plan(["c"], now=1.0) == []
+    assert scheduler.next_delay_sec(["c"], now=1.0) >= 1.0
+
+
+def test_monitor_records_per_keyword_yield(scheduler_settings, monkeypatch) -> None:
+    service = MarketMonitorService()
+    monkeypatch.setattr(service, "_get_proxies", lambda target_url=None: None)
+    monkeypatch.setattr(service._cookie_provider, "get_cookie", lambda force_refresh=False: "")
+
+    def fake_fetch(page, proxies, cookie_override, keyword):
+        return [{"id": f"{keyword}-{page}", "price": 10.0, "title": f"{keyword} card"}]
+
+    monkeypatch.setattr(service._xianyu, "fetch", fake_fetch)
+    monkeypatch.setattr(
+        "app.services.market_monitor.insert_listings",
+        lambda rows: len(rows) if rows[0].raw.get("keyword") == "alpha" else 0,
+    )
+
+    result = service.run_once()
+    assert result["fetched"] == 2
+    assert result["inserted"] == 1
+    stats = {item["keyword"]: item for item in service.status()["crawl_scheduler"]["keywords"]}
+    assert stats["alpha"]["inserted"] == 1
+    assert stats["beta"]["stale_streak"] == 1
+
+
+def test_monitor_stops_paginating_when_page_is_already_seen(scheduler_settings, monkeypatch) -> None:
+    object.__setattr__(settings, "monitor_adaptive_enabled", False)
+    object.__setattr__(settings, "monitor_pages", 5)
+    object.__setattr__(settings, "monitor_keywords", ("alpha",))
+    service = MarketMonitorService()
+    monkeypatch.setattr(service, "_get_proxies", lambda target_url=None: None)
+    monkeypatch.setattr(service._cookie_provider, "get_cookie", lambda force_refresh=False: "")
+    calls: list[int] = []
+
+    def fake_fetch(page, proxies, cookie_override, keyword):
+        calls.append(page)
+        return [
+            {"id": f"{keyword}-{page}-{index}", "price": 10.0, "title": f"card {page}-{index}"}
+            for index in range(5)
+        ]
+
+    monkeypatch.setattr(service._xianyu, "fetch", fake_fetch)
+    first = service.run_once()
+    assert first["requests"] == 5
+    assert first["saved_requests"] == 0
+
+    calls.clear()
+    second = service.run_once()
+    assert calls == [1]
+    assert second["requests"] == 1
+    assert second["saved_requests"] == 4
+    assert service.status()["incremental_crawl"]["saved_requests"] == 4
+
+
+def test_adaptive_skip_reason_only_applies_in_adaptive_mode(scheduler_settings, monkeypatch) -> None:
+    object.__setattr__(settings, "monitor_adaptive_enabled", False)
+    service = MarketMonitorService()
+    monkeypatch.setattr(service, "_fetch_market_data", lambda crawl=None: [])
+
+    result = service.run_once()
+    assert "skipped" not in result
+    assert result["fetched"] == 0
+
+    object.__setattr__(settings, "monitor_adaptive_enabled", True)
+    assert service.run_once()["reason"] == "no keyword due under adaptive schedule"
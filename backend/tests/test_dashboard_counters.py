@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, ValuationOut
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "dashboard_counters.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _seed_opportunity(index: int, list_price: float) -> int:
+    listing_row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id=f"counter-{index}",
+            seller_id=f"seller-{index}",
+            title=f"pytest card #{index}",
+            list_price=list_price,
+            listed_at=datetime(2026, 3, 6, tzinfo=timezone.utc),
+            status="open",
+        )
+    )
+    assert listing_row_id is not None
+    valuation_id = repo.save_valuation(
+        ValuationOut(
+            listing_row_id=listing_row_id,
+            expected_sale_price=list_price * 1.5,
+            buy_limit=list_price * 1.2,
+            suggested_list_price=list_price * 1.6,
+            ci_low=list_price,
+            ci_high=list_price * 2,
+            model_confidence=0.9,
+            comparables_count=12,
+            reasoning="pytest seed",
+        )
+    )
+    return repo.upsert_opportunity(
+        listing_row_id=listing_row_id,
+        valuation_id=valuation_id,
+        expected_profit=list_price * 0.3,
+        roi=0.3,
+        score=80.0,
+        status="pending_review",
+        note="pytest_seed",
+    )
+
+
+def test_counters_track_write_paths(isolated_sqlite: Path) -> None:
+    opp_ids = [_seed_opportunity(i, 100.0 + i) for i in range(1, 5)]
+    counters = repo.get_dashboard_counters()
+    assert counters["pending_review_count"] == 4
+    assert counters["open_listing_count"] == 4
+    assert counters["open_listing_price_sum"] == pytest.approx(410.0)
+
+    first = repo.approve_opportunity_idempotent(
+        opportunity_id=opp_ids[0], approved_buy_price=101.0, approved_by="pytest", note=""
+    )
+    second = repo.approve_opportunity_idempotent(
+        opportunity_id=opp_ids[1], approved_buy_price=102.0, approved_by="pytest", note=""
+    )
+    repo.update_opportunity_status(opp_ids[2], "rejected", "pytest")
+    repo.update_trade_listed(int(second["trade_id"]), "https://example.invalid/x", "")
+    repo.update_trade_sold(int(first["trade_id"]), 150.5, "")
+
+    counters = repo.get_dashboard_counters()
+    assert counters["pending_review_count"] == 1
+    assert counters["active_trades_count"] == 1
+    assert counters["sold_count"] == 1
+    assert counters["gross_profit"] == pytest.approx(49.5)
+
+    metrics = repo.get_dashboard_metrics()
+    assert metrics == {
+        "pending_review_count": 1,
+        "active_trades_count": 1,
+        "sold_count": 1,
+        "gross_profit": 49.5,
+    }
+    assert repo.check_dashboard_counters()["ok"] is True
+
+
+def test_check_reports_and_repairs_drift(isolated_sqlite: Path) -> None:
+    _seed_opportunity(1, 120.0)
+    with get_conn() as conn:
+        conn.execute("UPDATE dashboard_counters SET pending_review_count = 99 WHERE id = 1")
+
+    report = repo.check_dashboard_counters()
+    assert report["ok"] is False
+    assert report["drift"]["pending_review_count"] == {"stored": 99.0, "actual": 1.0}
+    assert report["repaired"] is False
+
+    repaired = repo.check_dashboard_counters(repair=True)
+    assert repaired["repaired"] is True
+    assert repo.check_dashboard_counters()["ok"] is True
+    assert repo.get_dashboard_counters()["pending_review_count"] == 1
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, ValuationOut
+from app.services.audit_writer import audit_writer
+from app.services.execution_health import execution_health
+from app.services.market_monitor import MarketMonitorService
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    old_window = settings.operating_state_execution_window
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "execution_health.db"))
+    object.__setattr__(settings, "operating_state_execution_window", 4)
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+        object.__setattr__(settings, "operating_state_execution_window", old_window)
+
+
+def _seed_trade() -> int:
+    listing_row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id="health-1",
+            title="pytest card",
+            list_price=100,
+            listed_at=datetime(2026, 3, 6, tzinfo=timezone.utc),
+            status="open",
+        )
+    )
+    assert listing_row_id is not None
+    valuation_id = repo.save_valuation(
+        ValuationOut(
+            listing_row_id=listing_row_id,
+            expected_sale_price=160,
+            buy_limit=120,
+            suggested_list_price=170,
+            ci_low=140,
+            ci_high=180,
+            model_confidence=0.9,
+            comparables_count=12,
+            reasoning="pytest seed",
+        )
+    )
+    opportunity_id = repo.upsert_opportunity(
+        listing_row_id=listing_row_id,
+        valuation_id=valuation_id,
+        expected_profit=40.0,
+        roi=0.4,
+        score=85.0,
+        status="pending_review",
+        note="pytest_seed",
+    )
+    approved = repo.approve_opportunity_idempotent(
+        opportunity_id=opportunity_id, approved_buy_price=100.0, approved_by="pytest", note=""
+    )
+    return int(approved["trade_id"])
+
+
+def _log(trade_id: int, *, success: bool, response: dict | None = None, error: str = "") -> int:
+    return repo.create_execution_log(
+        trade_id=trade_id,
+        action="buy",
+        provider="webhook",
+        dry_run=False,
+        response_payload=response or {},
+        success=success,
+        error=error,
+    )
+
+
+def test_rolling_window_matches_table_summary(isolated_sqlite: Path) -> None:
+    trade_id = _seed_trade()
+    _log(trade_id, success=False, response={"business_ban_code": "RISK_BLOCK"})
+    assert execution_health.execution_snapshot()["business_ban_count"] == 1
+
+    _log(trade_id, success=True)
+    _log(trade_id, success=False, error="Business ban: account limited")
+    _log(trade_id, success=True)
+    _log(trade_id, success=True)
+
+    snapshot = execution_health.execution_snapshot()
+    # The first (banned) log has rolled out of the 4-row window.
+    assert snapshot["sample_size"] == 4
+    assert snapshot["failure_count"] == 1
+    assert snapshot["business_ban_count"] == 1
+    assert snapshot == repo.get_execution_log_summary(limit=4)
+
+
+def test_out_of_order_logs_are_windowed_by_id(isolated_sqlite: Path) -> None:
+    assert execution_health.execution_snapshot()["sample_size"] == 0
+    record = execution_health.record_execution
+    record(12, success=True, business_ban=False, created_at="t12")
+    record(14, success=True, business_ban=False, created_at="t14")
+    # Concurrent writers can report a lower id after a higher one has landed.
+    record(11, success=False, business_ban=True, created_at="t11")
+    record(13, success=False, business_ban=False, created_at="t13")
+    record(13, success=False, business_ban=False, created_at="t13")
+    snapshot = execution_health.execution_snapshot()
+    assert (snapshot["sample_size"], snapshot["failure_count"], snapshot["business_ban_count"]) == (4, 2, 1)
+    assert snapshot["last_failure_at"] == "t13"
+
+    # A late id older than the whole window rolls straight back out.
+    record(10, success=False, business_ban=True, created_at="t10")
+    record(15, success=True, business_ban=False, created_at="t15")
+    snapshot = execution_health.execution_snapshot()
+    assert (snapshot["sample_size"], snapshot["failure_count"], snapshot["business_ban_count"]) == (4, 1, 0)
+    assert snapshot["last_failure_at"] == "t13"
+
+
+def test_init_db_backfills_business_ban_column(isolated_sqlite: Path) -> None:
+    trade_id = _seed_trade()
+    _log(trade_id, success=False, response={"business_ban_code": "http_403"})
+    _log(trade_id, success=False, error="timeout")
+    audit_writer.flush()
+    with get_conn() as conn:
+        conn.execute("ALTER TABLE execution_logs DROP COLUMN business_ban")
+
+    init_db()
+    with get_conn() as conn:
+        flags = [
+            int(row["business_ban"])
+            for row in conn.execute("SELECT business_ban FROM execution_logs ORDER BY id")
+        ]
+    assert flags == [1, 0]
+
+
+def test_monitor_pushes_health_events(isolated_sqlite: Path) -> None:
+    monitor = MarketMonitorService()
+    monitor._record_health(success=True)
+    monitor._record_health(success=False, reason="pytest")
+
+    health = execution_health.monitor_snapshot()
+    assert health["samples"] == 2
+    assert health["success_rate"] == pytest.approx(0.5)
+    assert health["circuit_open"] is False
+
+    monitor._reset_circuit()
+    assert execution_health.monitor_snapshot()["samples"] == 0
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.services import gemini_client
+from app.services.gemini_client import GeminiClient
+from app.services.gemini_quota import GeminiQuotaScheduler
+
+
+@pytest.fixture()
+def quota_settings(tmp_path: Path) -> Iterator[str]:
+    names = ("gemini_rpm", "gemini_tpm", "gemini_rpd", "gemini_quota_enabled", "gemini_api_key")
+    old = {name: getattr(settings, name) for name in names}
+    values: dict[str, Any] = {
+        "gemini_rpm": 2,
+        "gemini_tpm": 1000,
+        "gemini_rpd": 5,
+        "gemini_quota_enabled": True,
+        "gemini_api_key": "key-alpha-0001,key-bravo-0002",
+    }
+    for name, value in values.items():
+        object.__setattr__(settings, name, value)
+    try:
+        yield str(tmp_path / "quota.db")
+    finally:
+        for name, value in old.items():
+            object.__setattr__(settings, name, value)
+
+
+def test_budgets_and_quarantine_are_shared_through_the_file(quota_settings: str) -> None:
+    # Two schedulers on one file stand in for two processes.
+    first, second = GeminiQuotaScheduler(quota_settings), GeminiQuotaScheduler(quota_settings)
+    keys = ["key-alpha-0001", "key-bravo-0002"]
+    now = 1_800_000_000.0
+
+    picks = [
+        (first if index % 2 else second).reserve(keys, tokens=100, now=now)
+        for index in range(4)
+    ]
+    assert [slot.wait_sec for slot in picks] == [0.0] * 4
+    assert sorted(slot.key for slot in picks) == sorted(keys * 2)
+
+    # Both keys are out of RPM: the next callers queue at 30s and 60s instead of all retrying now.
+    queued = [first.reserve(keys, tokens=100, now=now), second.reserve(keys, tokens=100, now=now)]
+    assert [round(slot.wait_sec) for slot in queued] == [30, 30]
+    assert round(first.reserve(keys, tokens=100, now=now).wait_sec) == 60
+    assert second.reserve(keys, tokens=100, max_wait_sec=10, now=now) is None
+
+    # A 429 seen by one process quarantines the key for the other.
+    later = now + 600
+    assert first.mark_rate_limited("key-alpha-0001", base=4.0, cap=60.0, now=later) == 4.0
+    assert second.mark_rate_limited("key-alpha-0001", base=4.0, cap=60.0, now=later) == 8.0
+    assert second.reserve(keys, tokens=100, now=later).key == "key-bravo-0002"
+
+    # TPM: a 900-token call fits once a minute; settling the real usage refunds the rest.
+    slot = first.reserve(["key-bravo-0002"], tokens=900, now=later + 60)
+    assert slot is not None and slot.wait_sec == 0.0
+    first.settle("key-bravo-0002", reserved_tokens=900, used_tokens=100, now=later + 60)
+    row = second.status(["key-bravo-0002"], now=later + 60)["keys"][0]
+    assert row["key"] == "key-...0002" and row["strikes"] == 0
+    assert 850 <= row["tpm_available"] <= 1000
+
+    # The daily budget (RPD=5) is counted across both schedulers.
+    assert row["day_count"] == 5
+    assert round(first.reserve(["key-bravo-0002"], now=later + 120).wait_sec) > 3600
+
+
+async def test_clients_share_quota_state(quota_settings: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(gemini_client, "gemini_quota", GeminiQuotaScheduler(quota_settings))
+    producer, consumer = GeminiClient(), GeminiClient()
+    assert producer._quota is consumer._quota is not None
+
+    producer._mark_rate_limited("key-alpha-0001")
+    # A fresh client (e.g. a new FeatureExtractor) no longer treats the key as fresh.
+    assert await consumer._reserve_key(0, tokens=50) == "key-bravo-0002"
+    assert consumer._quota.status()["keys"][0]["quarantined_sec"] > 0
+
+    old_wait = settings.gemini_quota_max_wait_sec
+    object.__setattr__(settings, "gemini_quota_max_wait_sec", 0.0)
+    try:
+        producer._mark_rate_limited("key-bravo-0002")
+        with patch("asyncio.sleep", new_callable=AsyncMock) as sleep:
+            started = time.monotonic()
+            assert await consumer._reserve_key(0, tokens=50) == ""
+        assert sleep.await_count == 0 and time.monotonic() - started < 1.0
+    finally:
+        object.__setattr__(settings, "gemini_quota_max_wait_sec", old_wait)
+
+
+def test_clear_only_writes_when_the_key_was_struck(quota_settings: str) -> None:
+    scheduler = GeminiQuotaScheduler(quota_settings)
+    scheduler.clear("key-alpha-0001")
+    # A clean key is only read, so no row (and no write lock) appears.
+    assert scheduler.status()["keys"] == []
+
+    scheduler.mark_rate_limited("key-alpha-0001", base=4.0, cap=60.0)
+    scheduler.clear("key-alpha-0001")
+    [row] = scheduler.status()["keys"]
+    assert row["strikes"] == 0 and row["quarantined_sec"] == 0
+
+
+async def test_quota_writes_run_off_the_event_loop(quota_settings: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    scheduler = GeminiQuotaScheduler(quota_settings)
+    monkeypatch.setattr(gemini_client, "gemini_quota", scheduler)
+    loop_thread = threading.get_ident()
+    calls: list[tuple[str, bool]] = []
+    for name in ("mark_rate_limited", "clear", "settle"):
+        original = getattr(scheduler, name)
+
+        def _recorded(*args: Any, _name: str = name, _original: Any = original, **kwargs: Any) -> Any:
+            calls.append((_name, threading.get_ident() == loop_thread))
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(scheduler, name, _recorded)
+
+    body = {
+        "candidates": [{"content": {"parts": [{"text": '{"card_name": "Charizard"}'}]}}],
+        "usageMetadata": {"totalTokenCount": 42},
+    }
+
+    async def fake_post(url: str, **_: Any) -> httpx.Response:
+        status = 429 if "key-alpha" in url else 200
+        return httpx.Response(status, json=body, request=httpx.Request("POST", url))
+
+    mock_http = AsyncMock()
+    mock_http.__aenter__ = AsyncMock(return_value=mock_http)
+    mock_http.__aexit__ = AsyncMock(return_value=False)
+    mock_http.post = fake_post
+    with (
+        patch("app.services.gemini_client.httpx.AsyncClient", return_value=mock_http),
+        patch("app.services.gemini_client.resolve_proxy_for_url", return_value={}),
+        patch("app.services.gemini_client.proxy_url_from_mapping", return_value=None),
+    ):
+        result = await GeminiClient().extract_card_features("Charizard", "")
+
+    assert result == {"card_name": "Charizard"}
+    assert [name for name, _ in calls] == ["mark_rate_limited", "clear", "settle"]
+    assert not any(on_loop for _, on_loop in calls)
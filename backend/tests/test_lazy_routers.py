@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import importlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.database import init_db
+from app.lazy_routers import ROUTER_MODULES
+from app.main import create_app
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "lazy_routers.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def test_declared_segments_cover_every_route() -> None:
+    for name, segments in ROUTER_MODULES.items():
+        router = importlib.import_module(f"app.routers.{name}").router
+        for route in router.routes:
+            assert any(
+                route.path == segment or route.path.startswith(segment + "/") for segment in segments
+            ), f"{name}: {route.path}"
+
+
+def test_router_mounts_on_first_request_ahead_of_spa(
+    isolated_sqlite: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dist = tmp_path / "dist"
+    dist.mkdir()
+    (dist / "index.html").write_text("<html>spa</html>", encoding="utf-8")
+    monkeypatch.setenv("FRONTEND_DIST", str(dist))
+
+    app = create_app()
+    loader = app.state.router_loader
+    assert loader is not None
+    assert "trades" not in loader.loaded
+
+    client = TestClient(app)
+    assert client.get("/").text == "<html>spa</html>"
+    resp = client.get("/card-api/trades")
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 0
+    assert "trades" in loader.loaded
+    assert client.get("/trades").json()["count"] == 0
+    # Unknown paths still fall through to the SPA shell.
+    assert client.get("/some/client/route").text == "<html>spa</html>"
+
+    paths = client.get("/openapi.json").json()["paths"]
+    assert "/vnpy/status" in paths
+    assert loader.loaded == sorted(ROUTER_MODULES)
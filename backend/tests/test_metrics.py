@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import repositories as repo
+from app.config import settings
+from app.database import init_db
+from app.main import create_app
+from app.services.automation import automation_service
+from app.services.metrics import metrics
+import app.services.automation as automation_module
+
+
+@pytest.fixture
+def metrics_enabled(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    old_enabled = settings.metrics_enabled
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "metrics.db"))
+    object.__setattr__(settings, "metrics_enabled", True)
+    init_db()
+    metrics.reset()
+    try:
+        yield metrics
+    finally:
+        metrics.reset()
+        object.__setattr__(settings, "metrics_enabled", old_enabled)
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def test_metrics_disabled_records_nothing() -> None:
+    old_enabled = settings.metrics_enabled
+    object.__setattr__(settings, "metrics_enabled", False)
+    metrics.reset()
+    try:
+        metrics.inc("cardflip_test_total", 1, {"a": "b"})
+        metrics.observe("cardflip_test_seconds", 0.2)
+        assert metrics.render_prometheus() == ""
+    finally:
+        object.__setattr__(settings, "metrics_enabled", old_enabled)
+
+
+def test_histogram_renders_cumulative_buckets(metrics_enabled) -> None:
+    metrics_enabled.observe("cardflip_test_seconds", 0.003, {"stage": "scan"})
+    metrics_enabled.observe("cardflip_test_seconds", 0.3, {"stage": "scan"})
+    text = metrics_enabled.render_prometheus()
+
+    assert "# TYPE cardflip_test_seconds histogram" in text
+    assert 'cardflip_test_seconds_bucket{stage="scan",le="0.005"} 1' in text
+    assert 'cardflip_test_seconds_bucket{stage="scan",le="0.5"} 2' in text
+    assert 'cardflip_test_seconds_bucket{stage="scan",le="+Inf"} 2' in text
+    assert 'cardflip_test_seconds_count{stage="scan"} 2' in text
+
+
+def test_repository_calls_are_counted(metrics_enabled) -> None:
+    repo.list_opportunities(limit=5)
+    repo.list_opportunities(limit=5)
+    text = metrics_enabled.render_prometheus()
+
+    assert 'cardflip_db_queries_total{function="list_opportunities"} 2' in text
+    assert 'cardflip_db_query_duration_seconds_count{function="list_opportunities"} 2' in text
+
+
+def test_automation_stage_metrics_exposed_on_endpoint(metrics_enabled, monkeypatch) -> None:
+    async def fake_scan_open_listings(limit: int = 200):
+        return {"processed": 7}
+
+    monkeypatch.setattr(automation_module, "scan_open_listings", fake_scan_open_listings)
+    automation_service.run_once(
+        include_monitor=False,
+        include_scan=True,
+        include_autotrade=False,
+        include_execution_retry=False,
+        force=True,
+    )
+
+    client = TestClient(create_app())
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'cardflip_automation_stage_duration_seconds_count{stage="scan"} 1' in body
+    assert 'cardflip_automation_stage_rows_total{stage="scan"} 7' in body
+    assert 'cardflip_automation_stage_runs_total{outcome="success",stage="scan"} 1' in body
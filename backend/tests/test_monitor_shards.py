@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.services import market_monitor as market_monitor_module
+from app.services.market_monitor import MarketMonitorService
+from app.services.monitor_shard_worker import ShardMonitor
+from app.services.monitor_shards import MonitorShardSupervisor
+from app.services.monitor_shards import ShardSpec
+from app.services.monitor_shards import build_shard_specs
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "monitor_shards.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _crashing_shard(spec_data, status_queue, stop_event) -> None:
+    status_queue.put({"shard_id": spec_data["shard_id"], "circuit_open": False, "health_success_rate": 0.5})
+    sys.exit(1)
+
+
+def test_build_shard_specs_round_robins_keywords_and_identities() -> None:
+    specs = build_shard_specs(
+        ["a", "b", "c", "d", "e"],
+        2,
+        cookies=("cookie-1", "cookie-2"),
+        proxies=("http://p1:1",),
+        sqlite_path="x.db",
+    )
+    assert [spec.keywords for spec in specs] == [("a", "c", "e"), ("b", "d")]
+    assert [spec.cookie for spec in specs] == ["cookie-1", "cookie-2"]
+    assert [spec.proxy_url for spec in specs] == ["http://p1:1", "http://p1:1"]
+    assert len(build_shard_specs(["a"], 4)) == 1
+
+
+def test_supervisor_drains_staged_items_through_saver(isolated_sqlite) -> None:
+    saved: list[dict] = []
+
+    def saver(items):
+        saved.extend(items)
+        return len(items)
+
+    repo.stage_monitor_items(0, [{"id": "1", "price": 9.9, "title": "x", "keyword": "k1"}])
+    repo.stage_monitor_items(1, [{"id": "2", "price": 8.8, "title": "y", "keyword": "k2"}])
+    supervisor = MonitorShardSupervisor(saver)
+
+    assert supervisor._drain_staging() == 2
+    assert [item["keyword"] for item in saved] == ["k1", "k2"]
+    assert repo.list_staged_monitor_items() == []
+    assert supervisor.status()["inserted"] == 2
+
+
+def test_drain_advances_past_items_the_saver_rejects(isolated_sqlite) -> None:
+    saved: list[str] = []
+
+    def saver(items):
+        if any(item["id"] == "bad" for item in items):
+            raise ValueError("listing validation failed")
+        saved.extend(item["id"] for item in items)
+        return len(items)
+
+    repo.stage_monitor_items(0, [{"id": key, "title": key} for key in ("1", "bad", "2")])
+    supervisor = MonitorShardSupervisor(saver)
+
+    assert supervisor._drain_staging() == 2
+    assert saved == ["1", "2"]
+    [stuck] = repo.list_staged_monitor_items()
+    assert stuck["attempts"] == 1 and "validation" in stuck["last_error"]
+
+    # Later items keep flowing while the bad one is retried, then parked.
+    repo.stage_monitor_items(0, [{"id": "3", "title": "3"}])
+    for _ in range(settings.monitor_shard_drain_max_attempts):
+        supervisor._drain_staging()
+    assert saved == ["1", "2", "3"]
+    assert repo.list_staged_monitor_items(max_attempts=settings.monitor_shard_drain_max_attempts) == []
+    status = supervisor.status()
+    assert status["parked"] == 1 and status["inserted"] == 3
+
+
+def test_drain_that_inserts_runs_the_post_ingest_scan(isolated_sqlite, monkeypatch) -> None:
+    scans: list[int] = []
+
+    async def fake_scan(*, limit: int = 0):
+        scans.append(limit)
+        return {"processed": 1}
+
+    monkeypatch.setattr(market_monitor_module, "scan_open_listings", fake_scan)
+    old_values = (settings.monitor_auto_scan_after_ingest, settings.monitor_auto_scan_limit)
+    object.__setattr__(settings, "monitor_auto_scan_after_ingest", True)
+    object.__setattr__(settings, "monitor_auto_scan_limit", 7)
+    try:
+        monitor = MarketMonitorService()
+        supervisor = MonitorShardSupervisor(lambda items: len(items), on_inserted=monitor._scan_after_shard_drain)
+        assert supervisor._drain_and_notify() == 0
+        assert scans == []
+
+        repo.stage_monitor_items(0, [{"id": "1", "title": "x"}])
+        assert supervisor._drain_and_notify() == 1
+        assert scans == [7]
+        assert monitor.status()["last_scan"] == {"processed": 1}
+    finally:
+        object.__setattr__(settings, "monitor_auto_scan_after_ingest", old_values[0])
+        object.__setattr__(settings, "monitor_auto_scan_limit", old_values[1])
+
+
+def test_sharded_start_respects_the_circuit_cooldown(isolated_sqlite, monkeypatch) -> None:
+    old_values = (settings.monitor_shard_count, settings.monitor_provider)
+    object.__setattr__(settings, "monitor_shard_count", 2)
+    object.__setattr__(settings, "monitor_provider", "xianyu")
+    try:
+        monitor = MarketMonitorService()
+        monkeypatch.setattr(monitor, "_start_sharded", lambda: pytest.fail("sharded start during cooldown"))
+        monitor._circuit_open = True
+        monitor._circuit_open_at = datetime.now(timezone.utc).isoformat()
+        result = monitor.start()
+        assert result["started"] is False and result["reason"].startswith("circuit cooldown")
+    finally:
+        object.__setattr__(settings, "monitor_shard_count", old_values[0])
+        object.__setattr__(settings, "monitor_provider", old_values[1])
+
+
+def test_shard_monitor_stages_results_and_publishes_status(isolated_sqlite, monkeypatch) -> None:
+    status_queue: queue.Queue = queue.Queue()
+    spec = ShardSpec(shard_id=3, keywords=("alpha",), cookie="c=1", proxy_url="http://127.0.0.1:9")
+    monitor = ShardMonitor(spec, status_queue)
+    assert monitor._get_proxies() == {"http": "http://127.0.0.1:9", "https": "http://127.0.0.1:9"}
+
+    def fake_fetch(page, proxies, cookie_override, keyword):
+        assert cookie_override == "c=1"
+        return [{"id": f"{keyword}-{page}", "price": 10.0, "title": "card"}]
+
+    monkeypatch.setattr(monitor._xianyu, "fetch", fake_fetch)
+    result = monitor.run_once()
+
+    assert result["inserted"] == 1
+    staged = repo.list_staged_monitor_items()
+    assert [int(row["shard_id"]) for row in staged] == [3]
+    with get_conn() as conn:
+        assert conn.execute("SELECT COUNT(*) AS c FROM listings_raw").fetchone()["c"] == 0
+    message = status_queue.get_nowait()
+    assert message["shard_id"] == 3
+    assert message["runs"] == 1
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="fork start method required")
+def test_supervisor_restarts_crashed_shards(isolated_sqlite, monkeypatch) -> None:
+    object.__setattr__(settings, "monitor_shard_start_method", "fork")
+    supervisor = MonitorShardSupervisor(lambda items: 0, target=_crashing_shard, poll_interval_sec=0.05)
+    monkeypatch.setattr(supervisor, "_restart_delay", lambda exitcode, restarts: 0.0)
+    try:
+        started = supervisor.start([ShardSpec(shard_id=0, keywords=("a",))])
+        assert started == {"started": True, "shards": 1}
+        deadline = time.monotonic() + 10
+        status = supervisor.status()
+        while time.monotonic() < deadline:
+            status = supervisor.status()
+            shard = status["shards"][0]
+            if shard["restarts"] >= 2 and shard["last_status"]:
+                break
+            time.sleep(0.05)
+        shard = status["shards"][0]
+        assert shard["restarts"] >= 2
+        assert shard["last_exitcode"] == 1
+        assert status["min_health_success_rate"] == 0.5
+    finally:
+        supervisor.stop(timeout_sec=2)
+        object.__setattr__(settings, "monitor_shard_start_method", "spawn")
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, ValuationOut
+from app.services.near_duplicate import rebuild_near_duplicate_index
+
+LISTED_AT = datetime(2026, 3, 6, tzinfo=timezone.utc)
+BASE_TITLE = "Blue-Eyes White Dragon LOB-001 1st edition ultra rare near mint"
+BASE_DESCRIPTION = "Pulled from a sealed pack, stored in a sleeve and top loader since day one."
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    old_ingest_dedupe = settings.near_duplicate_ingest_dedupe
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "near_duplicate.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+        object.__setattr__(settings, "near_duplicate_ingest_dedupe", old_ingest_dedupe)
+
+
+def _listing(
+    title: str,
+    *,
+    description: str = BASE_DESCRIPTION,
+    listing_id: str | None = None,
+    listed_at: datetime = LISTED_AT,
+) -> ListingIn:
+    return ListingIn(
+        source="pytest",
+        listing_id=listing_id,
+        seller_id="seller-1",
+        title=title,
+        description=description,
+        list_price=120.0,
+        listed_at=listed_at,
+        status="open",
+    )
+
+
+def _reject(listing_row_id: int) -> None:
+    valuation_id = repo.save_valuation(
+        ValuationOut(
+            listing_row_id=listing_row_id,
+            expected_sale_price=150,
+            buy_limit=110,
+            suggested_list_price=160,
+            ci_low=140,
+            ci_high=165,
+            model_confidence=0.9,
+            comparables_count=10,
+            reasoning="pytest seed",
+        )
+    )
+    repo.upsert_opportunity(
+        listing_row_id=listing_row_id,
+        valuation_id=valuation_id,
+        expected_profit=20.0,
+        roi=0.2,
+        score=70.0,
+        status="rejected",
+    )
+
+
+def test_relisted_variants_are_found_and_block_the_scan(isolated_sqlite: Path) -> None:
+    original_id, _ = repo.upsert_listing(_listing(BASE_TITLE, listing_id="orig"))
+    tweaked_id, _ = repo.upsert_listing(
+        _listing("Blue-Eyes White Dragon LOB-001 1st edition ultra rare near mint!", listing_id="tweak")
+    )
+    reordered_id, _ = repo.upsert_listing(
+        _listing("1st edition Blue-Eyes White Dragon LOB-001 ultra rare near mint", listing_id="reorder")
+    )
+    unrelated_id, _ = repo.upsert_listing(
+        _listing("Dark Magician SDY-006 unlimited common played", description="Binder copy.", listing_id="other")
+    )
+
+    similar = {item["listing_row_id"]: item["similarity"] for item in repo.find_near_duplicate_listings(original_id)}
+    assert tweaked_id in similar and reordered_id in similar
+    assert unrelated_id not in similar
+    assert similar[tweaked_id] >= settings.near_duplicate_threshold
+
+    _reject(original_id)
+    check = dict(
+        source="pytest",
+        seller_id="seller-1",
+        title="Blue-Eyes White Dragon LOB-001 1st edition ultra rare near mint!",
+        exclude_listing_row_id=tweaked_id,
+        description=BASE_DESCRIPTION,
+    )
+    # The exact normalized-title check alone misses the tweaked relist.
+    assert not repo.has_reject_history_for_listing_signature(**check)
+    assert repo.has_reject_history_for_listing_signature(**check, near_duplicate_threshold=0.8)
+    assert repo.has_frozen_opportunity_for_listing_fingerprint(
+        **check, list_price=120.0, near_duplicate_threshold=0.8
+    )
+    assert not repo.has_reject_history_for_listing_signature(
+        source="pytest",
+        seller_id="seller-1",
+        title="Dark Magician SDY-006 unlimited common played",
+        exclude_listing_row_id=unrelated_id,
+        description="Binder copy.",
+        near_duplicate_threshold=0.8,
+    )
+
+    with get_conn() as conn:
+        before = conn.execute("SELECT COUNT(*) FROM listing_lsh_bands").fetchone()[0]
+        assert rebuild_near_duplicate_index(conn) == 4
+        assert conn.execute("SELECT COUNT(*) FROM listing_lsh_bands").fetchone()[0] == before
+
+
+def test_ingest_dedupe_folds_near_duplicates_when_enabled(isolated_sqlite: Path) -> None:
+    # Ingest dedupe shares the exact fingerprint's recent-listing window.
+    now = datetime.now(timezone.utc)
+    first_id, created = repo.upsert_listing(_listing(BASE_TITLE, listed_at=now))
+    assert created
+    second_id, created = repo.upsert_listing(_listing(BASE_TITLE + "!", listed_at=now))
+    assert created and second_id != first_id
+
+    object.__setattr__(settings, "near_duplicate_ingest_dedupe", True)
+    folded_id, created = repo.upsert_listing(_listing(BASE_TITLE + " !!", listed_at=now))
+    assert not created
+    assert folded_id == second_id
+    inserted = repo.insert_listings(
+        [
+            _listing(BASE_TITLE + "?", listed_at=now),
+            _listing("Totally different card", description="x", listed_at=now),
+        ]
+    )
+    assert inserted == 1
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import repositories as repo
+from app.config import settings
+from app.database import init_db
+from app.main import create_app
+from app.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.schemas import ListingIn, ValuationOut
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "pagination.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _seed_opportunity(index: int, score: float) -> int:
+    listing_row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id=f"page-{index}",
+            seller_id=f"seller-{index}",
+            title=f"pytest card #{index}",
+            list_price=100 + index,
+            listed_at=datetime(2026, 3, 6, tzinfo=timezone.utc),
+            status="open",
+        )
+    )
+    assert listing_row_id is not None
+    valuation_id = repo.save_valuation(
+        ValuationOut(
+            listing_row_id=listing_row_id,
+            expected_sale_price=168,
+            buy_limit=120,
+            suggested_list_price=176,
+            ci_low=150,
+            ci_high=182,
+            model_confidence=0.9,
+            comparables_count=12,
+            reasoning="pytest seed",
+        )
+    )
+    return repo.upsert_opportunity(
+        listing_row_id=listing_row_id,
+        valuation_id=valuation_id,
+        expected_profit=30.0,
+        roi=0.3,
+        score=score,
+        status="pending_review",
+        note="pytest_seed",
+    )
+
+
+def test_cursor_round_trip_and_rejects_garbage() -> None:
+    token = encode_cursor([88.5, 42])
+    assert decode_cursor(token, 2) == (88.5, 42)
+    assert decode_cursor("", 2) is None
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 2)
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 1)
+    assert decode_cursor(encode_cursor([88, 42]), 2, (float,)) == (88.0, 42)
+    for bad in (["abc", 5], [{"a": 1}, 5], [True, 5], [None, 5]):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(encode_cursor(bad), 2, (float,))
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor([7, 5]), 2, (str,))
+
+
+def test_opportunity_pages_are_stable_across_score_ties(isolated_sqlite: Path) -> None:
+    # Half the rows share a score so the id tie-breaker decides their order.
+    expected = [_seed_opportunity(i, 90.0 if i % 2 else 70.0 + i) for i in range(1, 8)]
+    client = TestClient(create_app())
+
+    seen: list[int] = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3, "include_total": "true"}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get("/opportunities", params=params)
+        assert resp.status_code == 200
+        payload = resp.json()
+        assert payload["total"] == len(expected)
+        seen.extend(item["opportunity_id"] for item in payload["items"])
+        pages += 1
+        cursor = payload["next_cursor"]
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(expected)
+    assert len(seen) == len(set(seen))
+    assert client.get("/opportunities", params={"cursor": "garbage"}).status_code == 400
+    for bad in (["abc", 5], [{"a": 1}, 5]):
+        assert client.get("/opportunities", params={"cursor": encode_cursor(bad)}).status_code == 400
+    assert client.get("/trades", params={"cursor": encode_cursor([3, 5])}).status_code == 400
+
+    # Totals come from the trigger-maintained status counters.
+    repo.update_opportunity_status(expected[0], "rejected", "pytest")
+    assert repo.count_opportunities() == len(expected)
+    assert repo.count_opportunities(status="pending_review") == len(expected) - 1
+    assert client.get("/opportunities", params={"status": "rejected", "include_total": "true"}).json()["total"] == 1
+    assert repo.count_trades() == 0
+    assert repo.check_dashboard_counters()["ok"] is True
+
+
+def test_execution_log_cursor_walks_by_id(isolated_sqlite: Path) -> None:
+    opportunity_id = _seed_opportunity(1, 88.0)
+    approved = repo.approve_opportunity_idempotent(
+        opportunity_id=opportunity_id,
+        approved_buy_price=100.0,
+        approved_by="pytest",
+        note="",
+    )
+    trade_id = int(approved["trade_id"])
+    log_ids = [
+        repo.create_execution_log(
+            trade_id=trade_id,
+            action="buy",
+            provider="mock",
+            dry_run=True,
+            success=True,
+            request_payload={"n": n},
+            response_payload={},
+        )
+        for n in range(5)
+    ]
+    client = TestClient(create_app())
+
+    first = client.get("/execution/logs", params={"limit": 2}).json()
+    assert [item["id"] for item in first["items"]] == log_ids[::-1][:2]
+    second = client.get(
+        "/execution/logs", params={"limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    assert [item["id"] for item in second["items"]] == log_ids[::-1][2:4]
+    last = client.get(
+        "/execution/logs", params={"limit": 2, "cursor": second["next_cursor"]}
+    ).json()
+    assert [item["id"] for item in last["items"]] == log_ids[:1]
+    assert last["next_cursor"] is None
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.main import create_app
+from app.schemas import ListingIn, SaleIn
+from app.services.price_rollups import get_rollup_series, rebuild_price_rollups
+
+T0 = datetime(2026, 3, 10, 9, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "price_rollups.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _sale(index: int, title: str, price: float, at: datetime) -> SaleIn:
+    return SaleIn(source="pytest", item_id=f"rollup-{index}", title=title, sold_price=price, sold_at=at)
+
+
+def _snapshot() -> list[tuple]:
+    with get_conn() as conn:
+        rows = conn.execute(
+            """
+            SELECT granularity, card_key, bucket_start, open_price, high_price, low_price, close_price,
+                   sale_count, ROUND(price_sum, 4), median_price, listing_count
+            FROM price_rollups
+            ORDER BY granularity, card_key, bucket_start
+            """
+        ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def test_incremental_buckets_match_rebuild(isolated_sqlite: Path) -> None:
+    # Out-of-order arrival across two batches must still give the right open/close.
+    repo.insert_sales(
+        [
+            _sale(1, "Blue-Eyes White Dragon", 120.0, T0 + timedelta(minutes=20)),
+            _sale(2, "Blue-Eyes White Dragon", 100.0, T0),
+        ]
+    )
+    repo.insert_sales(
+        [
+            _sale(3, "Blue-Eyes White Dragon", 90.0, T0 + timedelta(minutes=5)),
+            _sale(4, "Blue-Eyes White Dragon", 130.0, T0 + timedelta(days=1)),
+            _sale(1, "Blue-Eyes White Dragon", 999.0, T0),  # duplicate item_id is ignored
+            _sale(5, "Dark Magician", 40.0, T0 + timedelta(minutes=1)),
+        ]
+    )
+    repo.upsert_listing(
+        ListingIn(source="pytest", listing_id="l-1", title="Blue-Eyes White Dragon", list_price=95.0, listed_at=T0)
+    )
+
+    day = get_rollup_series("blue-eyes white dragon", granularity="day", buckets=10)
+    assert [item["bucket"] for item in day] == ["2026-03-10", "2026-03-11"]
+    first = day[0]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (100.0, 120.0, 90.0, 120.0)
+    assert first["volume"] == 3
+    assert first["median"] == 100.0
+    assert first["listing_count"] == 1
+    assert get_rollup_series("*", granularity="hour", buckets=10)[0]["volume"] == 4
+
+    incremental = _snapshot()
+    with get_conn() as conn:
+        rebuild_price_rollups(conn)
+    assert _snapshot() == incremental
+
+
+def test_rollup_endpoints(isolated_sqlite: Path) -> None:
+    repo.insert_sales(
+        [_sale(day, "Dark Magician", 100.0 + 10 * day, T0 + timedelta(days=day)) for day in range(6)]
+    )
+    client = TestClient(create_app())
+
+    cards = client.get("/analysis/rollups/cards", params={"days": 3650}).json()
+    assert cards["items"][0]["card_key"] == "dark magician"
+    assert cards["items"][0]["volume"] == 6
+
+    trend = client.get("/analysis/rollups/trend", params={"card": "Dark  Magician"}).json()
+    assert trend["card_key"] == "dark magician"
+    assert trend["buckets"] == 6
+    assert trend["trend"]["direction"] == "up"
+    assert trend["trend"]["change_pct"] == 50.0
+
+    momentum = client.get("/analysis/rollups/momentum", params={"card": "dark magician"}).json()
+    assert momentum["momentum"]["long_term_pct"] == 50.0
+    assert momentum["momentum"]["short_term_pct"] > 0
+
+    volatility = client.get("/analysis/rollups/volatility").json()
+    assert volatility["card_key"] == "*"
+    assert volatility["volatility"]["return_stddev"] > 0
+    assert volatility["volatility"]["buckets"] == 6
+
+    assert client.get("/analysis/rollups/series", params={"granularity": "week"}).status_code == 422
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from app.config import settings
+from app.services.market_sentiment import MarketSentimentService
+from app.services.ragflow_client import AsyncRagflowClient, RagflowClient, RagflowUploadError, first_json_object
+
+VERDICT = '```json\n{"label": "bullish", "confidence": 0.8, "adjustment_ratio": 0.05, "reason": "新卡包 {热度} 上涨"}\n```'
+
+
+class _StubRagflow(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.upload_batches: list[list[str]] = []
+        self.parse_batches: list[list[str]] = []
+        self.updated: list[str] = []
+        self.connections: set[int] = set()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _StubRagflow
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _json(self, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, payload: Any) -> None:
+        data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+        chunk = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(f"{len(chunk):x}\r\n".encode("ascii") + chunk + b"\r\n")
+        self.wfile.flush()
+
+    def do_PUT(self) -> None:
+        self._body()
+        self.server.updated.append(self.path.rsplit("/", 1)[-1])
+        self._json({"code": 0, "data": {}})
+
+    def do_POST(self) -> None:
+        self.server.connections.add(self.client_address[1])
+        body = self._body()
+        if self.path.endswith("/documents"):
+            names = [part.split(b'"', 1)[0].decode("utf-8") for part in body.split(b'filename="')[1:]]
+            with self.server.lock:
+                self.server.active += 1
+                self.server.max_active = max(self.server.max_active, self.server.active)
+                self.server.upload_batches.append(names)
+            time.sleep(0.05)
+            with self.server.lock:
+                self.server.active -= 1
+            if any(name.startswith("bad") for name in names):
+                self._json({"code": 102, "message": "unsupported file"})
+                return
+            docs = [{"id": f"doc-{name}", "name": name} for name in names]
+            self._json({"code": 0, "data": docs})
+        elif self.path.endswith("/chunks"):
+            self.server.parse_batches.append(json.loads(body)["document_ids"])
+            self._json({"code": 0})
+        elif "/chat/completions" in self.path:
+            request = json.loads(body)
+            if not request["stream"]:
+                self._json({"choices": [{"message": {"content": VERDICT}}]})
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            cut = VERDICT.index("0.05")
+            pieces = [VERDICT[:20], VERDICT[20:cut], VERDICT[cut:]]
+            if "slow" in self.path:
+                pieces = pieces[:2]
+            for piece in pieces:
+                self._event({"choices": [{"delta": {"content": piece}}]})
+                time.sleep(0.05)
+            # A slow tail (references, [DONE]) that early stopping must not wait for.
+            time.sleep(1.5)
+            self._event({"choices": [{"delta": {"content": "", "reference": {"chunks": []}}, "finish_reason": "stop"}]})
+            self._event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture()
+def stub() -> Iterator[_StubRagflow]:
+    server = _StubRagflow()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    old = {name: getattr(settings, name) for name in ("ragflow_enabled", "ragflow_upload_batch_files", "ragflow_parse_batch_size")}
+    object.__setattr__(settings, "ragflow_enabled", True)
+    object.__setattr__(settings, "ragflow_upload_batch_files", 2)
+    object.__setattr__(settings, "ragflow_parse_batch_size", 3)
+    try:
+        yield server
+    finally:
+        for name, value in old.items():
+            object.__setattr__(settings, name, value)
+        server.shutdown()
+        server.server_close()
+
+
+def _point(client: Any, server: _StubRagflow) -> Any:
+    client.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    client.api_key = "test-key"
+    return client
+
+
+async def test_async_ingest_batches_uploads_and_parse_requests(stub: _StubRagflow, tmp_path: Path) -> None:
+    paths = []
+    for index in range(7):
+        path = tmp_path / (f"shot{index}.png" if index < 2 else f"note{index}.txt")
+        path.write_bytes(b"x" * 1024)
+        paths.append(str(path))
+
+    client = _point(AsyncRagflowClient(), stub)
+    try:
+        result = await client.ingest_documents(dataset_id="ds1", file_paths=paths)
+        # A second call reuses the pooled client and its keep-alive connections.
+        assert await client.parse_documents(dataset_id="ds1", document_ids=["a", "b"]) == 1
+    finally:
+        await client.aclose()
+
+    assert [len(batch) for batch in stub.upload_batches] == [2, 2, 2, 1]
+    assert sorted(name for batch in stub.upload_batches for name in batch) == sorted(Path(p).name for p in paths)
+    assert 1 < stub.max_active <= settings.ragflow_upload_concurrency
+    assert (result["uploaded"], result["parsed"], result["image_docs_reconfigured"]) == (7, 7, 2)
+    assert [item["name"] for item in result["items"]] == [Path(p).name for p in paths]
+    assert sorted(stub.updated) == ["doc-shot0.png", "doc-shot1.png"]
+    assert [len(batch) for batch in stub.parse_batches] == [3, 3, 1, 2]
+    assert len(stub.connections) <= settings.ragflow_upload_concurrency
+
+    with pytest.raises(RuntimeError, match="file not found"):
+        await client.upload_documents(dataset_id="ds1", file_paths=[str(tmp_path / "missing.png")])
+
+
+async def test_failed_upload_batch_keeps_the_documents_that_did_upload(stub: _StubRagflow, tmp_path: Path) -> None:
+    names = ["good0.txt", "good1.txt", "bad2.txt", "good3.txt", "good4.png"]
+    paths = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"x" * 64)
+        paths.append(str(path))
+
+    client = _point(AsyncRagflowClient(), stub)
+    try:
+        with pytest.raises(RagflowUploadError, match="2/3 requests succeeded") as caught:
+            await client.upload_documents(dataset_id="ds1", file_paths=paths)
+        assert [doc["name"] for doc in caught.value.documents] == ["good0.txt", "good1.txt", "good4.png"]
+        assert caught.value.errors == [{"files": ["bad2.txt", "good3.txt"], "error": "RAGFlow upload failed: unsupported file"}]
+
+        stub.parse_batches.clear()
+        result = await client.ingest_documents(dataset_id="ds1", file_paths=paths)
+        with pytest.raises(RagflowUploadError, match="0/1 requests succeeded"):
+            await client.ingest_documents(dataset_id="ds1", file_paths=paths[2:3])
+    finally:
+        await client.aclose()
+
+    assert (result["uploaded"], result["parsed"], result["failed"]) == (3, 3, 2)
+    assert result["errors"][0]["files"] == ["bad2.txt", "good3.txt"]
+    assert sorted(doc_id for batch in stub.parse_batches for doc_id in batch) == [
+        "doc-good0.txt",
+        "doc-good1.txt",
+        "doc-good4.png",
+    ]
+
+    sync_client = _point(RagflowClient(), stub)
+    with pytest.raises(RagflowUploadError) as caught:
+        sync_client.upload_documents(dataset_id="ds1", file_paths=paths)
+    assert [doc["name"] for doc in caught.value.documents] == ["good0.txt", "good1.txt", "good4.png"]
+
+
+async def test_streamed_chat_stops_on_closed_json_or_deadline(stub: _StubRagflow) -> None:
+    client = _point(AsyncRagflowClient(), stub)
+    try:
+        started = time.monotonic()
+        early = await client.create_chat_completion(question="q", chat_id="c1", stream=True, stop_on_json=True)
+        assert time.monotonic() - started < 1.0
+        assert (early["stopped"], early["complete"]) == ("json", True)
+        assert first_json_object(early["answer"])["adjustment_ratio"] == 0.05
+
+        full = await client.create_chat_completion(question="q", chat_id="c1", stream=True)
+        assert full["stopped"] == "done" and full["reference"] == {"chunks": []}
+
+        partial = await client.create_chat_completion(question="q", chat_id="slow", stream=True, deadline_sec=0.5)
+        assert (partial["stopped"], partial["complete"]) == ("deadline", False)
+    finally:
+        await client.aclose()
+
+    sync_client = _point(RagflowClient(), stub)
+    started = time.monotonic()
+    sync_early = sync_client.create_chat_completion(question="q", chat_id="c1", stream=True, stop_on_json=True)
+    assert time.monotonic() - started < 1.0 and sync_early["answer"] == early["answer"]
+    assert sync_client.create_chat_completion(question="q", chat_id="c1")["answer"] == VERDICT
+    sync_client.close()
+
+    # The deadline-truncated verdict still yields its label, but not the cut-off number.
+    parsed = MarketSentimentService()._parse_answer(partial["answer"])
+    assert (parsed["label"], parsed["confidence"], parsed["adjustment_ratio"]) == ("bullish", 0.8, 0.02)
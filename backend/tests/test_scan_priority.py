@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import ListingIn, SaleIn
+from app.services import opportunity_scan
+from app.services import valuation_dirty
+from app.services.scan_priority import prescore
+from app.services.text_matcher import rule_based_features
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "scan_priority.db"))
+    init_db()
+
+    async def fake_extract(title: str, description: str):
+        return rule_based_features(title, description), "rule_based"
+
+    monkeypatch.setattr(opportunity_scan._extractor, "extract", fake_extract)
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _listing(key: str, title: str, price: float, *, seller: str | None = None, age_hours: float = 1.0) -> int:
+    row_id, created = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id=key,
+            seller_id=seller or f"seller-{key}",
+            title=title,
+            list_price=price,
+            listed_at=NOW - timedelta(hours=age_hours),
+        )
+    )
+    assert created and row_id is not None
+    return row_id
+
+
+def _queue_order(limit: int = 20) -> list[int]:
+    return [int(row["id"]) for row in repo.get_dirty_listings(limit=limit)]
+
+
+def test_prescore_ranks_discount_then_damps_dealers_and_age() -> None:
+    fresh = prescore(list_price=50, card_median=100, seller_open_count=1, age_hours=0)
+    assert fresh == 0.5
+    assert prescore(list_price=50, card_median=100, seller_open_count=11, age_hours=0) == 0.25
+    assert prescore(list_price=50, card_median=100, seller_open_count=1, age_hours=48) == 0.25
+    assert prescore(list_price=150, card_median=100, seller_open_count=1, age_hours=0) == -0.5
+    assert prescore(list_price=50, card_median=None, seller_open_count=1, age_hours=0) == 0.0
+
+
+async def test_dirty_scan_pulls_highest_expected_edge_first(isolated_sqlite: Path) -> None:
+    repo.insert_sales(
+        [
+            SaleIn(source="pytest", item_id=f"s-{index}", title="Dark Magician", sold_price=100.0, sold_at=NOW)
+            for index in range(3)
+        ]
+    )
+    # Drain the seed entries so only the listings below are queued.
+    await opportunity_scan.scan_open_listings(limit=50)
+
+    overpriced = _listing("over", "Dark Magician", 150.0)
+    unknown = _listing("unknown", "Mystery Box", 10.0)
+    dealer = [_listing(f"dealer-{index}", "Dark Magician", 60.0, seller="dealer") for index in range(3)]
+    cheap = _listing("cheap", "Dark Magician", 40.0)
+    stale_cheap = _listing("stale", "Dark Magician", 40.0, age_hours=24 * 7)
+
+    order = _queue_order()
+    assert order[0] == cheap
+    assert order.index(cheap) < min(order.index(row_id) for row_id in dealer) < order.index(unknown)
+    assert order.index(stale_cheap) < order.index(unknown) < order.index(overpriced)
+
+    # Starvation protection: anything queued past the limit jumps ahead, oldest first.
+    with get_conn() as conn:
+        conn.execute(
+            "UPDATE valuation_dirty_queue SET marked_at = datetime('now', '-13 hours') WHERE listing_row_id = ?",
+            (overpriced,),
+        )
+    assert _queue_order()[0] == overpriced
+
+    result = await opportunity_scan.scan_open_listings(limit=2)
+    assert result["processed"] == 2
+    remaining = _queue_order()
+    assert overpriced not in remaining and cheap not in remaining
+    assert remaining[0] in dealer
+
+
+def test_remark_resets_priority_for_rescoring(isolated_sqlite: Path) -> None:
+    listing = _listing("remark", "Blue-Eyes White Dragon", 40.0)
+    assert repo.get_dirty_listings(limit=5)[0]["scan_priority"] == 0.0
+
+    repo.insert_sales(
+        [SaleIn(source="pytest", item_id="bewd", title="Blue-Eyes White Dragon", sold_price=80.0, sold_at=NOW)]
+    )
+    with get_conn() as conn:
+        valuation_dirty.mark_listings(conn, [listing], "comparable_sale")
+    row = repo.get_dirty_listings(limit=5)[0]
+    assert int(row["id"]) == listing and row["scan_priority"] > 0.4
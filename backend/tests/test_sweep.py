@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import StrategyThresholds, settings
+from app.database import init_db
+from app.schemas import FeatureData, ListingIn, SaleIn
+from app.vnpy_system.backtest import load_replay_dataset
+from app.vnpy_system.sweep import (
+    SWEEP_PARAMETERS,
+    SweepParameterError,
+    grid_configurations,
+    random_configurations,
+    resolve_parameters,
+    run_sweep,
+)
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+BASE = StrategyThresholds(
+    min_score=30.0,
+    min_roi=0.1,
+    max_risk_score=60.0,
+    allow_blocked_review=False,
+    auto_reject_unqualified=False,
+)
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "sweep.db"))
+    init_db()
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _seed() -> None:
+    sales = [
+        SaleIn(
+            source="pytest",
+            item_id=f"Charizard-{day}",
+            title="Charizard holo card",
+            sold_price=200.0 + day,
+            sold_at=T0 + timedelta(days=day),
+        )
+        for day in range(1, 11)
+    ]
+    sales.append(
+        SaleIn(
+            source="pytest",
+            item_id="Charizard-late",
+            title="Charizard holo card",
+            sold_price=260.0,
+            sold_at=T0 + timedelta(days=13),
+        )
+    )
+    repo.insert_sales(sales)
+    row_id, _ = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id="listing-Charizard",
+            seller_id="seller-Charizard",
+            title="Charizard holo card",
+            list_price=100.0,
+            listed_at=T0 + timedelta(days=11),
+            status="open",
+        )
+    )
+    assert row_id is not None
+    repo.save_features(
+        "listing",
+        row_id,
+        FeatureData(card_name="Charizard", rarity="unknown", edition="unknown", card_condition="unknown", confidence=0.95),
+        "pytest",
+    )
+
+
+def test_grid_sweep_ranks_and_reuses_cache(isolated_sqlite: Path) -> None:
+    _seed()
+    dataset = load_replay_dataset()
+    configurations = grid_configurations(
+        {"min_score": [30.0, 99.0], "pricing_mode": ["balanced", "profit_max"]}
+    )
+    assert len(configurations) == 4
+
+    first = run_sweep(dataset, configurations, base_thresholds=BASE, max_workers=2)
+    assert first.configurations == 4
+    assert first.evaluated == 4
+    assert first.cached == 0
+    assert [item["rank"] for item in first.results] == [1, 2, 3, 4]
+    best = first.results[0]
+    assert best["params"]["min_score"] == 30.0
+    assert best["trades"] == 1
+    assert best["total_pnl"] > 0
+    # An unreachable score threshold trades nothing and ranks last.
+    assert all(item["trades"] == 0 for item in first.results[2:])
+
+    widened = configurations + [{"min_score": 30.0, "risk_min_comparables": 50}]
+    second = run_sweep(dataset, widened, base_thresholds=BASE, max_workers=1)
+    assert second.cached == 4
+    assert second.evaluated == 1
+    # The worker's risk override must not leak into this process.
+    assert settings.risk_min_comparables != 50
+
+
+def test_random_sampling_is_seeded_and_validated() -> None:
+    space = {"min_roi": {"low": 0.05, "high": 0.3}, "risk_min_comparables": (2, 8), "pricing_mode": ["fast_exit"]}
+    first = random_configurations(space, samples=5, seed=7)
+    assert first == random_configurations(space, samples=5, seed=7)
+    assert all(0.05 <= item["min_roi"] <= 0.3 for item in first)
+    assert all(isinstance(item["risk_min_comparables"], int) for item in first)
+
+    with pytest.raises(SweepParameterError):
+        grid_configurations({"not_a_knob": [1]})
+    # 20^9 configurations are rejected from the list lengths alone.
+    oversized = {name: list(range(20)) for name in SWEEP_PARAMETERS}
+    with pytest.raises(SweepParameterError, match="at most 5000"):
+        grid_configurations(oversized)
+    with pytest.raises(SweepParameterError):
+        resolve_parameters({"min_score": "x"}, BASE)
+    with pytest.raises(SweepParameterError):
+        resolve_parameters({"risk_min_comparables": {"a": 1}}, BASE)
+    with pytest.raises(SweepParameterError):
+        random_configurations({"min_roi": {"low": "x", "high": 1}}, samples=1)
+    assert resolve_parameters({"min_score": "45", "allow_blocked_review": "false"}, BASE)["min_score"] == 45.0
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from app.config import settings
+from app.services import text_matcher
+from app.services.price_rollups import rollup_card_key
+from app.services.text_matcher import (
+    KeywordMatcher,
+    guess_card_name,
+    risk_keyword_matcher,
+    rule_based_features,
+)
+
+
+def test_rule_based_extraction_keeps_dictionary_priority() -> None:
+    # Priority follows the token tuples, not position in the text.
+    feature = rule_based_features("Dark Magician R [JP] played", "graded UR, near mint")
+    assert feature.rarity == "UR"
+    assert feature.card_condition == "mint"
+    assert feature.card_name == "Dark Magician"
+    assert rule_based_features("SR-ish ssr (box)", "").rarity == "SSR"
+    assert rule_based_features("RARE card", "").rarity == "unknown"
+    assert guess_card_name("(PSA) [JP] UR nm") == "unknown"
+
+    overlapping = KeywordMatcher(("mint", "nm"))
+    assert overlapping.first("nmint") == "mint"
+    assert not KeywordMatcher(()).contains_any("anything")
+
+
+@pytest.fixture
+def restore_matcher_settings():
+    old_keywords = settings.risk_suspicious_keywords
+    old_dictionary = settings.card_name_dictionary_path
+    try:
+        yield
+    finally:
+        object.__setattr__(settings, "risk_suspicious_keywords", old_keywords)
+        object.__setattr__(settings, "card_name_dictionary_path", old_dictionary)
+
+
+def test_risk_keywords_and_card_dictionary_hot_reload(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, restore_matcher_settings: None
+) -> None:
+    object.__setattr__(settings, "risk_suspicious_keywords", "wechat, prepay")
+    assert risk_keyword_matcher().contains_any("Add me on WeChat")
+    object.__setattr__(settings, "risk_suspicious_keywords", "offline deal")
+    assert not risk_keyword_matcher().contains_any("Add me on WeChat")
+    assert risk_keyword_matcher().contains_any("offline deal only")
+
+    path = tmp_path / "cards.json"
+    path.write_text(json.dumps({"Blue-Eyes White Dragon": ["青眼白龙", "BEWD"]}), encoding="utf-8")
+    monkeypatch.setattr(text_matcher, "DICTIONARY_CHECK_INTERVAL_SEC", 0.0)
+    object.__setattr__(settings, "card_name_dictionary_path", str(path))
+    assert guess_card_name("游戏王 青眼白龙 SR 日版") == "Blue-Eyes White Dragon"
+    assert guess_card_name("BEWD LOB-001 nm") == "Blue-Eyes White Dragon"
+    assert guess_card_name("BEWDX promo") == "BEWDX promo"
+    assert rollup_card_key("bewd lob") == "blue-eyes white dragon"
+
+    path.write_text(json.dumps({"Dark Magician": "黑魔导"}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert guess_card_name("黑魔导 UR") == "Dark Magician"
+    assert guess_card_name("BEWD LOB-001") == "BEWD LOB-001"
+    assert rollup_card_key("bewd lob") == "bewd lob"
+
+    object.__setattr__(settings, "card_name_dictionary_path", str(tmp_path / "missing.json"))
+    assert guess_card_name("黑魔导 UR") == "黑魔导"
+    assert text_matcher.matcher_status()["card_name_dictionary"]["error"] == "file not found"
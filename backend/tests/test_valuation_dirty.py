@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from app import repositories as repo
+from app.config import settings
+from app.database import get_conn
+from app.database import init_db
+from app.schemas import FeatureData, ListingIn, SaleIn
+from app.services import opportunity_scan
+from app.services import valuation_dirty
+from app.services.text_matcher import rule_based_features
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def isolated_sqlite(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    old_sqlite_path = settings.sqlite_path
+    object.__setattr__(settings, "sqlite_path", str(tmp_path / "valuation_dirty.db"))
+    init_db()
+
+    async def fake_extract(title: str, description: str):
+        return rule_based_features(title, description), "rule_based"
+
+    monkeypatch.setattr(opportunity_scan._extractor, "extract", fake_extract)
+    try:
+        yield Path(settings.sqlite_path)
+    finally:
+        object.__setattr__(settings, "sqlite_path", old_sqlite_path)
+
+
+def _listing(index: int, title: str) -> int:
+    row_id, created = repo.upsert_listing(
+        ListingIn(
+            source="pytest",
+            listing_id=f"dirty-{index}",
+            seller_id=f"seller-{index}",
+            title=title,
+            list_price=50.0,
+            listed_at=NOW,
+        )
+    )
+    assert created and row_id is not None
+    return row_id
+
+
+def _valuation_count(listing_row_id: int) -> int:
+    with get_conn() as conn:
+        return int(
+            conn.execute(
+                "SELECT COUNT(*) FROM valuation_records WHERE listing_row_id = ?", (listing_row_id,)
+            ).fetchone()[0]
+        )
+
+
+async def test_scan_revalues_only_listings_whose_comparables_changed(isolated_sqlite: Path) -> None:
+    magician = _listing(1, "Dark Magician")
+    dragon = _listing(2, "Blue-Eyes White Dragon")
+
+    first = await opportunity_scan.scan_open_listings(limit=50)
+    assert first["processed"] == 2 and first["dirty_pending"] == 0
+    assert (await opportunity_scan.scan_open_listings(limit=50))["processed"] == 0
+
+    repo.insert_sales(
+        [
+            SaleIn(source="pytest", item_id="s-1", title="Dark Magician LOB", sold_price=80.0, sold_at=NOW),
+            SaleIn(source="pytest", item_id="s-2", title="Kuriboh", sold_price=5.0, sold_at=NOW),
+        ]
+    )
+    assert [int(row["id"]) for row in repo.get_dirty_listings(limit=10)] == [magician]
+    result = await opportunity_scan.scan_open_listings(limit=50)
+    assert result["processed"] == 1
+    assert (_valuation_count(magician), _valuation_count(dragon)) == (2, 1)
+    assert repo.get_latest_valuation_for_listing(magician)["comparables_count"] == 1
+
+    # Extracted features for a sale re-queue listings on the same card name.
+    with get_conn() as conn:
+        kuriboh_id = conn.execute("SELECT id FROM sales_raw WHERE item_id = 's-2'").fetchone()[0]
+    repo.save_features("sale", kuriboh_id, FeatureData(card_name="Blue-Eyes White Dragon"), "rule_based")
+    assert [int(row["id"]) for row in repo.get_dirty_listings(limit=10)] == [dragon]
+
+    # Re-saving a listing's own features only queues it when its key changes.
+    await opportunity_scan.scan_open_listings(limit=50)
+    repo.save_features("listing", magician, FeatureData(card_name="Dark Magician"), "rule_based")
+    assert repo.count_valuation_dirty() == 0
+    repo.save_features("listing", magician, FeatureData(card_name="Dark Magician Girl"), "gemini")
+    assert [int(row["id"]) for row in repo.get_dirty_listings(limit=10)] == [magician]
+
+    # Full mode still walks every open listing and drains their queue entries.
+    full = await opportunity_scan.scan_open_listings(limit=50, mode="full")
+    assert full["processed"] == 2 and full["dirty_pending"] == 0
+
+
+async def test_marks_survive_a_concurrent_scan_and_closed_listings_drop_out(isolated_sqlite: Path) -> None:
+    magician = _listing(1, "Dark Magician")
+    closed = _listing(2, "Dark Magician")
+    await opportunity_scan.scan_open_listings(limit=50)
+
+    repo.insert_sales(
+        [SaleIn(source="pytest", item_id="s-1", title="Dark Magician", sold_price=80.0, sold_at=NOW)]
+    )
+    snapshot = repo.get_valuation_dirty_versions([magician, closed])
+    # Another sale lands after the scan read the queue: its mark must not be cleared.
+    repo.insert_sales(
+        [
+            SaleIn(
+                source="pytest",
+                item_id="s-2",
+                title="Dark Magician",
+                sold_price=82.0,
+                sold_at=NOW + timedelta(minutes=1),
+            )
+        ]
+    )
+    repo.clear_valuation_dirty(list(snapshot.items()))
+    assert repo.count_valuation_dirty() == 2
+
+    with get_conn() as conn:
+        conn.execute("UPDATE listings_raw SET status = 'sold' WHERE id = ?", (closed,))
+    assert [int(row["id"]) for row in repo.get_dirty_listings(limit=10)] == [magician]
+    assert repo.count_valuation_dirty() == 1
+
+
+async def test_failed_valuations_stay_queued_until_parked(
+    isolated_sqlite: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    old_values = (settings.scan_priority_enabled, settings.valuation_dirty_max_attempts)
+    object.__setattr__(settings, "scan_priority_enabled", False)
+    object.__setattr__(settings, "valuation_dirty_max_attempts", 2)
+    broken = _listing(1, "Dark Magician")
+    fine = _listing(2, "Blue-Eyes White Dragon")
+    healthy_extract = opportunity_scan._extractor.extract
+
+    async def flaky_extract(title: str, description: str):
+        if title == "Dark Magician":
+            raise RuntimeError("extractor timeout")
+        return await healthy_extract(title, description)
+
+    monkeypatch.setattr(opportunity_scan._extractor, "extract", flaky_extract)
+    try:
+        first = await opportunity_scan.scan_open_listings(limit=50)
+        assert first["failed"] == 1 and first["dirty_pending"] == 1 and first["dirty_parked"] == 0
+        assert _valuation_count(fine) == 1
+        with get_conn() as conn:
+            row = conn.execute(
+                "SELECT attempts, last_error FROM valuation_dirty_queue WHERE listing_row_id = ?", (broken,)
+            ).fetchone()
+        assert row["attempts"] == 1 and "extractor timeout" in row["last_error"]
+
+        second = await opportunity_scan.scan_open_listings(limit=50)
+        assert second["failed"] == 1 and second["dirty_parked"] == 1
+        assert repo.get_dirty_listings(limit=10) == []
+        assert (await opportunity_scan.scan_open_listings(limit=50))["processed"] == 0
+
+        # A re-mark gives the parked listing a fresh attempt budget.
+        monkeypatch.setattr(opportunity_scan._extractor, "extract", healthy_extract)
+        with get_conn() as conn:
+            valuation_dirty.mark_listings(conn, [broken], "comparable_sale")
+        assert [int(row["id"]) for row in repo.get_dirty_listings(limit=10)] == [broken]
+        third = await opportunity_scan.scan_open_listings(limit=50)
+        assert third["failed"] == 0 and third["dirty_pending"] == 0 and third["dirty_parked"] == 0
+        assert _valuation_count(broken) == 1
+    finally:
+        object.__setattr__(settings, "scan_priority_enabled", old_values[0])
+        object.__setattr__(settings, "valuation_dirty_max_attempts", old_values[1])
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services import xianyu_parse
+from app.services.xianyu_client import XianyuClient
+
+
+def _page(*scripts: str) -> bytes:
+    body = "".join(f"<script>{script}</script>" for script in scripts)
+    return f"<html><body><p>闲鱼 {{not json}};</p>{body}</body></html>".encode("utf-8")
+
+
+@pytest.mark.parametrize("decoder", ["orjson", "json"])
+def test_bootstrap_locator_matches_the_regex_rules(monkeypatch: pytest.MonkeyPatch, decoder: str) -> None:
+    if decoder == "json":
+        monkeypatch.setattr(xianyu_parse, "orjson", None)
+    items = {"result": {"data": {"items": [{"itemId": "1", "title": "青眼白龙 UR", "price": "12.5", "userId": "u1"}]}}}
+    encoded = json.dumps(items, ensure_ascii=False)
+
+    # __INIT_DATA__ wins over an earlier __initialState__; a marker without "= {" is skipped.
+    page = _page("var s = '__INIT_DATA__';", 'window.__initialState__ = {"pageInfo": {"items": []}};', f"__INIT_DATA__ =\n {encoded} ;")
+    assert xianyu_parse.decode_bootstrap(page) == items
+    # A "};" that is not followed by </script> stays inside the object.
+    nested = '{"a": {"b": "x};y"}, "c": 1}'
+    assert xianyu_parse.decode_bootstrap(_page(f"window.__initData__ = {nested};")) == {"a": {"b": "x};y"}, "c": 1}
+    # Trailing garbage after the object is cut at the first "};".
+    assert xianyu_parse.decode_bootstrap(_page('__initialState__ = {"k": 1}; // c {x};')) == {"k": 1}
+    assert xianyu_parse.decode_bootstrap(_page("__INIT_DATA__ = {broken};")) is None
+
+    client = XianyuClient()
+    parsed = client._parse_items(client._extract_json(page.decode("utf-8")))
+    assert [(item["id"], item["title"], item["price"], item["seller_id"]) for item in parsed] == [
+        ("1", "青眼白龙 UR", 12.5, "u1")
+    ]
+
+
+def test_regex_fallback_and_charset_handling() -> None:
+    page = (
+        '<div data-x=\'{"itemId":"11","price":"9.9","title":"栗子球"}\'></div>'
+        '<div data-x=\'{"itemId":"12","title":"no price"}\'></div>'
+        '<div data-x=\'{"itemId":"13","foo":1,"price":20,"bar":"z","title":"Dark Magician"}\'></div>'
+    )
+    expected = [("11", 9.9, "栗子球"), ("13", 20.0, "Dark Magician")]
+    for body in (page, page.encode("utf-8")):
+        items = XianyuClient()._regex_parse_items(body)
+        assert [(item["id"], item["price"], item["title"]) for item in items] == expected
+
+    gbk = "<p>游戏王</p>".encode("gbk")
+    assert xianyu_parse.response_bytes(gbk, "text/html; charset=GBK") == "<p>游戏王</p>".encode("utf-8")
+    utf8 = "<p>游戏王</p>".encode("utf-8")
+    assert xianyu_parse.response_bytes(utf8, "text/html") is utf8
+
+
+def test_mtop_list_decodes_string_fields_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    entry = {
+        "data": {
+            "item": {"main": {"exContent": {"itemId": "7", "title": "<b>Kuriboh</b>", "price": [{"text": "¥"}, {"text": "3.5"}]}}},
+            "seller": {"userId": "s7"},
+        }
+    }
+    nested = json.dumps({"resultList": [entry]})
+    calls: list[object] = []
+    real_loads = xianyu_parse.loads
+    monkeypatch.setattr(xianyu_parse, "loads", lambda raw: calls.append(raw) or real_loads(raw))
+
+    raw_items = xianyu_parse.mtop_result_list({"meta": "not json", "result": nested})
+    assert raw_items == [entry] and len(calls) == 1
+
+    item = XianyuClient()._normalize_item(xianyu_parse.mtop_item_node(raw_items[0]))
+    assert (item["id"], item["title"], item["price"], item["seller_id"]) == ("7", "Kuriboh", 3.5, "s7")
+    assert xianyu_parse.mtop_item_node({"itemId": "8"}) == {"itemId": "8"}
+    assert xianyu_parse.mtop_item_node({"data": {"item": {"itemId": "9"}}}) == {"itemId": "9"}
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.xianyu_client import XianyuClient, XianyuHttpError
+from scripts.xianyu_standin import StandinConfig, XianyuStandinServer
+from scripts.monitor_load_test import run_load_test
+
+
+def _client(standin: XianyuStandinServer) -> XianyuClient:
+    client = XianyuClient()
+    client.mtop_url = standin.mtop_url
+    client.search_url = standin.search_url
+    return client
+
+
+def test_client_parses_standin_mtop_and_html_pages() -> None:
+    with XianyuStandinServer(StandinConfig(page_size=5, total_items=8, token_ttl_sec=0.5)) as standin:
+        client = _client(standin)
+        cookie = standin.issue_cookie()
+        first = client.fetch(page=1, cookie_override=cookie, keyword="游戏王")
+        second = client.fetch(page=2, cookie_override=cookie, keyword="游戏王")
+        assert (len(first), len(second)) == (5, 3)
+        assert all(item["id"] and item["title"] and item["price"] > 0 and item["seller_id"] for item in first)
+        assert {item["id"] for item in first}.isdisjoint(item["id"] for item in second)
+
+        time.sleep(0.6)
+        with pytest.raises(XianyuHttpError) as excinfo:
+            client.fetch(page=1, cookie_override=cookie, keyword="游戏王")
+        assert excinfo.value.status == 401 and "TOKEN_EXOIRED" in excinfo.value.body_excerpt
+
+        # Without an _m_h5_tk cookie the client falls back to the HTML bootstrap.
+        html_items = client.fetch(page=1, cookie_override="cna=x", keyword="游戏王")
+        assert [item["id"] for item in html_items] == [item["id"] for item in first]
+        assert standin.stats()["by_route"] == {"mtop": 3, "html": 1}
+
+
+def test_load_test_reports_throughput_and_holds_an_open_circuit() -> None:
+    old_sqlite_path = settings.sqlite_path
+    healthy = run_load_test(StandinConfig(page_size=10, new_items_per_request=3), runs=3, pages=2)
+    assert healthy["ok_runs"] == 3 and healthy["site_requests"] == 6
+    assert healthy["inserted"] > 0 and healthy["parse_ms_per_page"]["count"] == 6
+    assert healthy["circuit"] == {"opened": False}
+
+    banned = run_load_test(StandinConfig(page_size=10, fail_after=3, fail_status=403), runs=6, pages=1)
+    circuit = banned["circuit"]
+    assert circuit["opened"] and circuit["consecutive_403"] >= settings.monitor_circuit_403_threshold
+    assert circuit["site_requests_after_open"] == 0
+    assert banned["cookie_refreshes"] >= 1
+    assert settings.sqlite_path == old_sqlite_path
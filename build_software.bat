@@ -33,7 +33,7 @@ pushd "backend"
 if exist build rmdir /s /q build
 if exist dist rmdir /s /q dist
 if exist CardFlipAssistant.spec del /f /q CardFlipAssistant.spec
-call "%PYTHON_PACK%" -m PyInstaller --noconfirm --clean --name CardFlipAssistant --onedir --hidden-import browser_cookie3 --hidden-import websocket --add-data "..\dist;frontend_dist" --add-data "scripts;scripts" app\desktop_main.py
+call "%PYTHON_PACK%" -m PyInstaller --noconfirm --clean --name CardFlipAssistant --onedir --hidden-import browser_cookie3 --hidden-import websocket --collect-submodules app.routers --collect-submodules app.services --add-data "..\dist;frontend_dist" --add-data "scripts;scripts" app\desktop_main.py
 if errorlevel 1 (
   popd
   goto :fail
@@ -0,0 +1,355 @@
+"""
+浏览器池 - 为买入/上架/卖出保持预热的已登录浏览器
+"""
+import importlib.util
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.core.execution_engine import ExecutionAction
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+class BrowserPoolTimeout(RuntimeError):
+    """等待空闲浏览器超时"""
+
+
+class BrowserSlot:
+    """池中的一个浏览器位：固定 profile 目录，driver 可被回收重建"""
+
+    def __init__(self, action: ExecutionAction, index: int, profile_dir: str, epoch: int = 0):
+        self.action = action
+        self.index = index
+        self.profile_dir = profile_dir
+        # 所属的池轮次；stop()/start() 之后旧轮次的位只会被关闭，不再入队
+        self.epoch = epoch
+        self.driver = None
+        self.uses = 0
+        self.generation = 0
+        self.busy = False
+        self.creating = False
+        self.created_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'action': self.action.value,
+            'index': self.index,
+            'profile_dir': self.profile_dir,
+            'ready': self.driver is not None,
+            'busy': self.busy,
+            'uses': self.uses,
+            'generation': self.generation,
+            'created_at': self.created_at,
+            'last_error': self.last_error,
+        }
+
+
+def _load_executor(action: ExecutionAction):
+    """从 scripts 目录加载对应的执行器类"""
+    from app.core.execution_engine import LocalExecutionEngine
+
+    script_path = LocalExecutionEngine.SCRIPTS_DIR / LocalExecutionEngine.SCRIPT_MAP[action]
+    spec = importlib.util.spec_from_file_location(f'xianyu_{action.value}_script', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    class_name = {
+        ExecutionAction.BUY: 'XianyuBuyExecutor',
+        ExecutionAction.LIST: 'XianyuListExecutor',
+        ExecutionAction.SELL: 'XianyuSellExecutor',
+    }[action]
+    return getattr(module, class_name)
+
+
+class BrowserPool:
+    """
+    预热浏览器池
+
+    每种动作保持 N 个已登录的浏览器（各自独立的 profile 目录，可并行），
+    空闲浏览器放在本地队列里，执行请求从队列租用、用完归还。
+    租用前做健康检查；使用 K 次后或执行出错时退出并在后台重建，
+    重建期间其他请求继续使用剩余的浏览器。
+    """
+
+    WARM_URL = 'https://2.taobao.com'
+    PROFILES_DIR = Path('./browser_profiles')
+
+    def __init__(self, size_per_action: Optional[int] = None,
+                 max_uses: Optional[int] = None,
+                 driver_factory: Optional[Callable[[BrowserSlot], object]] = None):
+        self.size_per_action = max(1, size_per_action or _env_int('XXZL_BROWSER_POOL_SIZE', 2))
+        self.max_uses = max(1, max_uses or _env_int('XXZL_BROWSER_MAX_USES', 20))
+        self.lease_timeout = _env_int('XXZL_BROWSER_LEASE_TIMEOUT', 120)
+        self._driver_factory = driver_factory or self._create_driver
+        self._lock = threading.Lock()
+        self._idle: Dict[ExecutionAction, queue.Queue] = {}
+        self._slots: Dict[ExecutionAction, List[BrowserSlot]] = {}
+        self._executors: Dict[ExecutionAction, object] = {}
+        self._started = False
+        self._epoch = 0
+        # 每个 profile 目录同一时间只允许一个浏览器（含正在创建的），否则 Chrome 报 profile 被占用
+        self._profile_owner: Dict[str, BrowserSlot] = {}
+        self._profile_free = threading.Condition(self._lock)
+
+    # -- 生命周期 -------------------------------------------------------------
+
+    def start(self, actions: Optional[List[ExecutionAction]] = None) -> Dict:
+        """为每种动作在后台创建浏览器"""
+        with self._lock:
+            if self._started:
+                return {'started': False, 'reason': 'already running'}
+            self._started = True
+            self._epoch += 1
+            for action in actions or list(ExecutionAction):
+                self._idle[action] = queue.Queue()
+                self._slots[action] = [
+                    BrowserSlot(action, index, str(self._profile_dir(action, index)), self._epoch)
+                    for index in range(self.size_per_action)
+                ]
+            slots = [slot for group in self._slots.values() for slot in group]
+        for slot in slots:
+            self._spawn(slot)
+        return {'started': True, 'slots': len(slots)}
+
+    def stop(self) -> Dict:
+        """
+        退出所有空闲浏览器
+
+        正在执行交易的浏览器不会被中途关闭：它们已不属于当前轮次，
+        归还时会被关闭；仍在预热的线程创建完也会直接关闭。
+        """
+        with self._lock:
+            self._started = False
+            self._epoch += 1
+            slots = [slot for group in self._slots.values() for slot in group]
+            self._slots = {}
+            self._idle = {}
+            self._profile_free.notify_all()
+            idle = [slot for slot in slots if not slot.busy]
+        for slot in idle:
+            self._quit(slot)
+        return {'stopped': True, 'slots': len(slots), 'busy': len(slots) - len(idle)}
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'started': self._started,
+                'epoch': self._epoch,
+                'size_per_action': self.size_per_action,
+                'max_uses': self.max_uses,
+                'idle': {action.value: idle.qsize() for action, idle in self._idle.items()},
+                'slots': [slot.to_dict() for group in self._slots.values() for slot in group],
+            }
+
+    # -- 租用 -----------------------------------------------------------------
+
+    @contextmanager
+    def lease(self, action: ExecutionAction, timeout: Optional[float] = None) -> Iterator[BrowserSlot]:
+        """
+        租用一个空闲浏览器
+
+        块内抛出异常视为执行出错，浏览器会被回收；
+        也可以把 slot.last_error 置为非空来要求回收。
+        """
+        slot = self._acquire(action, self.lease_timeout if timeout is None else timeout)
+        failed = False
+        try:
+            yield slot
+        except Exception as e:
+            failed = True
+            slot.last_error = str(e)
+            raise
+        finally:
+            self._release(slot, failed=failed or bool(slot.last_error))
+
+    def run(self, action: ExecutionAction, method: str, *args, **kwargs) -> Dict:
+        """用池中浏览器运行执行器方法，返回与脚本相同的结果字典"""
+        executor_cls = self._executor_class(action)
+        try:
+            with self.lease(action) as slot:
+                executor = executor_cls(driver=slot.driver)
+                result = getattr(executor, method)(*args, **kwargs)
+                if result.get('status') != 'SUCCESS':
+                    slot.last_error = result.get('error') or result.get('status')
+                return result
+        except BrowserPoolTimeout as e:
+            return {'status': 'TIMEOUT', 'error': str(e)}
+
+    def _acquire(self, action: ExecutionAction, timeout: float) -> BrowserSlot:
+        with self._lock:
+            idle = self._idle.get(action)
+        if idle is None:
+            raise BrowserPoolTimeout(f'浏览器池未启动: {action.value}')
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                slot = idle.get(timeout=max(0.0, remaining)) if remaining > 0 else idle.get_nowait()
+            except queue.Empty:
+                raise BrowserPoolTimeout(f'等待空闲浏览器超时: {action.value}')
+            with self._lock:
+                stale = self._stale(slot)
+                if not stale:
+                    # 先标记占用，stop() 就不会在健康检查或执行中途关掉它
+                    slot.busy = True
+            if stale:
+                self._quit(slot)
+                continue
+            if self._healthy(slot):
+                slot.last_error = None
+                return slot
+            with self._lock:
+                slot.busy = False
+            logger.warning(f"浏览器 {action.value}#{slot.index} 健康检查失败，回收重建")
+            self._recycle(slot)
+
+    def _release(self, slot: BrowserSlot, failed: bool) -> None:
+        with self._lock:
+            slot.busy = False
+        slot.uses += 1
+        if failed or slot.uses >= self.max_uses:
+            logger.info(f"回收浏览器 {slot.action.value}#{slot.index} "
+                        f"(uses={slot.uses}, error={slot.last_error})")
+            self._recycle(slot)
+            return
+        self._put_idle(slot)
+
+    # -- 创建 / 回收 ------------------------------------------------------------
+
+    def _healthy(self, slot: BrowserSlot) -> bool:
+        if slot.driver is None:
+            return False
+        try:
+            # 轻量命令；浏览器崩溃或会话失效时会抛异常
+            return bool(slot.driver.window_handles)
+        except Exception as e:
+            slot.last_error = str(e)
+            return False
+
+    def _stale(self, slot: BrowserSlot) -> bool:
+        # 调用方持有 self._lock
+        return not self._started or slot.epoch != self._epoch
+
+    def _claim_profile(self, slot: BrowserSlot) -> bool:
+        """等到 profile 目录没有其他浏览器占用；位已过期时返回 False"""
+        with self._lock:
+            while True:
+                if self._stale(slot):
+                    return False
+                owner = self._profile_owner.get(slot.profile_dir)
+                if owner is None or owner is slot:
+                    self._profile_owner[slot.profile_dir] = slot
+                    slot.creating = True
+                    return True
+                self._profile_free.wait(timeout=5.0)
+
+    def _release_profile(self, slot: BrowserSlot) -> None:
+        with self._lock:
+            # 创建中的浏览器由预热线程在创建结束后释放
+            if slot.creating:
+                return
+            if self._profile_owner.get(slot.profile_dir) is slot:
+                del self._profile_owner[slot.profile_dir]
+                self._profile_free.notify_all()
+
+    def _recycle(self, slot: BrowserSlot) -> None:
+        self._quit(slot)
+        self._spawn(slot)
+
+    def _spawn(self, slot: BrowserSlot) -> None:
+        threading.Thread(
+            target=self._warm,
+            args=(slot,),
+            name=f'browser-{slot.action.value}-{slot.index}',
+            daemon=True,
+        ).start()
+
+    def _warm(self, slot: BrowserSlot) -> None:
+        delay = 5.0
+        while self._claim_profile(slot):
+            try:
+                driver = self._driver_factory(slot)
+            except Exception as e:
+                with self._lock:
+                    slot.creating = False
+                slot.last_error = str(e)
+                logger.error(f"浏览器 {slot.action.value}#{slot.index} 创建失败: {e}")
+                self._release_profile(slot)
+                time.sleep(delay)
+                delay = min(delay * 2, 120.0)
+                continue
+            with self._lock:
+                slot.driver = driver
+                slot.creating = False
+            slot.uses = 0
+            slot.generation += 1
+            slot.created_at = datetime.now().isoformat()
+            logger.info(f"✓ 浏览器 {slot.action.value}#{slot.index} 已预热")
+            # 过期的位在这里会被直接关闭并释放 profile
+            self._put_idle(slot)
+            return
+
+    def _put_idle(self, slot: BrowserSlot) -> None:
+        with self._lock:
+            idle = None if self._stale(slot) else self._idle.get(slot.action)
+        if idle is None:
+            # 旧轮次的位（stop 后才预热完或才归还）：关闭，避免与新轮次抢同一个 profile
+            self._quit(slot)
+            return
+        idle.put(slot)
+
+    def _quit(self, slot: BrowserSlot) -> None:
+        driver, slot.driver = slot.driver, None
+        try:
+            if driver is not None:
+                driver.quit()
+        except Exception as e:
+            logger.warning(f"关闭浏览器失败: {e}")
+        finally:
+            self._release_profile(slot)
+
+    def _profile_dir(self, action: ExecutionAction, index: int) -> Path:
+        # 第一个位沿用脚本原来的 profile，已有的登录态可以直接复用
+        name = f'xianyu_{action.value}' if index == 0 else f'xianyu_{action.value}_{index + 1}'
+        return self.PROFILES_DIR / name
+
+    def _executor_class(self, action: ExecutionAction):
+        with self._lock:
+            executor_cls = self._executors.get(action)
+        if executor_cls is None:
+            executor_cls = _load_executor(action)
+            with self._lock:
+                self._executors[action] = executor_cls
+        return executor_cls
+
+    def _create_driver(self, slot: BrowserSlot):
+        executor = self._executor_class(slot.action)()
+        driver = executor.create_driver(profile_dir=slot.profile_dir)
+        # 打开首页加载登录态，首个请求不再付页面冷启动的时间
+        driver.get(self.WARM_URL)
+        return driver
+
+
+browser_pool = BrowserPool()
+browser_pool_enabled = _env_bool('XXZL_BROWSER_POOL_ENABLED', False)
@@ -38,6 +38,9 @@ class LocalExecutionEngine:
         """
         logger.info(f"[执行] 买入: {item_id} @ ¥{price}")
         
+        if cls._pool_enabled():
+            return cls._run_pooled(ExecutionAction.BUY, 'buy_item', item_id, price, quantity)
+        
         script_path = cls.SCRIPTS_DIR / cls.SCRIPT_MAP[ExecutionAction.BUY]
         
         cmd = [
@@ -60,6 +63,9 @@ class LocalExecutionEngine:
         """
         logger.info(f"[执行] 上架: {title} @ ¥{price}")
         
+        if cls._pool_enabled():
+            return cls._run_pooled(ExecutionAction.LIST, 'list_item', item_id, title, price, description)
+        
         script_path = cls.SCRIPTS_DIR / cls.SCRIPT_MAP[ExecutionAction.LIST]
         
         cmd = [
@@ -83,6 +89,9 @@ class LocalExecutionEngine:
         """
         logger.info(f"[执行] 卖出: {order_id}")
         
+        if cls._pool_enabled():
+            return cls._run_pooled(ExecutionAction.SELL, 'complete_sale', listing_id, order_id, tracking_number)
+        
         script_path = cls.SCRIPTS_DIR / cls.SCRIPT_MAP[ExecutionAction.SELL]
         
         cmd = [
@@ -95,6 +104,33 @@ class LocalExecutionEngine:
         
         return cls._run_command(cmd, ExecutionAction.SELL)
     
+    @staticmethod
+    def _pool_enabled() -> bool:
+        from app.core.browser_pool import browser_pool_enabled
+        return browser_pool_enabled
+    
+    @classmethod
+    def _run_pooled(cls, action: ExecutionAction, method: str, *args) -> Dict:
+        """
+        在预热浏览器池中执行（XXZL_BROWSER_POOL_ENABLED=true）
+        
+        省去每次启动浏览器的时间；池未启动时先启动。
+        """
+        from app.core.browser_pool import browser_pool
+        
+        if not browser_pool.status()['started']:
+            browser_pool.start()
+        try:
+            result = browser_pool.run(action, method, *args)
+        except Exception as e:
+            logger.error(f"执行异常: {e}", exc_info=True)
+            return {
+                'status': 'ERROR',
+                'error': str(e)
+            }
+        logger.info(f"{action.value} 结果: {result.get('status')}")
+        return result
+    
     @classmethod
     def _run_command(cls, cmd: list, action: ExecutionAction) -> Dict:
         """
@@ -2,9 +2,11 @@
 执行 API
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import logging
 
+from app.core.browser_pool import browser_pool
 from app.core.execution_engine import LocalExecutionEngine, ExecutionAction
 
 router = APIRouter(prefix="/api/execution", tags=["execution"])
@@ -33,7 +35,9 @@ class SellRequest(BaseModel):
 @router.post("/buy")
 async def execute_buy(request: BuyRequest):
     """执行买入"""
-    result = LocalExecutionEngine.execute_buy(
+    # 在线程池中执行，不同 profile 的浏览器可以并行
+    result = await run_in_threadpool(
+        LocalExecutionEngine.execute_buy,
         request.item_id,
         request.price,
         request.quantity
@@ -47,7 +51,8 @@ async def execute_buy(request: BuyRequest):
 @router.post("/list")
 async def execute_list(request: ListRequest):
     """执行上架"""
-    result = LocalExecutionEngine.execute_list(
+    result = await run_in_threadpool(
+        LocalExecutionEngine.execute_list,
         request.item_id,
         request.title,
         request.price,
@@ -62,7 +67,8 @@ async def execute_list(request: ListRequest):
 @router.post("/sell")
 async def execute_sell(request: SellRequest):
     """执行卖出"""
-    result = LocalExecutionEngine.execute_sell(
+    result = await run_in_threadpool(
+        LocalExecutionEngine.execute_sell,
         request.listing_id,
         request.order_id,
         request.tracking_number
@@ -71,4 +77,19 @@ async def execute_sell(request: SellRequest):
     if result['status'] != 'SUCCESS':
         raise HTTPException(status_code=500, detail=result.get('error'))
     
-    return result
\ No newline at end of file
+    return result
+
+@router.get("/pool")
+async def pool_status():
+    """浏览器池状态"""
+    return browser_pool.status()
+
+@router.post("/pool/start")
+async def pool_start():
+    """预热浏览器池"""
+    return browser_pool.start()
+
+@router.post("/pool/stop")
+async def pool_stop():
+    """关闭浏览器池"""
+    return await run_in_threadpool(browser_pool.stop)
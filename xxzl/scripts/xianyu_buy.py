@@ -24,9 +24,11 @@ logger = logging.getLogger(__name__)
 class XianyuBuyExecutor:
     """闲鱼买入执行器"""
     
-    def __init__(self, display_num=':99'):
+    def __init__(self, display_num=':99', driver=None):
         self.display_num = display_num
-        self.driver = None
+        # 传入的 driver 来自浏览器池，用完归还，不在这里退出
+        self.driver = driver
+        self.owns_driver = driver is None
         self.result = {
             'status': 'PENDING',
             'item_id': None,
@@ -36,13 +38,13 @@ class XianyuBuyExecutor:
             'screenshot': None
         }
     
-    def create_driver(self):
-        """创建浏览器驱动"""
+    def create_driver(self, profile_dir='./browser_profiles/xianyu_buy'):
+        """创建浏览器驱动（profile_dir 不能被两个浏览器同时使用）"""
         import os
         os.environ['DISPLAY'] = self.display_num
         
         options = uc.ChromeOptions()
-        options.add_argument(f'--user-data-dir=./browser_profiles/xianyu_buy')
+        options.add_argument(f'--user-data-dir={profile_dir}')
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option('excludeSwitches', ['enable-automation'])
         options.add_argument('--window-size=1920,1080')
@@ -136,7 +138,7 @@ class XianyuBuyExecutor:
             return self.result
         
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
     
     def to_json(self) -> str:
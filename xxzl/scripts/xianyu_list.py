@@ -24,9 +24,11 @@ logger = logging.getLogger(__name__)
 class XianyuListExecutor:
     """闲鱼上架执行器"""
     
-    def __init__(self, display_num=':99'):
+    def __init__(self, display_num=':99', driver=None):
         self.display_num = display_num
-        self.driver = None
+        # 传入的 driver 来自浏览器池，用完归还，不在这里退出
+        self.driver = driver
+        self.owns_driver = driver is None
         self.result = {
             'status': 'PENDING',
             'item_id': None,
@@ -37,13 +39,13 @@ class XianyuListExecutor:
             'screenshot': None
         }
     
-    def create_driver(self):
-        """创建浏览器驱动"""
+    def create_driver(self, profile_dir='./browser_profiles/xianyu_list'):
+        """创建浏览器驱动（profile_dir 不能被两个浏览器同时使用）"""
         import os
         os.environ['DISPLAY'] = self.display_num
         
         options = uc.ChromeOptions()
-        options.add_argument(f'--user-data-dir=./browser_profiles/xianyu_list')
+        options.add_argument(f'--user-data-dir={profile_dir}')
         options.add_argument('--disable-blink-features=AutomationControlled')
         options.add_experimental_option('excludeSwitches', ['enable-automation'])
         options.add_argument('--window-size=1920,1080')
@@ -152,7 +154,7 @@ class XianyuListExecutor:
             return self.result
         
         finally:
-            if self.driver:
+            if self.driver and self.owns_driver:
                 self.driver.quit()
     
     def to_json(self) -> str: